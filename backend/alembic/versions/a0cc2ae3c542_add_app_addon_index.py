@@ -0,0 +1,42 @@
+"""Add app addon index
+
+Revision ID: a0cc2ae3c542
+Revises: 6a7b8c9d0e1f
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "a0cc2ae3c542"
+down_revision = "6a7b8c9d0e1f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "app_addon_index",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("addon_id", sa.String(), nullable=False),
+        sa.Column("branch", sa.String(), nullable=True),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "app_addon_index_addon_id_pattern",
+        "app_addon_index",
+        ["addon_id"],
+        unique=False,
+        postgresql_ops={"addon_id": "varchar_pattern_ops"},
+    )
+
+
+def downgrade():
+    op.drop_index("app_addon_index_addon_id_pattern", table_name="app_addon_index")
+    op.drop_table("app_addon_index")
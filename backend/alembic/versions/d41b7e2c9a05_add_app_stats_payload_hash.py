@@ -0,0 +1,25 @@
+"""Add app_stats payload hash
+
+Revision ID: d41b7e2c9a05
+Revises: a0cc2ae3c542
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "d41b7e2c9a05"
+down_revision = "a0cc2ae3c542"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("app_stats", sa.Column("payload_hash", sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("app_stats", "payload_hash")
@@ -1,10 +1,14 @@
+import itertools
 import logging
 import re
+import time
 from enum import StrEnum
+from typing import Any
 
 import gi
 
-from . import database, localize, models, schemas, search, utils
+from . import appstream_documents, database, localize, models, schemas, search, utils
+from .worker.redis import redis_conn
 
 gi.require_version("AppStream", "1.0")
 from gi.repository import AppStream  # ty: ignore[unresolved-import]
@@ -12,6 +16,7 @@ from gi.repository import AppStream  # ty: ignore[unresolved-import]
 logger = logging.getLogger(__name__)
 
 clean_html_re = re.compile("<.*?>")
+APPSTREAM_UPSERT_BATCH_SIZE = 500
 all_main_categories = schemas.get_main_categories()
 
 
@@ -141,83 +146,122 @@ def add_to_search(app_id: str, app: dict, apps_locale: dict) -> dict:
     }
 
 
-def load_appstream(sqldb) -> None:
+def _appstream_row(app_id: str, app: dict) -> dict[str, Any]:
+    if type := app.get("type"):
+        # "desktop" dates back to appstream-glib, need to handle that for backwards compat
+        if type == "desktop":
+            type = "desktop-application"
+    else:
+        type = None
+
+    app_data = app.copy()
+    locales = app_data.pop("locales")
+    content_rating_details = app_data.pop("content_rating_details", None)
+
+    categories = app.get("categories", [])
+    main_categories_list = [
+        category for category in categories if category.lower() in all_main_categories
+    ]
+    sub_categories_list = [
+        category
+        for category in categories
+        if category.lower() not in all_main_categories
+    ]
+
+    # Only keep the first main_category, move rest to sub_categories
+    main_category = None
+    if len(main_categories_list) > 0:
+        sub_categories_list = sub_categories_list + main_categories_list[1:]
+        main_category = main_categories_list[0]
+
+    return {
+        "app_id": app_id,
+        "type": type,
+        "localization": locales,
+        "content_rating_details": content_rating_details,
+        "appstream": app_data,
+        "main_category": main_category,
+        "sub_categories": sub_categories_list if sub_categories_list else None,
+    }
+
+
+def _upsert_apps(sqldb, rows: list[dict[str, Any]]) -> tuple[set[str], set[str]]:
+    """Upsert the rows in batches.
+
+    Returns the app IDs that changed and the app IDs that failed.
+    """
+    changed: set[str] = set()
+    failed = set()
+    for batch in itertools.batched(rows, APPSTREAM_UPSERT_BATCH_SIZE):
+        try:
+            changed |= models.App.bulk_set_appstream(sqldb, list(batch))
+            continue
+        except Exception:
+            sqldb.session.rollback()
+            logger.exception("Error upserting a batch of apps, retrying one by one")
+
+        for row in batch:
+            try:
+                changed |= models.App.bulk_set_appstream(sqldb, [row])
+            except Exception:
+                sqldb.session.rollback()
+                logger.exception("Error updating app %s", row["app_id"])
+                failed.add(row["app_id"])
+    return changed, failed
+
+
+def load_appstream(sqldb) -> set[str]:
+    """Load the apps from appstream and return the IDs of changed or removed apps."""
+    started = time.perf_counter()
     apps = utils.appstream2dict()
+    parsed = time.perf_counter()
 
     all_apps = get_appids(include_eol=True)
-    non_eol_apps = get_appids(include_eol=False)
+    non_eol_apps = set(get_appids(include_eol=False))
 
     search_apps = []
     developers = set()
+    rows = []
 
-    for app_id in apps:
+    for app_id, app in apps.items():
         if app_id in non_eol_apps:
-            search_apps.append(
-                add_to_search(
-                    app_id,
-                    apps[app_id],
-                    apps[app_id]["locales"],
-                )
-            )
+            search_apps.append(add_to_search(app_id, app, app["locales"]))
 
-        if developer_name := apps[app_id].get("developer_name"):
-            models.Developers.create(sqldb, developer_name)
-            developers.add(apps[app_id].get("developer_name"))
-
-        if type := apps[app_id].get("type"):
-            # "desktop" dates back to appstream-glib, need to handle that for backwards compat
-            if type == "desktop":
-                type = "desktop-application"
-        else:
-            type = None
-
-        app_data = apps[app_id].copy()
-        locales = app_data.pop("locales")
-        content_rating_details = app_data.pop("content_rating_details", None)
-
-        categories = apps[app_id].get("categories", [])
-        main_categories_list = [
-            category
-            for category in categories
-            if category.lower() in all_main_categories
-        ]
-        sub_categories_list = [
-            category
-            for category in categories
-            if category.lower() not in all_main_categories
-        ]
-
-        # Only keep the first main_category, move rest to sub_categories
-        main_category = None
-        if len(main_categories_list) > 0:
-            sub_categories_list = sub_categories_list + main_categories_list[1:]
-            main_category = main_categories_list[0]
+        if developer_name := app.get("developer_name"):
+            developers.add(developer_name)
 
-        try:
-            app = models.App.set_app(
-                sqldb, app_id, type, locales, content_rating_details
+        rows.append(_appstream_row(app_id, app))
+
+    models.Developers.bulk_create(sqldb, developers)
+    changed, failed = _upsert_apps(sqldb, rows)
+    upserted = time.perf_counter()
+
+    documents = appstream_documents.store_documents(
+        redis_conn,
+        (
+            (
+                row["app_id"],
+                row["appstream"],
+                row["localization"] or None,
+                row["content_rating_details"] or None,
             )
-            if app:
-                app.appstream = app_data
-                app.main_category = main_category
-                app.sub_categories = (
-                    sub_categories_list if sub_categories_list else None
-                )
-                sqldb.session.add(app)
-                sqldb.session.commit()
-        except Exception:
-            sqldb.session.rollback()
-            logger.exception("Error updating app %s", app_id)
+            for row in rows
+            if row["app_id"] not in failed
+        ),
+    )
+    materialized = time.perf_counter()
 
     search.create_or_update_apps(search_apps)
+    indexed = time.perf_counter()
 
     current_developers = models.Developers.all(sqldb.session)
     for developer in current_developers:
         if developer.name not in developers:
             models.Developers.delete(sqldb, developer.name)
 
+    removed = set(all_apps) - set(apps)
     apps_to_delete_from_search = []
-    for app_id in set(all_apps) - set(apps):
+    for app_id in removed:
         apps_to_delete_from_search.append(utils.get_clean_app_id(app_id))
 
         # Preserve app_stats when deleting app
@@ -228,6 +272,21 @@ def load_appstream(sqldb) -> None:
         models.App.delete_app(sqldb, app_id)
 
     search.delete_apps(apps_to_delete_from_search)
+    appstream_documents.delete_documents(redis_conn, removed)
+
+    logger.info(
+        "Loaded %d apps from appstream: parse %.2fs, upsert %.2fs, "
+        "documents %.2fs (%d rewritten), search %.2fs, cleanup %.2fs",
+        len(apps),
+        parsed - started,
+        upserted - parsed,
+        materialized - upserted,
+        documents,
+        indexed - materialized,
+        time.perf_counter() - indexed,
+    )
+
+    return changed | removed
 
 
 def get_appids(
@@ -274,47 +333,47 @@ def get_appids(
 
 
 def get_addons(app_id: str, branch: str = "stable") -> list[str]:
-    result = []
+    result: set[str] = set()
 
     with database.get_db() as sqldb:
         app = models.App.by_appid(sqldb, app_id)
-        if not app or not app.summary or models.App.is_fully_eol(sqldb, app_id):
-            return result
+        if (
+            not app
+            or not app.summary
+            or models.App.is_fully_eol(sqldb, app_id, app=app)
+        ):
+            return []
 
         metadata = app.summary.get("metadata", {})
         if not metadata or "extensions" not in metadata:
-            return result
+            return []
 
-        extension_ids: list[str] = []
+        extension_ids: list[tuple[str, str]] = []
         for ext_id, ext_data in metadata["extensions"].items():
             has_version = False
             if "version" in ext_data:
                 has_version = True
-                extension_ids.append(f"{ext_id}//{ext_data['version']}")
+                extension_ids.append((ext_id, ext_data["version"]))
             if "versions" in ext_data:
                 has_version = True
                 versions = (
                     v.strip() for v in ext_data["versions"].split(";") if v.strip()
                 )
-                extension_ids.extend(f"{ext_id}//{version}" for version in versions)
+                extension_ids.extend((ext_id, version) for version in versions)
             if not has_version:
-                extension_ids.append(f"{ext_id}//{branch}")
-
-        addons = {
-            f"{addon.app_id}//{addon.summary.get('branch', branch) if addon.summary else branch}"
-            for addon in sqldb.query(models.App)
-            .filter(models.App.type == "addon")
-            .filter(~models.App.is_eol)
-            .all()
-        }
-
-        for addon in addons:
-            for extension_id in extension_ids:
-                id_part, branch_part = extension_id.split("//", 1)
-                if addon.startswith(id_part) and addon.endswith(branch_part):
-                    result.append(addon)
-
-    return result
+                extension_ids.append((ext_id, branch))
+
+        addons = models.AppAddonIndex.matching(
+            sqldb, {ext_id for ext_id, _ in extension_ids}
+        )
+
+    for addon_id, addon_branch in addons:
+        addon = f"{addon_id}//{addon_branch or branch}"
+        for id_part, branch_part in extension_ids:
+            if addon_id.startswith(id_part) and addon.endswith(branch_part):
+                result.add(addon)
+
+    return sorted(result)
 
 
 def get_appstream(app_id: str) -> dict | None:
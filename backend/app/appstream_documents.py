@@ -0,0 +1,260 @@
+"""Precomputed per-locale ``get_appstream`` documents.
+
+Translating an app for a locale means resolving the content rating locale,
+overlaying the matching ``localization`` entry and patching screenshot
+captions and release descriptions. Instead of doing that on every request,
+``load_appstream`` materializes the pieces once per appstream change into
+one Redis hash per app:
+
+- ``base``: the appstream without internal fields
+- ``l:<locale>``: the top-level keys a localization entry replaces
+- ``r:<posix locale>``: the resolved content rating details for every locale
+  that resolves to one, including the prefixes the fallback rules match
+- ``default_rating``: the content rating details all other locales get
+
+A request fetches the handful of fields its locale can resolve to in one
+``HMGET`` and merges them with ``assemble``, which gives the same document
+as ``translate`` on the raw columns.
+"""
+
+import copy
+import hashlib
+from collections.abc import Iterable
+from typing import Any
+
+import orjson
+
+DOCUMENTS_KEY_PREFIX = "appstream:doc:"
+DOCUMENTS_VERSION = 1
+FINGERPRINT_FIELD = "fingerprint"
+BASE_FIELD = "base"
+DEFAULT_RATING_FIELD = "default_rating"
+DEFAULT_RATING_LOCALE = "en_US"
+
+
+def _documents_key(app_id: str) -> str:
+    return f"{DOCUMENTS_KEY_PREFIX}{app_id}"
+
+
+def _base(appstream: dict[str, Any]) -> dict[str, Any]:
+    result = appstream.copy()
+    # The languages field is internal data not needed by clients
+    result.pop("languages", None)
+    return result
+
+
+def _resolve_rating(
+    content_rating_details: dict[str, Any], posix_locale: str
+) -> dict[str, Any] | None:
+    # Try exact match first
+    entry = content_rating_details.get(posix_locale)
+    # Then prefix match (e.g. "de" -> "de_DE"), keeping the actual key
+    # Prefer _US suffix for bare language codes (e.g. "en" -> "en_US")
+    if not entry:
+        us_key = posix_locale + "_US"
+        if us_key in content_rating_details:
+            posix_locale = us_key
+            entry = content_rating_details[us_key]
+        else:
+            match = next(
+                (
+                    (k, v)
+                    for k, v in content_rating_details.items()
+                    if k.startswith(posix_locale + "_")
+                ),
+                None,
+            )
+            if match:
+                posix_locale, entry = match
+    return {posix_locale: entry} if entry else None
+
+
+def _default_rating(content_rating_details: dict[str, Any]) -> dict[str, Any] | None:
+    entry = content_rating_details.get(DEFAULT_RATING_LOCALE)
+    return {DEFAULT_RATING_LOCALE: entry} if entry else None
+
+
+def _localization_delta(
+    base: dict[str, Any], translation: dict[str, Any]
+) -> dict[str, Any]:
+    """Return the top-level keys of ``base`` that ``translation`` replaces.
+
+    Screenshots and releases are copied before their captions and
+    descriptions are patched, so the shared base is never modified.
+    """
+    delta: dict[str, Any] = {}
+    for key, value in translation.items():
+        for prefix, field, attribute in (
+            ("screenshots_caption_", "screenshots", "caption"),
+            ("release_description_", "releases", "description"),
+        ):
+            if not key.startswith(prefix) or not isinstance(base.get(field), list):
+                continue
+            if field not in delta:
+                delta[field] = copy.deepcopy(base[field])
+            number = int(key.split("_")[-1])
+            if number < len(delta[field]):
+                delta[field][number][attribute] = value
+
+    delta.update(
+        (k, v)
+        for k, v in translation.items()
+        if not k.startswith("screenshots_caption_")
+        and not k.startswith("release_description_")
+        # Don't include dict values for keys that should be arrays in the result
+        and not (isinstance(v, dict) and isinstance(base.get(k), list))
+    )
+    return delta
+
+
+def _compose(
+    base: dict[str, Any],
+    rating: dict[str, Any] | None,
+    delta: dict[str, Any] | None,
+) -> dict[str, Any]:
+    result = base.copy()
+    if rating:
+        result["content_rating_details"] = rating
+    if delta:
+        result.update(delta)
+    return result
+
+
+def translate(
+    appstream: dict[str, Any] | None,
+    localization: dict[str, Any] | None,
+    content_rating_details: dict[str, Any] | None,
+    locale: str,
+) -> dict[str, Any] | None:
+    """Build the document for ``locale`` straight from the app's columns."""
+    if not appstream:
+        return None
+
+    base = _base(appstream)
+
+    rating = None
+    if content_rating_details:
+        rating = _resolve_rating(
+            content_rating_details, locale.replace("-", "_")
+        ) or _default_rating(content_rating_details)
+
+    delta = None
+    if localization:
+        # fallback to base locale (e.g. 'en' from 'en-US')
+        translation = localization.get(locale) or localization.get(locale.split("-")[0])
+        if translation:
+            delta = _localization_delta(base, translation)
+
+    return _compose(base, rating, delta)
+
+
+def fingerprint(
+    appstream: dict[str, Any] | None,
+    localization: dict[str, Any] | None,
+    content_rating_details: dict[str, Any] | None,
+) -> str:
+    payload = orjson.dumps(
+        [DOCUMENTS_VERSION, appstream, localization, content_rating_details]
+    )
+    return hashlib.md5(payload).hexdigest()
+
+
+def materialize(
+    appstream: dict[str, Any] | None,
+    localization: dict[str, Any] | None,
+    content_rating_details: dict[str, Any] | None,
+) -> dict[str, bytes]:
+    """Return the hash fields holding every locale's document of an app."""
+    if not appstream:
+        return {}
+
+    base = _base(appstream)
+    fields = {BASE_FIELD: orjson.dumps(base)}
+
+    for locale, translation in (localization or {}).items():
+        if translation:
+            fields[f"l:{locale}"] = orjson.dumps(_localization_delta(base, translation))
+
+    if content_rating_details:
+        # A requested locale can only resolve to a rating through one of the
+        # keys or one of their "_"-separated prefixes; all others fall back
+        # to the default.
+        candidates = set()
+        for key in content_rating_details:
+            parts = key.split("_")
+            candidates.update("_".join(parts[:i]) for i in range(1, len(parts) + 1))
+        for posix_locale in sorted(candidates):
+            if rating := _resolve_rating(content_rating_details, posix_locale):
+                fields[f"r:{posix_locale}"] = orjson.dumps(rating)
+        if rating := _default_rating(content_rating_details):
+            fields[DEFAULT_RATING_FIELD] = orjson.dumps(rating)
+
+    return fields
+
+
+def document_fields(locale: str) -> list[str]:
+    """Return the hash fields ``assemble`` needs for ``locale``, in order."""
+    return [
+        BASE_FIELD,
+        f"r:{locale.replace('-', '_')}",
+        DEFAULT_RATING_FIELD,
+        f"l:{locale}",
+        f"l:{locale.split('-')[0]}",
+    ]
+
+
+def assemble(values: list[str | bytes | None]) -> dict[str, Any] | None:
+    """Merge the values of ``document_fields`` into the final document."""
+    base, rating, default_rating, delta, base_locale_delta = values
+    if base is None:
+        return None
+
+    rating = rating or default_rating
+    delta = delta or base_locale_delta
+    return _compose(
+        orjson.loads(base),
+        orjson.loads(rating) if rating else None,
+        orjson.loads(delta) if delta else None,
+    )
+
+
+async def get_document(redis, app_id: str, locale: str) -> dict[str, Any] | None:
+    """Fetch the materialized document, or None if the app has none yet."""
+    values = await redis.hmget(_documents_key(app_id), document_fields(locale))
+    return assemble(values)
+
+
+def store_documents(
+    conn, apps: Iterable[tuple[str, dict[str, Any] | None, Any, Any]]
+) -> int:
+    """Materialize the documents of apps whose appstream changed.
+
+    ``apps`` yields ``(app_id, appstream, localization, content_rating_details)``.
+    Returns how many apps were rewritten.
+    """
+    apps = list(apps)
+    pipe = conn.pipeline(transaction=False)
+    for app_id, *_ in apps:
+        pipe.hget(_documents_key(app_id), FINGERPRINT_FIELD)
+    stored_fingerprints = pipe.execute()
+
+    written = 0
+    pipe = conn.pipeline(transaction=False)
+    for (app_id, *columns), stored in zip(apps, stored_fingerprints, strict=True):
+        current = fingerprint(*columns)
+        if stored == current:
+            continue
+
+        key = _documents_key(app_id)
+        pipe.delete(key)
+        if fields := materialize(*columns):
+            pipe.hset(key, mapping={**fields, FINGERPRINT_FIELD: current})
+        written += 1
+    pipe.execute()
+    return written
+
+
+def delete_documents(conn, app_ids: Iterable[str]) -> None:
+    keys = [_documents_key(app_id) for app_id in app_ids]
+    if keys:
+        conn.delete(*keys)
@@ -1,19 +1,38 @@
+import asyncio
+import fnmatch
 import functools
+import gzip
 import hashlib
 import inspect
 import logging
 import time
-from collections.abc import Awaitable, Callable
-from enum import Enum
-from typing import Annotated, Any, Literal, ParamSpec, TypeVar, get_args, get_origin
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from enum import Enum, StrEnum
+from typing import (
+    Annotated,
+    Any,
+    Literal,
+    ParamSpec,
+    Protocol,
+    TypeVar,
+    cast,
+    get_args,
+    get_origin,
+)
 
 import orjson
 from fastapi import Response
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, TypeAdapter
-from starlette.datastructures import MutableHeaders
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from . import database
+from . import config, database
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +40,199 @@ P = ParamSpec("P")
 R = TypeVar("R")
 
 STALE_THRESHOLD = 0.8
+KEY_PREFIX = "cache:endpoint:"
+LOCAL_INVALIDATION_CHANNEL = "cache:local:invalidate"
+# Exact keys, e.g. those of an invalidated tag, are dropped without matching
+LOCAL_KEY_INVALIDATION_CHANNEL = "cache:local:invalidate-keys"
+GENERATION_KEY = "cache:generation"
+TAG_KEY_PREFIX = "cache:tag:"
+HITS_KEY = "cache:hits"
+HIT_FLUSH_INTERVAL = 10.0
+# Tag sets must outlive every entry they list, so they get at least this TTL
+TAG_TTL = 7 * 86400
+MARK_STALE_BATCH_SIZE = 1000
+REFRESH_LOCK_TTL = 10
+# How long a miss waits for another worker holding the refresh lock to store
+# the entry before computing it itself
+MISS_WAIT_TIMEOUT = 5.0
+MISS_POLL_INTERVAL = 0.05
+
+# Entries are Redis hashes holding the exact response body next to their
+# metadata, so the nginx edge can send ``body`` (or ``body_gzip`` when the
+# client accepts it) without decoding anything. Python never reads the gzip
+# copy.
+ENTRY_FIELDS = ("created_at", "is_stale", "generation", "etag", "body")
+GZIP_FIELD = "body_gzip"
+GZIP_MIN_SIZE = 1024
+
+# Flips "is_stale" in place; HSET keeps the TTL and never moves the
+# (potentially large) body through Lua. String keys holding a JSON envelope
+# are entries in the previous layout and are dropped, other strings such as
+# refresh locks are left alone.
+_MARK_STALE_SCRIPT = """
+local marked = 0
+for _, key in ipairs(KEYS) do
+    local kind = redis.call('TYPE', key)['ok']
+    if kind == 'hash' then
+        redis.call('HSET', key, 'is_stale', '1')
+        marked = marked + 1
+    elseif kind == 'string' and redis.call('GETRANGE', key, 0, 0) == '{' then
+        redis.call('DEL', key)
+        marked = marked + 1
+    end
+end
+return marked
+"""
+
+
+class EntryState(StrEnum):
+    FRESH = "fresh"
+    STALE = "stale"
+    MISSING = "missing"
+
+
+class CachedEndpoint(Protocol[P, R]):
+    """An endpoint wrapped by ``cached``."""
+
+    __name__: str
+    cache_state: Callable[P, Awaitable[EntryState]]
+    cache_ttl: int
+    # Whether entries hold the exact body the route sends
+    cache_raw: bool
+
+    def __call__(self, *args: P.args, **kwargs: P.kwargs) -> Awaitable[R]: ...
+
+
+class LocalCache:
+    """Per-process LRU tier in front of Redis.
+
+    Entries share the ``created_at`` of the Redis entry they mirror and are
+    only served while they would still be fresh under ``STALE_THRESHOLD``;
+    anything older falls through to Redis, which owns stale-while-revalidate.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        created_at, ttl, value = entry
+        if time.time() - created_at > ttl * STALE_THRESHOLD:
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: int, created_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+
+        self._entries[key] = (created_at, ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, pattern: str) -> int:
+        matching = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+        for key in matching:
+            del self._entries[key]
+        return len(matching)
+
+    def discard(self, keys: Iterable[str]) -> int:
+        return sum(self._entries.pop(key, None) is not None for key in keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+local_cache = LocalCache(config.settings.cache_local_max_entries)
+_invalidation_listener: asyncio.Task | None = None
+
+
+async def _publish_invalidation(*patterns: str) -> None:
+    if not patterns:
+        return
+
+    for pattern in patterns:
+        local_cache.invalidate(pattern)
+    try:
+        redis = await database.get_redis()
+        await redis.publish(LOCAL_INVALIDATION_CHANNEL, "\n".join(patterns))
+    except Exception:
+        logger.exception("Failed to publish cache invalidation for %s", patterns)
+
+
+async def _publish_key_invalidation(keys: list[str]) -> None:
+    if not keys:
+        return
+
+    local_cache.discard(keys)
+    try:
+        redis = await database.get_redis()
+        for start in range(0, len(keys), MARK_STALE_BATCH_SIZE):
+            await redis.publish(
+                LOCAL_KEY_INVALIDATION_CHANNEL,
+                "\n".join(keys[start : start + MARK_STALE_BATCH_SIZE]),
+            )
+    except Exception:
+        logger.exception("Failed to publish cache invalidation of %d keys", len(keys))
+
+
+async def _listen_for_invalidations() -> None:
+    while True:
+        try:
+            redis = await database.get_redis()
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(
+                LOCAL_INVALIDATION_CHANNEL, LOCAL_KEY_INVALIDATION_CHANNEL
+            )
+            try:
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    if message["channel"] == LOCAL_KEY_INVALIDATION_CHANNEL:
+                        local_cache.discard(message["data"].split("\n"))
+                    else:
+                        for pattern in message["data"].split("\n"):
+                            local_cache.invalidate(pattern)
+            finally:
+                await pubsub.aclose()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Cache invalidation listener failed, reconnecting")
+
+        # Invalidations may have been missed while disconnected
+        local_cache.clear()
+        await asyncio.sleep(1)
+
+
+def start_invalidation_listener() -> None:
+    global _invalidation_listener
+    if local_cache.max_entries <= 0 or _invalidation_listener is not None:
+        return
+    _invalidation_listener = asyncio.create_task(_listen_for_invalidations())
+
+
+async def stop_invalidation_listener() -> None:
+    global _invalidation_listener
+    if _invalidation_listener is None:
+        return
+    _invalidation_listener.cancel()
+    try:
+        await _invalidation_listener
+    except asyncio.CancelledError:
+        pass
+    _invalidation_listener = None
+    local_cache.clear()
 
 
 def _get_response_from_args(func: Any, args: tuple, kwargs: dict) -> Response | None:
@@ -37,15 +249,20 @@ def _should_cache_response(response: Response | None) -> bool:
     return response is None or response.status_code == 200
 
 
-def _make_cache_key(func: Any, args: tuple, kwargs: dict) -> str:
+def _bind_arguments(func: Any, args: tuple, kwargs: dict) -> dict[str, Any]:
     sig = inspect.signature(func)
     bound = sig.bind_partial(*args, **kwargs)
     bound.apply_defaults()
 
-    normalized_kwargs = {}
-    for param_name, param_value in bound.arguments.items():
-        if not isinstance(param_value, Response):
-            normalized_kwargs[param_name] = param_value
+    return {
+        param_name: param_value
+        for param_name, param_value in bound.arguments.items()
+        if not isinstance(param_value, Response)
+    }
+
+
+def _make_cache_key(func: Any, args: tuple, kwargs: dict) -> str:
+    normalized_kwargs = _bind_arguments(func, args, kwargs)
 
     key_data = {
         "func": func.__name__,
@@ -55,32 +272,255 @@ def _make_cache_key(func: Any, args: tuple, kwargs: dict) -> str:
     key_hash = hashlib.md5(
         orjson.dumps(key_data, option=orjson.OPT_SORT_KEYS, default=str)
     ).hexdigest()
-    return f"cache:endpoint:{func.__name__}:{key_hash}"
+    return f"{KEY_PREFIX}{func.__name__}:{key_hash}"
 
 
 def _make_refresh_lock_key(cache_key: str) -> str:
     return f"{cache_key}:refreshing"
 
 
-def _serialize_value(value: Any) -> dict:
+def _make_tag_key(tag: str) -> str:
+    return f"{TAG_KEY_PREFIX}{tag}"
+
+
+Tag = str | Callable[..., str]
+
+
+def _format_tags(tags: tuple[Tag, ...], arguments: dict[str, Any]) -> list[str]:
+    return [
+        tag.format(**arguments) if isinstance(tag, str) else tag(**arguments)
+        for tag in tags
+    ]
+
+
+class HitCounter:
+    """Per-process tally of Redis reads per tag.
+
+    Reads are counted in memory and added to ``HITS_KEY`` at most every
+    ``HIT_FLUSH_INTERVAL`` seconds in one pipeline, so cache reads do not each
+    write to Redis.
+    """
+
+    def __init__(self):
+        self._counts: Counter[str] = Counter()
+        self._flushed_at = time.monotonic()
+        self._flush_task: asyncio.Task | None = None
+
+    def record(self, tags: list[str]) -> None:
+        if not _counting_hits.get():
+            return
+        self._counts.update(tags)
+        if (
+            self._flush_task is None
+            and time.monotonic() - self._flushed_at >= HIT_FLUSH_INTERVAL
+        ):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> None:
+        counts, self._counts = self._counts, Counter()
+        self._flushed_at = time.monotonic()
+        try:
+            if counts:
+                redis = await database.get_redis()
+                async with redis.pipeline(transaction=False) as pipe:
+                    for tag, count in counts.items():
+                        pipe.zincrby(HITS_KEY, count, tag)
+                    await pipe.execute()
+        except Exception:
+            logger.exception("Failed to flush cache hit counts")
+        finally:
+            self._flush_task = None
+
+
+hit_counter = HitCounter()
+
+_counting_hits: ContextVar[bool] = ContextVar("cache_counting_hits", default=True)
+
+
+@contextmanager
+def hits_not_counted() -> Iterator[None]:
+    """Leave cache reads made inside the block out of the hit counts.
+
+    Used by the prewarm, whose reads are not requests and would otherwise
+    keep the apps it warms at the top of the ranking it is based on.
+    """
+    token = _counting_hits.set(False)
+    try:
+        yield
+    finally:
+        _counting_hits.reset(token)
+
+
+async def _fetch_entry(
+    redis: Any, cache_key: str, entry_tags: list[str]
+) -> tuple[list | None, int]:
+    """Return the cached entry fields and the current cache generation.
+
+    Accesses are counted per tag by ``hit_counter``.
+    """
+    hit_counter.record(entry_tags)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.hmget(cache_key, ENTRY_FIELDS)
+        pipe.get(GENERATION_KEY)
+        # Keys still in the previous string layout fail with WRONGTYPE
+        fields, generation = await pipe.execute(raise_on_error=False)
+    if isinstance(generation, Exception):
+        raise generation
+    return _entry_fields(fields), int(generation or 0)
+
+
+def _entry_fields(reply: Any) -> list | None:
+    """Return the ``HMGET`` reply of an entry, or None if there is no entry."""
+    if not isinstance(reply, list) or all(field is None for field in reply):
+        return None
+    return reply
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """A cached response body kept as the exact bytes sent to clients."""
+
+    body: bytes
+    etag: str
+    created_at: float
+    is_stale: bool = False
+    generation: int = 0
+
+    def meta(self) -> dict:
+        return {
+            "created_at": self.created_at,
+            "is_stale": self.is_stale,
+            "generation": self.generation,
+            "etag": self.etag,
+        }
+
+
+def _serialize_value(value: Any) -> bytes:
     if isinstance(value, BaseModel):
-        serialized_value = value.model_dump(mode="json", by_alias=True)
-    else:
-        serialized_value = value
+        value = value.model_dump(mode="json", by_alias=True)
+    return orjson.dumps(value)
 
-    return {
-        "value": serialized_value,
-        "created_at": time.time(),
-        "is_stale": False,
+
+def _serialize_body(value: Any, exclude_none: bool = False) -> bytes:
+    if isinstance(value, BaseModel):
+        return value.model_dump_json(by_alias=True, exclude_none=exclude_none).encode()
+    return orjson.dumps(
+        jsonable_encoder(value, by_alias=True, exclude_none=exclude_none)
+    )
+
+
+def _make_entry(body: bytes, generation: int = 0) -> CacheEntry:
+    return CacheEntry(
+        body=body,
+        etag=hashlib.md5(body).hexdigest(),
+        created_at=time.time(),
+        generation=generation,
+    )
+
+
+def _dump_entry(entry: CacheEntry) -> dict[str, str | bytes]:
+    """Return the hash fields ``entry`` is stored as."""
+    mapping: dict[str, str | bytes] = {
+        "created_at": repr(entry.created_at),
+        "is_stale": "1" if entry.is_stale else "0",
+        "generation": str(entry.generation),
+        "etag": entry.etag,
+        "body": entry.body,
     }
+    if len(entry.body) >= GZIP_MIN_SIZE:
+        mapping[GZIP_FIELD] = gzip.compress(entry.body, mtime=0)
+    return mapping
+
+
+def _load_entry(fields: list | None) -> CacheEntry | None:
+    """Build the entry from the ``ENTRY_FIELDS`` of its hash."""
+    if not fields:
+        return None
+
+    created_at, is_stale, generation, etag, body = fields
+    if body is None or etag is None:
+        return None
+
+    return CacheEntry(
+        body=body.encode() if isinstance(body, str) else body,
+        etag=etag,
+        created_at=float(created_at or 0),
+        is_stale=is_stale == "1",
+        generation=int(generation or 0),
+    )
 
 
-def _deserialize_value(data: dict, expected_type: type | None) -> Any:
-    if not isinstance(data, dict) or "value" not in data:
-        return data
+def _raw_response(entry: CacheEntry) -> Response:
+    return Response(content=entry.body, media_type="application/json")
 
-    value = data.get("value")
 
+@dataclass
+class CacheValidators:
+    """Conditional request state shared between the middleware and ``cached``.
+
+    ``CacheControlMiddleware`` creates one per GET/HEAD request from the
+    ``If-None-Match``/``If-Modified-Since`` headers. When ``cached`` wraps the
+    matched route endpoint itself it fills in the validators of the entry it
+    serves and the middleware emits them as ``ETag``/``Last-Modified`` headers;
+    cached helpers called from inside other routes are left alone.
+    """
+
+    scope: Scope
+    if_none_match: str | None = None
+    if_modified_since: str | None = None
+    etag: str | None = None
+    last_modified: float | None = None
+
+    @property
+    def endpoint(self) -> Any:
+        return self.scope.get("endpoint")
+
+    def set_entry(self, etag: str, created_at: float) -> None:
+        self.etag = etag
+        self.last_modified = created_at
+
+    def is_not_modified(self) -> bool:
+        if self.etag is None:
+            return False
+
+        if self.if_none_match is not None:
+            return _etag_matches(self.if_none_match, self.etag)
+
+        if self.if_modified_since is not None and self.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(self.if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.last_modified) <= since
+
+        return False
+
+    def headers(self) -> dict[str, str]:
+        if self.etag is None:
+            return {}
+
+        headers = {"ETag": f'"{self.etag}"'}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = formatdate(self.last_modified, usegmt=True)
+        return headers
+
+
+_validators: ContextVar[CacheValidators | None] = ContextVar(
+    "cache_validators", default=None
+)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.removeprefix("W/").strip('"') == etag:
+            return True
+    return False
+
+
+def _deserialize_value(value: Any, expected_type: type | None) -> Any:
     if not expected_type:
         return value
 
@@ -118,13 +558,16 @@ def _deserialize_value(data: dict, expected_type: type | None) -> Any:
     return value
 
 
-def _is_cache_stale(cache_data: dict, ttl: int) -> bool:
+def _is_cache_stale(cache_data: dict, ttl: int, generation: int = 0) -> bool:
     if not isinstance(cache_data, dict):
         return True
 
     if cache_data.get("is_stale"):
         return True
 
+    if cache_data.get("generation", 0) < generation:
+        return True
+
     created_at = cache_data.get("created_at")
     if created_at:
         age = time.time() - created_at
@@ -137,69 +580,310 @@ def _is_cache_stale(cache_data: dict, ttl: int) -> bool:
 
 def cached(
     ttl: int = 3600,
+    local: bool = False,
+    raw: bool = False,
+    exclude_none: bool = False,
+    tags: tuple[Tag, ...] = (),
 ) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Cache the endpoint result in Redis.
+
+    Entries are hashes of the JSON body plus its metadata (see
+    ``ENTRY_FIELDS``), which the nginx edge serves directly for the ``raw``
+    routes listed in the ``cache_manifest``. Every entry carries a content
+    hash, served as ``ETag`` together with a ``Last-Modified`` of its creation
+    time. Requests whose ``If-None-Match`` or ``If-Modified-Since`` match the
+    entry get a ``304 Not Modified`` without deserializing the cached value.
+
+    With ``local=True`` fresh results are additionally kept in the per-process
+    ``local_cache`` so hot keys are served without a Redis round-trip. Local
+    entries are dropped in every worker through pub/sub: the patterns of
+    ``mark_stale_by_pattern`` and ``invalidate_cache_by_pattern`` on
+    ``LOCAL_INVALIDATION_CHANNEL``, and the keys of ``invalidate_tags`` on
+    ``LOCAL_KEY_INVALIDATION_CHANNEL``.
+
+    With ``raw=True`` the body is the final JSON the route sends rather than the
+    model dump, and hits are returned as a ``Response`` without any model
+    validation or re-serialization. Only use it for endpoints that do not set
+    headers or a status code on the injected ``Response``; ``exclude_none``
+    must mirror the route's ``response_model_exclude_none``.
+
+    ``tags`` are ``str.format`` templates over the endpoint arguments, e.g.
+    ``("app:{app_id}",)``, or callables taking the arguments as keywords for
+    tags that cannot be spelled as a template. Every entry is recorded in the
+    Redis set of each of its tags so ``invalidate_tags`` can drop exactly the
+    entries that mention an app instead of scanning the keyspace.
+
+    Misses are single-flight: concurrent callers in a process share one call of
+    the function, and other workers seeing the key's refresh lock wait up to
+    ``MISS_WAIT_TIMEOUT`` for the holder to store the entry.
+    """
+
     def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
         func_name: str = getattr(func, "__name__", repr(func))
+        return_type = func.__annotations__.get("return")
+        use_local = local and local_cache.max_entries > 0
+
+        def encode(result: Any, generation: int) -> tuple[CacheEntry, Any]:
+            """Return the entry to store and the local value."""
+            if raw:
+                entry = _make_entry(_serialize_body(result, exclude_none), generation)
+                return entry, entry
+            return _make_entry(_serialize_value(result), generation), result
+
+        def decode(fields: list | None) -> tuple[dict | None, Callable[[], Any]]:
+            """Return the entry metadata and a loader for the local value."""
+            entry = _load_entry(fields)
+            if entry is None:
+                return None, lambda: None
+            if raw:
+                return entry.meta(), lambda: entry
+            return entry.meta(), lambda: _deserialize_value(
+                orjson.loads(entry.body), return_type
+            )
+
+        def respond(meta: dict, load: Callable[[], Any]) -> Any:
+            validators = _validators.get()
+            if (
+                validators is not None
+                and validators.endpoint is wrapper
+                and meta.get("etag")
+            ):
+                validators.set_entry(meta["etag"], meta["created_at"])
+                if validators.is_not_modified():
+                    return Response(status_code=304)
+
+            value = load()
+            return _raw_response(value) if raw else value
+
+        def serve(stored: tuple[dict, Any]) -> Any:
+            meta, value = stored
+            return respond(meta, lambda: value)
+
+        def remember(cache_key: str, meta: dict, value: Any) -> None:
+            if use_local:
+                local_cache.set(cache_key, (meta, value), ttl, meta["created_at"])
+
+        async def store(
+            redis: Any,
+            cache_key: str,
+            result: Any,
+            generation: int,
+            arguments: dict[str, Any],
+        ) -> tuple[dict, Any]:
+            entry, value = encode(result, generation)
+            meta = entry.meta()
+            # One transaction so the edge never sees a half written entry
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(cache_key)
+                pipe.hset(cache_key, mapping=_dump_entry(entry))
+                pipe.expire(cache_key, ttl)
+                for tag in _format_tags(tags, arguments):
+                    tag_key = _make_tag_key(tag)
+                    pipe.sadd(tag_key, cache_key)
+                    pipe.expire(tag_key, max(ttl, TAG_TTL))
+                await pipe.execute()
+            remember(cache_key, meta, value)
+            return meta, value
+
+        async def compute(
+            redis: Any,
+            cache_key: str,
+            generation: int,
+            arguments: dict[str, Any],
+            args: tuple,
+            kwargs: dict,
+        ) -> tuple[Any, tuple[dict, Any] | None]:
+            """Call the function and store its result if the response allows it."""
+            result = await func(*args, **kwargs)
+            response_obj = _get_response_from_args(func, args, kwargs)
+            if _should_cache_response(response_obj):
+                try:
+                    stored = await store(
+                        redis, cache_key, result, generation, arguments
+                    )
+                    return result, stored
+                except Exception:
+                    logger.exception("Cache set error for %s", func_name)
+            return result, None
+
+        async def wait_for_entry(
+            redis: Any, cache_key: str, refresh_lock_key: str
+        ) -> tuple[dict, Any] | None:
+            """Poll for the entry another worker is computing under the lock."""
+            deadline = time.monotonic() + MISS_WAIT_TIMEOUT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(MISS_POLL_INTERVAL)
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.hmget(cache_key, ENTRY_FIELDS)
+                    pipe.exists(refresh_lock_key)
+                    fields, locked = await pipe.execute(raise_on_error=False)
+                meta, load = decode(_entry_fields(fields))
+                if meta is not None:
+                    value = load()
+                    remember(cache_key, meta, value)
+                    return meta, value
+                if not locked:
+                    return None
+            return None
+
+        async def fill(
+            redis: Any,
+            cache_key: str,
+            generation: int,
+            arguments: dict[str, Any],
+            args: tuple,
+            kwargs: dict,
+        ) -> tuple[Any, tuple[dict, Any] | None]:
+            """Compute a missing entry, unless another worker already is."""
+            refresh_lock_key = _make_refresh_lock_key(cache_key)
+            try:
+                locked = await redis.set(
+                    refresh_lock_key, "1", ex=REFRESH_LOCK_TTL, nx=True
+                )
+                if not locked:
+                    stored = await wait_for_entry(redis, cache_key, refresh_lock_key)
+                    if stored is not None:
+                        return None, stored
+            except Exception:
+                logger.exception("Cache lock error for %s", func_name)
+                locked = False
+
+            try:
+                return await compute(
+                    redis, cache_key, generation, arguments, args, kwargs
+                )
+            finally:
+                if locked:
+                    await redis.delete(refresh_lock_key)
+
+        async def fill_once(
+            redis: Any,
+            cache_key: str,
+            generation: int,
+            arguments: dict[str, Any],
+            args: tuple,
+            kwargs: dict,
+        ) -> Any:
+            """Coalesce concurrent misses of a key in this process into one fill.
+
+            Callers arriving while a fill is in flight await its entry, or its
+            exception, instead of calling the function again. When the result
+            was not cached they compute their own.
+            """
+            pending = in_flight.get(cache_key)
+            if pending is not None:
+                stored = await asyncio.shield(pending)
+                if stored is not None:
+                    return serve(stored)
+                result, _ = await compute(
+                    redis, cache_key, generation, arguments, args, kwargs
+                )
+                return result
+
+            future: asyncio.Future = asyncio.get_running_loop().create_future()
+            in_flight[cache_key] = future
+            try:
+                result, stored = await fill(
+                    redis, cache_key, generation, arguments, args, kwargs
+                )
+                future.set_result(stored)
+            except asyncio.CancelledError:
+                future.set_result(None)
+                raise
+            except Exception as exc:
+                future.set_exception(exc)
+                # Mark the exception retrieved when no other caller was waiting
+                future.exception()
+                raise
+            finally:
+                del in_flight[cache_key]
+
+            if stored is not None:
+                return serve(stored)
+            return result
+
+        in_flight: dict[str, asyncio.Future] = {}
 
         @functools.wraps(func)
         async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
-            redis = await database.get_redis()
             cache_key = _make_cache_key(func, args, kwargs)
+            arguments = _bind_arguments(func, args, kwargs) if tags else {}
+
+            if use_local:
+                hit, local_entry = local_cache.get(cache_key)
+                if hit:
+                    return serve(local_entry)
+
+            redis = await database.get_redis()
             refresh_lock_key = _make_refresh_lock_key(cache_key)
+            generation = 0
 
             try:
-                cached_data = await redis.get(cache_key)
-                if cached_data:
-                    cache_entry = orjson.loads(cached_data)
-
-                    if not _is_cache_stale(cache_entry, ttl):
-                        return _deserialize_value(
-                            cache_entry,
-                            func.__annotations__.get("return"),
-                        )
-
-                    if isinstance(cache_entry, dict) and "value" in cache_entry:
-                        stale_value = _deserialize_value(
-                            cache_entry,
-                            func.__annotations__.get("return"),
-                        )
-
+                fields, generation = await _fetch_entry(
+                    redis, cache_key, _format_tags(tags, arguments)
+                )
+                if fields:
+                    cache_entry, load = decode(fields)
+
+                    if cache_entry is not None and not _is_cache_stale(
+                        cache_entry, ttl, generation
+                    ):
+                        if use_local:
+                            value = load()
+                            remember(cache_key, cache_entry, value)
+                            return respond(cache_entry, lambda: value)
+                        return respond(cache_entry, load)
+
+                    if cache_entry is not None:
                         try:
-                            if await redis.set(refresh_lock_key, "1", ex=10, nx=True):
+                            if await redis.set(
+                                refresh_lock_key, "1", ex=REFRESH_LOCK_TTL, nx=True
+                            ):
                                 try:
-                                    fresh_result = await func(*args, **kwargs)
-                                    response_obj = _get_response_from_args(
-                                        func, args, kwargs
+                                    fresh_result, stored = await compute(
+                                        redis,
+                                        cache_key,
+                                        generation,
+                                        arguments,
+                                        args,
+                                        kwargs,
                                     )
-                                    if _should_cache_response(response_obj):
-                                        serialized = _serialize_value(fresh_result)
-                                        await redis.setex(
-                                            cache_key, ttl, orjson.dumps(serialized)
-                                        )
+                                    if stored is not None:
+                                        return serve(stored)
                                     return fresh_result
                                 finally:
                                     await redis.delete(refresh_lock_key)
                         except Exception:
                             logger.exception("Cache refresh error for %s", func_name)
 
-                        return stale_value
+                        return respond(cache_entry, load)
 
             except Exception:
                 logger.exception("Cache get error for %s", func_name)
 
-            result = await func(*args, **kwargs)
+            return await fill_once(
+                redis, cache_key, generation, arguments, args, kwargs
+            )
 
-            response_obj = _get_response_from_args(func, args, kwargs)
-            if _should_cache_response(response_obj):
-                try:
-                    serialized = _serialize_value(result)
-                    await redis.setex(cache_key, ttl, orjson.dumps(serialized))
-                except Exception:
-                    logger.exception("Cache set error for %s", func_name)
-
-            return result
-
-        return wrapper  # type: ignore[return-value]
+        async def cache_state(*args: P.args, **kwargs: P.kwargs) -> EntryState:
+            """Return the entry state for these arguments without computing it."""
+            redis = await database.get_redis()
+            fields, generation = await _fetch_entry(
+                redis, _make_cache_key(func, args, kwargs), []
+            )
+            if not fields:
+                return EntryState.MISSING
+
+            cache_entry, _ = decode(fields)
+            if cache_entry is None or _is_cache_stale(cache_entry, ttl, generation):
+                return EntryState.STALE
+            return EntryState.FRESH
+
+        endpoint = cast("CachedEndpoint[P, R]", wrapper)
+        endpoint.cache_state = cache_state
+        endpoint.cache_ttl = ttl
+        endpoint.cache_raw = raw
+        return endpoint
 
     return decorator
 
@@ -227,6 +911,15 @@ class CacheControlMiddleware:
             await self.app(scope, receive, send)
             return
 
+        validators = None
+        if scope["method"] in ("GET", "HEAD"):
+            request_headers = Headers(scope=scope)
+            validators = CacheValidators(
+                scope=scope,
+                if_none_match=request_headers.get("if-none-match"),
+                if_modified_since=request_headers.get("if-modified-since"),
+            )
+
         async def send_with_cache_policy(message: Message) -> None:
             if message["type"] == "http.response.start":
                 endpoint = scope.get("endpoint")
@@ -238,39 +931,78 @@ class CacheControlMiddleware:
                     if pragma is not None:
                         headers["Pragma"] = pragma
 
+                if validators is not None and message["status"] in (200, 304):
+                    headers = MutableHeaders(scope=message)
+                    for name, value in validators.headers().items():
+                        headers[name] = value
+
             await send(message)
 
-        await self.app(scope, receive, send_with_cache_policy)
+        token = _validators.set(validators)
+        try:
+            await self.app(scope, receive, send_with_cache_policy)
+        finally:
+            _validators.reset(token)
 
 
 async def mark_stale_by_pattern(pattern: str) -> int:
+    """Mark every entry matching ``pattern`` stale, keeping its remaining TTL.
+
+    Keys are flipped server-side by ``_MARK_STALE_SCRIPT`` in batches of
+    ``MARK_STALE_BATCH_SIZE``. To mark the whole endpoint cache stale prefer
+    ``bump_generation``, which is a single write.
+    """
     try:
         redis = await database.get_redis()
+        mark_stale = redis.register_script(_MARK_STALE_SCRIPT)
         marked_count = 0
+        started_at = time.perf_counter()
         cursor = 0
         while True:
-            cursor, keys = await redis.scan(cursor=cursor, match=pattern, count=100)
-            for key in keys:
+            cursor, keys = await redis.scan(
+                cursor=cursor, match=pattern, count=MARK_STALE_BATCH_SIZE
+            )
+            if keys:
                 try:
-                    cached_data = await redis.get(key)
-                    if cached_data:
-                        cache_entry = orjson.loads(cached_data)
-                        if isinstance(cache_entry, dict):
-                            cache_entry["is_stale"] = True
-                            await redis.set(key, orjson.dumps(cache_entry))
-                            marked_count += 1
+                    marked_count += await mark_stale(keys=keys)
                 except Exception:
-                    logger.exception("Error marking key %s as stale", key)
+                    logger.exception("Error marking %d keys as stale", len(keys))
 
             if cursor == 0:
                 break
 
+        elapsed = time.perf_counter() - started_at
+        logger.info(
+            "Marked %d cache entries stale for %s in %.2fs (%.0f keys/s)",
+            marked_count,
+            pattern,
+            elapsed,
+            marked_count / elapsed if elapsed else 0,
+        )
+        await _publish_invalidation(pattern)
         return marked_count
     except Exception:
         logger.exception("Cache mark stale error for pattern %s", pattern)
         return 0
 
 
+async def bump_generation() -> int:
+    """Mark all endpoint cache entries stale by bumping the cache generation.
+
+    Entries remember the generation they were written in and count as stale
+    once it is behind ``GENERATION_KEY``, so stale-while-revalidate keeps
+    working without rewriting any entry.
+    """
+    try:
+        redis = await database.get_redis()
+        generation = await redis.incr(GENERATION_KEY)
+        await _publish_invalidation("cache:endpoint:*")
+        return generation
+    except Exception:
+        logger.exception("Cache generation bump error")
+        return 0
+
+
 async def invalidate_cache_by_pattern(pattern: str) -> int:
     try:
         redis = await database.get_redis()
@@ -284,7 +1016,66 @@ async def invalidate_cache_by_pattern(pattern: str) -> int:
             if cursor == 0:
                 break
 
+        await _publish_invalidation(pattern)
         return deleted_count
     except Exception:
         logger.exception("Cache invalidation error for pattern %s", pattern)
         return 0
+
+
+async def invalidate_tags(*tags: str, stale: bool = False) -> int:
+    """Drop every cached entry recorded under any of ``tags``.
+
+    With ``stale=True`` the entries are marked stale instead, so they keep
+    being served until the next request refreshes them.
+    """
+    try:
+        redis = await database.get_redis()
+        tag_keys = [_make_tag_key(tag) for tag in tags]
+        async with redis.pipeline(transaction=True) as pipe:
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            pipe.delete(*tag_keys)
+            results = await pipe.execute()
+
+        keys = sorted(set().union(*results[:-1]))
+        invalidate = (
+            redis.register_script(_MARK_STALE_SCRIPT)
+            if stale
+            else lambda keys: redis.delete(*keys)
+        )
+        invalidated_count = 0
+        for start in range(0, len(keys), MARK_STALE_BATCH_SIZE):
+            invalidated_count += await invalidate(
+                keys=keys[start : start + MARK_STALE_BATCH_SIZE]
+            )
+
+        await _publish_key_invalidation(keys)
+        return invalidated_count
+    except Exception:
+        logger.exception("Cache invalidation error for tags %s", tags)
+        return 0
+
+
+async def get_hit_counts(tags: list[str]) -> dict[str, float]:
+    """Return how often entries with each tag were read from Redis."""
+    if not tags:
+        return {}
+
+    redis = await database.get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        for tag in tags:
+            pipe.zscore(HITS_KEY, tag)
+        scores = await pipe.execute()
+    return {tag: score or 0.0 for tag, score in zip(tags, scores, strict=True)}
+
+
+async def get_top_hit_tags(limit: int) -> list[tuple[str, float]]:
+    redis = await database.get_redis()
+    return await redis.zrevrange(HITS_KEY, 0, limit - 1, withscores=True)
+
+
+async def decay_hit_counts(factor: float = 0.5) -> None:
+    """Scale all hit counts by ``factor`` so priorities follow recent traffic."""
+    redis = await database.get_redis()
+    await redis.zunionstore(HITS_KEY, {HITS_KEY: factor})
@@ -0,0 +1,133 @@
+"""Describe the ``cached`` routes for the nginx edge.
+
+The manifest lists every GET route in matching order with the regex
+Starlette matches it by. Routes whose endpoint is ``cached`` with
+``raw=True`` also carry the function name, TTL and the parameters
+``_make_cache_key`` hashes, so ``nginx/lua/redis_cache.lua`` can build the
+same key from the request without its own copy of each route. Other cached
+routes store the model dump rather than the response FastAPI sends, so the
+edge leaves them to the backend. It is written to ``MANIFEST_KEY`` on
+startup.
+"""
+
+import logging
+import types
+from enum import Enum
+from typing import Any, Union, cast, get_args, get_origin
+
+import orjson
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute, RouteContext, iter_route_contexts
+
+from . import cache, database
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_KEY = "cache:manifest"
+MANIFEST_VERSION = 1
+
+
+def _scalar_type(annotation: Any) -> str | None:
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        values = {type(member.value) for member in annotation}
+        return {frozenset({str}): "string", frozenset({int}): "integer"}.get(
+            frozenset(values)
+        )
+    if annotation is bool:
+        return "boolean"
+    if annotation is int:
+        return "integer"
+    if isinstance(annotation, type) and issubclass(annotation, str):
+        return "string"
+    # Floats are left out because Lua cannot print them the way orjson does
+    return None
+
+
+def _param_type(annotation: Any) -> dict[str, str] | None:
+    """Return the JSON type of a path or query parameter for the edge."""
+    if get_origin(annotation) in (Union, types.UnionType):
+        members = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(members) != 1:
+            return None
+        annotation = members[0]
+
+    if get_origin(annotation) is list:
+        (item,) = get_args(annotation)
+        item_type = _scalar_type(item)
+        return {"type": "array", "items": item_type} if item_type else None
+
+    scalar_type = _scalar_type(annotation)
+    return {"type": scalar_type} if scalar_type else None
+
+
+def _cache_schema(route: RouteContext) -> dict[str, Any] | None:
+    """Return how the edge builds the cache key of ``route``, if it can."""
+    if not getattr(route.endpoint, "cache_raw", False):
+        return None
+    endpoint = cast("cache.CachedEndpoint", route.endpoint)
+    dependant = route.dependant
+    if (
+        dependant.header_params
+        or dependant.cookie_params
+        or dependant.body_params
+        or dependant.dependencies
+        or dependant.request_param_name
+    ):
+        return None
+
+    params = []
+    for location, fields in (
+        ("path", dependant.path_params),
+        ("query", dependant.query_params),
+    ):
+        for field in fields:
+            param_type = _param_type(field.field_info.annotation)
+            if param_type is None:
+                return None
+            param: dict[str, Any] = {
+                "name": field.name,
+                "alias": field.alias,
+                "in": location,
+                "required": field.field_info.is_required(),
+                **param_type,
+            }
+            if not param["required"]:
+                param["default"] = jsonable_encoder(
+                    field.field_info.get_default(call_default_factory=True)
+                )
+            params.append(param)
+
+    return {"func": endpoint.__name__, "ttl": endpoint.cache_ttl, "params": params}
+
+
+def build_manifest(app: FastAPI) -> dict[str, Any]:
+    routes = []
+    for route in iter_route_contexts(app.routes):
+        if not isinstance(route.original_route, APIRoute) or "GET" not in (
+            route.methods or ()
+        ):
+            continue
+        entry = {"path": route.path, "regex": route.path_regex.pattern}
+        if schema := _cache_schema(route):
+            entry.update(schema)
+        routes.append(entry)
+
+    return {
+        "version": MANIFEST_VERSION,
+        "root_path": app.root_path,
+        "key_prefix": cache.KEY_PREFIX,
+        "generation_key": cache.GENERATION_KEY,
+        "stale_threshold": cache.STALE_THRESHOLD,
+        "entry_fields": list(cache.ENTRY_FIELDS),
+        "gzip_field": cache.GZIP_FIELD,
+        "routes": routes,
+    }
+
+
+async def publish_manifest(app: FastAPI) -> None:
+    try:
+        redis = await database.get_redis()
+        await redis.set(MANIFEST_KEY, orjson.dumps(build_manifest(app)))
+    except Exception:
+        logger.exception("Failed to publish the cache manifest")
@@ -16,9 +16,12 @@ class Settings(BaseSettings):
     database_replica_url: str = "postgresql+psycopg://postgres:postgres@db:5432"
     meilisearch_url: str = "http://meilisearch:7700"
     meilisearch_key: str | None = None
+    search_timeout: float = Field(default=5.0, gt=0)
     search_hybrid_enabled: bool = False
     search_hybrid_semantic_ratio: float = Field(default=0.3, ge=0.0, le=1.0)
     search_hybrid_embedder: str = "apps-fireworks-qwen3"
+    # Hybrid searches past this fall back to the lexical index
+    search_hybrid_timeout: float = Field(default=2.0, gt=0)
     search_embedding_url: str = "https://api.fireworks.ai/inference/v1/embeddings"
     search_embedding_model: str = "fireworks/qwen3-embedding-8b"
     search_embedding_dimensions: int = Field(default=2048, ge=32, le=4096)
@@ -27,6 +30,7 @@ class Settings(BaseSettings):
     appstream_repos: str | None = None
     datadir: str = os.path.join(ROOT_DIR, "data")
     stats_baseurl: str = "https://hub.flathub.org/stats"
+    stats_store_dir: str = os.path.join(ROOT_DIR, "stats_store")
     session_secret_key: str = "change-me-for-production"
     repo_url: str = "https://dl.flathub.org/repo"
 
@@ -154,6 +158,9 @@ class Settings(BaseSettings):
 
     backend_node_url: str | None = None
 
+    # Per-worker in-memory tier for @cache.cached(local=True) endpoints, 0 disables it
+    cache_local_max_entries: int = Field(default=2048, ge=0)
+
     force_recompute_stats: bool = False
     audit_log_retention_days: int = 90
 
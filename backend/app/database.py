@@ -1,13 +1,15 @@
-from contextlib import contextmanager
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, contextmanager
 from typing import Literal, cast
 
 import orjson
 import redis.asyncio as aioredis
-from sqlalchemy import create_engine, or_
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from . import config, models
-from .db_session import DBSession
+from .db_session import AsyncDBSession, DBSession
 
 _redis: aioredis.Redis | None = None
 
@@ -77,6 +79,58 @@ def get_db_session(db_type: Literal["writer", "replica"] = "replica") -> Session
     return WriterSessionLocal() if db_type == "writer" else ReplicaSessionLocal()
 
 
+# The async engines serve `async def` routes so that waiting on the database
+# does not block the event loop. psycopg 3 picks its async driver on its own.
+async_writer_engine = create_async_engine(
+    config.settings.database_url,
+    pool_size=4,
+    max_overflow=0,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    connect_args={
+        "connect_timeout": 10,
+        "options": "-c statement_timeout=30000",
+    },
+)
+
+async_replica_engine = create_async_engine(
+    config.settings.database_replica_url,
+    pool_size=4,
+    max_overflow=0,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    connect_args={
+        "connect_timeout": 10,
+        "options": "-c statement_timeout=30000",
+    },
+)
+
+AsyncWriterSessionLocal = async_sessionmaker(
+    autoflush=True, bind=async_writer_engine, expire_on_commit=False
+)
+AsyncReplicaSessionLocal = async_sessionmaker(
+    autoflush=False, bind=async_replica_engine, expire_on_commit=False
+)
+
+
+@asynccontextmanager
+async def get_async_db(
+    db_type: Literal["writer", "replica"] = "replica",
+) -> AsyncIterator[AsyncDBSession]:
+    SessionClass = (
+        AsyncWriterSessionLocal if db_type == "writer" else AsyncReplicaSessionLocal
+    )
+    async with SessionClass() as db:
+        yield AsyncDBSession(db)
+        if db_type == "writer":
+            await db.commit()
+
+
+async def close_async_db():
+    await async_writer_engine.dispose()
+    await async_replica_engine.dispose()
+
+
 db = ReplicaSessionLocal()
 
 
@@ -167,29 +221,13 @@ def bulk_set_app_stats(stats_dict: dict[str, dict]):
 
 
 def get_all_appids_for_frontend():
-    appids = []
-
     with get_db() as sqldb:
-        apps = (
-            sqldb.query(models.App.app_id, models.App.type)
-            .filter(
-                or_(
-                    models.App.type == "desktop-application",
-                    models.App.type == "console-application",
-                )
-            )
+        return [
+            app_id
+            for (app_id,) in sqldb.query(models.App.app_id)
+            .filter(models.App.for_frontend())
             .all()
-        )
-
-    for app in apps:
-        if (
-            app.type == "desktop-application"
-            or app.type == "console-application"
-            and is_appid_for_frontend(app.app_id)
-        ):
-            appids.append(app.app_id)
-
-    return appids
+        ]
 
 
 def is_appid_for_frontend(app_id: str):
@@ -3,6 +3,7 @@
 # - database.py needs models for database operations
 # By moving DBSession to its own module, both can import it without creating a cycle.
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 
@@ -16,3 +17,15 @@ class DBSession:
     @property
     def session(self):
         return self._session
+
+
+class AsyncDBSession:
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    @property
+    def session(self):
+        return self._session
@@ -0,0 +1,194 @@
+import datetime
+import logging
+from typing import cast
+
+import numpy as np
+import redis
+
+logger = logging.getLogger(__name__)
+
+FIRST_STATS_DATE = datetime.date(2018, 4, 29)
+
+INSTALLS_KEY_PREFIX = "stats:agg:installs:"
+INSTALLS_START_KEY = "stats:agg:installs_start"
+INSTALLS_DTYPE = np.dtype("<i4")
+LOAD_BATCH_SIZE = 1000
+
+
+def day_offset(date: datetime.date) -> int:
+    return (date - FIRST_STATS_DATE).days
+
+
+def _installs_key(app_id: str) -> str:
+    return f"{INSTALLS_KEY_PREFIX}{app_id}"
+
+
+def _redis(conn: redis.Redis | None) -> redis.Redis:
+    if conn is not None:
+        return conn
+    # Imported late since the worker package imports the stats modules using this
+    from .worker.redis import redis_bytes_conn
+
+    return redis_bytes_conn
+
+
+def _load_starts(conn: redis.Redis) -> dict[str, int]:
+    starts = cast("dict[bytes, bytes]", conn.hgetall(INSTALLS_START_KEY))
+    return {app_id.decode(): int(start) for app_id, start in starts.items()}
+
+
+class DailyInstalls:
+    """Net installs per app and day as one contiguous int32 run per app.
+
+    Each app's run starts at the day it first showed up in the stats
+    (``starts``, in days since ``FIRST_STATS_DATE``) and the runs are
+    concatenated into ``values``. Window sums are two lookups into a running
+    sum, so they cost the same for a week as for the whole history.
+    """
+
+    def __init__(self, app_ids: list[str], starts: list[int], runs: list[np.ndarray]):
+        self.app_ids = app_ids
+        self.index = {app_id: row for row, app_id in enumerate(app_ids)}
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.lengths = np.array([len(run) for run in runs], dtype=np.int64)
+        self.offsets = np.cumsum(self.lengths) - self.lengths
+        self.values = (
+            np.concatenate(runs).astype(np.int64)
+            if runs
+            else np.zeros(0, dtype=np.int64)
+        )
+        self._running = np.concatenate(([0], np.cumsum(self.values)))
+
+    @classmethod
+    def from_per_day(cls, per_day: dict[str, dict[str, int]]) -> "DailyInstalls":
+        """Build from the ``{app_id: {iso_date: installs}}`` layout."""
+        app_ids, starts, runs = [], [], []
+        for app_id, days in per_day.items():
+            if not days:
+                continue
+            offsets = [day_offset(datetime.date.fromisoformat(day)) for day in days]
+            start = min(offsets)
+            run = np.zeros(max(offsets) - start + 1, dtype=np.int64)
+            run[np.array(offsets) - start] = list(days.values())
+            app_ids.append(app_id)
+            starts.append(start)
+            runs.append(run)
+        return cls(app_ids, starts, runs)
+
+    def __contains__(self, app_id: str) -> bool:
+        return app_id in self.index
+
+    def __len__(self) -> int:
+        return len(self.app_ids)
+
+    def _positions(self, first: int, last: int) -> tuple[np.ndarray, np.ndarray]:
+        lo = np.clip(first - self.starts, 0, self.lengths)
+        hi = np.clip(last + 1 - self.starts, 0, self.lengths)
+        return self.offsets + lo, self.offsets + hi
+
+    def window_sums(self, edate: datetime.date, days: int) -> np.ndarray:
+        """Return every app's installs over the ``days`` days ending at ``edate``."""
+        last = day_offset(edate)
+        lo, hi = self._positions(last - days + 1, last)
+        return self._running[hi] - self._running[lo]
+
+    def active(self, edate: datetime.date, days: int) -> np.ndarray:
+        """Return which apps have stats in the ``days`` days ending at ``edate``."""
+        last = day_offset(edate)
+        lo, hi = self._positions(last - days + 1, last)
+        return hi > lo
+
+    def window(self, edate: datetime.date, days: int) -> np.ndarray:
+        """Return an ``(apps, days)`` matrix of the daily installs up to ``edate``."""
+        last = day_offset(edate)
+        local = np.arange(last - days + 1, last + 1) - self.starts[:, None]
+        valid = (local >= 0) & (local < self.lengths[:, None])
+        if not self.values.size:
+            return np.zeros(local.shape, dtype=np.int64)
+        positions = self.offsets[:, None] + np.where(valid, local, 0)
+        return np.where(valid, self.values[positions], 0)
+
+    def per_day(self, app_id: str) -> dict[str, int]:
+        row = self.index[app_id]
+        start = FIRST_STATS_DATE + datetime.timedelta(days=int(self.starts[row]))
+        offset = self.offsets[row]
+        run = self.values[offset : offset + self.lengths[row]]
+        return {
+            (start + datetime.timedelta(days=day)).isoformat(): installs
+            for day, installs in enumerate(run.tolist())
+        }
+
+
+class DailyInstallsWriter:
+    """Appends a day of installs to the per-app runs in Redis.
+
+    Each app's run is a binary string of little-endian int32 values written
+    with ``SETRANGE`` at the day's position, so appending a day touches only
+    the apps that have stats for it. Redis zero-fills gaps, and rewriting a
+    day is idempotent, which makes it safe to resume after a crash.
+    """
+
+    def __init__(self, conn: redis.Redis | None = None):
+        self.conn = _redis(conn)
+        self.starts = _load_starts(self.conn)
+
+    def record(self, date: datetime.date, installs: dict[str, int]) -> None:
+        day = day_offset(date)
+        pipe = self.conn.pipeline()
+        for app_id, count in installs.items():
+            start = self.starts.get(app_id)
+            if start is None:
+                start = self.starts[app_id] = day
+                pipe.hset(INSTALLS_START_KEY, app_id, str(day))
+            elif day < start:
+                logger.warning("Skipping installs of %s before %s", app_id, start)
+                continue
+            pipe.setrange(
+                _installs_key(app_id),
+                (day - start) * INSTALLS_DTYPE.itemsize,
+                np.array(count, dtype=INSTALLS_DTYPE).tobytes(),
+            )
+        pipe.execute()
+
+
+def has_daily_installs(conn: redis.Redis | None = None) -> bool:
+    conn = _redis(conn)
+    return bool(conn.exists(INSTALLS_START_KEY))
+
+
+def load_daily_installs(conn: redis.Redis | None = None) -> DailyInstalls:
+    conn = _redis(conn)
+    starts = _load_starts(conn)
+    app_ids = sorted(starts)
+
+    runs: list[np.ndarray] = []
+    for i in range(0, len(app_ids), LOAD_BATCH_SIZE):
+        batch = app_ids[i : i + LOAD_BATCH_SIZE]
+        buffers = cast(
+            "list[bytes | None]",
+            conn.mget([_installs_key(app_id) for app_id in batch]),
+        )
+        runs.extend(
+            np.frombuffer(buffer or b"", dtype=INSTALLS_DTYPE) for buffer in buffers
+        )
+
+    return DailyInstalls(app_ids, [starts[app_id] for app_id in app_ids], runs)
+
+
+def load_first_seen(conn: redis.Redis | None = None) -> dict[str, datetime.date]:
+    """Return the day each app first showed up in the stats."""
+    return {
+        app_id: FIRST_STATS_DATE + datetime.timedelta(days=start)
+        for app_id, start in _load_starts(_redis(conn)).items()
+    }
+
+
+def delete_daily_installs(conn: redis.Redis | None = None) -> None:
+    conn = _redis(conn)
+    app_ids = cast("list[bytes]", conn.hkeys(INSTALLS_START_KEY))
+    keys = [_installs_key(app_id.decode()) for app_id in app_ids]
+    pipe = conn.pipeline()
+    for i in range(0, len(keys), LOAD_BATCH_SIZE):
+        pipe.delete(*keys[i : i + LOAD_BATCH_SIZE])
+    pipe.delete(INSTALLS_START_KEY)
+    pipe.execute()
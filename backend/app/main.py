@@ -11,11 +11,13 @@ from sentry_sdk.integrations.starlette import StarletteIntegration
 
 from . import (
     cache,
+    cache_manifest,
     config,
     database,
     emails,
     logins,
     moderation,
+    search,
     update,
     users,
     vending,
@@ -58,8 +60,14 @@ if config.settings.sentry_dsn:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await database.get_redis()
+    cache.start_invalidation_listener()
+    await cache_manifest.publish_manifest(app)
     yield
+    await cache.stop_invalidation_listener()
+    await cache.hit_counter.flush()
+    await search.async_client.aclose()
     await database.close_redis()
+    await database.close_async_db()
 
 
 router = FastAPI(
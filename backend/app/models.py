@@ -1,5 +1,7 @@
 import datetime as _dt
 import enum
+import hashlib
+import itertools
 import json
 import logging
 from datetime import date, datetime, timedelta
@@ -7,6 +9,7 @@ from math import ceil
 from typing import Any, ClassVar, Optional, Union, cast
 from uuid import uuid4
 
+import orjson
 from fastapi import HTTPException
 from pydantic import BaseModel
 from sqlalchemy import (
@@ -21,17 +24,22 @@ from sqlalchemy import (
     Integer,
     String,
     and_,
+    any_,
+    bindparam,
     case,
+    column,
     delete,
     desc,
     false,
     func,
     or_,
+    select,
     text,
     true,
     update,
+    values,
 )
-from sqlalchemy.dialects.postgresql import ARRAY, JSONB, ExcludeConstraint
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, ExcludeConstraint, insert
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -41,11 +49,21 @@ from sqlalchemy.orm import (
     relationship,
 )
 
-from . import utils
+from . import appstream_documents, ownership, utils
 from .db_session import DBSession
 
 logger = logging.getLogger(__name__)
 
+# Rows per statement for bulk writes, keeping them under the 65535 bind
+# parameter limit of PostgreSQL
+BULK_UPSERT_BATCH_SIZE = 1000
+BULK_UPDATE_BATCH_SIZE = 5000
+
+
+def _jsonb_truthy(value):
+    """SQL condition matching a JSONB value that is truthy in Python"""
+    return value.astext.notin_(["", "[]", "{}", "false", "0"])
+
 
 class Pagination(BaseModel):
     page: int
@@ -1387,6 +1405,13 @@ class AppVerification(Base):
     def all_by_app(db, app_id: str) -> list["AppVerification"]:
         return db.session.query(AppVerification).filter_by(app_id=app_id).all()
 
+    @staticmethod
+    async def async_all_by_app(db, app_id: str) -> list["AppVerification"]:
+        result = await db.session.scalars(
+            select(AppVerification).filter_by(app_id=app_id)
+        )
+        return list(result)
+
     @staticmethod
     def all_by_user(db, user: FlathubUser) -> list["AppVerification"]:
         return db.session.query(AppVerification).filter_by(account=user.id).all()
@@ -1768,6 +1793,7 @@ class Transaction(Base):
         )
         db.session.add(app)
         db.session.flush()
+        ownership.add_on_commit(db.session, self.user_id, row.recipient)
 
 
 class TransactionRow(Base):
@@ -1879,6 +1905,23 @@ class UserOwnedApp(Base):
             is not None
         )
 
+    @staticmethod
+    def owned_app_ids(db, user_id: int, app_ids: list[str]) -> set[str]:
+        """
+        Return which of the given app IDs the user owns, in a single query
+        """
+        if not app_ids:
+            return set()
+        return set(
+            db.session.scalars(
+                select(UserOwnedApp.app_id).where(
+                    UserOwnedApp.account == user_id,
+                    UserOwnedApp.app_id
+                    == any_(bindparam("app_ids", app_ids, type_=ARRAY(String))),
+                )
+            )
+        )
+
     @staticmethod
     def all_owned_by_user(db, user: FlathubUser):
         return db.session.query(UserOwnedApp).filter_by(account=user.id)
@@ -1899,6 +1942,7 @@ class UserOwnedApp(Base):
         Delete any app ownerships associated with this user
         """
         db.session.execute(delete(UserOwnedApp).where(UserOwnedApp.account == user.id))
+        ownership.forget_on_commit(db.session, user.id)
 
 
 FlathubUser.TABLES_FOR_DELETE.append(UserOwnedApp)
@@ -2105,6 +2149,7 @@ class RedeemableAppToken(Base):
 
         app = UserOwnedApp(app_id=self.appid, account=user.id, created=utils.utcnow())
         db.session.add(app)
+        ownership.add_on_commit(db.session, user.id, self.appid)
 
         self.token = None
         self.state = RedeemableAppTokenState.REDEEMED
@@ -2530,6 +2575,57 @@ class QualityModeration(Base):
 
         db.session.commit()
 
+    @classmethod
+    def passed_by_guidelines(
+        cls, db, guideline_ids: list[str]
+    ) -> dict[tuple[str, str], bool]:
+        """
+        Return the stored verdicts of the given guidelines for all apps
+        """
+        return {
+            (row.app_id, row.guideline_id): row.passed
+            for row in db.session.execute(
+                select(cls.app_id, cls.guideline_id, cls.passed).where(
+                    cls.guideline_id.in_(guideline_ids)
+                )
+            )
+        }
+
+    @classmethod
+    def bulk_upsert(
+        cls, db, verdicts: list[tuple[str, str, bool]], updated_by: int | None
+    ) -> int:
+        """
+        Insert or update many (app ID, guideline ID, passed) verdicts at once.
+        Rows whose verdict did not change are left alone, like in ``upsert``.
+        Returns how many verdicts were sent.
+        """
+        for batch in itertools.batched(verdicts, BULK_UPSERT_BATCH_SIZE):
+            stmt = insert(cls).values(
+                [
+                    {
+                        "app_id": app_id,
+                        "guideline_id": guideline_id,
+                        "passed": passed,
+                        "updated_by": updated_by,
+                    }
+                    for app_id, guideline_id, passed in batch
+                ]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[cls.app_id, cls.guideline_id],
+                set_={
+                    "passed": stmt.excluded.passed,
+                    "updated_by": stmt.excluded.updated_by,
+                    "updated_at": func.now(),
+                },
+                where=cls.passed.is_distinct_from(stmt.excluded.passed),
+            )
+            db.session.execute(stmt)
+
+        db.session.commit()
+        return len(verdicts)
+
     @classmethod
     def by_appid(
         cls, db, app_id: str
@@ -2801,6 +2897,74 @@ class AppOfTheDay(Base):
 
         return date.min
 
+    @classmethod
+    def oldest_candidates(cls, db, day: _dt.date) -> list[str]:
+        """
+        Return the apps that can be picked as app of the day for ``day`` and
+        have gone longest without being picked, apps never picked first.
+
+        Candidates are frontend apps that pass all quality guidelines, are not
+        excluded from app picks and are not an app of the week of that week.
+        """
+        last_picks = (
+            select(
+                AppOfTheDay.app_id,
+                func.max(AppOfTheDay.date).label("last_pick"),
+            )
+            .group_by(AppOfTheDay.app_id)
+            .subquery()
+        )
+        apps_of_the_week = select(AppsOfTheWeek.app_id).where(
+            AppsOfTheWeek.weekNumber == day.isocalendar().week,
+            AppsOfTheWeek.year == day.year,
+        )
+
+        candidates = (
+            select(
+                App.app_id,
+                func.rank()
+                .over(order_by=last_picks.c.last_pick.asc().nulls_first())
+                .label("pick_rank"),
+            )
+            .join(
+                Guideline,
+                and_(
+                    Guideline.needed_to_pass_since <= utils.utcnow().date(),
+                    or_(
+                        App.is_fullscreen_app == False,
+                        App.is_fullscreen_app == Guideline.show_on_fullscreen_app,
+                    ),
+                ),
+            )
+            .outerjoin(
+                QualityModeration,
+                and_(
+                    QualityModeration.guideline_id == Guideline.id,
+                    QualityModeration.app_id == App.app_id,
+                ),
+            )
+            .outerjoin(last_picks, last_picks.c.app_id == App.app_id)
+            .where(
+                App.for_frontend(),
+                App.excluded_from_app_picks == false(),
+                App.app_id.not_in(apps_of_the_week),
+            )
+            .group_by(App.app_id, last_picks.c.last_pick)
+            .having(
+                func.count(Guideline.id)
+                == func.sum(func.cast(QualityModeration.passed, Integer))
+            )
+            .subquery()
+        )
+
+        return list(
+            db.session.scalars(
+                select(candidates.c.app_id)
+                .where(candidates.c.pick_rank == 1)
+                .order_by(candidates.c.app_id)
+            )
+        )
+
 
 class AppsOfTheWeek(Base):
     """Curated apps of the week usually five"""
@@ -3114,80 +3278,45 @@ class App(Base):
     )
 
     def get_translated_appstream(self, locale: str) -> dict[str, Any] | None:
-        if not self.appstream:
-            return None
-
-        result = self.appstream.copy()
-
-        # Remove languages field from API response - it's internal data not needed by clients
-        result.pop("languages", None)
-
-        # Add content rating details filtered to the requested locale
-        if self.content_rating_details:
-            posix_locale = locale.replace("-", "_")
-            # Try exact match first
-            entry = self.content_rating_details.get(posix_locale)
-            # Then prefix match (e.g. "de" -> "de_DE"), keeping the actual key
-            # Prefer _US suffix for bare language codes (e.g. "en" -> "en_US")
-            if not entry:
-                us_key = posix_locale + "_US"
-                if us_key in self.content_rating_details:
-                    posix_locale = us_key
-                    entry = self.content_rating_details[us_key]
-                else:
-                    match = next(
-                        (
-                            (k, v)
-                            for k, v in self.content_rating_details.items()
-                            if k.startswith(posix_locale + "_")
-                        ),
-                        None,
-                    )
-                    if match:
-                        posix_locale, entry = match
-            # Fall back to en_US
-            if not entry:
-                posix_locale = "en_US"
-                entry = self.content_rating_details.get("en_US")
-            if entry:
-                result["content_rating_details"] = {posix_locale: entry}
-
-        if not self.localization:
-            return result
+        return appstream_documents.translate(
+            self.appstream, self.localization, self.content_rating_details, locale
+        )
 
-        translation = self.localization.get(locale)
-        if not translation:
-            # fallback to base locale (e.g. 'en' from 'en-US')
-            base_locale = locale.split("-")[0]
-            translation = self.localization.get(base_locale)
-            if not translation:
-                return result
-
-        for key in translation:
-            if key.startswith("screenshots_caption_"):
-                number = int(key.split("_")[-1])
-                result["screenshots"][number]["caption"] = translation[key]
-
-            if key.startswith("release_description_"):
-                number = int(key.split("_")[-1])
-                result["releases"][number]["description"] = translation[key]
-
-        translation = {
-            k: v
-            for k, v in translation.items()
-            if not k.startswith("screenshots_caption_")
-            and not k.startswith("release_description_")
-            # Don't include dict values for keys that should be arrays in the result
-            and not (isinstance(v, dict) and isinstance(result.get(k), list))
-        }
+    @classmethod
+    def by_appid(cls, db, app_id: str) -> Optional["App"]:
+        return db.session.query(App).filter(App.app_id == app_id).first()
 
-        result = result | translation
+    @classmethod
+    def for_frontend(cls):
+        """
+        SQL condition for apps shown on the frontend: desktop apps, and
+        console apps with an icon and screenshots
+        """
+        return or_(
+            cls.type == "desktop-application",
+            and_(
+                cls.type == "console-application",
+                _jsonb_truthy(cls.appstream["icon"]),
+                _jsonb_truthy(cls.appstream["screenshots"]),
+            ),
+        )
 
-        return result
+    @classmethod
+    async def async_by_appid(cls, db, app_id: str) -> Optional["App"]:
+        return await db.session.scalar(select(App).where(App.app_id == app_id))
 
     @classmethod
-    def by_appid(cls, db, app_id: str) -> Optional["App"]:
-        return db.session.query(App).filter(App.app_id == app_id).first()
+    def appstream_and_summaries(cls, db, types: list[str]) -> list[Any]:
+        """
+        Return the app ID, appstream and summary of every app of the given types
+        """
+        return list(
+            db.session.execute(
+                select(App.app_id, App.appstream, App.summary).where(
+                    App.type.in_(types)
+                )
+            )
+        )
 
     @classmethod
     def get_appstream(cls, db, app_id: str) -> dict | None:
@@ -3218,39 +3347,48 @@ class App(Base):
         return None
 
     @classmethod
-    def set_app(
-        cls, db, app_id: str, type, app_locales, content_rating_details
-    ) -> Optional["App"]:
-        app = App.by_appid(db, app_id)
-
-        if bool(app_locales) is False:
-            app_locales = None
+    def bulk_set_appstream(cls, db, rows: list[dict[str, Any]]) -> set[str]:
+        """Insert or update apps from appstream in a single statement.
 
-        if bool(content_rating_details) is False:
-            content_rating_details = None
+        Each row carries ``app_id``, ``type``, ``localization``,
+        ``content_rating_details``, ``appstream``, ``main_category`` and
+        ``sub_categories``. Rows whose values did not change are left alone.
+        Returns the IDs of the apps that were inserted or changed.
+        """
+        if not rows:
+            return set()
 
-        if app:
-            if (
-                app.type == type
-                and app.localization == app_locales
-                and app.content_rating_details == content_rating_details
-            ):
-                return app
-            app.localization = app_locales
-            app.content_rating_details = content_rating_details
-            app.type = type
-            db.session.commit()
-            return app
-        else:
-            app = App(
-                app_id=app_id,
-                type=type,
-                localization=app_locales,
-                content_rating_details=content_rating_details,
-            )
-            db.session.add(app)
-            db.session.commit()
-            return app
+        columns = (
+            "type",
+            "localization",
+            "content_rating_details",
+            "appstream",
+            "main_category",
+            "sub_categories",
+        )
+        stmt = insert(App).values(
+            [
+                {
+                    **row,
+                    "localization": row["localization"] or None,
+                    "content_rating_details": row["content_rating_details"] or None,
+                }
+                for row in rows
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[App.app_id],
+            set_={column: stmt.excluded[column] for column in columns},
+            where=or_(
+                *(
+                    getattr(App, column).is_distinct_from(stmt.excluded[column])
+                    for column in columns
+                )
+            ),
+        ).returning(App.app_id)
+        changed = set(db.session.scalars(stmt))
+        db.session.commit()
+        return changed
 
     @classmethod
     def delete_app(cls, db, app_id: str) -> None:
@@ -3258,11 +3396,25 @@ class App(Base):
         db.session.commit()
 
     @classmethod
-    def set_downloads(cls, db, app_id: str, downloads: int) -> None:
-        app = App.by_appid(db, app_id)
-        if app and app.installs_last_7_days != downloads:
-            app.installs_last_7_days = downloads
-            db.session.commit()
+    def bulk_set_downloads(cls, db, downloads: dict[str, int]) -> None:
+        """Set ``installs_last_7_days`` of many apps, skipping unchanged ones."""
+        for batch in itertools.batched(downloads.items(), BULK_UPDATE_BATCH_SIZE):
+            new_downloads = values(
+                column("app_id", String),
+                column("installs_last_7_days", Integer),
+                name="new_downloads",
+            ).data(list(batch))
+            db.session.execute(
+                update(App)
+                .where(App.app_id == new_downloads.c.app_id)
+                .where(
+                    App.installs_last_7_days.is_distinct_from(
+                        new_downloads.c.installs_last_7_days
+                    )
+                )
+                .values(installs_last_7_days=new_downloads.c.installs_last_7_days)
+            )
+        db.session.commit()
 
     @classmethod
     def get_fullscreen_app(cls, db, app_id: str) -> bool:
@@ -3271,6 +3423,14 @@ class App(Base):
             return app.is_fullscreen_app
         return False
 
+    @classmethod
+    async def async_get_fullscreen_app(cls, db, app_id: str) -> bool:
+        return bool(
+            await db.session.scalar(
+                select(App.is_fullscreen_app).where(App.app_id == app_id)
+            )
+        )
+
     @classmethod
     def fullscreen_app_ids(cls, db, app_ids: set[str]) -> set[str]:
         if not app_ids:
@@ -3325,13 +3485,25 @@ class App(Base):
             db.session.commit()
 
     @classmethod
-    def set_initial_release_at(
-        cls, db, app_id: str, initial_release_at: datetime
+    def bulk_set_initial_release_at(
+        cls, db, initial_release_at: dict[str, datetime]
     ) -> None:
-        app = App.by_appid(db, app_id)
-        if app and app.initial_release_at != initial_release_at:
-            app.initial_release_at = initial_release_at
-            db.session.commit()
+        """Backfill ``initial_release_at`` of apps that do not have one yet."""
+        if not initial_release_at:
+            return
+
+        backfill = values(
+            column("app_id", String),
+            column("initial_release_at", DateTime),
+            name="backfill",
+        ).data(list(initial_release_at.items()))
+        db.session.execute(
+            update(App)
+            .where(App.app_id == backfill.c.app_id)
+            .where(App.initial_release_at.is_(None))
+            .values(initial_release_at=backfill.c.initial_release_at)
+        )
+        db.session.commit()
 
     @classmethod
     def set_eol_data(
@@ -3398,7 +3570,37 @@ class App(Base):
 
     @classmethod
     def get_eol_data(cls, db, app_id: str, branch: str | None = None) -> bool:
-        app = App.by_appid(db, app_id)
+        return cls._branch_is_eol(App.by_appid(db, app_id), branch)
+
+    @classmethod
+    def eol_refs(cls, db, refs: set[tuple[str, str]]) -> set[tuple[str, str]]:
+        """
+        Return which of the given (app ID, branch) pairs are EOL, in one query
+        """
+        if not refs:
+            return set()
+        apps = {
+            app.app_id: app
+            for app in db.session.execute(
+                select(App.app_id, App.is_eol, App.eol_branches).where(
+                    App.app_id.in_({app_id for app_id, _ in refs})
+                )
+            )
+        }
+        return {
+            (app_id, branch)
+            for app_id, branch in refs
+            if cls._branch_is_eol(apps.get(app_id), branch)
+        }
+
+    @classmethod
+    async def async_get_eol_data(
+        cls, db, app_id: str, branch: str | None = None
+    ) -> bool:
+        return cls._branch_is_eol(await App.async_by_appid(db, app_id), branch)
+
+    @staticmethod
+    def _branch_is_eol(app: Optional["App"], branch: str | None) -> bool:
         if not app:
             return False
 
@@ -3433,6 +3635,18 @@ class App(Base):
         """
         if app is None:
             app = App.by_appid(db, app_id)
+        return cls._app_is_fully_eol(app)
+
+    @classmethod
+    async def async_is_fully_eol(
+        cls, db, app_id: str, app: Optional["App"] = None
+    ) -> bool:
+        if app is None:
+            app = await App.async_by_appid(db, app_id)
+        return cls._app_is_fully_eol(app)
+
+    @staticmethod
+    def _app_is_fully_eol(app: Optional["App"]) -> bool:
         if not app:
             return False
 
@@ -3868,6 +4082,20 @@ class Developers(Base):
         db.session.commit()
         return developer
 
+    @classmethod
+    def bulk_create(cls, db, names: set[str]) -> None:
+        if not names:
+            return
+        now = utils.utcnow()
+        db.session.execute(
+            insert(Developers)
+            .values(
+                [{"name": name, "updated_at": now, "created_at": now} for name in names]
+            )
+            .on_conflict_do_nothing(index_elements=[Developers.name])
+        )
+        db.session.commit()
+
     @classmethod
     def delete(cls, db, name: str):
         developer = cls.by_name(db, name)
@@ -4012,6 +4240,60 @@ class AppExtensionLookup(Base):
         db.commit()
 
 
+class AppAddonIndex(Base):
+    """Branches of the non-EOL addons, matched against extension points by prefix"""
+
+    __tablename__ = "app_addon_index"
+
+    id = mapped_column(Integer, primary_key=True)
+    addon_id = mapped_column(String, nullable=False)
+    # NULL when the addon's summary has no branch; it then matches any
+    branch = mapped_column(String, nullable=True)
+    updated_at = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index(
+            "app_addon_index_addon_id_pattern",
+            addon_id,
+            postgresql_ops={"addon_id": "varchar_pattern_ops"},
+        ),
+    )
+
+    @classmethod
+    def set_all(cls, db, addons: dict[str, str | None]) -> None:
+        db.query(cls).delete()
+        if addons:
+            db.execute(
+                insert(cls).values(
+                    [
+                        {"addon_id": addon_id, "branch": branch}
+                        for addon_id, branch in addons.items()
+                    ]
+                )
+            )
+        db.commit()
+
+    @classmethod
+    def matching(cls, db, prefixes: set[str]) -> list[tuple[str, str | None]]:
+        """Return the addons whose ID starts with any of ``prefixes``."""
+        if not prefixes:
+            return []
+
+        return [
+            (addon_id, branch)
+            for addon_id, branch in db.query(cls.addon_id, cls.branch)
+            .filter(
+                or_(
+                    *(
+                        cls.addon_id.startswith(prefix, autoescape=True)
+                        for prefix in prefixes
+                    )
+                )
+            )
+            .all()
+        ]
+
+
 class AppStats(Base):
     __tablename__ = "app_stats"
 
@@ -4028,6 +4310,8 @@ class AppStats(Base):
     )
     installs_per_day: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     installs_per_country: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # md5 of the stored values, so unchanged rows can be skipped on update
+    payload_hash: Mapped[str | None] = mapped_column(String, nullable=True)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, server_default=func.now()
     )
@@ -4041,6 +4325,10 @@ class AppStats(Base):
     def get_stats(cls, db, app_id: str) -> "AppStats | None":
         return db.query(cls).filter(cls.app_id == app_id).first()
 
+    @classmethod
+    async def async_get_stats(cls, db, app_id: str) -> "AppStats | None":
+        return await db.session.scalar(select(cls).where(cls.app_id == app_id))
+
     @classmethod
     def set_stats(cls, db, app_id: str, stats_data: dict) -> "AppStats":
         app_stats = db.query(cls).filter(cls.app_id == app_id).first()
@@ -4066,10 +4354,50 @@ class AppStats(Base):
         db.commit()
         return app_stats
 
+    @staticmethod
+    def _stats_row(app_id: str, stats_data: dict) -> dict[str, Any]:
+        row = {
+            "app_id": app_id,
+            "installs_total": stats_data.get("installs_total", 0),
+            "installs_last_month": stats_data.get("installs_last_month", 0),
+            "installs_last_7_days": stats_data.get("installs_last_7_days", 0),
+            "installs_per_day": stats_data.get("installs_per_day", {}),
+            "installs_per_country": stats_data.get("installs_per_country", {}),
+        }
+        row["payload_hash"] = hashlib.md5(
+            orjson.dumps(list(row.values()), option=orjson.OPT_SORT_KEYS)
+        ).hexdigest()
+        return row
+
     @classmethod
-    def bulk_set_stats(cls, db, stats_dict: dict[str, dict]) -> None:
-        for app_id, stats_data in stats_dict.items():
-            cls.set_stats(db, app_id, stats_data)
+    def bulk_set_stats(cls, db, stats_dict: dict[str, dict]) -> int:
+        """Upsert the stats of many apps in one transaction.
+
+        Rows whose payload hash matches the stored one are not sent at all.
+        Returns how many rows were written.
+        """
+        stored = dict(db.query(cls.app_id, cls.payload_hash).all())
+        rows = [
+            row
+            for app_id, stats_data in stats_dict.items()
+            if (row := cls._stats_row(app_id, stats_data))["payload_hash"]
+            != stored.get(app_id)
+        ]
+
+        for batch in itertools.batched(rows, BULK_UPSERT_BATCH_SIZE):
+            stmt = insert(cls).values(list(batch))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[cls.app_id],
+                set_={
+                    name: stmt.excluded[name] for name in batch[0] if name != "app_id"
+                }
+                | {"updated_at": func.now()},
+                where=cls.payload_hash.is_distinct_from(stmt.excluded.payload_hash),
+            )
+            db.execute(stmt)
+
+        db.commit()
+        return len(rows)
 
     def to_dict(self) -> dict:
         return {
@@ -0,0 +1,118 @@
+"""Per-user cache of owned apps for the purchase checks.
+
+Flatpak clients check every ref they update, so ``check-purchases`` and
+``generate-download-token`` see the same long lists of app IDs over and over.
+Apps a user owns are kept in a Redis set per user; only IDs not in it are
+looked up in the database, in one query, and those found are added.
+
+Only ownership is cached, never its absence, so a purchase is visible to the
+next check even if the replica has not caught up yet. Changes are written to
+the cache after the database transaction commits, so a rolled back purchase is
+never cached.
+"""
+
+import logging
+from collections.abc import Callable, Iterable
+from typing import cast
+
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+OWNED_APPS_KEY_PREFIX = "ownership:user:"
+OWNED_APPS_TTL = 24 * 3600
+_PENDING_OWNED = "ownership_pending_owned"
+_PENDING_FORGOTTEN = "ownership_pending_forgotten"
+
+
+def _redis() -> redis.Redis:
+    # Imported late since the worker package imports the models, which use this
+    from .worker.redis import redis_conn
+
+    return redis_conn
+
+
+def _key(user_id: int) -> str:
+    return f"{OWNED_APPS_KEY_PREFIX}{user_id}"
+
+
+def owned_apps(
+    user_id: int,
+    app_ids: list[str],
+    load: Callable[[list[str]], Iterable[str]],
+) -> set[str]:
+    """Return which of ``app_ids`` the user owns.
+
+    ``load`` is called with the IDs the cache does not know the user owns and
+    returns those the user does own.
+    """
+    if not app_ids:
+        return set()
+
+    key = _key(user_id)
+    try:
+        cached = cast("list[int]", _redis().smismember(key, app_ids))
+    except redis.RedisError:
+        logger.warning("Failed to read owned apps of user %s", user_id, exc_info=True)
+        cached = [0] * len(app_ids)
+
+    owned = {app_id for app_id, hit in zip(app_ids, cached, strict=True) if hit}
+    missing = [app_id for app_id in app_ids if app_id not in owned]
+    if not missing:
+        return owned
+
+    found = set(load(missing))
+    if found:
+        _add(user_id, found)
+    return owned | found
+
+
+def _add(user_id: int, app_ids: set[str]) -> None:
+    try:
+        with _redis().pipeline() as pipe:
+            pipe.sadd(_key(user_id), *app_ids)
+            pipe.expire(_key(user_id), OWNED_APPS_TTL)
+            pipe.execute()
+    except redis.RedisError:
+        logger.warning("Failed to cache owned apps of user %s", user_id, exc_info=True)
+
+
+def _forget(user_ids: set[int]) -> None:
+    try:
+        _redis().delete(*(_key(user_id) for user_id in user_ids))
+    except redis.RedisError:
+        logger.warning("Failed to drop owned apps of users %s", user_ids, exc_info=True)
+
+
+def add_on_commit(session: Session, user_id: int, app_id: str) -> None:
+    """Cache that the user owns ``app_id`` once ``session`` commits."""
+    session.info.setdefault(_PENDING_OWNED, set()).add((user_id, app_id))
+
+
+def forget_on_commit(session: Session, user_id: int) -> None:
+    """Drop the cached apps of the user once ``session`` commits."""
+    session.info.setdefault(_PENDING_FORGOTTEN, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session) -> None:
+    owned = session.info.pop(_PENDING_OWNED, set())
+    forgotten = session.info.pop(_PENDING_FORGOTTEN, set())
+
+    by_user: dict[int, set[str]] = {}
+    for user_id, app_id in owned:
+        if user_id not in forgotten:
+            by_user.setdefault(user_id, set()).add(app_id)
+    for user_id, app_ids in by_user.items():
+        _add(user_id, app_ids)
+    if forgotten:
+        _forget(forgotten)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction) -> None:
+    # Not caching a change that did commit only costs a database lookup
+    session.info.pop(_PENDING_OWNED, None)
+    session.info.pop(_PENDING_FORGOTTEN, None)
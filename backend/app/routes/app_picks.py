@@ -48,7 +48,7 @@ class AppOfTheDay(BaseModel):
         500: {"description": "Internal server error"},
     },
 )
-@cache.cached(ttl=21600)
+@cache.cached(ttl=21600, tags=("app_of_the_day",))
 async def get_app_of_the_day(
     date: AppPickDate,
 ) -> AppOfTheDay:
@@ -250,7 +250,7 @@ def _validate_scheduled_selection(
         500: {"description": "Internal server error"},
     },
 )
-@cache.cached(ttl=21600)
+@cache.cached(ttl=21600, tags=("app_of_the_week",))
 async def get_app_of_the_week(
     date: AppPickDate,
 ) -> AppsOfTheWeek:
@@ -285,7 +285,7 @@ async def get_app_of_the_week(
         500: {"description": "Internal server error"},
     },
 )
-@cache.cached(ttl=21600)
+@cache.cached(ttl=21600, tags=("curated_app_selections",))
 async def get_curated_app_selections(
     date: CuratedAppSelectionDate,
 ) -> CuratedAppSelections:
@@ -440,9 +440,7 @@ async def create_curated_app_selection_admin(
         )
         result = _selection_to_admin_response(selection, fullscreen_app_ids)
 
-    await cache.invalidate_cache_by_pattern(
-        "cache:endpoint:get_curated_app_selections:*"
-    )
+    await cache.invalidate_tags("curated_app_selections")
     return result
 
 
@@ -496,9 +494,7 @@ async def update_curated_app_selection_admin(
         )
         result = _selection_to_admin_response(selection, fullscreen_app_ids)
 
-    await cache.invalidate_cache_by_pattern(
-        "cache:endpoint:get_curated_app_selections:*"
-    )
+    await cache.invalidate_tags("curated_app_selections")
     return result
 
 
@@ -526,9 +522,7 @@ async def delete_curated_app_selection_admin(
             raise HTTPException(404, "Curated app selection schedule not found")
         db.session.delete(selection)
 
-    await cache.invalidate_cache_by_pattern(
-        "cache:endpoint:get_curated_app_selections:*"
-    )
+    await cache.invalidate_tags("curated_app_selections")
 
 
 class UpsertAppOfTheWeek(BaseModel):
@@ -563,7 +557,7 @@ async def set_app_of_the_week(
             body.position,
             moderator.user.id,
         )
-        await cache.invalidate_cache_by_pattern("cache:endpoint:get_app_of_the_week:*")
+        await cache.invalidate_tags("app_of_the_week")
 
 
 @router.post(
@@ -584,7 +578,7 @@ async def set_app_of_the_day(
     """Sets an app of the day"""
     with get_db("writer") as db:
         app = models.AppOfTheDay.set_app_of_the_day(db, body.app_id, body.day)
-        await cache.invalidate_cache_by_pattern("cache:endpoint:get_app_of_the_day:*")
+        await cache.invalidate_tags("app_of_the_day")
 
         if app:
             return AppOfTheDay(app_id=app.app_id, day=app.date)
@@ -1,7 +1,18 @@
 from fastapi import APIRouter, FastAPI, HTTPException, Path
-
-from .. import api_models, apps, cache, database, models, search, utils
-from ..database import get_db
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+
+from .. import (
+    api_models,
+    apps,
+    appstream_documents,
+    cache,
+    database,
+    models,
+    search,
+    utils,
+)
+from ..database import get_async_db
 
 router = APIRouter()
 
@@ -17,7 +28,7 @@ def register_to_app(app: FastAPI):
         200: {"description": "End-of-life rebase information"},
     },
 )
-@cache.cached(ttl=21600)
+@cache.cached(ttl=21600, local=True)
 async def get_eol_rebase() -> dict[str, list[str]]:
     eol_rebase = database.get_json_key("eol_rebase")
     if eol_rebase is None:
@@ -33,7 +44,7 @@ async def get_eol_rebase() -> dict[str, list[str]]:
         404: {"description": "App rebase information not found"},
     },
 )
-@cache.cached(ttl=21600)
+@cache.cached(ttl=21600, local=True, tags=("app:{app_id}",))
 async def get_eol_rebase_appid(
     app_id: str = Path(
         min_length=6,
@@ -54,7 +65,7 @@ async def get_eol_rebase_appid(
         200: {"description": "End-of-life messages for all apps"},
     },
 )
-@cache.cached(ttl=21600)
+@cache.cached(ttl=21600, local=True)
 async def get_eol_message() -> dict[str, str]:
     eol_messages = database.get_json_key("eol_message")
     if eol_messages is None:
@@ -70,7 +81,7 @@ async def get_eol_message() -> dict[str, str]:
         404: {"description": "App message not found"},
     },
 )
-@cache.cached(ttl=21600)
+@cache.cached(ttl=21600, local=True, tags=("app:{app_id}",))
 async def get_eol_message_appid(
     app_id: str = Path(
         min_length=6,
@@ -121,7 +132,7 @@ async def list_appstream(
         404: {"description": "App not found"},
     },
 )
-@cache.cached(ttl=3600)
+@cache.cached(ttl=3600, local=True, raw=True, exclude_none=True, tags=("app:{app_id}",))
 async def get_appstream(
     app_id: str = Path(
         min_length=6,
@@ -138,33 +149,35 @@ async def get_appstream(
     releases, and other metadata. The response is localized based on the
     locale parameter.
     """
-    with get_db("replica") as db_session:
-        from sqlalchemy.orm import load_only
-
-        app = (
-            db_session.session.query(models.App)
+    async with get_async_db("replica") as db_session:
+        app = await db_session.session.scalar(
+            select(models.App)
             .options(
                 load_only(
                     models.App.app_id,
                     models.App.type,
-                    models.App.appstream,
-                    models.App.localization,
-                    models.App.content_rating_details,
                     models.App.is_eol,
                     models.App.eol_branches,
                 )
             )
-            .filter(models.App.app_id == app_id)
-            .first()
+            .where(models.App.app_id == app_id)
         )
 
         if not app:
             raise HTTPException(status_code=404, detail="App not found")
 
-        if models.App.is_fully_eol(db_session, app_id, app=app):
+        if await models.App.async_is_fully_eol(db_session, app_id, app=app):
             raise HTTPException(status_code=404, detail="App not found")
 
-        result = app.get_translated_appstream(locale)
+        result = await appstream_documents.get_document(
+            await database.get_redis(), app_id, locale
+        )
+        if result is None:
+            # Not materialized yet, translate from the stored columns
+            await db_session.session.refresh(
+                app, ["appstream", "localization", "content_rating_details"]
+            )
+            result = app.get_translated_appstream(locale)
         if not result:
             raise HTTPException(status_code=404, detail="App not found")
 
@@ -194,7 +207,7 @@ async def get_appstream(
         200: {"description": "Whether the app is a fullscreen app"},
     },
 )
-@cache.cached(ttl=3600)
+@cache.cached(ttl=3600, tags=("app:{app_id}",))
 async def get_isFullscreenApp(
     app_id: str = Path(
         min_length=6,
@@ -204,8 +217,8 @@ async def get_isFullscreenApp(
     ),
 ) -> bool:
     """Check if an application is configured to run in fullscreen mode."""
-    with get_db("replica") as db_session:
-        return models.App.get_fullscreen_app(db_session, app_id)
+    async with get_async_db("replica") as db_session:
+        return await models.App.async_get_fullscreen_app(db_session, app_id)
 
 
 @router.post(
@@ -217,7 +230,7 @@ async def get_isFullscreenApp(
         400: {"description": "Invalid search query"},
     },
 )
-def post_search(
+async def post_search(
     query: search.SearchQuery, locale: str = "en"
 ) -> search.MeilisearchResponse[search.AppsIndex]:
     """
@@ -226,7 +239,7 @@ def post_search(
     Accepts a search query with filters and returns matching applications
     with facets and pagination information.
     """
-    return search.search_apps_post(query, locale)
+    return await search.search_apps_post(query, locale)
 
 
 @router.get(
@@ -237,13 +250,13 @@ def post_search(
         200: {"description": "List of available runtimes"},
     },
 )
-def get_runtime_list() -> dict[str, int]:
+async def get_runtime_list() -> dict[str, int]:
     """
     Get a list of available Flatpak runtimes with usage counts.
 
     Returns a mapping of runtime names to the number of apps using each runtime.
     """
-    return search.get_runtime_list()
+    return await search.get_runtime_list()
 
 
 @router.get(
@@ -258,7 +271,7 @@ def get_runtime_list() -> dict[str, int]:
         404: {"description": "App not found"},
     },
 )
-@cache.cached(ttl=3600)
+@cache.cached(ttl=3600, tags=("app:{app_id}",))
 async def get_summary(
     app_id: str = Path(
         min_length=6,
@@ -274,12 +287,12 @@ async def get_summary(
     Returns information about the app's size, architectures, runtime metadata,
     and flatpak-specific configuration.
     """
-    with get_db("replica") as db_session:
-        app = models.App.by_appid(db_session, app_id)
+    async with get_async_db("replica") as db_session:
+        app = await models.App.async_by_appid(db_session, app_id)
         if not app:
             raise HTTPException(status_code=404, detail="App not found")
 
-        if models.App.is_fully_eol(db_session, app_id):
+        if await models.App.async_is_fully_eol(db_session, app_id, app=app):
             raise HTTPException(status_code=404, detail="App not found")
 
         if app.summary:
@@ -292,7 +305,7 @@ async def get_summary(
                 runtime_appid, _, runtime_branch = summary["metadata"]["runtime"].split(
                     "/"
                 )
-                runtime_is_eol = models.App.get_eol_data(
+                runtime_is_eol = await models.App.async_get_eol_data(
                     db_session, runtime_appid, runtime_branch
                 )
                 summary["metadata"]["runtimeIsEol"] = runtime_is_eol
@@ -303,7 +316,9 @@ async def get_summary(
                     "runtimeInstalledSize" not in summary["metadata"]
                     or "runtimeName" not in summary["metadata"]
                 ):
-                    runtime_app = models.App.by_appid(db_session, runtime_appid)
+                    runtime_app = await models.App.async_by_appid(
+                        db_session, runtime_appid
+                    )
                     if runtime_app and runtime_app.summary:
                         branches = runtime_app.summary.get("branches", {})
                         branch_data = branches.get(runtime_branch, {})
@@ -353,7 +368,7 @@ def get_platforms() -> dict[str, utils.Platform]:
         200: {"description": "List of addons for the app"},
     },
 )
-@cache.cached(ttl=3600)
+@cache.cached(ttl=3600, tags=("app:{app_id}",))
 async def get_addons(app_id: str) -> list[str]:
     """
     Get a list of addon IDs that are compatible with the specified application.
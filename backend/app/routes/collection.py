@@ -24,7 +24,7 @@ def register_to_app(app: FastAPI):
         200: {"description": "List of all available categories"},
     },
 )
-@cached(ttl=3600)
+@cached(ttl=3600, local=True)
 async def get_categories() -> list[str]:
     """Get a list of all available main categories for filtering applications."""
     return [category.value for category in schemas.MainCategory]
@@ -38,7 +38,7 @@ async def get_categories() -> list[str]:
         400: {"description": "Invalid pagination parameters"},
     },
 )
-@cached(ttl=300)
+@cached(ttl=300, local=True, raw=True)
 async def get_category(
     response: Response,
     category: schemas.MainCategory,
@@ -65,7 +65,7 @@ async def get_category(
             status_code=400,
         )
 
-    result = search.get_by_selected_categories(
+    result = await search.get_by_selected_categories(
         [category], exclude_subcategories, page, per_page, locale, sort_by
     )
 
@@ -80,7 +80,7 @@ async def get_category(
         400: {"description": "Invalid pagination parameters"},
     },
 )
-@cached(ttl=300)
+@cached(ttl=300, local=True, raw=True)
 async def get_subcategory(
     response: Response,
     category: schemas.MainCategory,
@@ -114,7 +114,7 @@ async def get_subcategory(
             status_code=400,
         )
 
-    result = search.get_by_selected_category_and_subcategory(
+    result = await search.get_by_selected_category_and_subcategory(
         category, subcategory, exclude_subcategories, page, per_page, locale, sort_by
     )
 
@@ -183,7 +183,7 @@ async def get_keyword(
             status_code=400,
         )
 
-    result = search.get_by_keyword(keyword, page, per_page, locale)
+    result = await search.get_by_keyword(keyword, page, per_page, locale)
 
     return result
 
@@ -219,7 +219,7 @@ async def get_developers(
             status_code=400,
         )
 
-    return search.get_developers(page, per_page)
+    return await search.get_developers(page, per_page)
 
 
 @router.get(
@@ -255,7 +255,7 @@ async def get_developer(
             status_code=400,
         )
 
-    result = search.get_by_developer(developer, page, per_page, locale)
+    result = await search.get_by_developer(developer, page, per_page, locale)
 
     return result
 
@@ -292,7 +292,7 @@ async def get_recently_updated(
             status_code=400,
         )
 
-    result = search.get_by_updated_at(page, per_page, locale)
+    result = await search.get_by_updated_at(page, per_page, locale)
 
     return result
 
@@ -329,7 +329,7 @@ async def get_recently_added(
             status_code=400,
         )
 
-    result = search.get_by_added_at(page, per_page, locale)
+    result = await search.get_by_added_at(page, per_page, locale)
 
     return result
 
@@ -367,7 +367,7 @@ async def get_verified(
             status_code=400,
         )
 
-    result = search.get_by_verified(page, per_page, locale)
+    result = await search.get_by_verified(page, per_page, locale)
 
     return result
 
@@ -405,7 +405,7 @@ async def get_mobile(
             status_code=400,
         )
 
-    result = search.get_by_mobile(page, per_page, locale)
+    result = await search.get_by_mobile(page, per_page, locale)
 
     return result
 
@@ -442,7 +442,7 @@ async def get_popular_last_month(
             status_code=400,
         )
 
-    result = search.get_by_installs_last_month(page, per_page, locale)
+    result = await search.get_by_installs_last_month(page, per_page, locale)
 
     return result
 
@@ -480,7 +480,7 @@ async def get_trending_last_two_weeks(
             status_code=400,
         )
 
-    result = search.get_by_trending(page, per_page, locale)
+    result = await search.get_by_trending(page, per_page, locale)
 
     return result
 
@@ -518,6 +518,6 @@ async def get_most_favorited(
             status_code=400,
         )
 
-    result = search.get_by_favorites_count(page, per_page, locale)
+    result = await search.get_by_favorites_count(page, per_page, locale)
 
     return result
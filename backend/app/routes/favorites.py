@@ -39,9 +39,7 @@ async def add_to_favorites(
             db_session.commit()
 
             # Invalidate the favorites count cache for this app
-            await cache.invalidate_cache_by_pattern(
-                f"cache:endpoint:get_app_favorites_count:*{app_id}*"
-            )
+            await cache.invalidate_tags(f"favorites:{app_id}")
 
             return Response(status_code=HTTPStatus.OK)
         except Exception:
@@ -71,9 +69,7 @@ async def remove_from_favorites(
             db_session.commit()
 
             # Invalidate the favorites count cache for this app
-            await cache.invalidate_cache_by_pattern(
-                f"cache:endpoint:get_app_favorites_count:*{app_id}*"
-            )
+            await cache.invalidate_tags(f"favorites:{app_id}")
 
             return Response(status_code=HTTPStatus.OK)
         except Exception:
@@ -135,7 +131,7 @@ def is_favorited(
         200: {"description": "Number of users who favorited the app"},
     },
 )
-@cache.cached(ttl=3600)
+@cache.cached(ttl=3600, tags=("app:{app_id}", "favorites:{app_id}"))
 async def get_app_favorites_count(
     app_id: str,
 ) -> dict:
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, FastAPI, Response
 from feedgen.feed import FeedGenerator
+from sqlalchemy import select
 
 from .. import cache, models
-from ..database import get_db
+from ..database import get_async_db
 
 router = APIRouter(prefix="/feed")
 
@@ -62,10 +63,10 @@ async def generate_feed(column_name: str, title: str, description: str, link: st
 
     column = getattr(models.App, column_name)
 
-    with get_db("replica") as sqldb:
-        apps_query = (
-            sqldb.query(models.App)
-            .filter(column.isnot(None))
+    async with get_async_db("replica") as sqldb:
+        apps_query = await sqldb.session.execute(
+            select(models.App.app_id, models.App.type, models.App.appstream, column)
+            .where(column.isnot(None))
             .order_by(column.desc())
             .limit(60)
         )
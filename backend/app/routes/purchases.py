@@ -9,7 +9,7 @@ from fastapi import APIRouter, Body, FastAPI, HTTPException
 from gi.repository import AppStream  # type: ignore
 from pydantic import BaseModel
 
-from .. import cache, config, models, summary
+from .. import cache, config, models, ownership, summary
 from ..database import get_db, get_json_key
 from ..login_info import LoginStatusDep
 from ..verification import VerificationStatus, get_verification_status, is_appid_runtime
@@ -162,11 +162,12 @@ def _check_purchases(appids: list[str], user_id: int) -> None:
     canon_appids = list({canon_app_id(app_id) for app_id in appids})
 
     with get_db("replica") as db:
-        unowned = [
-            app_id
-            for app_id in canon_appids
-            if not models.UserOwnedApp.user_owns_app(db, user_id, app_id)
-        ]
+        owned = ownership.owned_apps(
+            user_id,
+            canon_appids,
+            lambda app_ids: models.UserOwnedApp.owned_app_ids(db, user_id, app_ids),
+        )
+    unowned = [app_id for app_id in canon_appids if app_id not in owned]
 
     if len(unowned) != 0:
         raise HTTPException(
@@ -82,7 +82,7 @@ async def get_stats(response: Response) -> StatsResult | None:
         404: {"description": "App statistics not found"},
     },
 )
-@cache.cached(ttl=900)
+@cache.cached(ttl=900, tags=("app:{app_id}",))
 async def get_stats_for_app(
     response: Response,
     app_id: str = Path(
@@ -94,15 +94,15 @@ async def get_stats_for_app(
     all: bool = False,
     days: int = 180,
 ) -> StatsResultApp | None:
-    if value := stats.get_installs_by_ids([app_id]).get(app_id, None):
+    if value := await stats.async_get_installs_by_id(app_id):
         if all:
-            return value
+            return StatsResultApp.model_validate(value)
 
         if per_day := value.get("installs_per_day"):
             requested_dates = list(per_day.keys())[-days:]
             requested_per_day = {date: per_day[date] for date in requested_dates}
             value["installs_per_day"] = requested_per_day
-            return value
+            return StatsResultApp.model_validate(value)
 
     response.status_code = 404
     return None
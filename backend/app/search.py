@@ -11,9 +11,16 @@ from sqlalchemy import text
 
 from app.models import ConnectedAccountProvider
 
-from . import config, schemas, search_health, search_index
+from . import (
+    config,
+    schemas,
+    search_client,
+    search_fingerprints,
+    search_health,
+    search_index,
+)
 from .database import get_db
-from .search_tasks import monitor_hybrid_index_task
+from .search_tasks import monitor_hybrid_index_task, monitor_lexical_index_task
 from .verification_method import VerificationMethod
 
 T = TypeVar("T")
@@ -137,6 +144,14 @@ client = meilisearch.Client(
 _configure_meilisearch_index(client)
 _configure_meilisearch_index(client, HYBRID_APPS_INDEX)
 
+# Index management goes through the synchronous client above, searches
+# through this pooled one
+async_client = search_client.AsyncSearchClient(
+    config.settings.meilisearch_url,
+    config.settings.meilisearch_key,
+    timeout=config.settings.search_timeout,
+)
+
 
 def _translate_name_and_summary[
     U: (
@@ -368,6 +383,30 @@ def _queue_hybrid_task(operation: Literal["update", "delete"], task: Any) -> boo
     return True
 
 
+def _monitor_lexical_task(task: Any, documents: list[dict[str, Any]]) -> None:
+    doc_ids = [document["id"] for document in documents]
+    try:
+        monitor_lexical_index_task.send(task.task_uid, doc_ids)
+    except Exception:
+        # Unmonitored documents may not have been written, so resend them
+        search_fingerprints.forget(doc_ids)
+        logger.exception(
+            "Unable to queue lexical Meilisearch task monitor",
+            extra={"task": getattr(task, "task_uid", None)},
+        )
+
+
+def _lexical_index_epoch() -> str | None:
+    """Return when the lexical index was created, or None if unknown."""
+    try:
+        return str(client.get_index(LEXICAL_APPS_INDEX).created_at)
+    except Exception:
+        logger.warning(
+            "Unable to read the lexical index, sending all documents", exc_info=True
+        )
+        return None
+
+
 def create_or_update_apps(apps_to_update: list[dict]):
     sanitized_documents = []
     skipped_for_sanitization = []
@@ -389,13 +428,23 @@ def create_or_update_apps(apps_to_update: list[dict]):
 
     if not sanitized_documents:
         logger.info(
-            "Meilisearch index update skipped: total=%d queued=0 skipped=%d",
+            "Meilisearch index update skipped: total=%d sent=0 unchanged=0 failed=%d",
             len(apps_to_update),
             len(skipped_for_sanitization),
         )
         return
 
     with search_health.hybrid_mutation_lock():
+        fingerprints = None
+        unchanged_count = 0
+        if epoch := _lexical_index_epoch():
+            fingerprints = search_fingerprints.DocumentFingerprints.load(
+                sanitized_documents, epoch
+            )
+            sanitized_documents, unchanged_count = fingerprints.changed(
+                sanitized_documents
+            )
+
         queued_count, skipped_for_meili, lexical_tasks = (
             _update_documents_with_fallback(
                 client.index(LEXICAL_APPS_INDEX), sanitized_documents
@@ -412,41 +461,52 @@ def create_or_update_apps(apps_to_update: list[dict]):
                 reason,
             )
 
-        try:
-            (
-                hybrid_queued_count,
-                skipped_for_hybrid,
-                hybrid_tasks,
-            ) = _update_documents_with_fallback(
-                client.index(HYBRID_APPS_INDEX), sanitized_documents
+        if fingerprints is not None:
+            # Hybrid failures are repaired by reconciling from the lexical
+            # index, so the lexical result decides what counts as sent
+            fingerprints.record(
+                [document for _, documents in lexical_tasks for document in documents]
             )
-            for document, reason in skipped_for_hybrid:
-                logger.warning(
-                    "Skipping hybrid Meilisearch document %s due to Meilisearch error: %s",
-                    _get_doc_identifier(document),
-                    reason,
+            for task, documents in lexical_tasks:
+                _monitor_lexical_task(task, documents)
+
+        if sanitized_documents:
+            try:
+                (
+                    hybrid_queued_count,
+                    skipped_for_hybrid,
+                    hybrid_tasks,
+                ) = _update_documents_with_fallback(
+                    client.index(HYBRID_APPS_INDEX), sanitized_documents
                 )
-            if skipped_for_hybrid:
+                for document, reason in skipped_for_hybrid:
+                    logger.warning(
+                        "Skipping hybrid Meilisearch document %s due to Meilisearch error: %s",
+                        _get_doc_identifier(document),
+                        reason,
+                    )
+                if skipped_for_hybrid:
+                    search_health.mark_hybrid_task_failed("synchronous")
+
+                monitor_failures = sum(
+                    not _queue_hybrid_task("update", task) for task, _ in hybrid_tasks
+                )
+                logger.info(
+                    "Hybrid Meilisearch index update queued: total=%d queued=%d skipped=%d monitor_failures=%d",
+                    len(sanitized_documents),
+                    hybrid_queued_count,
+                    len(skipped_for_hybrid),
+                    monitor_failures,
+                )
+            except Exception:
                 search_health.mark_hybrid_task_failed("synchronous")
-
-            monitor_failures = sum(
-                not _queue_hybrid_task("update", task) for task, _ in hybrid_tasks
-            )
-            logger.info(
-                "Hybrid Meilisearch index update queued: total=%d queued=%d skipped=%d monitor_failures=%d",
-                len(sanitized_documents),
-                hybrid_queued_count,
-                len(skipped_for_hybrid),
-                monitor_failures,
-            )
-        except Exception:
-            search_health.mark_hybrid_task_failed("synchronous")
-            logger.exception("Hybrid Meilisearch index update failed")
+                logger.exception("Hybrid Meilisearch index update failed")
 
     logger.info(
-        "Meilisearch index update queued: total=%d queued=%d skipped=%d",
+        "Meilisearch index update queued: total=%d sent=%d unchanged=%d failed=%d",
         len(apps_to_update),
         queued_count,
+        unchanged_count,
         len(skipped_for_sanitization) + len(skipped_for_meili),
     )
 
@@ -454,6 +514,7 @@ def create_or_update_apps(apps_to_update: list[dict]):
 def delete_apps(app_id_list: list[str]) -> None:
     if len(app_id_list) > 0:
         with search_health.hybrid_mutation_lock():
+            search_fingerprints.forget(app_id_list)
             lexical_task = client.index(LEXICAL_APPS_INDEX).delete_documents(
                 app_id_list
             )
@@ -466,7 +527,7 @@ def delete_apps(app_id_list: list[str]) -> None:
                 logger.exception("Hybrid Meilisearch index delete failed")
 
 
-def get_by_selected_categories(
+async def get_by_selected_categories(
     selected_categories: list[schemas.MainCategory],
     exclude_subcategories: list[str] | None,
     page: int | None,
@@ -490,7 +551,8 @@ def get_by_selected_categories(
     return _translate_name_and_summary(
         locale,
         MeilisearchResponse[AppsIndex].model_validate(
-            client.index(LEXICAL_APPS_INDEX).search(
+            await async_client.search(
+                LEXICAL_APPS_INDEX,
                 "",
                 {
                     "filter": [
@@ -512,7 +574,7 @@ def get_by_selected_categories(
     )
 
 
-def get_by_selected_category_and_subcategory(
+async def get_by_selected_category_and_subcategory(
     selected_category: schemas.MainCategory,
     selected_subcategory: list[str],
     exclude_subcategories: list[str] | None,
@@ -538,7 +600,8 @@ def get_by_selected_category_and_subcategory(
     return _translate_name_and_summary(
         locale,
         MeilisearchResponse[AppsIndex].model_validate(
-            client.index(LEXICAL_APPS_INDEX).search(
+            await async_client.search(
+                LEXICAL_APPS_INDEX,
                 "",
                 {
                     "filter": [
@@ -561,13 +624,14 @@ def get_by_selected_category_and_subcategory(
     )
 
 
-def get_by_installs_last_month(
+async def get_by_installs_last_month(
     page: int | None, hits_per_page: int | None, locale: str
 ) -> MeilisearchResponse[AppsIndex]:
     return _translate_name_and_summary(
         locale,
         MeilisearchResponse[AppsIndex].model_validate(
-            client.index(LEXICAL_APPS_INDEX).search(
+            await async_client.search(
+                LEXICAL_APPS_INDEX,
                 "",
                 {
                     "sort": ["installs_last_month:desc"],
@@ -583,13 +647,14 @@ def get_by_installs_last_month(
     )
 
 
-def get_by_trending(
+async def get_by_trending(
     page: int | None, hits_per_page: int | None, locale: str
 ) -> MeilisearchResponse[AppsIndex]:
     return _translate_name_and_summary(
         locale,
         MeilisearchResponse[AppsIndex].model_validate(
-            client.index(LEXICAL_APPS_INDEX).search(
+            await async_client.search(
+                LEXICAL_APPS_INDEX,
                 "",
                 {
                     "sort": ["trending:desc"],
@@ -605,13 +670,14 @@ def get_by_trending(
     )
 
 
-def get_by_added_at(
+async def get_by_added_at(
     page: int | None, hits_per_page: int | None, locale: str
 ) -> MeilisearchResponse[AppsIndex]:
     return _translate_name_and_summary(
         locale,
         MeilisearchResponse[AppsIndex].model_validate(
-            client.index(LEXICAL_APPS_INDEX).search(
+            await async_client.search(
+                LEXICAL_APPS_INDEX,
                 "",
                 {
                     "sort": ["added_at:desc"],
@@ -627,13 +693,14 @@ def get_by_added_at(
     )
 
 
-def get_by_updated_at(
+async def get_by_updated_at(
     page: int | None, hits_per_page: int | None, locale: str
 ) -> MeilisearchResponse[AppsIndex]:
     return _translate_name_and_summary(
         locale,
         MeilisearchResponse[AppsIndex].model_validate(
-            client.index(LEXICAL_APPS_INDEX).search(
+            await async_client.search(
+                LEXICAL_APPS_INDEX,
                 "",
                 {
                     "sort": ["updated_at:desc"],
@@ -649,13 +716,14 @@ def get_by_updated_at(
     )
 
 
-def get_by_verified(
+async def get_by_verified(
     page: int | None, hits_per_page: int | None, locale: str
 ) -> MeilisearchResponse[AppsIndex]:
     return _translate_name_and_summary(
         locale,
         MeilisearchResponse[AppsIndex].model_validate(
-            client.index(LEXICAL_APPS_INDEX).search(
+            await async_client.search(
+                LEXICAL_APPS_INDEX,
                 "",
                 {
                     "filter": [
@@ -672,13 +740,14 @@ def get_by_verified(
     )
 
 
-def get_by_favorites_count(
+async def get_by_favorites_count(
     page: int | None, hits_per_page: int | None, locale: str
 ) -> MeilisearchResponse[AppsIndex]:
     return _translate_name_and_summary(
         locale,
         MeilisearchResponse[AppsIndex].model_validate(
-            client.index(LEXICAL_APPS_INDEX).search(
+            await async_client.search(
+                LEXICAL_APPS_INDEX,
                 "",
                 {
                     "filter": [
@@ -694,13 +763,14 @@ def get_by_favorites_count(
     )
 
 
-def get_by_mobile(
+async def get_by_mobile(
     page: int | None, hits_per_page: int | None, locale: str
 ) -> MeilisearchResponse[AppsIndex]:
     return _translate_name_and_summary(
         locale,
         MeilisearchResponse[AppsIndex].model_validate(
-            client.index(LEXICAL_APPS_INDEX).search(
+            await async_client.search(
+                LEXICAL_APPS_INDEX,
                 "",
                 {
                     "filter": [
@@ -717,7 +787,7 @@ def get_by_mobile(
     )
 
 
-def get_by_developer(
+async def get_by_developer(
     developer: str, page: int | None, hits_per_page: int | None, locale: str
 ) -> MeilisearchResponse[AppsIndex]:
     escaped_developer = (
@@ -727,7 +797,8 @@ def get_by_developer(
     return _translate_name_and_summary(
         locale,
         MeilisearchResponse[AppsIndex].model_validate(
-            client.index(LEXICAL_APPS_INDEX).search(
+            await async_client.search(
+                LEXICAL_APPS_INDEX,
                 "",
                 {
                     "filter": [
@@ -744,7 +815,7 @@ def get_by_developer(
     )
 
 
-def get_by_keyword(
+async def get_by_keyword(
     keyword: str, page: int | None, hits_per_page: int | None, locale: str
 ) -> MeilisearchResponse[AppsIndex]:
     escaped_keyword = (
@@ -754,7 +825,8 @@ def get_by_keyword(
     return _translate_name_and_summary(
         locale,
         MeilisearchResponse[AppsIndex].model_validate(
-            client.index(LEXICAL_APPS_INDEX).search(
+            await async_client.search(
+                LEXICAL_APPS_INDEX,
                 "",
                 {
                     "filter": [
@@ -849,7 +921,7 @@ def _log_search_timing(
     )
 
 
-def search_apps_post(
+async def search_apps_post(
     searchquery: SearchQuery, locale: str
 ) -> MeilisearchResponse[AppsIndex]:
     options = _search_apps_options(searchquery)
@@ -864,8 +936,8 @@ def search_apps_post(
         logger.warning(
             "Hybrid Meilisearch index has failed tasks; using lexical fallback"
         )
-        raw_response = client.index(LEXICAL_APPS_INDEX).search(
-            searchquery.query, options
+        raw_response = await async_client.search(
+            LEXICAL_APPS_INDEX, searchquery.query, options
         )
         mode = "hybrid_unhealthy_fallback"
         fallback_error_code = "index_unhealthy"
@@ -878,8 +950,11 @@ def search_apps_post(
             },
         }
         try:
-            raw_response = client.index(HYBRID_APPS_INDEX).search(
-                searchquery.query, hybrid_options
+            raw_response = await async_client.search(
+                HYBRID_APPS_INDEX,
+                searchquery.query,
+                hybrid_options,
+                timeout=config.settings.search_hybrid_timeout,
             )
             mode = "hybrid"
         except (
@@ -899,13 +974,13 @@ def search_apps_post(
                     "elapsed_ms": elapsed_ms,
                 },
             )
-            raw_response = client.index(LEXICAL_APPS_INDEX).search(
-                searchquery.query, options
+            raw_response = await async_client.search(
+                LEXICAL_APPS_INDEX, searchquery.query, options
             )
             mode = "hybrid_fallback"
     else:
-        raw_response = client.index(LEXICAL_APPS_INDEX).search(
-            searchquery.query, options
+        raw_response = await async_client.search(
+            LEXICAL_APPS_INDEX, searchquery.query, options
         )
 
     response = _translate_name_and_summary(
@@ -916,8 +991,9 @@ def search_apps_post(
     return response
 
 
-def get_runtime_list() -> dict[str, int]:
-    return client.index(LEXICAL_APPS_INDEX).search(
+async def get_runtime_list() -> dict[str, int]:
+    result = await async_client.search(
+        LEXICAL_APPS_INDEX,
         "",
         {
             "filter": [
@@ -928,7 +1004,8 @@ def get_runtime_list() -> dict[str, int]:
             "sort": ["installs_last_month:desc"],
             "facets": ["runtime"],
         },
-    )["facetDistribution"]["runtime"]
+    )
+    return result["facetDistribution"]["runtime"]
 
 
 class DevelopersResponse(BaseModel):
@@ -950,8 +1027,11 @@ class KeywordsResponse(BaseModel):
     per_page: int
 
 
-def get_developers(page: int | None, hits_per_page: int | None) -> DevelopersResponse:
-    result = client.index(LEXICAL_APPS_INDEX).search(
+async def get_developers(
+    page: int | None, hits_per_page: int | None
+) -> DevelopersResponse:
+    result = await async_client.search(
+        LEXICAL_APPS_INDEX,
         "",
         {
             "facets": ["developer_name"],
@@ -1012,24 +1092,48 @@ def get_keywords(page: int | None, hits_per_page: int | None) -> KeywordsRespons
     )
 
 
-def get_number_of_verified_apps() -> int:
+VERIFIED_APPS_OPTIONS: dict[str, Any] = {
+    "filter": [
+        "verification_verified = true",
+        "type IN [console-application, desktop-application]",
+        "NOT icon IS NULL",
+    ],
+    "limit": 1,
+    "facets": [
+        "verification_verified",
+    ],
+}
+
+
+def _verified_apps_count(result: dict[str, Any]) -> int:
     return (
-        client.index(LEXICAL_APPS_INDEX)
-        .search(
-            "",
-            {
-                "filter": [
-                    "verification_verified = true",
-                    "type IN [console-application, desktop-application]",
-                    "NOT icon IS NULL",
-                ],
-                "limit": 1,
-                "facets": [
-                    "verification_verified",
-                ],
-            },
-        )
-        .get("facetDistribution", {})
+        result.get("facetDistribution", {})
         .get("verification_verified", {})
         .get("true", 0)
     )
+
+
+async def get_number_of_verified_apps() -> int:
+    result = await async_client.search(LEXICAL_APPS_INDEX, "", VERIFIED_APPS_OPTIONS)
+    return _verified_apps_count(result)
+
+
+async def get_search_totals() -> tuple[dict[str, int], int]:
+    """Return the number of apps per main category and of verified apps.
+
+    Both are counted on the lexical index in one multi-search.
+    """
+    categories, verified = await async_client.multi_search(
+        [
+            search_client.MultiSearchQuery(
+                LEXICAL_APPS_INDEX, "", _search_apps_options(SearchQuery(query=""))
+            ),
+            search_client.MultiSearchQuery(
+                LEXICAL_APPS_INDEX, "", VERIFIED_APPS_OPTIONS
+            ),
+        ]
+    )
+    main_categories = (categories.get("facetDistribution") or {}).get(
+        "main_categories", {}
+    )
+    return main_categories, _verified_apps_count(verified)
@@ -0,0 +1,160 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+import meilisearch.errors
+import orjson
+
+DEFAULT_TIMEOUT = 5.0
+MAX_CONNECTIONS = 50
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 30.0
+
+
+@dataclass
+class MultiSearchQuery:
+    index_uid: str
+    query: str
+    options: dict[str, Any] | None = None
+
+    def payload(self) -> dict[str, Any]:
+        return {"indexUid": self.index_uid, "q": self.query, **(self.options or {})}
+
+
+class SearchApiError(meilisearch.errors.MeilisearchApiError):
+    """A ``MeilisearchApiError`` read from an ``httpx.Response``.
+
+    The base class parses a ``requests.Response``; callers keep catching
+    ``MeilisearchApiError`` and get the same attributes.
+    """
+
+    def __init__(self, response: httpx.Response):
+        self.status_code = response.status_code
+        self.code = None
+        self.link = None
+        self.type = None
+        self.message = str(response.status_code)
+        try:
+            body = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            body = None
+        if isinstance(body, dict):
+            self.message = body.get("message") or self.message
+            self.code = body.get("code")
+            self.link = body.get("link")
+            self.type = body.get("type")
+        meilisearch.errors.MeilisearchError.__init__(self, self.message)
+
+
+class AsyncSearchClient:
+    """Searches Meilisearch over a pooled ``httpx.AsyncClient``.
+
+    ``search`` sends one query to its index's search endpoint.
+    ``multi_search`` sends queries a caller needs together, e.g. the totals
+    of one page, as one ``/multi-search`` request; they share its timeout,
+    so only queries that should wait as long belong in the same call. Errors
+    are raised as the ``meilisearch.errors`` exceptions the synchronous
+    client raises.
+
+    The HTTP client is created on first use and again if the event loop
+    changed, so the worker can call in through ``asyncio.run``.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        api_key: str | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _http_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            self._client = httpx.AsyncClient(
+                base_url=self.url,
+                headers=headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+                transport=self.transport,
+            )
+            self._loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+    async def search(
+        self,
+        index_uid: str,
+        query: str,
+        options: dict[str, Any] | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Search ``index_uid`` and return the raw Meilisearch response.
+
+        Raises ``MeilisearchTimeoutError`` if no response arrived within
+        ``timeout`` seconds.
+        """
+        return await self._post(
+            f"/indexes/{index_uid}/search",
+            {"q": query, **(options or {})},
+            timeout or self.timeout,
+        )
+
+    async def multi_search(
+        self, queries: list[MultiSearchQuery], timeout: float | None = None
+    ) -> list[dict[str, Any]]:
+        """Run ``queries`` in one request and return their raw responses.
+
+        Meilisearch fails the whole request if any query is invalid.
+        """
+        if not queries:
+            return []
+        response = await self._post(
+            "/multi-search",
+            {"queries": [query.payload() for query in queries]},
+            timeout or self.timeout,
+        )
+        results = response["results"]
+        for result in results:
+            result.pop("indexUid", None)
+        return results
+
+    async def _post(
+        self, path: str, payload: dict[str, Any], timeout: float
+    ) -> dict[str, Any]:
+        try:
+            async with asyncio.timeout(timeout):
+                response = await self._http_client().post(
+                    path, content=orjson.dumps(payload), timeout=timeout
+                )
+        except (TimeoutError, httpx.TimeoutException) as error:
+            raise meilisearch.errors.MeilisearchTimeoutError(
+                f"Request to {path} timed out after {timeout}s"
+            ) from error
+        except httpx.TransportError as error:
+            raise meilisearch.errors.MeilisearchCommunicationError(
+                str(error)
+            ) from error
+
+        if response.is_error:
+            raise SearchApiError(response)
+        return orjson.loads(response.content)
@@ -0,0 +1,138 @@
+import hashlib
+import logging
+from typing import Any, cast
+
+import orjson
+import redis
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINTS_KEY = "search:apps:fingerprints"
+FIELD_GROUPS_KEY = "search:apps:fingerprint-groups"
+INDEX_EPOCH_KEY = "search:apps:fingerprint-epoch"
+BATCH_SIZE = 1000
+
+
+def _redis() -> redis.Redis:
+    # Imported late since the worker package imports the search tasks, which
+    # use this
+    from .worker.redis import redis_conn
+
+    return redis_conn
+
+
+def _field_group(document: dict[str, Any]) -> tuple[str, list[str]]:
+    fields = sorted(field for field in document if field != "id")
+    group = hashlib.blake2b(",".join(fields).encode(), digest_size=4).hexdigest()
+    return group, fields
+
+
+def _digest(document: dict[str, Any]) -> str:
+    payload = orjson.dumps(document, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=12).hexdigest()
+
+
+class DocumentFingerprints:
+    """Digests of the search documents last sent to Meilisearch.
+
+    Callers send documents with different sets of fields, e.g. the full
+    appstream document or just ``trending``. Each set of fields is a group,
+    and ``FINGERPRINTS_KEY`` maps every document id to the digest of each
+    group last sent for it. A document is only sent again when its group's
+    digest changed. Sending a group forgets the digests of the document's
+    other groups that share fields with it, since those values are no
+    longer what the index holds.
+    """
+
+    def __init__(
+        self,
+        stored: dict[str, dict[str, str]],
+        group_fields: dict[str, set[str]],
+    ):
+        self.stored = stored
+        self.group_fields = group_fields
+
+    @classmethod
+    def load(
+        cls, documents: list[dict[str, Any]], epoch: str
+    ) -> "DocumentFingerprints":
+        """Load the digests of ``documents``.
+
+        ``epoch`` identifies the index the digests describe. If it changed,
+        e.g. because the index was recreated, the digests are dropped.
+        """
+        redis_conn = _redis()
+        if redis_conn.get(INDEX_EPOCH_KEY) != epoch:
+            logger.info("Search index changed, dropping document fingerprints")
+            with redis_conn.pipeline() as pipe:
+                pipe.delete(FINGERPRINTS_KEY, FIELD_GROUPS_KEY)
+                pipe.set(INDEX_EPOCH_KEY, epoch)
+                pipe.execute()
+
+        ids = list({document["id"] for document in documents})
+        stored = {}
+        for i in range(0, len(ids), BATCH_SIZE):
+            batch = ids[i : i + BATCH_SIZE]
+            values = cast("list[str | None]", redis_conn.hmget(FINGERPRINTS_KEY, batch))
+            for doc_id, value in zip(batch, values, strict=True):
+                if value is not None:
+                    stored[doc_id] = orjson.loads(value)
+
+        groups = cast("dict[str, str]", redis_conn.hgetall(FIELD_GROUPS_KEY))
+        group_fields = {
+            group: set(fields.split(",")) for group, fields in groups.items()
+        }
+        return cls(stored, group_fields)
+
+    def changed(
+        self, documents: list[dict[str, Any]]
+    ) -> tuple[list[dict[str, Any]], int]:
+        """Return the documents that differ from what was last sent."""
+        changed = []
+        for document in documents:
+            group, _ = _field_group(document)
+            if self.stored.get(document["id"], {}).get(group) != _digest(document):
+                changed.append(document)
+        return changed, len(documents) - len(changed)
+
+    def record(self, documents: list[dict[str, Any]]) -> None:
+        """Remember ``documents`` as sent.
+
+        They are recorded once their task is enqueued; if the task then
+        fails, ``forget`` drops them again so that they are resent.
+        """
+        if not documents:
+            return
+
+        updates = {}
+        new_groups = {}
+        for document in documents:
+            group, fields = _field_group(document)
+            if group not in self.group_fields:
+                self.group_fields[group] = set(fields)
+                new_groups[group] = ",".join(fields)
+
+            entry = self.stored.setdefault(document["id"], {})
+            for other in list(entry):
+                other_fields = self.group_fields.get(other)
+                if other != group and (
+                    other_fields is None or not other_fields.isdisjoint(fields)
+                ):
+                    del entry[other]
+            entry[group] = _digest(document)
+            updates[document["id"]] = orjson.dumps(entry)
+
+        with _redis().pipeline() as pipe:
+            if new_groups:
+                pipe.hset(FIELD_GROUPS_KEY, mapping=new_groups)
+            items = list(updates.items())
+            for i in range(0, len(items), BATCH_SIZE):
+                pipe.hset(FINGERPRINTS_KEY, mapping=dict(items[i : i + BATCH_SIZE]))
+            pipe.execute()
+
+
+def forget(doc_ids: list[str]) -> None:
+    """Drop the digests of documents removed from or not written to the index."""
+    redis_conn = _redis()
+    for i in range(0, len(doc_ids), BATCH_SIZE):
+        redis_conn.hdel(FINGERPRINTS_KEY, *doc_ids[i : i + BATCH_SIZE])
@@ -3,7 +3,7 @@ from typing import Any, Literal
 
 import dramatiq
 
-from . import search_health
+from . import search_fingerprints, search_health
 
 logger = logging.getLogger(__name__)
 
@@ -138,3 +138,34 @@ def monitor_hybrid_index_task(
         },
     )
     _schedule_reconciliation(0)
+
+
+@dramatiq.actor(time_limit=TASK_TIMEOUT_MS + 60_000)
+def monitor_lexical_index_task(task_uid: int, doc_ids: list[str]) -> None:
+    """Forget the fingerprints of ``doc_ids`` unless their task succeeds.
+
+    Fingerprints are recorded as soon as the documents are enqueued, so a
+    failed task would otherwise keep its documents from being sent again.
+    """
+    from . import search
+
+    try:
+        result = search.client.wait_for_task(
+            task_uid,
+            timeout_in_ms=TASK_TIMEOUT_MS,
+            interval_in_ms=TASK_INTERVAL_MS,
+        )
+    except Exception:
+        search_fingerprints.forget(doc_ids)
+        logger.exception(
+            "Lexical index task monitoring failed; forgetting its fingerprints",
+            extra={"task": task_uid},
+        )
+        return
+
+    if result.status != "succeeded":
+        search_fingerprints.forget(doc_ids)
+        logger.error(
+            "Lexical Meilisearch task failed; forgetting its fingerprints",
+            extra={"task": task_uid, "status": result.status},
+        )
@@ -1,20 +1,27 @@
 import asyncio
-import concurrent.futures
 import copy
 import datetime
-import json
 import logging
 from collections import defaultdict
+from collections.abc import Iterator
 from typing import TypedDict, cast
-from urllib.parse import urlparse, urlunparse
 
-import httpx
+import numpy as np
 import orjson
 
 from app import utils
 
-from . import config, database, models, schemas, search
-from .trending import calculate_trending_score as _calculate_trending_score
+from . import config, database, models, schemas, search, stats_fetcher, year_totals
+from .installs_store import (
+    FIRST_STATS_DATE,
+    DailyInstalls,
+    DailyInstallsWriter,
+    delete_daily_installs,
+    has_daily_installs,
+    load_daily_installs,
+    load_first_seen,
+)
+from .trending import calculate_trending_scores as _calculate_trending_scores
 from .worker.redis import redis_conn
 
 logger = logging.getLogger(__name__)
@@ -37,16 +44,18 @@ class StatsFromServer(TypedDict):
     refs: dict[str, dict[str, list[int]]]
 
 
-FIRST_STATS_DATE = datetime.date(2018, 4, 29)
-
 AGGREGATES_KEYS = {
     "totals": "stats:agg:totals",
-    "per_day": "stats:agg:per_day",
     "per_country": "stats:agg:per_country",
     "per_os_version": "stats:agg:per_os_version",
     "global": "stats:agg:global",
     "last_date": "stats:agg:last_date",
 }
+# Superseded by the per-app runs of the installs store
+LEGACY_PER_DAY_KEY = "stats:agg:per_day"
+# flathub-stats keeps updating the most recent days, so they are never
+# folded into the aggregates and are read fresh on every update instead
+PARTIAL_STATS_DAYS = 2
 
 # Download thresholds for filtering meaningful statistics
 # Used to exclude apps/categories with insufficient downloads from various calculations
@@ -62,71 +71,35 @@ HIGH_DOWNLOADS_THRESHOLD = (
 MINIMUM_GEM_THRESHOLD = 1000  # Minimum threshold for hidden gems calculation
 
 
+def _date_range(sdate: datetime.date, edate: datetime.date) -> list[datetime.date]:
+    return [sdate + datetime.timedelta(days=i) for i in range((edate - sdate).days + 1)]
+
+
 def _fetch_stats_parallel(
     sdate: datetime.date, edate: datetime.date
 ) -> list[StatsFromServer | None]:
-    dates = [
-        sdate + datetime.timedelta(days=i) for i in range((edate - sdate).days + 1)
-    ]
-
-    results: list[StatsFromServer | None] = [None] * len(dates)
-    with (
-        httpx.Client() as shared_session,
-        concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor,
-    ):
-        future_to_index = {
-            executor.submit(_get_stats_for_date, date, shared_session): idx
-            for idx, date in enumerate(dates)
-        }
+    return cast(
+        "list[StatsFromServer | None]",
+        stats_fetcher.fetch_days(_date_range(sdate, edate)),
+    )
 
-        for future in concurrent.futures.as_completed(future_to_index):
-            idx = future_to_index[future]
-            try:
-                results[idx] = future.result()
-            except Exception:
-                logger.exception("Failed to fetch stats for index %s", idx)
 
-    return results
+def _get_stats_for_dates(
+    dates: list[datetime.date],
+) -> list[StatsFromServer | None]:
+    return cast(
+        "list[StatsFromServer | None]",
+        stats_fetcher.fetch_days(dates, raise_errors=True),
+    )
 
 
-def _get_stats_for_date(
-    date: datetime.date, session: httpx.Client | None = None
-) -> StatsFromServer | None:
-    stats_json_url = urlparse(
-        config.settings.stats_baseurl + date.strftime("/%Y/%m/%d.json")
+def _iter_stats_for_period(
+    sdate: datetime.date, edate: datetime.date
+) -> Iterator[tuple[datetime.date, StatsFromServer | None]]:
+    return cast(
+        "Iterator[tuple[datetime.date, StatsFromServer | None]]",
+        stats_fetcher.iter_days(_date_range(sdate, edate), raise_errors=True),
     )
-    if stats_json_url.scheme == "file":
-        try:
-            with open(stats_json_url.path) as stats_file:
-                stats = json.load(stats_file)
-        except FileNotFoundError:
-            return None
-        return stats
-    redis_key = f"stats:date:{date.isoformat()}"
-    stats_txt = redis_conn.get(redis_key)
-    if stats_txt is None:
-        if session is None:
-            with httpx.Client() as temp_session:
-                response = temp_session.get(urlunparse(stats_json_url), timeout=30.0)
-                if response.status_code == 404:
-                    return None
-                response.raise_for_status()
-                stats = response.json()
-        else:
-            response = session.get(urlunparse(stats_json_url), timeout=30.0)
-            if response.status_code == 404:
-                return None
-            response.raise_for_status()
-            stats = response.json()
-        expire = (
-            datetime.timedelta(hours=4)
-            if date > utils.utcnow().date() + datetime.timedelta(days=-7)
-            else None
-        )
-        redis_conn.set(redis_key, orjson.dumps(stats), ex=expire)
-    else:
-        stats = orjson.loads(cast("str | bytes", stats_txt))
-    return stats
 
 
 def _load_aggregates() -> dict:
@@ -149,13 +122,14 @@ def _delete_aggregates():
     pipe = redis_conn.pipeline()
     for redis_key in AGGREGATES_KEYS.values():
         pipe.delete(redis_key)
+    pipe.delete(LEGACY_PER_DAY_KEY)
     pipe.execute()
+    delete_daily_installs()
 
 
 def _init_empty_aggregates() -> dict:
     return {
         "totals": {},
-        "per_day": {},
         "per_country": {},
         "per_os_version": {},
         "global": {
@@ -171,7 +145,7 @@ def _init_empty_aggregates() -> dict:
 def _normalize_aggregates(agg: dict) -> dict:
     normalized = _init_empty_aggregates()
 
-    for key in ("totals", "per_day", "per_country", "per_os_version"):
+    for key in ("totals", "per_country", "per_os_version"):
         if isinstance(agg.get(key), dict):
             normalized[key] = agg[key]
 
@@ -210,11 +184,11 @@ def _update_global_stats_for_date(
 
 def _update_aggregates_for_date(
     date: datetime.date, stats: StatsFromServer | None, agg: dict
-) -> None:
+) -> dict[str, int]:
+    """Add a day to the aggregates and return the day's installs per app."""
+    installs: dict[str, int] = defaultdict(int)
     if stats is None:
-        return
-
-    date_str = date.isoformat()
+        return installs
 
     if stats.get("refs"):
         for app_id, app_stats in stats["refs"].items():
@@ -226,8 +200,7 @@ def _update_aggregates_for_date(
                 arch_totals[1] += downloads[1]
                 arch_totals[2] += downloads[0] - downloads[1]
 
-            per_day_for_app = agg["per_day"].setdefault(clean_id, {})
-            per_day_for_app[date_str] = _sum_installs_by_arch(app_stats)
+            installs[clean_id] += _sum_installs_by_arch(app_stats)
 
     if stats.get("ref_by_country"):
         for app_id, country_stats in stats["ref_by_country"].items():
@@ -246,14 +219,12 @@ def _update_aggregates_for_date(
                 )
 
     _update_global_stats_for_date(date, stats, agg["global"])
+    return installs
 
 
 def _get_stats_for_period(sdate: datetime.date, edate: datetime.date):
     totals: StatsType = {}
-    for i in range((edate - sdate).days + 1):
-        date = sdate + datetime.timedelta(days=i)
-        stats = _get_stats_for_date(date)
-
+    for stats in _fetch_stats_parallel(sdate, edate):
         if stats is None or "refs" not in stats or stats["refs"] is None:
             continue
         for app_id, app_stats in stats["refs"].items():
@@ -270,75 +241,16 @@ def _get_stats_for_period(sdate: datetime.date, edate: datetime.date):
     return totals
 
 
-def _get_app_stats_per_day() -> dict[str, dict[str, int]]:
-    # Skip last two days as flathub-stats publishes partial statistics
-    redis_key = "app_stats_per_day"
-    cached_data = database.get_json_key(redis_key)
-    if cached_data is not None and isinstance(cached_data, dict):
-        return cached_data
-
-    edate = utils.utcnow().date() - datetime.timedelta(days=2)
-    sdate = FIRST_STATS_DATE
-
-    app_stats_per_day: dict[str, dict[str, int]] = {}
-
-    dates = [
-        sdate + datetime.timedelta(days=i) for i in range((edate - sdate).days + 1)
+async def _get_search_totals() -> tuple[list[dict], int]:
+    try:
+        main_categories, verified_apps = await search.get_search_totals()
+    finally:
+        await search.async_client.aclose()
+    category_totals = [
+        {"category": category, "count": count}
+        for category, count in main_categories.items()
     ]
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-        future_to_date = {
-            executor.submit(_get_stats_for_date, date): date for date in dates
-        }
-
-        for future in concurrent.futures.as_completed(future_to_date):
-            date = future_to_date[future]
-            try:
-                stats = future.result()
-            except Exception:
-                logger.exception("Failed to fetch stats for %s", date)
-                continue
-
-            if stats is not None and "refs" in stats and stats["refs"] is not None:
-                for app_id, app_stats in stats["refs"].items():
-                    app_id_without_architecture = _remove_architecture_from_id(app_id)
-                    if app_id_without_architecture not in app_stats_per_day:
-                        app_stats_per_day[app_id_without_architecture] = {}
-                    app_stats_per_day[app_id_without_architecture][date.isoformat()] = (
-                        _sum_installs_by_arch(app_stats)
-                    )
-
-    for app_id, stats_by_date in app_stats_per_day.items():
-        app_stats_per_day[app_id] = dict(sorted(stats_by_date.items()))
-
-    # Cache for a day; data is historical and slow to compute
-    redis_conn.set(redis_key, orjson.dumps(app_stats_per_day), ex=86400)
-
-    return app_stats_per_day
-
-
-def get_category_totals():
-    categories = []
-    category_totals = search.search_apps_post(
-        search.SearchQuery(query="", filters=None), "en"
-    )
-
-    if (
-        category_totals is None
-        or category_totals.facetDistribution is None
-        or "main_categories" not in category_totals.facetDistribution
-    ):
-        return categories
-
-    for category, count in category_totals.facetDistribution["main_categories"].items():
-        categories.append(
-            {
-                "category": category,
-                "count": count,
-            }
-        )
-
-    return categories
+    return category_totals, verified_apps
 
 
 def _calculate_installs(downloads_data: list[int]) -> int:
@@ -370,6 +282,16 @@ def _remove_architecture_from_id(app_id: str) -> str:
     return app_id.split("/")[0]
 
 
+def _format_app_stats(app_id: str, app_stats: dict) -> dict:
+    if "installs_per_day" in app_stats:
+        app_stats["installs_per_day"] = dict(
+            sorted(app_stats["installs_per_day"].items())
+        )
+
+    app_stats["id"] = app_id
+    return app_stats
+
+
 def get_installs_by_ids(ids: list[str]):
     result = defaultdict()
     for app_id in ids:
@@ -377,16 +299,20 @@ def get_installs_by_ids(ids: list[str]):
         if app_stats is None:
             continue
 
-        if "installs_per_day" in app_stats:
-            app_stats["installs_per_day"] = dict(
-                sorted(app_stats["installs_per_day"].items())
-            )
-
-        app_stats["id"] = app_id
-        result[app_id] = app_stats
+        result[app_id] = _format_app_stats(app_id, app_stats)
     return result
 
 
+async def async_get_installs_by_id(app_id: str) -> dict | None:
+    async with database.get_async_db() as sqldb:
+        app_stats = await models.AppStats.async_get_stats(sqldb, app_id)
+
+    if app_stats is None:
+        return None
+
+    return _format_app_stats(app_id, app_stats.to_dict())
+
+
 def get_popular(days: int | None):
     edate = utils.utcnow().date()
 
@@ -424,38 +350,42 @@ def _calculate_quality_passed_ratio(app_quality_status) -> float:
 
 
 def _build_or_update_aggregates() -> dict:
-    edate = utils.utcnow().date() - datetime.timedelta(days=2)
+    edate = utils.utcnow().date() - datetime.timedelta(days=PARTIAL_STATS_DAYS)
 
     if config.settings.force_recompute_stats:
         _delete_aggregates()
+        year_totals.delete_year_totals()
 
     agg = _normalize_aggregates(_load_aggregates())
 
-    if agg["last_date"] is None:
+    if agg["last_date"] is None or not has_daily_installs():
+        # Aggregates from before the installs store kept the daily installs in
+        # a JSON blob; rebuild them from the (cached) daily stats instead.
+        _delete_aggregates()
         agg = _init_empty_aggregates()
         sdate = FIRST_STATS_DATE
     else:
         last_date = datetime.date.fromisoformat(agg["last_date"])
         sdate = last_date + datetime.timedelta(days=1)
-        if sdate > edate:
-            return agg
 
+    # The installs are written day by day. A crash before the next checkpoint
+    # only rewrites those days with the same values when the update resumes.
+    installs_writer = DailyInstallsWriter()
     checkpoint_interval = 100
     days_processed = 0
-    current_date = sdate
 
-    while current_date <= edate:
-        stats = _get_stats_for_date(current_date)
-        _update_aggregates_for_date(current_date, stats, agg)
+    for current_date, stats in _iter_stats_for_period(sdate, edate):
+        installs = _update_aggregates_for_date(current_date, stats, agg)
+        installs_writer.record(current_date, installs)
         agg["last_date"] = current_date.isoformat()
         days_processed += 1
 
         if days_processed % checkpoint_interval == 0:
             _save_aggregates(agg)
 
-        current_date += datetime.timedelta(days=1)
-
-    _save_aggregates(agg)
+    if days_processed:
+        _save_aggregates(agg)
+    agg["installs"] = load_daily_installs()
     return agg
 
 
@@ -478,9 +408,7 @@ def _compute_recent_version_stats(
     flatpak_versions: dict[str, int] = {}
     os_flatpak_versions: dict[str, dict[str, int]] = {}
 
-    for i in range((edate - sdate).days + 1):
-        date = sdate + datetime.timedelta(days=i)
-        stats = _get_stats_for_date(date)
+    for stats in _get_stats_for_dates(_date_range(sdate, edate)):
         if stats is None:
             continue
         if stats.get("os_versions"):
@@ -510,7 +438,46 @@ def _compute_recent_version_stats(
     return os_versions, flatpak_versions, os_flatpak_versions
 
 
-def _build_stats_dict_from_aggregates(agg: dict, app_count: int) -> dict:
+def _get_partial_stats(
+    edate: datetime.date,
+) -> list[tuple[datetime.date, StatsFromServer | None]]:
+    dates = _date_range(edate - datetime.timedelta(days=PARTIAL_STATS_DAYS - 1), edate)
+    return list(zip(dates, _get_stats_for_dates(dates), strict=True))
+
+
+def _get_window_installs(
+    installs: DailyInstalls,
+    partial_installs: dict[str, int],
+    edate: datetime.date,
+    days: int,
+) -> dict[str, int]:
+    """Return the installs over the ``days`` days up to ``edate`` per app seen in them.
+
+    The days before the partial ones come from the aggregated daily installs,
+    the partial ones from ``partial_installs``.
+    """
+    aggregated_edate = edate - datetime.timedelta(days=PARTIAL_STATS_DAYS)
+    aggregated_days = days - PARTIAL_STATS_DAYS
+    window = {
+        app_id: total
+        for app_id, total, active in zip(
+            installs.app_ids,
+            installs.window_sums(aggregated_edate, aggregated_days).tolist(),
+            installs.active(aggregated_edate, aggregated_days).tolist(),
+            strict=True,
+        )
+        if active
+    }
+    for app_id, count in partial_installs.items():
+        window[app_id] = window.get(app_id, 0) + count
+    return window
+
+
+def _build_stats_dict_from_aggregates(
+    agg: dict,
+    app_count: int,
+    partial_stats: list[tuple[datetime.date, StatsFromServer | None]] | None = None,
+) -> dict:
     global_dict = {
         "downloads_per_day": dict(agg["global"]["downloads_per_day"]),
         "updates_per_day": dict(agg["global"]["updates_per_day"]),
@@ -518,14 +485,12 @@ def _build_stats_dict_from_aggregates(agg: dict, app_count: int) -> dict:
         "totals_country": dict(agg["global"]["totals_country"]),
     }
 
-    edate = utils.utcnow().date()
-    sdate = edate - datetime.timedelta(days=1)
-    for i in range(2):
-        date = sdate + datetime.timedelta(days=i)
-        stats = _get_stats_for_date(date)
+    if partial_stats is None:
+        partial_stats = _get_partial_stats(utils.utcnow().date())
+    for date, stats in partial_stats:
         _update_global_stats_for_date(date, stats, global_dict)
 
-    category_totals = get_category_totals()
+    category_totals, verified_apps = asyncio.run(_get_search_totals())
     os_versions, flatpak_versions, os_flatpak_versions = _compute_recent_version_stats(
         days=30
     )
@@ -534,7 +499,7 @@ def _build_stats_dict_from_aggregates(agg: dict, app_count: int) -> dict:
         "totals": {
             "downloads": sum(global_dict["downloads_per_day"].values()),
             "number_of_apps": app_count,
-            "verified_apps": search.get_number_of_verified_apps(),
+            "verified_apps": verified_apps,
         },
         "countries": global_dict["totals_country"],
         "downloads_per_day": global_dict["downloads_per_day"],
@@ -555,11 +520,25 @@ def update(sqldb):
     frontend_app_ids = database.get_all_appids_for_frontend()
 
     agg = _build_or_update_aggregates()
-    stats_dict = _build_stats_dict_from_aggregates(agg, len(frontend_app_ids))
+    partial_stats = _get_partial_stats(edate)
+    stats_dict = _build_stats_dict_from_aggregates(
+        agg, len(frontend_app_ids), partial_stats
+    )
+    installs = agg["installs"]
+    partial_installs: dict[str, int] = defaultdict(int)
+    for _, stats in partial_stats:
+        for app_id, app_stats in ((stats or {}).get("refs") or {}).items():
+            partial_installs[_remove_architecture_from_id(app_id)] += (
+                _sum_installs_by_arch(app_stats)
+            )
 
-    apps_with_stats = [
-        app_id for app_id in agg["per_day"] if app_id in frontend_app_ids
+    frontend_app_id_set = set(frontend_app_ids)
+    trending_rows = [
+        row
+        for row, app_id in enumerate(installs.app_ids)
+        if app_id in frontend_app_id_set
     ]
+    apps_with_stats = [installs.app_ids[row] for row in trending_rows]
     quality_status_batch = models.QualityModeration.by_appids_summarized(
         sqldb, apps_with_stats
     )
@@ -572,40 +551,34 @@ def update(sqldb):
         )
     )
 
-    trending_apps: list = []
-    for app_id in agg["per_day"]:
-        if app_id not in frontend_app_ids:
-            continue
-
-        stats_dict_for_app = agg["per_day"][app_id]
-        last_date = datetime.date.fromisoformat(agg["last_date"])
-        first_date = last_date - datetime.timedelta(days=20)
-        installs_over_days = [
-            stats_dict_for_app.get(
-                (first_date + datetime.timedelta(days=offset)).isoformat(), 0
-            )
-            for offset in range(21)
-        ]
-
-        quality_passed_ratio = _calculate_quality_passed_ratio(
-            quality_status_batch.get(app_id)
-        )
-
-        is_eol = eol_status_batch.get(app_id, False)
-
-        trending_score = _calculate_trending_score(
-            installs_over_days=installs_over_days,
-            quality_passed_ratio=quality_passed_ratio,
-            icon_quality_bonus=icon_quality_passed_count_batch.get(app_id, 0),
-            is_eol=is_eol,
-        )
-
-        trending_apps.append(
-            {
-                "id": utils.get_clean_app_id(app_id),
-                "trending": trending_score,
-            }
+    last_date = datetime.date.fromisoformat(agg["last_date"])
+    trending_scores = _calculate_trending_scores(
+        installs_over_days=installs.window(last_date, 21)[trending_rows],
+        quality_passed_ratios=np.array(
+            [
+                _calculate_quality_passed_ratio(quality_status_batch.get(app_id))
+                for app_id in apps_with_stats
+            ],
+            dtype=np.float64,
+        ),
+        icon_quality_bonuses=np.array(
+            [
+                icon_quality_passed_count_batch.get(app_id, 0)
+                for app_id in apps_with_stats
+            ],
+            dtype=np.int64,
+        ),
+        is_eol=np.array(
+            [eol_status_batch.get(app_id, False) for app_id in apps_with_stats],
+            dtype=bool,
+        ),
+    )
+    trending_apps = [
+        {"id": utils.get_clean_app_id(app_id), "trending": trending_score}
+        for app_id, trending_score in zip(
+            apps_with_stats, trending_scores.tolist(), strict=True
         )
+    ]
     search.create_or_update_apps(trending_apps)
 
     for app_id, arch_stats in agg["totals"].items():
@@ -613,10 +586,8 @@ def update(sqldb):
             [s[2] for s in arch_stats.values()]
         )
 
-        if app_id in agg["per_day"]:
-            stats_apps_dict[app_id]["installs_per_day"] = dict(
-                sorted(agg["per_day"][app_id].items())
-            )
+        if app_id in installs:
+            stats_apps_dict[app_id]["installs_per_day"] = installs.per_day(app_id)
 
         if app_id in agg["per_country"]:
             stats_apps_dict[app_id]["installs_per_country"] = agg["per_country"][app_id]
@@ -626,21 +597,16 @@ def update(sqldb):
                 app_id
             ]
 
-    recent_sdate = edate - datetime.timedelta(days=1)
-    recent_stats = _get_stats_for_period(recent_sdate, edate)
-    for app_id, app_dict in recent_stats.items():
-        recent_installs = sum([i[2] for i in app_dict.values()])
+    for app_id, recent_installs in partial_installs.items():
         if app_id in stats_apps_dict:
             stats_apps_dict[app_id]["installs_total"] = (
                 stats_apps_dict[app_id].get("installs_total", 0) + recent_installs
             )
 
-    sdate_30_days = edate - datetime.timedelta(days=30 - 1)
-    stats_30_days = _get_stats_for_period(sdate_30_days, edate)
+    installs_30_days = _get_window_installs(installs, partial_installs, edate, 30)
 
     stats_installs: list = []
-    for app_id, app_dict in stats_30_days.items():
-        installs_last_month = sum([i[2] for i in app_dict.values()])
+    for app_id, installs_last_month in installs_30_days.items():
         stats_apps_dict[app_id]["installs_last_month"] = installs_last_month
         if app_id in frontend_app_ids:
             stats_installs.append(
@@ -665,18 +631,18 @@ def update(sqldb):
     if len(favorites_list) > 0:
         search.create_or_update_apps(favorites_list)
 
-    sdate_7_days = edate - datetime.timedelta(days=7 - 1)
-    stats_7_days = _get_stats_for_period(sdate_7_days, edate)
+    installs_7_days = _get_window_installs(installs, partial_installs, edate, 7)
 
-    for app_id, app_dict in stats_7_days.items():
-        stats_apps_dict[app_id]["installs_last_7_days"] = sum(
-            [i[2] for i in app_dict.values()]
-        )
+    for app_id, installs_last_7_days in installs_7_days.items():
+        stats_apps_dict[app_id]["installs_last_7_days"] = installs_last_7_days
 
-    for app_id in stats_apps_dict:
-        models.App.set_downloads(
-            sqldb, app_id, stats_apps_dict[app_id].get("installs_last_7_days", 0)
-        )
+    models.App.bulk_set_downloads(
+        sqldb,
+        {
+            app_id: app_stats.get("installs_last_7_days", 0)
+            for app_id, app_stats in stats_apps_dict.items()
+        },
+    )
 
     for app_id in stats_apps_dict:
         stats_apps_dict[app_id]["installs_total"] = stats_apps_dict[app_id].get(
@@ -783,149 +749,6 @@ def _generate_and_store_year_in_review_stats(sqldb):
             models.YearInReviewStats.set_for_year(sqldb, year, base_stats)
 
 
-def _normalize_year_date_range(year: int) -> tuple[datetime.date, datetime.date] | None:
-    sdate = datetime.date(year, 1, 1)
-    edate = datetime.date(year, 12, 31)
-    today = utils.utcnow().date()
-
-    edate = min(edate, today)
-    sdate = max(sdate, FIRST_STATS_DATE)
-    if sdate > today:
-        return None
-
-    return (sdate, edate)
-
-
-def _get_country_downloads_for_year(year: int) -> dict[str, int]:
-    date_range = _normalize_year_date_range(year)
-    if not date_range:
-        return {}
-
-    sdate, edate = date_range
-
-    country_downloads: dict[str, int] = {}
-    stats_results = _fetch_stats_parallel(sdate, edate)
-
-    for stats in stats_results:
-        if stats and "ref_by_country" in stats and stats["ref_by_country"] is not None:
-            for country_stats in stats["ref_by_country"].values():
-                for country, downloads in country_stats.items():
-                    if country not in country_downloads:
-                        country_downloads[country] = 0
-                    new_installs = _calculate_installs(downloads)
-                    if new_installs > 0:
-                        country_downloads[country] += new_installs
-
-    return country_downloads
-
-
-def _get_basic_year_stats(year: int) -> dict | None:
-    date_range = _normalize_year_date_range(year)
-    if not date_range:
-        return None
-
-    sdate, edate = date_range
-
-    total_downloads = 0
-    total_updates = 0
-
-    stats_results = _fetch_stats_parallel(sdate, edate)
-    for stats in stats_results:
-        if stats:
-            if "refs" in stats and stats["refs"] is not None:
-                for app_stats in stats["refs"].values():
-                    for downloads in app_stats.values():
-                        new_installs = _calculate_installs(downloads)
-                        if new_installs > 0:
-                            total_downloads += new_installs
-            if "updates" in stats and stats["updates"] is not None:
-                total_updates += stats["updates"]
-
-    new_apps_count = 0
-    with database.get_db() as sqldb:
-        new_apps_count = (
-            sqldb.query(models.App)
-            .filter(models.App.type == "desktop-application")
-            .filter(models.App.initial_release_at >= sdate)
-            .filter(models.App.initial_release_at <= edate)
-            .count()
-        )
-
-    result = {
-        "total_downloads": total_downloads,
-        "new_apps_count": new_apps_count,
-        "updates_count": total_updates,
-    }
-
-    return result
-
-
-def _get_category_downloads_for_year(year: int) -> dict[str, int]:
-    date_range = _normalize_year_date_range(year)
-    if not date_range:
-        return {}
-
-    sdate, edate = date_range
-
-    app_downloads = defaultdict(int)
-    stats_results = _fetch_stats_parallel(sdate, edate)
-
-    for stats in stats_results:
-        if stats and "refs" in stats and stats["refs"] is not None:
-            for app_id, app_stats in stats["refs"].items():
-                app_id_clean = _remove_architecture_from_id(app_id)
-                for downloads in app_stats.values():
-                    new_installs = _calculate_installs(downloads)
-                    if new_installs > 0:
-                        app_downloads[app_id_clean] += new_installs
-
-    category_downloads = defaultdict(int)
-    with database.get_db() as sqldb:
-        if not app_downloads:
-            app_rows: list[tuple[str, str | None]] = []
-        else:
-            app_rows = (
-                sqldb.query(models.App.app_id, models.App.main_category)
-                .filter(
-                    models.App.type == "desktop-application",
-                    models.App.app_id.in_(app_downloads.keys()),
-                )
-                .all()
-            )
-
-        for app_id, main_category in app_rows:
-            if main_category:
-                category_downloads[main_category.lower()] += app_downloads[app_id]
-
-    result = dict(category_downloads)
-
-    return result
-
-
-def _get_app_downloads_for_year(year: int) -> dict[str, int]:
-    date_range = _normalize_year_date_range(year)
-    if not date_range:
-        return {}
-
-    sdate, edate = date_range
-
-    app_downloads = defaultdict(int)
-    stats_results = _fetch_stats_parallel(sdate, edate)
-
-    for stats in stats_results:
-        if stats and "refs" in stats and stats["refs"] is not None:
-            for app_id, app_stats in stats["refs"].items():
-                app_id_clean = _remove_architecture_from_id(app_id)
-                for downloads in app_stats.values():
-                    new_installs = _calculate_installs(downloads)
-                    if new_installs > 0:
-                        app_downloads[app_id_clean] += new_installs
-
-    result = dict(app_downloads)
-
-    return result
-
-
 def _load_year_in_review_base(year: int) -> dict | None:
     with database.get_db() as sqldb:
         stored_stats = models.YearInReviewStats.get_for_year(sqldb, year)
@@ -952,92 +775,22 @@ def _build_base_top_list(
 
 
 async def _build_year_in_review_base(year: int) -> dict | None:
-    sdate = datetime.date(year, 1, 1)
-    edate = datetime.date(year, 12, 31)
-
-    today = utils.utcnow().date()
-    edate = min(edate, today)
-
-    sdate = max(sdate, FIRST_STATS_DATE)
-
-    if sdate > today:
+    date_range = year_totals.year_date_range(year, utils.utcnow().date())
+    totals = await year_totals.load_year_totals(year)
+    if date_range is None or totals is None:
         return None
+    sdate, edate = date_range
 
-    total_downloads = 0
-    total_updates = 0
-    app_downloads = defaultdict(int)
-    app_updates_dict = defaultdict(int)
-    monthly_downloads = defaultdict(lambda: defaultdict(int))
-    country_downloads = defaultdict(int)
-    arch_downloads = defaultdict(int)
-
-    dates = [
-        sdate + datetime.timedelta(days=i) for i in range((edate - sdate).days + 1)
-    ]
-
-    async def _fetch_stats_async(date):
-        cache_key = f"stats:date:{date.isoformat()}"
-        try:
-            cached_value = await redis_conn.get(cache_key)
-        except Exception:
-            logger.exception("Failed to read cached stats for %s", date)
-            cached_value = None
-
-        if cached_value:
-            try:
-                return orjson.loads(cached_value)
-            except Exception:
-                # Fallback to recomputing if cache is corrupt
-                logger.exception("Failed to decode cached stats for %s", date)
-
-        try:
-            data = await asyncio.to_thread(_get_stats_for_date, date)
-        except Exception:
-            logger.exception("Failed to fetch stats for %s", date)
-            return None
-
-        if data is not None:
-            try:
-                today = utils.utcnow().date()
-                ttl_seconds = 60 * 60 if date.year == today.year else 60 * 60 * 24 * 7
-                await redis_conn.set(cache_key, orjson.dumps(data), ex=ttl_seconds)
-            except Exception:
-                # If caching fails, just proceed without cache
-                logger.exception("Failed to cache stats for %s", date)
-
-        return data
-
-    stats_results = await asyncio.gather(*[_fetch_stats_async(date) for date in dates])
-
-    for date_idx, stats in enumerate(stats_results):
-        if stats is None:
-            continue
+    # The comparisons with the previous year all derive from its totals
+    prev_totals = None
+    if year > 2018:
+        prev_totals = await year_totals.load_year_totals(year - 1)
 
-        date = dates[date_idx]
-
-        if "updates" in stats and stats["updates"] is not None:
-            total_updates += stats["updates"]
-
-        month_key = date.strftime("%Y-%m")
-        if "refs" in stats and stats["refs"] is not None:
-            for app_id, app_stats in stats["refs"].items():
-                app_id_clean = _remove_architecture_from_id(app_id)
-                for arch, downloads in app_stats.items():
-                    new_installs = _calculate_installs(downloads)
-                    if new_installs > 0:
-                        updates = downloads[1] if len(downloads) >= 2 else 0
-                        app_downloads[app_id_clean] += new_installs
-                        app_updates_dict[app_id_clean] += updates
-                        monthly_downloads[month_key][app_id_clean] += new_installs
-                        arch_downloads[arch] += new_installs
-                        total_downloads += new_installs
-
-        if "ref_by_country" in stats and stats["ref_by_country"] is not None:
-            for app_id, country_stats in stats["ref_by_country"].items():
-                for country, downloads in country_stats.items():
-                    new_installs = _calculate_installs(downloads)
-                    if new_installs > 0:
-                        country_downloads[country] += new_installs
+    total_downloads = totals.total_downloads
+    total_updates = totals.updates
+    app_downloads = totals.app_downloads
+    country_downloads = totals.country_downloads
+    arch_downloads = totals.arch_downloads
 
     loop = asyncio.get_running_loop()
 
@@ -1160,21 +913,21 @@ async def _build_year_in_review_base(year: int) -> dict | None:
     top_game_store_ids = _get_top_app_ids(game_store_app_downloads, 3)
     top_game_utility_ids = _get_top_app_ids(game_utility_app_downloads, 3)
 
-    frontend_app_ids, app_stats_per_day = await asyncio.gather(
+    frontend_app_ids, first_seen = await asyncio.gather(
         loop.run_in_executor(None, database.get_all_appids_for_frontend),
-        loop.run_in_executor(None, _get_app_stats_per_day),
+        loop.run_in_executor(None, load_first_seen),
     )
 
     new_apps_count = 0
     total_apps_at_year_end = 0
-    for app_id, daily_stats in app_stats_per_day.items():
-        if app_id in frontend_app_ids and daily_stats:
-            first_date_str = min(daily_stats.keys())
-            first_date = datetime.date.fromisoformat(first_date_str)
-            if first_date <= edate:
-                total_apps_at_year_end += 1
-            if sdate <= first_date <= edate:
-                new_apps_count += 1
+    for app_id in set(frontend_app_ids):
+        first_date = first_seen.get(app_id)
+        if first_date is None:
+            continue
+        if first_date <= edate:
+            total_apps_at_year_end += 1
+        if sdate <= first_date <= edate:
+            new_apps_count += 1
 
     total_apps = total_apps_at_year_end
 
@@ -1193,13 +946,13 @@ async def _build_year_in_review_base(year: int) -> dict | None:
                     }
         return growth_dict
 
-    new_apps_downloads = {}
-    for app_id, daily_stats in app_stats_per_day.items():
-        if app_id in desktop_app_ids and daily_stats:
-            first_date_str = min(daily_stats.keys())
-            first_date = datetime.date.fromisoformat(first_date_str)
-            if sdate <= first_date <= edate and app_id in app_downloads:
-                new_apps_downloads[app_id] = app_downloads[app_id]
+    new_apps_downloads = {
+        app_id: downloads
+        for app_id, downloads in app_downloads.items()
+        if app_id in desktop_app_ids
+        and app_id in first_seen
+        and sdate <= first_seen[app_id] <= edate
+    }
 
     def _get_sort_value(value, sort_key):
         return value if isinstance(value, int) else value[sort_key]
@@ -1245,10 +998,8 @@ async def _build_year_in_review_base(year: int) -> dict | None:
 
     biggest_growth_by_category = []
     most_improved_by_category = []
-    if year > 2018:
-        prev_year_app_downloads = await loop.run_in_executor(
-            None, _get_app_downloads_for_year, year - 1
-        )
+    if prev_totals is not None:
+        prev_year_app_downloads = prev_totals.app_downloads
 
         if prev_year_app_downloads and app_downloads:
             app_yoy_growth = _calculate_yoy_growth(
@@ -1285,10 +1036,8 @@ async def _build_year_in_review_base(year: int) -> dict | None:
             )
 
     fastest_growing_regions = []
-    if year > 2018:  # Need previous year data
-        prev_year_countries = await loop.run_in_executor(
-            None, _get_country_downloads_for_year, year - 1
-        )
+    if prev_totals is not None:
+        prev_year_countries = prev_totals.country_downloads
 
         if prev_year_countries and country_downloads:
             country_growth = []
@@ -1320,20 +1069,15 @@ async def _build_year_in_review_base(year: int) -> dict | None:
 
     total_downloads_change = 0
     total_downloads_change_percentage = 0.0
-    if year > 2018:  # Only if we have previous year data
-        prev_year_stats = await loop.run_in_executor(
-            None, _get_basic_year_stats, year - 1
+    if prev_totals is not None:
+        prev_downloads = prev_totals.total_downloads
+        downloads_change = total_downloads - prev_downloads
+        downloads_change_pct = (
+            (downloads_change / prev_downloads * 100) if prev_downloads > 0 else 0
         )
-        if prev_year_stats:
-            prev_downloads = prev_year_stats.get("total_downloads", 0)
 
-            downloads_change = total_downloads - prev_downloads
-            downloads_change_pct = (
-                (downloads_change / prev_downloads * 100) if prev_downloads > 0 else 0
-            )
-
-            total_downloads_change = downloads_change
-            total_downloads_change_percentage = round(downloads_change_pct, 1)
+        total_downloads_change = downloads_change
+        total_downloads_change_percentage = round(downloads_change_pct, 1)
 
     def _fetch_quality_apps():
         with database.get_db() as sqldb:
@@ -1383,16 +1127,9 @@ async def _build_year_in_review_base(year: int) -> dict | None:
             )[:5]
 
     trending_categories = []
-    if year > 2018:
-        prev_category_downloads = await loop.run_in_executor(
-            None, _get_category_downloads_for_year, year - 1
-        )
-        current_category_downloads = defaultdict(int)
-
-        for app_id, downloads in app_downloads.items():
-            category = app_main_category.get(app_id)
-            if category:
-                current_category_downloads[category.lower()] += downloads
+    if prev_totals is not None:
+        prev_category_downloads = prev_totals.category_downloads(app_main_category)
+        current_category_downloads = totals.category_downloads(app_main_category)
 
         for category, current_downloads in current_category_downloads.items():
             prev_downloads = prev_category_downloads.get(category, 0)
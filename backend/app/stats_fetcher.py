@@ -0,0 +1,331 @@
+import asyncio
+import bisect
+import contextlib
+import datetime
+import itertools
+import json
+import logging
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import Self
+from urllib.parse import urlparse
+
+import httpx
+import orjson
+
+from . import config, stats_store, utils
+from .worker.redis import redis_conn
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = 20
+# Days fetched at once by iter_days, which bounds how many are held in memory
+FETCH_CHUNK_DAYS = 100
+# Mutable days are served from Redis for this long before being revalidated
+FRESH_FOR = datetime.timedelta(hours=4)
+# Long enough to revalidate a day one last time when it becomes immutable
+CACHE_EXPIRY = datetime.timedelta(days=stats_store.MUTABLE_DAYS + 1)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _day_key(date: datetime.date) -> str:
+    return f"stats:date:{date.isoformat()}"
+
+
+def _validators_key(date: datetime.date) -> str:
+    return f"stats:date:{date.isoformat()}:validators"
+
+
+@dataclass
+class FetchReport:
+    """Counters for the requests made by a ``StatsFetcher``."""
+
+    downloaded: int = 0
+    not_modified: int = 0
+    missing: int = 0
+    bytes_downloaded: int = 0
+    bytes_saved: int = 0
+    latencies: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+
+    @property
+    def requests(self) -> int:
+        return self.downloaded + self.not_modified + self.missing
+
+    def observe(self, seconds: float) -> None:
+        self.latencies[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def histogram(self) -> dict[str, int]:
+        labels = [f"<={bound}s" for bound in LATENCY_BUCKETS]
+        labels.append(f">{LATENCY_BUCKETS[-1]}s")
+        return dict(zip(labels, self.latencies, strict=True))
+
+    def log(self) -> None:
+        if not self.requests:
+            return
+        logger.info(
+            "Fetched stats: %d downloaded (%d bytes), %d not modified "
+            "(%d bytes saved), %d missing; latency %s",
+            self.downloaded,
+            self.bytes_downloaded,
+            self.not_modified,
+            self.bytes_saved,
+            self.missing,
+            {label: count for label, count in self.histogram().items() if count},
+        )
+
+
+@dataclass
+class _CachedDay:
+    body: str
+    etag: str | None
+    last_modified: str | None
+    size: int
+
+
+class StatsFetcher:
+    """Fetches days of flathub-stats through the local caches.
+
+    Days that no longer change are read from the on-disk ``stats_store``.
+    The last ``MUTABLE_DAYS`` are cached in Redis together with their ETag
+    and Last-Modified headers, and once ``FRESH_FOR`` has passed they are
+    revalidated with a conditional request instead of downloaded again.
+
+    Everything that misses the caches is requested concurrently over one
+    HTTP/2 ``httpx.AsyncClient``, at most ``concurrency`` at a time, and
+    saved to the caches in worker threads. Used as
+    an async context manager, the fetcher keeps that client open across
+    ``fetch`` calls.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = MAX_CONCURRENCY,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.concurrency = concurrency
+        self.transport = transport
+        self.report = FetchReport()
+        self._client: httpx.AsyncClient | None = None
+
+    async def __aenter__(self) -> Self:
+        self._client = self._new_client()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=self.concurrency),
+            transport=self.transport,
+        )
+
+    def _url(self, date: datetime.date) -> str:
+        return config.settings.stats_baseurl + date.strftime("/%Y/%m/%d.json")
+
+    def _read_file(self, date: datetime.date) -> dict | None:
+        try:
+            with open(urlparse(self._url(date)).path) as stats_file:
+                return json.load(stats_file)
+        except FileNotFoundError:
+            return None
+
+    def _cached(
+        self, dates: list[datetime.date], today: datetime.date
+    ) -> tuple[dict[datetime.date, dict], dict[datetime.date, _CachedDay | None]]:
+        """Return the days served from cache and the days to request."""
+        hits: dict[datetime.date, dict] = {}
+        in_redis = []
+        for date in dates:
+            stored = None
+            if stats_store.is_immutable(date, today):
+                stored = stats_store.stats_store.get(date)
+            if stored is not None:
+                hits[date] = stored
+            else:
+                in_redis.append(date)
+        if not in_redis:
+            return hits, {}
+
+        pipe = redis_conn.pipeline()
+        for date in in_redis:
+            pipe.get(_day_key(date))
+            pipe.hgetall(_validators_key(date))
+        replies = pipe.execute()
+
+        now = utils.utcnow().timestamp()
+        misses: dict[datetime.date, _CachedDay | None] = {}
+        for date, body, validators in zip(
+            in_redis, replies[::2], replies[1::2], strict=True
+        ):
+            if body is None:
+                misses[date] = None
+            elif not validators:
+                # Cached before validators were stored: immutable days are
+                # moved to disk as they are, recent ones are downloaded again
+                if stats_store.is_immutable(date, today):
+                    hits[date] = orjson.loads(body)
+                    stats_store.stats_store.put(date, hits[date])
+                    redis_conn.delete(_day_key(date))
+                else:
+                    misses[date] = None
+            elif (
+                not stats_store.is_immutable(date, today)
+                and now - float(validators.get("checked_at", 0))
+                < FRESH_FOR.total_seconds()
+            ):
+                hits[date] = orjson.loads(body)
+            else:
+                misses[date] = _CachedDay(
+                    body=body,
+                    etag=validators.get("etag"),
+                    last_modified=validators.get("last_modified"),
+                    size=int(validators.get("size", 0)),
+                )
+        return hits, misses
+
+    def _save(
+        self,
+        date: datetime.date,
+        today: datetime.date,
+        body: str,
+        response: httpx.Response,
+        cached: _CachedDay | None,
+    ) -> dict:
+        stats = orjson.loads(body)
+        if stats_store.is_immutable(date, today):
+            stats_store.stats_store.put(date, stats)
+            redis_conn.delete(_day_key(date), _validators_key(date))
+            return stats
+
+        # A 304 may leave out the validators, so keep the ones already stored
+        etag = response.headers.get("etag") or (cached and cached.etag)
+        last_modified = response.headers.get("last-modified") or (
+            cached and cached.last_modified
+        )
+        validators = {
+            "checked_at": utils.utcnow().timestamp(),
+            "size": cached.size if cached else len(response.content),
+        }
+        if etag:
+            validators["etag"] = etag
+        if last_modified:
+            validators["last_modified"] = last_modified
+
+        pipe = redis_conn.pipeline()
+        pipe.set(_day_key(date), body, ex=CACHE_EXPIRY)
+        pipe.delete(_validators_key(date))
+        pipe.hset(_validators_key(date), mapping=validators)
+        pipe.expire(_validators_key(date), CACHE_EXPIRY)
+        pipe.execute()
+        return stats
+
+    async def _request(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        date: datetime.date,
+        today: datetime.date,
+        cached: _CachedDay | None,
+    ) -> dict | None:
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(self._url(date), headers=headers)
+            self.report.observe(time.perf_counter() - start)
+
+        if response.status_code == 404:
+            self.report.missing += 1
+            return None
+        if response.status_code == 304 and cached is not None:
+            self.report.not_modified += 1
+            self.report.bytes_saved += cached.size
+            return await asyncio.to_thread(
+                self._save, date, today, cached.body, response, cached
+            )
+
+        response.raise_for_status()
+        self.report.downloaded += 1
+        self.report.bytes_downloaded += len(response.content)
+        # Parsing, compressing and storing a day blocks, so it runs in a
+        # thread to keep the other downloads going
+        return await asyncio.to_thread(
+            self._save, date, today, response.text, response, None
+        )
+
+    async def fetch(
+        self, dates: list[datetime.date], raise_errors: bool = False
+    ) -> list[dict | None]:
+        """Return the stats of each date, or None if they are not published.
+
+        Failed requests are logged and returned as None unless
+        ``raise_errors`` is set.
+        """
+        if urlparse(config.settings.stats_baseurl).scheme == "file":
+            return [self._read_file(date) for date in dates]
+
+        today = utils.utcnow().date()
+        hits, misses = self._cached(dates, today)
+        if misses:
+            semaphore = asyncio.Semaphore(self.concurrency)
+            async with (
+                contextlib.nullcontext(self._client)
+                if self._client is not None
+                else self._new_client()
+            ) as client:
+                results = await asyncio.gather(
+                    *(
+                        self._request(client, semaphore, date, today, cached)
+                        for date, cached in misses.items()
+                    ),
+                    return_exceptions=True,
+                )
+            self.report.log()
+
+            for date, result in zip(misses, results, strict=True):
+                if isinstance(result, BaseException):
+                    if raise_errors:
+                        raise result
+                    logger.error("Failed to fetch stats for %s", date, exc_info=result)
+                elif result is not None:
+                    hits[date] = result
+
+        return [hits.get(date) for date in dates]
+
+
+def fetch_days(
+    dates: list[datetime.date], raise_errors: bool = False
+) -> list[dict | None]:
+    return asyncio.run(StatsFetcher().fetch(dates, raise_errors=raise_errors))
+
+
+def iter_days(
+    dates: list[datetime.date], raise_errors: bool = False
+) -> Iterator[tuple[datetime.date, dict | None]]:
+    """Yield each date with its stats, fetching ``FETCH_CHUNK_DAYS`` at a time.
+
+    All chunks share one event loop and one HTTP/2 client, so long ranges
+    are fetched without holding every day in memory at once.
+    """
+    with asyncio.Runner() as runner:
+        fetcher = StatsFetcher()
+        runner.run(fetcher.__aenter__())
+        try:
+            for chunk in itertools.batched(dates, FETCH_CHUNK_DAYS):
+                stats = runner.run(fetcher.fetch(list(chunk), raise_errors))
+                yield from zip(chunk, stats, strict=True)
+        finally:
+            runner.run(fetcher.__aexit__(None, None, None))
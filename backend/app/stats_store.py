@@ -0,0 +1,186 @@
+import datetime
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+
+import numpy as np
+import orjson
+import zstandard
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# flathub-stats keeps rewriting the most recent days; older days never change
+MUTABLE_DAYS = 7
+
+COUNT_DTYPE = np.dtype("<u4")
+VALUE_DTYPE = np.dtype("<i8")
+HEADER_LENGTH = struct.Struct("<I")
+COMPRESSION_LEVEL = 10
+
+
+def is_immutable(date: datetime.date, today: datetime.date) -> bool:
+    return date <= today - datetime.timedelta(days=MUTABLE_DAYS)
+
+
+def _table_width(table) -> int | None:
+    """Return the shared length of a ``{row: {column: [int, ...]}}`` table's cells.
+
+    Tables that do not have that shape, or whose cells differ in length, are
+    not worth a columnar layout and are kept in the JSON header instead.
+    """
+    if not isinstance(table, dict):
+        return None
+    width = None
+    for cells in table.values():
+        if not isinstance(cells, dict):
+            return None
+        for value in cells.values():
+            if not isinstance(value, list) or not all(type(v) is int for v in value):
+                return None
+            if width is None:
+                width = len(value)
+            elif len(value) != width:
+                return None
+    return 2 if width is None else width
+
+
+def encode(stats: dict) -> bytes:
+    """Pack a day of stats into a header and per-table column arrays.
+
+    The per-ref tables (``refs``, ``ref_by_country``, ``ref_by_os_version``)
+    make up nearly all of a day, so they are stored as a string table of rows
+    and columns plus three arrays: cells per row, column index per cell and
+    the cell values. Everything else stays in the orjson header.
+    """
+    fields = {}
+    tables = {}
+    arrays = []
+    for name, value in stats.items():
+        width = _table_width(value)
+        if width is None or not value:
+            fields[name] = value
+            continue
+
+        columns: dict[str, int] = {}
+        counts = []
+        column_ids = []
+        values = []
+        for cells in value.values():
+            counts.append(len(cells))
+            for column, cell in cells.items():
+                column_ids.append(columns.setdefault(column, len(columns)))
+                values.extend(cell)
+
+        tables[name] = {
+            "rows": list(value),
+            "columns": list(columns),
+            "cells": len(column_ids),
+            "width": width,
+        }
+        arrays += [
+            np.array(counts, dtype=COUNT_DTYPE).tobytes(),
+            np.array(column_ids, dtype=COUNT_DTYPE).tobytes(),
+            np.array(values, dtype=VALUE_DTYPE).tobytes(),
+        ]
+
+    header = orjson.dumps({"fields": fields, "tables": tables, "order": list(stats)})
+    return b"".join([HEADER_LENGTH.pack(len(header)), header, *arrays])
+
+
+def decode(payload: bytes) -> dict:
+    (header_length,) = HEADER_LENGTH.unpack_from(payload)
+    offset = HEADER_LENGTH.size + header_length
+    header = orjson.loads(payload[HEADER_LENGTH.size : offset])
+
+    def take(dtype: np.dtype, count: int) -> np.ndarray:
+        nonlocal offset
+        array = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+        offset += count * dtype.itemsize
+        return array
+
+    stats = header["fields"]
+    for name, table in header["tables"].items():
+        counts = take(COUNT_DTYPE, len(table["rows"])).tolist()
+        column_ids = take(COUNT_DTYPE, table["cells"]).tolist()
+        values = (
+            take(VALUE_DTYPE, table["cells"] * table["width"])
+            .reshape(table["cells"], table["width"])
+            .tolist()
+        )
+        columns = table["columns"]
+
+        rows = {}
+        cell = 0
+        for row, count in zip(table["rows"], counts, strict=True):
+            end = cell + count
+            rows[row] = {columns[column_ids[i]]: values[i] for i in range(cell, end)}
+            cell = end
+        stats[name] = rows
+
+    return {name: stats[name] for name in header["order"]}
+
+
+class StatsStore:
+    """Content-addressed on-disk store for days of stats that no longer change.
+
+    Each day is encoded with ``encode``, compressed with zstd and written to
+    ``objects/<digest>.zst``, named after the blake2b digest of the encoded
+    day. ``days/<date>`` holds the digest of that day's object. Both are
+    written to a temporary file and renamed into place, so concurrent
+    writers and crashes never leave a partial file behind.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _day_path(self, date: datetime.date) -> str:
+        return os.path.join(self.root, "days", date.isoformat())
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.zst")
+
+    def _write(self, path: str, data: bytes) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, date: datetime.date) -> dict | None:
+        try:
+            with open(self._day_path(date)) as day_file:
+                digest = day_file.read().strip()
+            with open(self._object_path(digest), "rb") as object_file:
+                payload = zstandard.ZstdDecompressor().decompress(object_file.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zstandard.ZstdError):
+            logger.exception("Failed to read stored stats for %s", date)
+            return None
+
+        if hashlib.blake2b(payload, digest_size=16).hexdigest() != digest:
+            logger.warning("Stored stats for %s do not match their digest", date)
+            return None
+        return decode(payload)
+
+    def put(self, date: datetime.date, stats: dict) -> str:
+        payload = encode(stats)
+        digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+            self._write(object_path, compressor.compress(payload))
+        self._write(self._day_path(date), digest.encode())
+        return digest
+
+
+stats_store = StatsStore(config.settings.stats_store_dir)
@@ -298,7 +298,9 @@ def fetch_summary_bytes(url: str) -> bytes | None:
             raise
 
 
-def update(sqldb) -> None:
+def update(sqldb) -> set[str]:
+    """Load the repo summary and return the IDs of apps whose summary or EOL state changed."""
+    changed: set[str] = set()
     all_apps = set(apps.get_appids(include_eol=True))
     non_eol_apps = set(apps.get_appids(include_eol=False))
 
@@ -310,7 +312,7 @@ def update(sqldb) -> None:
         summary = GLib.Bytes.new(summary_bytes)
         summary_dict, updated_at_dict, metadata = parse_summary(summary, sqldb)
     else:
-        return
+        return changed
 
     summary_idx_url = f"{repo_url}/summary.idx"
     idx_bytes = fetch_summary_bytes(summary_idx_url)
@@ -430,6 +432,8 @@ def update(sqldb) -> None:
         for app_id, summary_json in apps_to_update.items():
             app = models.App.by_appid(sqldb, app_id)
             if app:
+                if app.summary != summary_json:
+                    changed.add(app_id)
                 app.summary = summary_json
                 sqldb.session.add(app)
             else:
@@ -439,10 +443,12 @@ def update(sqldb) -> None:
                     summary=summary_json,
                 )
                 sqldb.session.add(app)
+                changed.add(app_id)
 
         sqldb.session.commit()
     except Exception:
         sqldb.session.rollback()
+        changed.clear()
         logger.exception("Error updating apps")
 
     eol_rebase, eol_message = parse_eol_data(metadata)
@@ -457,7 +463,9 @@ def update(sqldb) -> None:
         for appid_and_branch, message in eol_message.items():
             app_id, _, branch = appid_and_branch.partition(":")
             summary_eol_map[app_id].add(branch or "stable")
-            models.App.set_eol_message(sqldb, app_id, message)
+            if models.App.get_eol_message(sqldb, app_id) != message:
+                models.App.set_eol_message(sqldb, app_id, message)
+                changed.add(app_id)
 
         db_eol_apps = set(models.App.get_eol_apps(sqldb))
         apps_to_process = set(summary_eol_map.keys()).union(db_eol_apps)
@@ -467,6 +475,7 @@ def update(sqldb) -> None:
             if not app:
                 continue
 
+            was_eol = (app.is_eol, app.eol_branches, app.eol_message)
             if app_id in summary_eol_map:
                 app.is_eol = True
                 app.eol_branches = list(summary_eol_map[app_id])
@@ -485,6 +494,8 @@ def update(sqldb) -> None:
                 app.eol_message = None
                 app.eol_dates = None
                 sqldb.session.add(app)
+            if (app.is_eol, app.eol_branches, app.eol_message) != was_eol:
+                changed.add(app_id)
         sqldb.session.commit()
     except Exception:
         sqldb.session.rollback()
@@ -531,3 +542,13 @@ def update(sqldb) -> None:
             pass
 
     models.AppExtensionLookup.set_all_mappings(sqldb, reverse_lookup)
+
+    addons = (
+        sqldb.session.query(models.App.app_id, models.App.summary["branch"].astext)
+        .filter(models.App.type == "addon")
+        .filter(~models.App.is_eol)
+        .all()
+    )
+    models.AppAddonIndex.set_all(sqldb, dict(addons))
+
+    return changed
@@ -1,6 +1,8 @@
 from decimal import Decimal, localcontext
 from math import nextafter, tanh
 
+import numpy as np
+
 
 def _normalize_trend(adjusted_trend: float) -> float:
     limit = 20.0
@@ -62,3 +64,58 @@ def calculate_trending_score(
                 adjusted_momentum *= Decimal("0.5")
 
     return _normalize_trend(float(adjusted_momentum))
+
+
+def calculate_trending_scores(
+    installs_over_days: np.ndarray,
+    quality_passed_ratios: np.ndarray,
+    icon_quality_bonuses: np.ndarray,
+    is_eol: np.ndarray,
+) -> np.ndarray:
+    """Calculate the trending scores of many apps at once.
+
+    ``installs_over_days`` is an ``(apps, 21)`` matrix and the other
+    arguments hold one value per app. This follows
+    ``calculate_trending_score`` in float64, matching its scores to within
+    float rounding.
+    """
+    history = np.asarray(installs_over_days, dtype=np.float64)
+    if history.ndim != 2 or history.shape[1] != 21:
+        raise ValueError("installs_over_days must have exactly 21 columns")
+
+    recent = history[:, 14:]
+    baseline_rate = history[:, :14].sum(axis=1) / 14
+    recent_rate = recent.sum(axis=1) / 7
+    recent_volume = np.abs(recent).sum(axis=1)
+
+    growth = (recent_rate - baseline_rate) / (np.abs(baseline_rate) + 5)
+    directional_growth = np.where(recent_rate > 0, growth, np.minimum(growth, 0.0))
+    confidence = recent_volume / (recent_volume + 50)
+
+    recent_dispersion = np.sqrt(((recent - recent_rate[:, None]) ** 2).sum(axis=1) / 7)
+    consistency_denominator = np.abs(recent_rate) + recent_dispersion
+    consistency = np.divide(
+        np.abs(recent_rate),
+        consistency_denominator,
+        out=np.zeros_like(recent_rate),
+        where=consistency_denominator != 0,
+    )
+    consistency_weight = 0.5 + 0.5 * consistency
+
+    adjusted_momentum = 20 * directional_growth * confidence * consistency_weight
+    positive = adjusted_momentum > 0
+    guideline_quality = np.asarray(quality_passed_ratios, dtype=np.float64) ** 0.7
+    icon_quality = np.minimum(np.asarray(icon_quality_bonuses) / 5, 1.0)
+    quality_signal = 0.75 * guideline_quality + 0.25 * icon_quality
+    adjusted_momentum = np.where(
+        positive, adjusted_momentum * (1 + 0.025 * quality_signal), adjusted_momentum
+    )
+    adjusted_momentum = np.where(
+        positive & np.asarray(is_eol, dtype=bool),
+        adjusted_momentum * 0.5,
+        adjusted_momentum,
+    )
+
+    limit = 20.0
+    bound = nextafter(limit, 0.0)
+    return np.clip(limit * np.tanh(adjusted_momentum / limit), -bound, bound)
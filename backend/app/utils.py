@@ -1,11 +1,19 @@
 import base64
+import concurrent.futures
 import ctypes
 import gettext
 import gzip
 import hashlib
+import itertools
 import json
+import logging
+import multiprocessing
 import os
 import re
+import time
+import zlib
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
@@ -27,6 +35,12 @@ MAXUINT = ctypes.c_uint(-1).value
 mobile_min_size = 360
 mobile_max_size = 768
 
+APPSTREAM_CHUNK_SIZE = 64 * 1024
+APPSTREAM_BATCH_SIZE = 200
+APPSTREAM_WORKERS = min(4, os.cpu_count() or 1)
+
+logger = logging.getLogger(__name__)
+
 
 def utcnow() -> datetime:
     # Naive UTC: the OIDC timestamp columns are timezone-naive, so storing and
@@ -75,459 +89,530 @@ def add_translation(
     apps_locale[language][key] = value
 
 
-def appstream2dict(appstream_url=None) -> dict[str, dict]:
-    if config.settings.appstream_repos:
-        appstream_path = os.path.join(
-            config.settings.appstream_repos,
-            "repo",
-            "appstream",
-            "x86_64",
-            "appstream.xml",
-        )
-        with open(appstream_path, "rb") as file:
-            if appstream_path.endswith(".gz"):
-                appstream = gzip.decompress(file.read())
-            else:
-                appstream = file.read()
-    else:
-        if not appstream_url:
-            appstream_url = (
-                "https://dl.flathub.org/repo/appstream/x86_64/appstream.xml.gz"
-            )
-        with http_client.stream("GET", appstream_url) as r:
-            appstream = gzip.decompress(r.read())
+def _component2dict(component: etree._Element) -> tuple[str, dict]:
+    media_base_url = "https://dl.flathub.org/media"
 
-    root = etree.fromstring(appstream)
+    appid = re.sub(remove_desktop_re, "", component.find("id").text)
+    app = {}
+    parsed_content_rating = None
 
-    apps = {}
+    app["type"] = component.attrib.get("type", "generic")
+    app["locales"] = {}
 
-    media_base_url = "https://dl.flathub.org/media"
+    isMobileFriendly = False
+    hasTouch = False
 
-    for component in root:
-        appid = re.sub(remove_desktop_re, "", component.find("id").text)
-        app = {}
-        parsed_content_rating = None
+    for tag_name in ("requires", "recommends"):
+        if (tag := component.find(tag_name)) is not None and (
+            display_lengths := tag.findall("display_length")
+        ):
+            isMobileFriendly = display_length_supports_mobile(display_lengths)
+            if isMobileFriendly:
+                break
 
-        app["type"] = component.attrib.get("type", "generic")
-        app["locales"] = {}
+    for requirement in ("supports", "recommends"):
+        element = component.find(requirement)
+        if element is not None:
+            controls = element.findall("control")
+            if any(control.text == "touch" for control in controls):
+                hasTouch = True
+                break
 
-        isMobileFriendly = False
-        hasTouch = False
+    app["isMobileFriendly"] = isMobileFriendly and hasTouch
 
-        for tag_name in ("requires", "recommends"):
-            if (tag := component.find(tag_name)) is not None and (
-                display_lengths := tag.findall("display_length")
-            ):
-                isMobileFriendly = display_length_supports_mobile(display_lengths)
-                if isMobileFriendly:
-                    break
-
-        for requirement in ("supports", "recommends"):
-            element = component.find(requirement)
-            if element is not None:
-                controls = element.findall("control")
-                if any(control.text == "touch" for control in controls):
-                    hasTouch = True
-                    break
-
-        app["isMobileFriendly"] = isMobileFriendly and hasTouch
-
-        descriptions = component.findall("description")
-        if len(descriptions):
-            for desc in descriptions:
-                component.remove(desc)
-
-                description = [
-                    etree.tostring(tag, encoding=("unicode")) for tag in desc
-                ]
+    descriptions = component.findall("description")
+    if len(descriptions):
+        for desc in descriptions:
+            component.remove(desc)
 
-                if len(desc.attrib) == 0:
-                    app["description"] = "".join(description)
-                else:
-                    add_translation(
-                        app["locales"],
-                        desc.get("{http://www.w3.org/XML/1998/namespace}lang"),
-                        appid,
-                        "description",
-                        "".join(description),
-                    )
+            description = [etree.tostring(tag, encoding=("unicode")) for tag in desc]
 
-        screenshotsComponent = component.find("screenshots")
+            if len(desc.attrib) == 0:
+                app["description"] = "".join(description)
+            else:
+                add_translation(
+                    app["locales"],
+                    desc.get("{http://www.w3.org/XML/1998/namespace}lang"),
+                    appid,
+                    "description",
+                    "".join(description),
+                )
+
+    screenshotsComponent = component.find("screenshots")
 
-        if screenshotsComponent is not None:
-            if not all(
-                screenshot.attrib.get("environment")
-                in (
+    if screenshotsComponent is not None:
+        if not all(
+            screenshot.attrib.get("environment")
+            in (
+                "windows",
+                "macos",
+            )
+            for screenshot in screenshotsComponent
+        ):
+            screenshots = [
+                screenshot
+                for screenshot in screenshotsComponent
+                if screenshot.attrib.get("environment")
+                not in (
                     "windows",
                     "macos",
                 )
-                for screenshot in screenshotsComponent
-            ):
-                screenshots = [
-                    screenshot
-                    for screenshot in screenshotsComponent
-                    if screenshot.attrib.get("environment")
-                    not in (
-                        "windows",
-                        "macos",
-                    )
-                ]
-            else:
-                screenshots = [screenshot for screenshot in screenshotsComponent]
+            ]
+        else:
+            screenshots = [screenshot for screenshot in screenshotsComponent]
 
-            app["screenshots"] = []
-            for i, screenshot in enumerate(screenshots):
-                attrs = {}
+        app["screenshots"] = []
+        for i, screenshot in enumerate(screenshots):
+            attrs = {}
 
-                if screenshot.attrib.get("environment") is not None:
-                    attrs["environment"] = screenshot.attrib.get("environment")
+            if screenshot.attrib.get("environment") is not None:
+                attrs["environment"] = screenshot.attrib.get("environment")
 
-                if component.attrib.get("type") == "desktop-application":
-                    for caption in screenshot.findall("caption"):
-                        if caption is not None and caption.text:
-                            caption_lang = caption.get(
-                                "{http://www.w3.org/XML/1998/namespace}lang"
-                            )
-                            if caption_lang is None:
-                                attrs["caption"] = caption.text
-                            else:
-                                add_translation(
-                                    app["locales"],
-                                    caption_lang,
-                                    appid,
-                                    f"screenshots_caption_{i}",
-                                    caption.text,
-                                )
-
-                if screenshot.attrib.get("type") == "default":
-                    attrs["default"] = True
-
-                attrs["sizes"] = []
-                for image in screenshot:
-                    if (
-                        image.attrib.get("type") == "thumbnail"
-                        and image.attrib.get(
+            if component.attrib.get("type") == "desktop-application":
+                for caption in screenshot.findall("caption"):
+                    if caption is not None and caption.text:
+                        caption_lang = caption.get(
                             "{http://www.w3.org/XML/1998/namespace}lang"
                         )
-                        is None
-                        or (
-                            image.attrib.get("type") == "source"
-                            and image.attrib.get("width") is not None
-                            and image.attrib.get("height") is not None
-                            and image.get("{http://www.w3.org/XML/1998/namespace}lang")
-                            is None
-                        )
-                    ):
-                        scale = None
-                        if image.attrib.get("scale") is not None:
-                            scale = image.attrib.get("scale")
-                        width = image.attrib.get("width")
-                        height = image.attrib.get("height")
-
-                        if image.text.startswith("http"):
-                            if image.text.startswith(
-                                "https://dl.flathub.org/repo/screenshots/"
-                            ):
-                                src = image.text.replace(
-                                    "https://dl.flathub.org/repo/screenshots/",
-                                    "https://dl.flathub.org/media/",
-                                    1,
-                                )
-                            else:
-                                src = image.text
-                        else:
-                            src = f"{media_base_url}/{image.text}"
-
-                        attrs["sizes"].append(
-                            {
-                                "width": width,
-                                "height": height,
-                                "scale": scale if scale is not None else "1x",
-                                "src": src,
-                            }
-                        )
-
-                if attrs and len(attrs["sizes"]) > 0:
-                    app["screenshots"].append(attrs.copy())
-            component.remove(screenshotsComponent)
-
-        releases = component.find("releases")
-        if releases is not None:
-            app["releases"] = []
-            for i, release in enumerate(releases):
-                attrs = {}
-                for attr in release.attrib:
-                    attrs[attr] = release.attrib[attr]
-
-                # Per the AppStream spec, releases without an explicit type
-                # default to "stable"
-                if "type" not in attrs:
-                    attrs["type"] = "stable"
-
-                descs = release.findall("description")
-                for desc in descs:
-                    if desc is not None:
-                        description = [
-                            etree.tostring(tag, encoding=("unicode")) for tag in desc
-                        ]
-                        desc_lang = desc.get(
-                            "{http://www.w3.org/XML/1998/namespace}lang"
-                        )
-                        if desc_lang is None:
-                            attrs["description"] = "".join(description)
+                        if caption_lang is None:
+                            attrs["caption"] = caption.text
                         else:
                             add_translation(
                                 app["locales"],
-                                desc_lang,
+                                caption_lang,
                                 appid,
-                                "release_description_" + str(i),
-                                "".join(description),
+                                f"screenshots_caption_{i}",
+                                caption.text,
+                            )
+
+            if screenshot.attrib.get("type") == "default":
+                attrs["default"] = True
+
+            attrs["sizes"] = []
+            for image in screenshot:
+                if (
+                    image.attrib.get("type") == "thumbnail"
+                    and image.attrib.get("{http://www.w3.org/XML/1998/namespace}lang")
+                    is None
+                    or (
+                        image.attrib.get("type") == "source"
+                        and image.attrib.get("width") is not None
+                        and image.attrib.get("height") is not None
+                        and image.get("{http://www.w3.org/XML/1998/namespace}lang")
+                        is None
+                    )
+                ):
+                    scale = None
+                    if image.attrib.get("scale") is not None:
+                        scale = image.attrib.get("scale")
+                    width = image.attrib.get("width")
+                    height = image.attrib.get("height")
+
+                    if image.text.startswith("http"):
+                        if image.text.startswith(
+                            "https://dl.flathub.org/repo/screenshots/"
+                        ):
+                            src = image.text.replace(
+                                "https://dl.flathub.org/repo/screenshots/",
+                                "https://dl.flathub.org/media/",
+                                1,
                             )
+                        else:
+                            src = image.text
+                    else:
+                        src = f"{media_base_url}/{image.text}"
+
+                    attrs["sizes"].append(
+                        {
+                            "width": width,
+                            "height": height,
+                            "scale": scale if scale is not None else "1x",
+                            "src": src,
+                        }
+                    )
 
-                url = release.find("url")
-                if url is not None:
-                    attrs["url"] = url.text
-
-                app["releases"].append(attrs.copy())
-            component.remove(releases)
-
-        content_rating = component.find("content_rating")
-        if content_rating is not None:
-            parsed_content_rating = {"type": content_rating.attrib.get("type")}
-            for attr in content_rating:
-                attr_name = attr.attrib.get("id")
-                if attr_name:
-                    parsed_content_rating[attr_name.replace("-", "_")] = attr.text
-            component.remove(content_rating)
-
-        urls = component.findall("url")
-        if len(urls):
-            app["urls"] = {}
-            for url in urls:
-                component.remove(url)
-                url_type = url.attrib.get("type")
-                if url_type:
-                    app["urls"][url_type.replace("-", "_")] = url.text
-
-        icons = component.findall("icon")
-        iconListNewLocation = []
-        iconListOldLocation = []
-        if len(icons):
+            if attrs and len(attrs["sizes"]) > 0:
+                app["screenshots"].append(attrs.copy())
+        component.remove(screenshotsComponent)
+
+    releases = component.find("releases")
+    if releases is not None:
+        app["releases"] = []
+        for i, release in enumerate(releases):
+            attrs = {}
+            for attr in release.attrib:
+                attrs[attr] = release.attrib[attr]
+
+            # Per the AppStream spec, releases without an explicit type
+            # default to "stable"
+            if "type" not in attrs:
+                attrs["type"] = "stable"
+
+            descs = release.findall("description")
+            for desc in descs:
+                if desc is not None:
+                    description = [
+                        etree.tostring(tag, encoding=("unicode")) for tag in desc
+                    ]
+                    desc_lang = desc.get("{http://www.w3.org/XML/1998/namespace}lang")
+                    if desc_lang is None:
+                        attrs["description"] = "".join(description)
+                    else:
+                        add_translation(
+                            app["locales"],
+                            desc_lang,
+                            appid,
+                            "release_description_" + str(i),
+                            "".join(description),
+                        )
+
+            url = release.find("url")
+            if url is not None:
+                attrs["url"] = url.text
+
+            app["releases"].append(attrs.copy())
+        component.remove(releases)
+
+    content_rating = component.find("content_rating")
+    if content_rating is not None:
+        parsed_content_rating = {"type": content_rating.attrib.get("type")}
+        for attr in content_rating:
+            attr_name = attr.attrib.get("id")
+            if attr_name:
+                parsed_content_rating[attr_name.replace("-", "_")] = attr.text
+        component.remove(content_rating)
+
+    urls = component.findall("url")
+    if len(urls):
+        app["urls"] = {}
+        for url in urls:
+            component.remove(url)
+            url_type = url.attrib.get("type")
+            if url_type:
+                app["urls"][url_type.replace("-", "_")] = url.text
+
+    icons = component.findall("icon")
+    iconListNewLocation = []
+    iconListOldLocation = []
+    if len(icons):
+        for icon in icons:
+            icon_type = icon.attrib.get("type")
+            if icon_type == "remote" and icon.text.startswith(
+                "https://dl.flathub.org/media/"
+            ):
+                if "icon" not in app:
+                    app["icon"] = icon.text
+                attrs = {}
+                for attr in icon.attrib:
+                    attrs[attr] = icon.attrib[attr]
+                attrs.update({"url": icon.text})
+                iconListNewLocation.append(attrs)
+
+        if not app.get("icon"):
             for icon in icons:
                 icon_type = icon.attrib.get("type")
-                if icon_type == "remote" and icon.text.startswith(
-                    "https://dl.flathub.org/media/"
-                ):
+                if icon_type == "cached":
                     if "icon" not in app:
-                        app["icon"] = icon.text
+                        app["icon"] = (
+                            f"https://dl.flathub.org/media/icons/128x128/{icon.text}"
+                        )
                     attrs = {}
                     for attr in icon.attrib:
                         attrs[attr] = icon.attrib[attr]
-                    attrs.update({"url": icon.text})
-                    iconListNewLocation.append(attrs)
-
-            if not app.get("icon"):
-                for icon in icons:
-                    icon_type = icon.attrib.get("type")
-                    if icon_type == "cached":
-                        if "icon" not in app:
-                            app["icon"] = (
-                                f"https://dl.flathub.org/media/icons/128x128/{icon.text}"
-                            )
-                        attrs = {}
-                        for attr in icon.attrib:
-                            attrs[attr] = icon.attrib[attr]
-                        scaleSuffix = f"@{attrs['scale']}" if "scale" in attrs else ""
-                        attrs.update(
-                            {
-                                "url": f"https://dl.flathub.org/media/icons/{attrs['height']}x{attrs['width']}{scaleSuffix}/{icon.text}"
-                            }
-                        )
-                        iconListOldLocation.append(attrs)
-
-            for icon in icons:
-                component.remove(icon)
+                    scaleSuffix = f"@{attrs['scale']}" if "scale" in attrs else ""
+                    attrs.update(
+                        {
+                            "url": f"https://dl.flathub.org/media/icons/{attrs['height']}x{attrs['width']}{scaleSuffix}/{icon.text}"
+                        }
+                    )
+                    iconListOldLocation.append(attrs)
 
-        # Bail out if the loop above didn't find an icon
-        if not app.get("icon"):
-            app["icon"] = None
+        for icon in icons:
+            component.remove(icon)
 
-        if len(iconListNewLocation) == 0 and len(iconListOldLocation) == 0:
-            app["icons"] = None
-        elif len(iconListNewLocation):
-            app["icons"] = iconListNewLocation
-        else:
-            app["icons"] = iconListNewLocation
+    # Bail out if the loop above didn't find an icon
+    if not app.get("icon"):
+        app["icon"] = None
 
-        metadata = component.find("metadata")
-        if metadata is not None:
+    if len(iconListNewLocation) == 0 and len(iconListOldLocation) == 0:
+        app["icons"] = None
+    elif len(iconListNewLocation):
+        app["icons"] = iconListNewLocation
+    else:
+        app["icons"] = iconListNewLocation
+
+    metadata = component.find("metadata")
+    if metadata is not None:
+        app["metadata"] = {}
+        for value in metadata:
+            key = value.attrib.get("key")
+            app["metadata"][key] = value.text
+        component.remove(metadata)
+
+    custom = component.find("custom")
+    if custom is not None:
+        if "metadata" not in app:
             app["metadata"] = {}
-            for value in metadata:
-                key = value.attrib.get("key")
-                app["metadata"][key] = value.text
-            component.remove(metadata)
-
-        custom = component.find("custom")
-        if custom is not None:
-            if "metadata" not in app:
-                app["metadata"] = {}
-            for value in custom:
-                key = value.attrib.get("key")
-                app["metadata"][key] = value.text
-            component.remove(custom)
-
-        developers = component.findall(".//developer/name")
-        if len(developers):
-            app["developers"] = []
-            for name in developers:
-                # TODO: support translations
-                if name.get("{http://www.w3.org/XML/1998/namespace}lang"):
-                    continue
-                app["developers"].append(name.text)
-            component.remove(component.find("developer"))
-
-        for elem in component:
-            elem_xml_lang = elem.get("{http://www.w3.org/XML/1998/namespace}lang")
-            if elem_xml_lang and len(elem) == 0 and elem.text and elem.text.strip():
-                add_translation(
-                    app["locales"],
-                    elem_xml_lang,
-                    appid,
-                    elem.tag,
-                    elem.text.strip(),
-                )
+        for value in custom:
+            key = value.attrib.get("key")
+            app["metadata"][key] = value.text
+        component.remove(custom)
+
+    developers = component.findall(".//developer/name")
+    if len(developers):
+        app["developers"] = []
+        for name in developers:
+            # TODO: support translations
+            if name.get("{http://www.w3.org/XML/1998/namespace}lang"):
                 continue
+            app["developers"].append(name.text)
+        component.remove(component.find("developer"))
+
+    for elem in component:
+        elem_xml_lang = elem.get("{http://www.w3.org/XML/1998/namespace}lang")
+        if elem_xml_lang and len(elem) == 0 and elem.text and elem.text.strip():
+            add_translation(
+                app["locales"],
+                elem_xml_lang,
+                appid,
+                elem.tag,
+                elem.text.strip(),
+            )
+            continue
 
-            if len(elem) == 0 and len(elem.attrib) == 0:
-                app[elem.tag] = elem.text
+        if len(elem) == 0 and len(elem.attrib) == 0:
+            app[elem.tag] = elem.text
 
-            if len(elem) == 0 and len(elem.attrib):
-                attrs = {}
-                attrs["value"] = elem.text
-                for attr in elem.attrib:
-                    attrs[attr] = elem.attrib[attr]
-
-                if elem.tag not in app:
-                    siblings = component.findall(elem.tag)
-                    if len(siblings) > 1:
-                        app[elem.tag] = [attrs.copy()]
-                    else:
-                        app[elem.tag] = attrs
-                        continue
-                else:
-                    app[elem.tag] = attrs.copy()
+        if len(elem) == 0 and len(elem.attrib):
+            attrs = {}
+            attrs["value"] = elem.text
+            for attr in elem.attrib:
+                attrs[attr] = elem.attrib[attr]
 
-            if len(elem):
-                # Check if parent element has xml:lang (for container elements with localized children)
-                parent_xml_lang = elem.get("{http://www.w3.org/XML/1998/namespace}lang")
+            if elem.tag not in app:
+                siblings = component.findall(elem.tag)
+                if len(siblings) > 1:
+                    app[elem.tag] = [attrs.copy()]
+                else:
+                    app[elem.tag] = attrs
+                    continue
+            else:
+                app[elem.tag] = attrs.copy()
+
+        if len(elem):
+            # Check if parent element has xml:lang (for container elements with localized children)
+            parent_xml_lang = elem.get("{http://www.w3.org/XML/1998/namespace}lang")
+
+            # If parent has xml:lang, all children are translations
+            if parent_xml_lang:
+                # Collect all child text values into a list
+                translated_items = [
+                    tag.text.strip()
+                    for tag in elem
+                    if not len(tag.attrib) and tag.text is not None and tag.text.strip()
+                ]
 
-                # If parent has xml:lang, all children are translations
-                if parent_xml_lang:
-                    # Collect all child text values into a list
+                if elem.tag == "keywords" and translated_items:
                     translated_items = [
-                        tag.text.strip()
-                        for tag in elem
-                        if not len(tag.attrib)
-                        and tag.text is not None
-                        and tag.text.strip()
-                    ]
+                        item
+                        for item in translated_items
+                        if isinstance(item, str)
+                        and len(item) <= 20
+                        and not any(c in item for c in "./")
+                    ][:3]
 
-                    if elem.tag == "keywords" and translated_items:
-                        translated_items = [
-                            item
-                            for item in translated_items
-                            if isinstance(item, str)
-                            and len(item) <= 20
-                            and not any(c in item for c in "./")
-                        ][:3]
+                if translated_items:
+                    add_translation(
+                        app["locales"],
+                        parent_xml_lang,
+                        appid,
+                        elem.tag,
+                        translated_items,
+                    )
+                continue
 
-                    if translated_items:
+            # Parent has no xml:lang, process children normally
+            if elem.tag not in app:
+                app[elem.tag] = []
+            for tag_index, tag in enumerate(elem):
+                # Try to get xml:lang attribute from child
+                xml_lang = tag.get("{http://www.w3.org/XML/1998/namespace}lang")
+
+                # Check if this is a translated child element
+                if xml_lang:
+                    # Add translation for child elements like <keyword xml:lang="de">
+                    if tag.text and tag.text.strip():
                         add_translation(
                             app["locales"],
-                            parent_xml_lang,
+                            xml_lang,
                             appid,
-                            elem.tag,
-                            translated_items,
+                            f"{elem.tag}_{tag_index}",
+                            tag.text.strip(),
                         )
                     continue
 
-                # Parent has no xml:lang, process children normally
-                if elem.tag not in app:
-                    app[elem.tag] = []
-                for tag_index, tag in enumerate(elem):
-                    # Try to get xml:lang attribute from child
-                    xml_lang = tag.get("{http://www.w3.org/XML/1998/namespace}lang")
-
-                    # Check if this is a translated child element
-                    if xml_lang:
-                        # Add translation for child elements like <keyword xml:lang="de">
-                        if tag.text and tag.text.strip():
-                            add_translation(
-                                app["locales"],
-                                xml_lang,
-                                appid,
-                                f"{elem.tag}_{tag_index}",
-                                tag.text.strip(),
-                            )
-                        continue
+                # No xml:lang attribute - either no attributes or other attributes
+                if not len(tag.attrib):
+                    # Simple text element with no attributes
+                    if tag.text and tag.text.strip():
+                        app[elem.tag].append(tag.text.strip())
+                    continue
 
-                    # No xml:lang attribute - either no attributes or other attributes
-                    if not len(tag.attrib):
-                        # Simple text element with no attributes
-                        if tag.text and tag.text.strip():
-                            app[elem.tag].append(tag.text.strip())
-                        continue
+                # Has other attributes (not xml:lang)
+                attrs = {}
+                attrs["value"] = tag.text
+                for attr in tag.attrib:
+                    attrs[attr] = tag.attrib[attr]
+
+                app[elem.tag].append(attrs.copy())
+
+            if elem.tag == "keywords" and elem.tag in app:
+                app[elem.tag] = [
+                    kw
+                    for kw in app[elem.tag]
+                    if isinstance(kw, str)
+                    and len(kw) <= 10
+                    and not any(c in kw for c in " ./")
+                ][:3]
+
+    # Determine whether the app is FOSS
+    app_licence = app.get("project_license", "")
+    app["is_free_license"] = app_licence and AppStream.license_is_free_license(
+        app_licence
+    )
 
-                    # Has other attributes (not xml:lang)
-                    attrs = {}
-                    attrs["value"] = tag.text
-                    for attr in tag.attrib:
-                        attrs[attr] = tag.attrib[attr]
-
-                    app[elem.tag].append(attrs.copy())
-
-                if elem.tag == "keywords" and elem.tag in app:
-                    app[elem.tag] = [
-                        kw
-                        for kw in app[elem.tag]
-                        if isinstance(kw, str)
-                        and len(kw) <= 10
-                        and not any(c in kw for c in " ./")
-                    ][:3]
+    if app["is_free_license"] == "":
+        app["is_free_license"] = False
 
-        # Determine whether the app is FOSS
-        app_licence = app.get("project_license", "")
-        app["is_free_license"] = app_licence and AppStream.license_is_free_license(
-            app_licence
+    # Settings seems to be a lonely, forgotten category with just 3 apps,
+    # add them to more popular System
+    if "categories" in app and "Settings" in app["categories"]:
+        app["categories"].append("System")
+
+    # Backfill developer_name for backwards compatibility
+    if app_developers := app.get("developers"):
+        app["developer_name"] = ", ".join(app_developers)
+
+    # Some apps append .desktop suffix for legacy reasons, fall back to what
+    # Flatpak put into bundle component for actual ID
+    appid = app["bundle"]["value"].split("/")[1]
+    app["id"] = appid
+
+    if parsed_content_rating and parsed_content_rating.get("type") is not None:
+        content_rating = {}
+        for lang in localize.LOCALES:
+            content_rating[lang] = get_content_rating_details(
+                parsed_content_rating, lang
+            )
+
+        app["content_rating_details"] = content_rating
+
+    return appid, app
+
+
+def _iter_appstream_chunks(appstream_url: str | None) -> Iterator[bytes]:
+    """Yield the decompressed appstream XML as it is read or downloaded."""
+    if config.settings.appstream_repos:
+        appstream_path = os.path.join(
+            config.settings.appstream_repos,
+            "repo",
+            "appstream",
+            "x86_64",
+            "appstream.xml",
         )
+        opener = gzip.open if appstream_path.endswith(".gz") else open
+        with opener(appstream_path, "rb") as file:
+            while chunk := file.read(APPSTREAM_CHUNK_SIZE):
+                yield chunk
+    else:
+        if not appstream_url:
+            appstream_url = (
+                "https://dl.flathub.org/repo/appstream/x86_64/appstream.xml.gz"
+            )
+        decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        with http_client.stream("GET", appstream_url) as r:
+            for chunk in r.iter_bytes(APPSTREAM_CHUNK_SIZE):
+                yield decompressor.decompress(chunk)
+        yield decompressor.flush()
+
+
+def _iter_appstream_components(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Yield every top-level component serialized, as soon as it is parsed.
+
+    Components are removed from the tree once yielded, so only the one being
+    parsed is ever held in memory.
+    """
+    parser = etree.XMLPullParser(events=("end",), tag="component")
+
+    def components() -> Iterator[bytes]:
+        for _, component in parser.read_events():
+            parent = component.getparent()
+            if parent is None or parent.getparent() is not None:
+                continue
+            yield etree.tostring(component, with_tail=False)
+            component.clear()
+            while component.getprevious() is not None:
+                del parent[0]
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from components()
+    parser.close()
+    yield from components()
 
-        if app["is_free_license"] == "":
-            app["is_free_license"] = False
-
-        # Settings seems to be a lonely, forgotten category with just 3 apps,
-        # add them to more popular System
-        if "categories" in app and "Settings" in app["categories"]:
-            app["categories"].append("System")
-
-        # Backfill developer_name for backwards compatibility
-        if app_developers := app.get("developers"):
-            app["developer_name"] = ", ".join(app_developers)
-
-        # Some apps append .desktop suffix for legacy reasons, fall back to what
-        # Flatpak put into bundle component for actual ID
-        appid = app["bundle"]["value"].split("/")[1]
-        app["id"] = appid
-        apps[appid] = app
-
-        if parsed_content_rating and parsed_content_rating.get("type") is not None:
-            content_rating = {}
-            for lang in localize.LOCALES:
-                content_rating[lang] = get_content_rating_details(
-                    parsed_content_rating, lang
-                )
 
-            apps[appid]["content_rating_details"] = content_rating
+def _components2dicts(components: Sequence[bytes]) -> list[tuple[str, dict]]:
+    return [_component2dict(etree.fromstring(component)) for component in components]
 
+
+def appstream2dict(appstream_url=None) -> dict[str, dict]:
+    """Parse the appstream catalogue into app dicts keyed by app ID.
+
+    The XML is parsed while it is read, and batches of components are turned
+    into dicts in a process pool. The pool is only started once there is more
+    than one batch, so small build repos are parsed inline.
+    """
+    started = time.perf_counter()
+    batches = itertools.batched(
+        _iter_appstream_components(_iter_appstream_chunks(appstream_url)),
+        APPSTREAM_BATCH_SIZE,
+    )
+    apps: dict[str, dict] = {}
+    waited = 0.0
+
+    head = [batch for batch in (next(batches, None), next(batches, None)) if batch]
+    if len(head) < 2 or APPSTREAM_WORKERS <= 1:
+        for batch in itertools.chain(head, batches):
+            apps.update(_components2dicts(batch))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=APPSTREAM_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver"),
+        ) as executor:
+            pending: deque[concurrent.futures.Future] = deque()
+            for batch in itertools.chain(head, batches):
+                pending.append(executor.submit(_components2dicts, batch))
+                # Keep parsing ahead of the workers, but not of the whole file
+                while len(pending) > APPSTREAM_WORKERS * 2 or (
+                    pending and pending[0].done()
+                ):
+                    wait_started = time.perf_counter()
+                    apps.update(pending.popleft().result())
+                    waited += time.perf_counter() - wait_started
+            while pending:
+                wait_started = time.perf_counter()
+                apps.update(pending.popleft().result())
+                waited += time.perf_counter() - wait_started
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Parsed %d appstream components in %.2fs (%.2fs reading and parsing, "
+        "%.2fs waiting for transforms)",
+        len(apps),
+        elapsed,
+        elapsed - waited,
+        waited,
+    )
     return apps
 
 
@@ -3,7 +3,7 @@ import json
 import xml.etree.ElementTree as ET
 from datetime import UTC, datetime
 from enum import StrEnum
-from typing import Annotated, Literal
+from typing import Annotated, Any, Literal
 from uuid import uuid4
 
 import dns.asyncresolver
@@ -20,7 +20,7 @@ from pydantic import BaseModel, Field
 from sqlalchemy.sql import func
 
 from . import audit_log, cache, config, http_client, models, utils, worker
-from .database import get_db
+from .database import get_async_db, get_db
 from .login_info import AppAuthorDep, LoggedInDep, LoggedInInformation, ModifyUsersDep
 from .logins import refresh_oauth_token
 from .utils import jti
@@ -483,6 +483,11 @@ def is_appid_runtime(app_id: str) -> str | Literal[False]:
     return False
 
 
+def verification_tag(app_id: str, **_: Any) -> str:
+    """Cache tag of an app's verification; runtimes share the tag of their Sdk."""
+    return f"verification:{is_appid_runtime(app_id) or app_id}"
+
+
 def _get_existing_verification(app_id: str) -> models.AppVerification | None:
     if runtime_id := is_appid_runtime(app_id):
         app_id = runtime_id
@@ -491,6 +496,24 @@ def _get_existing_verification(app_id: str) -> models.AppVerification | None:
     with get_db("replica") as db:
         verifications = models.AppVerification.all_by_app(db, app_id)
 
+    return _select_existing_verification(verifications)
+
+
+async def _async_get_existing_verification(
+    app_id: str,
+) -> models.AppVerification | None:
+    if runtime_id := is_appid_runtime(app_id):
+        app_id = runtime_id
+
+    async with get_async_db("replica") as db:
+        verifications = await models.AppVerification.async_all_by_app(db, app_id)
+
+    return _select_existing_verification(verifications)
+
+
+def _select_existing_verification(
+    verifications: list[models.AppVerification],
+) -> models.AppVerification | None:
     # Manual unverification overrides any other verifications
     unverified = [
         verification
@@ -585,7 +608,7 @@ def get_verified_apps():
         404: {"description": "App not found"},
     },
 )
-@cache.cached(ttl=3600)
+@cache.cached(ttl=3600, tags=("app:{app_id}", verification_tag))
 async def get_verification_status(
     app_id: str = Path(
         min_length=6,
@@ -596,7 +619,7 @@ async def get_verification_status(
 ) -> VerificationStatus:
     """Gets the verification status of the given app."""
 
-    verification = _get_existing_verification(app_id)
+    verification = await _async_get_existing_verification(app_id)
 
     if verification is None:
         return VerificationStatusNone(
@@ -1032,7 +1055,7 @@ async def verify_by_login_provider(
 
     if not new_app:
         worker.republish_app.send(app_id)
-        await cache.mark_stale_by_pattern("cache:endpoint:get_verification_status:*")
+        await cache.invalidate_tags(verification_tag(app_id), stale=True)
 
 
 class LinkResponse(BaseModel):
@@ -1195,9 +1218,7 @@ async def confirm_website_verification(
 
         if not new_app:
             worker.republish_app.send(app_id)
-            await cache.mark_stale_by_pattern(
-                "cache:endpoint:get_verification_status:*"
-            )
+            await cache.invalidate_tags(verification_tag(app_id), stale=True)
 
     return result
 
@@ -1299,9 +1320,7 @@ async def confirm_dns_verification(
 
         if not new_app:
             worker.republish_app.send(app_id)
-            await cache.mark_stale_by_pattern(
-                "cache:endpoint:get_verification_status:*"
-            )
+            await cache.invalidate_tags(verification_tag(app_id), stale=True)
 
     return result
 
@@ -1375,7 +1394,7 @@ async def unverify(
     )
 
     worker.republish_app.send(app_id)
-    await cache.mark_stale_by_pattern("cache:endpoint:get_verification_status:*")
+    await cache.invalidate_tags(verification_tag(app_id), stale=True)
 
 
 @router.post(
@@ -1555,7 +1574,7 @@ async def manual_verification(
     )
 
     worker.republish_app.send(app_id)
-    await cache.mark_stale_by_pattern("cache:endpoint:get_verification_status:*")
+    await cache.invalidate_tags(verification_tag(app_id), stale=True)
 
     return VerificationStatusManual(
         verified=True,
@@ -1,5 +1,9 @@
 from ..audit_log import log_audit_event
-from ..search_tasks import monitor_hybrid_index_task, reconcile_hybrid_index
+from ..search_tasks import (
+    monitor_hybrid_index_task,
+    monitor_lexical_index_task,
+    reconcile_hybrid_index,
+)
 from .core import broker
 from .emails import send_email_new, send_one_email_new
 from .prune_audit_logs import prune_audit_logs
@@ -16,6 +20,7 @@ __all__ = [
     "broker",
     "log_audit_event",
     "monitor_hybrid_index_task",
+    "monitor_lexical_index_task",
     "prune_audit_logs",
     "prune_oidc_tokens",
     "reconcile_hybrid_index",
@@ -1,8 +1,15 @@
+import itertools
 from typing import cast
 
 import redis
 
 from .. import config
+from ..cache import (
+    LOCAL_INVALIDATION_CHANNEL,
+    LOCAL_KEY_INVALIDATION_CHANNEL,
+    MARK_STALE_BATCH_SIZE,
+    TAG_KEY_PREFIX,
+)
 
 redis_conn = redis.Redis(
     host=config.settings.redis_host,
@@ -10,6 +17,12 @@ redis_conn = redis.Redis(
     db=config.settings.redis_db,
     decode_responses=True,
 )
+# For values that are binary rather than text, e.g. the packed installs arrays
+redis_bytes_conn = redis.Redis(
+    host=config.settings.redis_host,
+    port=config.settings.redis_port,
+    db=config.settings.redis_db,
+)
 
 
 def invalidate_cache_by_pattern(pattern: str) -> int:
@@ -26,7 +39,32 @@ def invalidate_cache_by_pattern(pattern: str) -> int:
                 deleted_count += cast("int", redis_conn.delete(*keys))
             if cursor == 0:
                 break
+        redis_conn.publish(LOCAL_INVALIDATION_CHANNEL, pattern)
         return deleted_count
     except redis.RedisError as e:
         print(f"Cache invalidation error for pattern {pattern}: {e}")
         return 0
+
+
+def invalidate_tags(*tags: str) -> int:
+    """Sync tag invalidation for Dramatiq workers."""
+    try:
+        tag_keys = [f"{TAG_KEY_PREFIX}{tag}" for tag in tags]
+        pipe = redis_conn.pipeline(transaction=True)
+        for tag_key in tag_keys:
+            pipe.smembers(tag_key)
+        pipe.delete(*tag_keys)
+        results = pipe.execute()
+
+        keys = sorted(set().union(*results[:-1]))
+        if not keys:
+            return 0
+
+        deleted_count = 0
+        for batch in itertools.batched(keys, MARK_STALE_BATCH_SIZE):
+            deleted_count += cast("int", redis_conn.delete(*batch))
+            redis_conn.publish(LOCAL_KEY_INVALIDATION_CHANNEL, "\n".join(batch))
+        return deleted_count
+    except redis.RedisError as e:
+        print(f"Cache invalidation error for tags {tags}: {e}")
+        return 0
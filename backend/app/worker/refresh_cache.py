@@ -1,18 +1,32 @@
 import asyncio
 import logging
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from typing import Any
 
 import dramatiq
 from fastapi import Response
 
-from .. import cache, models
+from .. import cache, database, models
 from ..database import get_db
 
 logger = logging.getLogger(__name__)
 
+PREWARM_APP_LIMIT = 1000
+PREWARM_CONCURRENCY = 16
+PREWARM_PROGRESS_INTERVAL = 1000
+
 
 async def _refresh_cache_impl():
-    await cache.mark_stale_by_pattern("cache:endpoint:*")
-    await _prepopulate_cache()
+    try:
+        await cache.bump_generation()
+        await _prepopulate_cache()
+    finally:
+        # Each run has its own event loop, and pooled async connections and
+        # the Redis client are bound to the loop that opened them
+        await database.close_async_db()
+        await database.close_redis()
 
 
 @dramatiq.actor(time_limit=1000 * 60 * 60)
@@ -20,36 +34,101 @@ def refresh_cache():
     asyncio.run(_refresh_cache_impl())
 
 
+def _app_endpoints(app_id: str) -> list[tuple[Callable[..., Awaitable], dict]]:
+    from ..routes import apps, stats
+
+    return [
+        (apps.get_appstream, {"app_id": app_id, "locale": "en"}),
+        (apps.get_summary, {"app_id": app_id}),
+        (apps.get_isFullscreenApp, {"app_id": app_id}),
+        (apps.get_addons, {"app_id": app_id}),
+        (apps.get_eol_rebase_appid, {"app_id": app_id, "branch": "stable"}),
+        (apps.get_eol_message_appid, {"app_id": app_id, "branch": "stable"}),
+        (stats.get_stats_for_app, {"response": Response(), "app_id": app_id}),
+        # get_quality_moderation_for_app is not listed: it is only marked
+        # @cache.private for Cache-Control and has no Redis entry to warm
+    ]
+
+
 async def _prepopulate_cache():
-    from ..routes import apps, quality_moderation, stats
-
-    top_app_ids = _get_top_apps(1000)
-
-    for app_id in top_app_ids:
-        try:
-            await apps.get_appstream(app_id=app_id, locale="en")
-            await apps.get_summary(app_id=app_id)
-            await apps.get_isFullscreenApp(app_id=app_id)
-            await apps.get_addons(app_id=app_id)
-        except Exception:
-            logger.exception("Error prepopulating app data for %s", app_id)
-
-        try:
-            await apps.get_eol_rebase_appid(app_id=app_id, branch="stable")
-            await apps.get_eol_message_appid(app_id=app_id, branch="stable")
-        except Exception:
-            logger.exception("Error prepopulating EOL data for %s", app_id)
-
-        try:
-            quality_moderation.get_quality_moderation_for_app(app_id=app_id)
-        except Exception:
-            logger.exception("Error prepopulating quality moderation for %s", app_id)
-
-        try:
-            response = Response()
-            await stats.get_stats_for_app(response=response, app_id=app_id)
-        except Exception:
-            logger.exception("Error prepopulating stats for %s", app_id)
+    """Re-warm the stale endpoint entries of the most requested apps.
+
+    Apps are ordered by how often their entries were read since the previous
+    runs, falling back to installs for apps without recorded hits. Only
+    entries that are stale are recomputed; missing entries are left to the
+    first request and fresh ones are skipped.
+    """
+    app_ids = await _get_prewarm_app_ids(PREWARM_APP_LIMIT)
+    jobs = [job for app_id in app_ids for job in _app_endpoints(app_id)]
+
+    semaphore = asyncio.Semaphore(PREWARM_CONCURRENCY)
+    results: Counter[str] = Counter()
+    started_at = time.perf_counter()
+
+    async def warm(endpoint: Any, kwargs: dict) -> None:
+        async with semaphore:
+            try:
+                state = await endpoint.cache_state(**kwargs)
+                if state == cache.EntryState.STALE:
+                    await endpoint(**kwargs)
+                    results["warmed"] += 1
+                else:
+                    results[f"skipped_{state}"] += 1
+            except Exception:
+                results["failed"] += 1
+                logger.exception(
+                    "Error prepopulating %s for %s",
+                    endpoint.__name__,
+                    kwargs.get("app_id"),
+                )
+
+            done = results.total()
+            if done % PREWARM_PROGRESS_INTERVAL == 0:
+                _log_progress(done, len(jobs), results, started_at)
+
+    # Tasks copy the context they are created in, so none of them count hits
+    with cache.hits_not_counted():
+        async with asyncio.TaskGroup() as task_group:
+            for endpoint, kwargs in jobs:
+                task_group.create_task(warm(endpoint, kwargs))
+
+    _log_progress(results.total(), len(jobs), results, started_at)
+    await cache.decay_hit_counts()
+
+
+def _log_progress(
+    done: int, total: int, results: Counter[str], started_at: float
+) -> None:
+    elapsed = time.perf_counter() - started_at
+    logger.info(
+        "Cache prewarm %d/%d in %.1fs (%.1f entries/s): %s",
+        done,
+        total,
+        elapsed,
+        done / elapsed if elapsed else 0,
+        dict(results),
+    )
+
+
+async def _get_prewarm_app_ids(limit: int = 1000) -> list[str]:
+    top_app_ids = _get_top_apps(limit)
+    hit_app_ids = [
+        tag.removeprefix("app:")
+        for tag, _ in await cache.get_top_hit_tags(limit * 2)
+        if tag.startswith("app:")
+    ]
+
+    candidates = list(dict.fromkeys(hit_app_ids + top_app_ids))
+    hits = await cache.get_hit_counts([f"app:{app_id}" for app_id in candidates])
+    install_rank = {app_id: rank for rank, app_id in enumerate(top_app_ids)}
+
+    candidates.sort(
+        key=lambda app_id: (
+            -hits[f"app:{app_id}"],
+            install_rank.get(app_id, len(install_rank)),
+        )
+    )
+    return candidates[:limit]
 
 
 def _get_top_apps(limit: int = 1000) -> list[str]:
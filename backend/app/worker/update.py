@@ -1,67 +1,92 @@
 from datetime import UTC, datetime
+from typing import cast
 
 import dramatiq
+import orjson
 
 from .. import apps, exceptions, models, search, summary, utils
-from ..database import get_db, get_json_key
+from ..database import get_db
+from .redis import invalidate_tags, redis_conn
 
 
 @dramatiq.actor
 def update():
     with get_db("writer") as db:
-        apps.load_appstream(db)
-        summary.update(db)
+        changed_apps = apps.load_appstream(db)
+        changed_apps |= summary.update(db)
     exceptions.update()
 
-    all_apps = apps.get_appids(include_eol=True)
-    non_eol_apps = apps.get_appids(include_eol=False)
-    apps_created_at = {}
-
-    for app_id in all_apps:
-        with get_db("writer") as db:
-            created_at = (
-                db.session.query(models.App.initial_release_at)
-                .filter(models.App.app_id == app_id)
-                .scalar()
-            )
+    if changed_apps:
+        invalidate_tags(*(f"app:{app_id}" for app_id in sorted(changed_apps)))
 
-        if created_at:
-            apps_created_at[app_id] = created_at.timestamp()
-        else:
-            with get_db("writer") as db:
-                app = models.App.by_appid(db, app_id)
-                if app and app.summary and "timestamp" in app.summary:
-                    created_at = app.summary["timestamp"]
-                elif metadata := get_json_key(f"summary:{app_id}:stable"):
-                    created_at = metadata.get("timestamp")
-
-                if not created_at:
-                    created_at = int(datetime.now(UTC).timestamp())
-
-            apps_created_at[app_id] = float(created_at)
-            with get_db("writer") as db:
-                models.App.set_initial_release_at(
-                    db,
-                    app_id,
-                    datetime.fromtimestamp(float(created_at), UTC).replace(tzinfo=None),
-                )
-
-    if apps_created_at:
-        search_added_at = []
-        for app_id, value in apps_created_at.items():
-            if app_id not in non_eol_apps:
-                continue
-
-            search_added_at.append(
-                {
-                    "id": utils.get_clean_app_id(app_id),
-                    "added_at": int(value),
-                }
-            )
+    all_apps = apps.get_appids(include_eol=True)
+    non_eol_apps = set(apps.get_appids(include_eol=False))
+    apps_created_at = _backfill_initial_release_at(all_apps)
 
+    search_added_at = [
+        {
+            "id": utils.get_clean_app_id(app_id),
+            "added_at": int(value),
+        }
+        for app_id, value in apps_created_at.items()
+        if app_id in non_eol_apps
+    ]
+    if search_added_at:
         search.create_or_update_apps(search_added_at)
 
     eol_apps = set(all_apps) - set(non_eol_apps)
     if eol_apps:
         eol_app_ids = [utils.get_clean_app_id(app_id) for app_id in eol_apps]
         search.delete_apps(eol_app_ids)
+
+
+def _backfill_initial_release_at(app_ids: list[str]) -> dict[str, float]:
+    """Return when each app was first released, storing it where it is missing.
+
+    Apps without ``initial_release_at`` fall back to their summary timestamp,
+    then the legacy Redis summary, then the current time.
+    """
+    if not app_ids:
+        return {}
+
+    with get_db("writer") as db:
+        rows = (
+            db.session.query(
+                models.App.app_id,
+                models.App.initial_release_at,
+                models.App.summary["timestamp"],
+            )
+            .filter(models.App.app_id.in_(app_ids))
+            .all()
+        )
+
+        apps_created_at = {}
+        summary_timestamps = {}
+        for app_id, initial_release_at, timestamp in rows:
+            if initial_release_at:
+                apps_created_at[app_id] = initial_release_at.timestamp()
+            else:
+                summary_timestamps[app_id] = timestamp
+
+        legacy = [app_id for app_id, ts in summary_timestamps.items() if not ts]
+        if legacy:
+            values = cast(
+                "list[str | None]",
+                redis_conn.mget([f"summary:{app_id}:stable" for app_id in legacy]),
+            )
+            for app_id, value in zip(legacy, values, strict=True):
+                if value:
+                    summary_timestamps[app_id] = orjson.loads(value).get("timestamp")
+
+        now = int(datetime.now(UTC).timestamp())
+        backfill = {}
+        for app_id, timestamp in summary_timestamps.items():
+            created_at = float(timestamp or now)
+            apps_created_at[app_id] = created_at
+            backfill[app_id] = datetime.fromtimestamp(created_at, UTC).replace(
+                tzinfo=None
+            )
+
+        models.App.bulk_set_initial_release_at(db, backfill)
+
+    return apps_created_at
@@ -1,133 +1,123 @@
+import logging
+import time
+from typing import Any
+
 import dramatiq
 
-from .. import apps, models
-from ..database import get_db, get_json_key
+from .. import models
+from ..database import get_db
+
+logger = logging.getLogger(__name__)
+
+APP_TYPES = ["desktop-application", "console-application"]
+RUNTIME_GUIDELINE = "general-runtime-not-eol"
+AUTOMATIC_GUIDELINES = [
+    "app-name-not-too-long",
+    "app-summary-not-too-long",
+    "screenshots-at-least-one-screenshot",
+    "branding-has-primary-brand-colors",
+    RUNTIME_GUIDELINE,
+]
+
+
+def _has_primary_brand_color(appstream: dict) -> bool:
+    # A light and a dark primary color both count, but so does any one
+    return any(
+        "type" in branding and "value" in branding and branding["type"] == "primary"
+        for branding in appstream.get("branding") or []
+    )
+
+
+def _runtime_ref(summary: dict | None) -> tuple[str, str] | None:
+    """Return the runtime (app ID, branch) of an app's stable summary."""
+    metadata = (summary or {}).get("metadata")
+    runtime = metadata.get("runtime") if metadata else None
+    if not runtime:
+        return None
+    runtime_parts = runtime.split("/")
+    if len(runtime_parts) < 2:
+        return None
+    return runtime_parts[0], runtime_parts[2] if len(runtime_parts) > 2 else "stable"
+
+
+def evaluate_app(
+    appstream: dict, summary: dict | None, eol_runtimes: set[tuple[str, str]]
+) -> dict[str, bool]:
+    """Return the verdict of each automatic guideline for one app.
+
+    The runtime guideline is only evaluated for apps with a stable summary.
+    """
+    verdicts = {
+        "app-name-not-too-long": "name" in appstream and len(appstream["name"]) <= 20,
+        "app-summary-not-too-long": "summary" in appstream
+        and len(appstream["summary"]) <= 35,
+        "screenshots-at-least-one-screenshot": "screenshots" in appstream
+        and len(appstream["screenshots"]) >= 1,
+        "branding-has-primary-brand-colors": _has_primary_brand_color(appstream),
+    }
+    if summary:
+        verdicts[RUNTIME_GUIDELINE] = _runtime_ref(summary) not in eol_runtimes
+    return verdicts
+
+
+def evaluate_apps(
+    apps: list[Any], eol_runtimes: set[tuple[str, str]]
+) -> list[tuple[str, str, bool]]:
+    """Return the (app ID, guideline ID, passed) verdicts of all apps."""
+    return [
+        (app.app_id, guideline_id, passed)
+        for app in apps
+        for guideline_id, passed in evaluate_app(
+            app.appstream, _stable_summary(app.summary), eol_runtimes
+        ).items()
+    ]
+
+
+def _stable_summary(summary: dict | None) -> dict | None:
+    if summary and summary.get("branch") == "stable":
+        return summary
+    return None
 
 
 @dramatiq.actor
 def update_quality_moderation():
+    started_at = time.perf_counter()
     with get_db("writer") as db:
-        appids = apps.get_appids(include_eol=True)
-
-        if not appids:
+        apps = [
+            app
+            for app in models.App.appstream_and_summaries(db, APP_TYPES)
+            if app.app_id and app.appstream
+        ]
+        if not apps:
             return
 
-        appids_for_frontend = [
-            app_id for app_id in appids if app_id and get_json_key(f"apps:{app_id}")
+        runtime_refs = {
+            ref
+            for app in apps
+            if (ref := _runtime_ref(_stable_summary(app.summary))) is not None
+        }
+        eol_runtimes = models.App.eol_refs(db, runtime_refs)
+        stored = models.QualityModeration.passed_by_guidelines(db, AUTOMATIC_GUIDELINES)
+        loaded_at = time.perf_counter()
+
+        verdicts = evaluate_apps(apps, eol_runtimes)
+        changed = [
+            (app_id, guideline_id, passed)
+            for app_id, guideline_id, passed in verdicts
+            if stored.get((app_id, guideline_id)) != passed
         ]
+        evaluated_at = time.perf_counter()
 
-        if not appids_for_frontend:
-            return
+        models.QualityModeration.bulk_upsert(db, changed, None)
+        written_at = time.perf_counter()
 
-        for app_id in appids_for_frontend:
-            if value := get_json_key(f"apps:{app_id}"):
-                # Check app name length
-                models.QualityModeration.upsert(
-                    db,
-                    app_id,
-                    "app-name-not-too-long",
-                    "name" in value and len(value["name"]) <= 20,
-                    None,
-                )
-
-                # Check app summary length
-                models.QualityModeration.upsert(
-                    db,
-                    app_id,
-                    "app-summary-not-too-long",
-                    "summary" in value and len(value["summary"]) <= 35,
-                    None,
-                )
-
-                models.QualityModeration.upsert(
-                    db,
-                    app_id,
-                    "screenshots-at-least-one-screenshot",
-                    "screenshots" in value and len(value["screenshots"]) >= 1,
-                    None,
-                )
-
-                models.QualityModeration.upsert(
-                    db,
-                    app_id,
-                    "branding-has-primary-brand-colors",
-                    "branding" in value
-                    and (
-                        (
-                            any(
-                                branding
-                                for branding in value["branding"]
-                                if "type" in branding
-                                and "scheme_preference" in branding
-                                and "value" in branding
-                                and branding["type"] == "primary"
-                                and branding["scheme_preference"] == "light"
-                            )
-                            and any(
-                                branding
-                                for branding in value["branding"]
-                                if "type" in branding
-                                and "scheme_preference" in branding
-                                and "value" in branding
-                                and branding["type"] == "primary"
-                                and branding["scheme_preference"] == "dark"
-                            )
-                        )
-                        or (
-                            any(
-                                branding
-                                for branding in value["branding"]
-                                if "type" in branding
-                                and "scheme_preference" in branding
-                                and "value" in branding
-                                and branding["type"] == "primary"
-                                and (
-                                    branding["scheme_preference"] == "light"
-                                    or branding["scheme_preference"] == "dark"
-                                )
-                            )
-                            and any(
-                                branding
-                                for branding in value["branding"]
-                                if "type" in branding
-                                and "scheme_preference" not in branding
-                                and "value" in branding
-                                and branding["type"] == "primary"
-                            )
-                        )
-                        or any(
-                            branding
-                            for branding in value["branding"]
-                            if "type" in branding
-                            and "value" in branding
-                            and branding["type"] == "primary"
-                        )
-                    ),
-                    None,
-                )
-                if summary_dict := get_json_key(f"summary:{app_id}:stable"):
-                    runtime_is_not_eol = True
-                    if (
-                        "metadata" in summary_dict
-                        and summary_dict["metadata"]
-                        and "runtime" in summary_dict["metadata"]
-                        and summary_dict["metadata"]["runtime"]
-                    ):
-                        runtime_parts = summary_dict["metadata"]["runtime"].split("/")
-                        if len(runtime_parts) >= 2:
-                            runtime_appid = runtime_parts[0]
-                            runtime_branch = (
-                                runtime_parts[2] if len(runtime_parts) > 2 else "stable"
-                            )
-                            runtime_is_eol = models.App.get_eol_data(
-                                db, runtime_appid, runtime_branch
-                            )
-                            runtime_is_not_eol = not runtime_is_eol
-
-                    models.QualityModeration.upsert(
-                        db,
-                        app_id,
-                        "general-runtime-not-eol",
-                        runtime_is_not_eol,
-                        None,
-                    )
+    logger.info(
+        "Evaluated %d quality verdicts of %d apps, %d changed; "
+        "load %.2fs, evaluate %.2fs, write %.2fs",
+        len(verdicts),
+        len(apps),
+        len(changed),
+        loaded_at - started_at,
+        evaluated_at - loaded_at,
+        written_at - evaluated_at,
+    )
@@ -0,0 +1,192 @@
+"""Download totals of a year for the year in review, folded in day by day.
+
+Every year-in-review view derives from the same few totals: new installs
+per app, architecture and country, and the number of updates. Each day of
+stats is reduced to these once and added to the year's totals.
+
+Days that flathub-stats no longer changes are folded into a checkpoint
+stored in Redis, together with the last day folded in, so the next run only
+fetches the days after it. The more recent days are added on top on every
+run without being folded in, the way the stats aggregates treat them.
+"""
+
+import datetime
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import cast
+
+import orjson
+
+from . import stats_fetcher, stats_store, utils
+from .installs_store import FIRST_STATS_DATE
+from .worker.redis import redis_conn
+
+logger = logging.getLogger(__name__)
+
+YEAR_TOTALS_KEY_PREFIX = "stats:year_in_review:totals:"
+
+
+def _key(year: int) -> str:
+    return f"{YEAR_TOTALS_KEY_PREFIX}{year}"
+
+
+def year_date_range(
+    year: int, today: datetime.date
+) -> tuple[datetime.date, datetime.date] | None:
+    sdate = max(datetime.date(year, 1, 1), FIRST_STATS_DATE)
+    edate = min(datetime.date(year, 12, 31), today)
+    if sdate > edate:
+        return None
+    return sdate, edate
+
+
+@dataclass
+class YearTotals:
+    """New installs and updates of a year, up to and including ``through``."""
+
+    through: datetime.date | None = None
+    updates: int = 0
+    app_downloads: dict[str, int] = field(default_factory=dict)
+    arch_downloads: dict[str, int] = field(default_factory=dict)
+    country_downloads: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_downloads(self) -> int:
+        return sum(self.app_downloads.values())
+
+    def add_day(self, date: datetime.date, stats: dict | None) -> None:
+        self.through = date
+        if stats is None:
+            return
+
+        if stats.get("updates") is not None:
+            self.updates += stats["updates"]
+
+        for ref, ref_stats in (stats.get("refs") or {}).items():
+            app_id = ref.split("/")[0]
+            for arch, downloads in ref_stats.items():
+                new_installs = _new_installs(downloads)
+                if new_installs > 0:
+                    _add(self.app_downloads, app_id, new_installs)
+                    _add(self.arch_downloads, arch, new_installs)
+
+        for country_stats in (stats.get("ref_by_country") or {}).values():
+            for country, downloads in country_stats.items():
+                new_installs = _new_installs(downloads)
+                if new_installs > 0:
+                    _add(self.country_downloads, country, new_installs)
+
+    def copy(self) -> "YearTotals":
+        return YearTotals(
+            through=self.through,
+            updates=self.updates,
+            app_downloads=dict(self.app_downloads),
+            arch_downloads=dict(self.arch_downloads),
+            country_downloads=dict(self.country_downloads),
+        )
+
+    def category_downloads(self, app_main_category: dict[str, str]) -> dict[str, int]:
+        """Return the new installs per lowercased main category."""
+        downloads: dict[str, int] = defaultdict(int)
+        for app_id, app_downloads in self.app_downloads.items():
+            if category := app_main_category.get(app_id):
+                downloads[category.lower()] += app_downloads
+        return dict(downloads)
+
+    def dumps(self) -> bytes:
+        return orjson.dumps(
+            {
+                "through": self.through,
+                "updates": self.updates,
+                "app_downloads": self.app_downloads,
+                "arch_downloads": self.arch_downloads,
+                "country_downloads": self.country_downloads,
+            }
+        )
+
+    @classmethod
+    def loads(cls, data: str | bytes) -> "YearTotals":
+        stored = orjson.loads(data)
+        return cls(
+            through=datetime.date.fromisoformat(stored["through"]),
+            updates=stored["updates"],
+            app_downloads=stored["app_downloads"],
+            arch_downloads=stored["arch_downloads"],
+            country_downloads=stored["country_downloads"],
+        )
+
+
+def _add(totals: dict[str, int], key: str, value: int) -> None:
+    totals[key] = totals.get(key, 0) + value
+
+
+def _new_installs(downloads: list[int]) -> int:
+    if len(downloads) >= 2:
+        return downloads[0] - downloads[1]
+    return 0
+
+
+def _load_checkpoint(year: int, sdate: datetime.date) -> YearTotals:
+    data = redis_conn.get(_key(year))
+    if not data:
+        return YearTotals()
+    try:
+        checkpoint = YearTotals.loads(cast("str | bytes", data))
+    except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        logger.warning("Dropping unreadable year-in-review totals for %s", year)
+        return YearTotals()
+
+    if checkpoint.through is None or checkpoint.through < sdate:
+        return YearTotals()
+    return checkpoint
+
+
+async def load_year_totals(year: int) -> YearTotals | None:
+    """Return the totals of ``year`` so far, or None if it has not started.
+
+    Raises if stats for a day could not be fetched, so a failed request is
+    never folded in as a day without downloads.
+    """
+    today = utils.utcnow().date()
+    date_range = year_date_range(year, today)
+    if date_range is None:
+        return None
+    sdate, edate = date_range
+
+    totals = _load_checkpoint(year, sdate)
+    start = totals.through + datetime.timedelta(days=1) if totals.through else sdate
+    dates = [
+        start + datetime.timedelta(days=i) for i in range((edate - start).days + 1)
+    ]
+    if not dates:
+        return totals
+
+    fetched = await stats_fetcher.StatsFetcher().fetch(dates, raise_errors=True)
+
+    folded = 0
+    for date, stats in zip(dates, fetched, strict=True):
+        if not stats_store.is_immutable(date, today):
+            break
+        totals.add_day(date, stats)
+        folded += 1
+    if folded:
+        redis_conn.set(_key(year), totals.dumps())
+        logger.info(
+            "Folded %d days into the year-in-review totals for %s", folded, year
+        )
+
+    if folded == len(dates):
+        return totals
+
+    recent = totals.copy()
+    for date, stats in zip(dates[folded:], fetched[folded:], strict=True):
+        recent.add_day(date, stats)
+    return recent
+
+
+def delete_year_totals() -> None:
+    current_year = utils.utcnow().year
+    redis_conn.delete(
+        *(_key(year) for year in range(FIRST_STATS_DATE.year, current_year + 1))
+    )
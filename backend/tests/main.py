@@ -6,6 +6,7 @@ from unittest.mock import Mock
 from urllib import parse
 
 import gi
+import numpy as np
 import orjson
 import pytest
 import vcr
@@ -131,13 +132,17 @@ def test_build_or_update_aggregates_normalizes_old_cache(monkeypatch):
     }
 
     stats.redis_conn.set("stats:agg:totals", orjson.dumps({}))
-    stats.redis_conn.set("stats:agg:per_day", orjson.dumps({}))
+    stats.redis_conn.hset("stats:agg:installs_start", "org.example.App", 0)
     stats.redis_conn.set("stats:agg:per_country", orjson.dumps({}))
     stats.redis_conn.delete("stats:agg:per_os_version")
     stats.redis_conn.set("stats:agg:global", orjson.dumps(old_global))
     stats.redis_conn.set("stats:agg:last_date", orjson.dumps(last_date.isoformat()))
 
-    monkeypatch.setattr(stats, "_get_stats_for_date", lambda date: None)
+    monkeypatch.setattr(
+        stats,
+        "_iter_stats_for_period",
+        lambda sdate, edate: ((date, None) for date in stats._date_range(sdate, edate)),
+    )
 
     agg = stats._build_or_update_aggregates()
 
@@ -584,6 +589,7 @@ class TrendingBatchIndexed(Exception):
 
 
 def test_update_zero_fills_trending_history_and_includes_last_date(monkeypatch):
+    from app.installs_store import DailyInstalls
     from app.worker import update_stats as update_stats_actor
 
     stats = update_stats_actor.fn.__globals__["stats"]
@@ -593,13 +599,15 @@ def test_update_zero_fills_trending_history_and_includes_last_date(monkeypatch):
     first_date = last_date - datetime.timedelta(days=20)
     middle_date = first_date + datetime.timedelta(days=10)
     aggregate = {
-        "per_day": {
-            app_id: {
-                first_date.isoformat(): 3,
-                middle_date.isoformat(): -2,
-                last_date.isoformat(): 9,
+        "installs": DailyInstalls.from_per_day(
+            {
+                app_id: {
+                    first_date.isoformat(): 3,
+                    middle_date.isoformat(): -2,
+                    last_date.isoformat(): 9,
+                }
             }
-        },
+        ),
         "last_date": last_date.isoformat(),
     }
     captured = {}
@@ -619,14 +627,14 @@ def test_update_zero_fills_trending_history_and_includes_last_date(monkeypatch):
         lambda *_args: {},
     )
 
-    def capture_score(**kwargs):
+    def capture_scores(**kwargs):
         captured.update(kwargs)
-        return 1.0
+        return np.ones(len(kwargs["installs_over_days"]))
 
     def stop_after_trending_batch(_apps):
         raise TrendingBatchIndexed
 
-    monkeypatch.setattr(stats, "_calculate_trending_score", capture_score)
+    monkeypatch.setattr(stats, "_calculate_trending_scores", capture_scores)
     monkeypatch.setattr(
         stats.search, "create_or_update_apps", stop_after_trending_batch
     )
@@ -634,7 +642,9 @@ def test_update_zero_fills_trending_history_and_includes_last_date(monkeypatch):
     with pytest.raises(TrendingBatchIndexed):
         stats.update(object())
 
-    assert captured["installs_over_days"] == [3] + [0] * 9 + [-2] + [0] * 9 + [9]
+    assert captured["installs_over_days"].tolist() == [
+        [3] + [0] * 9 + [-2] + [0] * 9 + [9]
+    ]
     assert "is_new_app" not in captured
 
 
@@ -1340,11 +1350,11 @@ def test_verification_confirm_website_cleans_stale_records(monkeypatch):
         lambda app_id: events.append(("republish", app_id)),
     )
 
-    async def fake_mark_stale(pattern):
-        events.append(("cache", pattern))
+    async def fake_invalidate_tags(*tags, stale=False):
+        events.append(("cache", tags, stale))
 
     monkeypatch.setattr(
-        verification_module.cache, "mark_stale_by_pattern", fake_mark_stale
+        verification_module.cache, "invalidate_tags", fake_invalidate_tags
     )
 
     login = SimpleNamespace(user=SimpleNamespace(id=42))
@@ -1365,7 +1375,7 @@ def test_verification_confirm_website_cleans_stale_records(monkeypatch):
         ("cleanup", "org.gnome.Maps", 42),
         "commit",
         ("republish", "org.gnome.Maps"),
-        ("cache", "cache:endpoint:get_verification_status:*"),
+        ("cache", ("verification:org.gnome.Maps",), True),
     ]
 
 
@@ -1419,11 +1429,11 @@ def test_verification_login_provider_cleans_stale_records(monkeypatch):
         lambda app_id: events.append(("republish", app_id)),
     )
 
-    async def fake_mark_stale(pattern):
-        events.append(("cache", pattern))
+    async def fake_invalidate_tags(*tags, stale=False):
+        events.append(("cache", tags, stale))
 
     monkeypatch.setattr(
-        verification_module.cache, "mark_stale_by_pattern", fake_mark_stale
+        verification_module.cache, "invalidate_tags", fake_invalidate_tags
     )
 
     login = SimpleNamespace(user=SimpleNamespace(id=42))
@@ -1442,7 +1452,7 @@ def test_verification_login_provider_cleans_stale_records(monkeypatch):
         ("cleanup", "io.github.ajr0d.FlathubTestApp", 42),
         "commit",
         ("republish", "io.github.ajr0d.FlathubTestApp"),
-        ("cache", "cache:endpoint:get_verification_status:*"),
+        ("cache", ("verification:io.github.ajr0d.FlathubTestApp",), True),
     ]
 
 
@@ -0,0 +1,112 @@
+import os
+import sys
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+# app.search imports meilisearch at module load and connects at import time.
+# Stub it before importing any app module that transitively pulls it in.
+sys.modules.setdefault("app.search", SimpleNamespace())
+
+from app import apps, models
+
+SUMMARY = {
+    "metadata": {
+        "extensions": {
+            "org.example.App.Plugin": {"directory": "plugins"},
+            "org.freedesktop.Platform.GL": {"versions": "23.08;23.08-extra"},
+            "org.example.App.Codecs": {"version": "1.4"},
+        }
+    }
+}
+
+
+def _get_addons(monkeypatch, indexed, app_summary=SUMMARY):
+    queried = []
+
+    @contextmanager
+    def fake_get_db(db_type="replica"):
+        yield SimpleNamespace()
+
+    def fake_matching(_db, prefixes):
+        queried.append(prefixes)
+        return [
+            (addon_id, branch)
+            for addon_id, branch in indexed
+            if any(addon_id.startswith(prefix) for prefix in prefixes)
+        ]
+
+    monkeypatch.setattr(apps.database, "get_db", fake_get_db)
+    monkeypatch.setattr(
+        models.App,
+        "by_appid",
+        classmethod(lambda cls, _db, app_id: SimpleNamespace(summary=app_summary)),
+    )
+    monkeypatch.setattr(
+        models.App, "is_fully_eol", classmethod(lambda cls, *args, **kwargs: False)
+    )
+    monkeypatch.setattr(
+        models.AppAddonIndex, "matching", classmethod(lambda cls, *a: fake_matching(*a))
+    )
+    return apps.get_addons("org.example.App"), queried
+
+
+def test_addons_match_extension_points_and_branches(monkeypatch):
+    result, queried = _get_addons(
+        monkeypatch,
+        [
+            ("org.example.App.Plugin.Spell", None),
+            ("org.example.App.Plugin.Old", "beta"),
+            ("org.freedesktop.Platform.GL.default", "23.08"),
+            ("org.freedesktop.Platform.GL32.default", "23.08-extra"),
+            ("org.freedesktop.Platform.GL.nvidia", "22.08"),
+            ("org.example.App.Codecs", "1.4"),
+        ],
+    )
+
+    assert result == [
+        "org.example.App.Codecs//1.4",
+        "org.example.App.Plugin.Spell//stable",
+        "org.freedesktop.Platform.GL.default//23.08",
+        "org.freedesktop.Platform.GL32.default//23.08-extra",
+    ]
+    assert queried == [set(SUMMARY["metadata"]["extensions"])]
+
+
+def test_addons_without_extension_points_skip_the_index(monkeypatch):
+    result, queried = _get_addons(
+        monkeypatch, [("org.example.App.Plugin", None)], app_summary={"metadata": {}}
+    )
+
+    assert result == []
+    assert queried == []
+
+
+def test_addon_index_matches_prefixes_literally():
+    class FakeQuery:
+        def __init__(self, *columns):
+            self.criteria = []
+
+        def filter(self, criterion):
+            self.criteria.append(criterion)
+            return self
+
+        def all(self):
+            return []
+
+    query = FakeQuery()
+    db = SimpleNamespace(query=lambda *columns: query)
+
+    assert models.AppAddonIndex.matching(db, {"org.example.My_App"}) == []
+    assert models.AppAddonIndex.matching(db, set()) == []
+
+    sql = str(
+        query.criteria[0].compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+    assert "LIKE 'org.example.My/_App' || '%%' ESCAPE '/'" in sql
@@ -0,0 +1,94 @@
+from sqlalchemy.dialects import postgresql
+
+from app import models
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, stored_hashes=None):
+        self.stored_hashes = stored_hashes or {}
+        self.statements = []
+        self.commits = 0
+
+    def query(self, *_columns):
+        return FakeQuery(list(self.stored_hashes.items()))
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+    def commit(self):
+        self.commits += 1
+
+
+def _stats(total):
+    return {
+        "installs_total": total,
+        "installs_last_month": 3,
+        "installs_last_7_days": 1,
+        "installs_per_day": {"2026-01-01": 1},
+        "installs_per_country": {"DE": 1},
+        "installs_per_os_version": {"ignored": 1},
+    }
+
+
+def test_bulk_set_stats_skips_rows_with_unchanged_hash(monkeypatch):
+    monkeypatch.setattr(models, "BULK_UPSERT_BATCH_SIZE", 2)
+    stats = {f"org.example.App{i}": _stats(i) for i in range(5)}
+    unchanged = models.AppStats._stats_row(
+        "org.example.App0", stats["org.example.App0"]
+    )
+    session = FakeSession({"org.example.App0": unchanged["payload_hash"]})
+
+    assert models.AppStats.bulk_set_stats(session, stats) == 4
+    assert session.commits == 1
+    assert len(session.statements) == 2
+
+    compiled = session.statements[0].compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert "ON CONFLICT (app_id) DO UPDATE SET" in sql
+    assert "updated_at = now()" in sql
+    assert "WHERE app_stats.payload_hash IS DISTINCT FROM excluded.payload_hash" in sql
+    assert "installs_per_os_version" not in sql
+    assert "org.example.App0" not in compiled.params.values()
+
+
+def test_payload_hash_ignores_key_order():
+    forward = _stats(1)
+    backward = _stats(1)
+    backward["installs_per_day"] = {"2026-01-02": 2, "2026-01-01": 1}
+    forward["installs_per_day"] = {"2026-01-01": 1, "2026-01-02": 2}
+
+    assert (
+        models.AppStats._stats_row("a", forward)["payload_hash"]
+        == models.AppStats._stats_row("a", backward)["payload_hash"]
+    )
+    assert (
+        models.AppStats._stats_row("a", forward)["payload_hash"]
+        != models.AppStats._stats_row("a", _stats(2))["payload_hash"]
+    )
+
+
+def test_bulk_set_downloads_updates_only_changed_counts():
+    class Db:
+        session = FakeSession()
+
+    models.App.bulk_set_downloads(Db, {"org.example.A": 1, "org.example.B": 2})
+
+    [statement] = Db.session.statements
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.startswith(
+        "UPDATE apps SET installs_last_7_days=new_downloads.installs_last_7_days "
+        "FROM (VALUES"
+    )
+    assert (
+        "apps.installs_last_7_days IS DISTINCT FROM new_downloads.installs_last_7_days"
+        in sql
+    )
+    assert Db.session.commits == 1
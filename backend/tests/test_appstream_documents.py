@@ -0,0 +1,185 @@
+import asyncio
+import copy
+
+import orjson
+import pytest
+
+from app import appstream_documents
+
+APPSTREAM = {
+    "id": "org.example.App",
+    "name": "App",
+    "summary": "An app",
+    "languages": ["de", "fr"],
+    "screenshots": [{"caption": "Main window"}, {"caption": "Settings"}],
+    "releases": [{"version": "2.0", "description": "<p>New</p>"}],
+    "keywords": ["example"],
+}
+LOCALIZATION = {
+    "de": {
+        "name": "Anwendung",
+        "screenshots_caption_1": "Einstellungen",
+        "release_description_0": "<p>Neu</p>",
+        "keywords": {"0": "beispiel"},
+    },
+    "pt_BR": {"summary": "Um aplicativo"},
+    "fr": {},
+}
+CONTENT_RATING_DETAILS = {
+    "en_US": [{"id": "violence-cartoon", "description": "No cartoon violence"}],
+    "de_DE": [{"id": "violence-cartoon", "description": "Keine Gewalt"}],
+    "de_AT": [{"id": "violence-cartoon", "description": "Keine Gewalt (AT)"}],
+    "pt_BR": [{"id": "violence-cartoon", "description": "Sem violência"}],
+    "zh_Hant_TW": [{"id": "violence-cartoon", "description": "無"}],
+}
+LOCALES = [
+    "en",
+    "en-US",
+    "de",
+    "de-AT",
+    "de-CH",
+    "de_DE",
+    "fr",
+    "pt",
+    "pt-BR",
+    "pt_BR",
+    "zh",
+    "zh-Hant",
+    "zh_Hant",
+    "ja",
+    "",
+]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(
+            {
+                field: value.decode() if isinstance(value, bytes) else value
+                for field, value in mapping.items()
+            }
+        )
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    async def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(field) for field in fields]
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+
+        return queue
+
+    def execute(self):
+        return [command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+def _assembled(locale, localization, content_rating_details):
+    fields = appstream_documents.materialize(
+        APPSTREAM, localization, content_rating_details
+    )
+    return appstream_documents.assemble(
+        [fields.get(field) for field in appstream_documents.document_fields(locale)]
+    )
+
+
+@pytest.mark.parametrize("locale", LOCALES)
+@pytest.mark.parametrize("localization", [LOCALIZATION, None])
+@pytest.mark.parametrize("content_rating_details", [CONTENT_RATING_DETAILS, None])
+def test_materialized_documents_match_translation(
+    locale, localization, content_rating_details
+):
+    expected = appstream_documents.translate(
+        APPSTREAM, localization, content_rating_details, locale
+    )
+
+    assert _assembled(locale, localization, content_rating_details) == expected
+    # Compare serialized too so key order (and so the ETag) matches
+    assert orjson.dumps(
+        _assembled(locale, localization, content_rating_details)
+    ) == orjson.dumps(expected)
+
+
+def test_translation_resolves_locale_fallbacks():
+    de_at = appstream_documents.translate(
+        APPSTREAM, LOCALIZATION, CONTENT_RATING_DETAILS, "de-AT"
+    )
+    assert de_at["name"] == "Anwendung"
+    assert de_at["content_rating_details"] == {"de_AT": CONTENT_RATING_DETAILS["de_AT"]}
+    assert [s["caption"] for s in de_at["screenshots"]] == [
+        "Main window",
+        "Einstellungen",
+    ]
+    assert de_at["releases"][0]["description"] == "<p>Neu</p>"
+    assert de_at["keywords"] == ["example"]
+    assert "languages" not in de_at
+
+    de = appstream_documents.translate(
+        APPSTREAM, LOCALIZATION, CONTENT_RATING_DETAILS, "de"
+    )
+    assert de["content_rating_details"] == {"de_DE": CONTENT_RATING_DETAILS["de_DE"]}
+
+    ja = appstream_documents.translate(
+        APPSTREAM, LOCALIZATION, CONTENT_RATING_DETAILS, "ja"
+    )
+    assert ja["name"] == "App"
+    assert ja["content_rating_details"] == {"en_US": CONTENT_RATING_DETAILS["en_US"]}
+
+
+def test_translation_does_not_modify_appstream():
+    appstream = copy.deepcopy(APPSTREAM)
+
+    appstream_documents.translate(appstream, LOCALIZATION, None, "de")
+    appstream_documents.materialize(appstream, LOCALIZATION, None)
+
+    assert appstream == APPSTREAM
+
+
+def test_store_documents_rewrites_only_changed_apps():
+    redis = FakeRedis()
+    apps = [
+        ("org.example.App", APPSTREAM, LOCALIZATION, CONTENT_RATING_DETAILS),
+        ("org.example.Empty", None, None, None),
+    ]
+
+    assert appstream_documents.store_documents(redis, apps) == 2
+    assert appstream_documents.store_documents(redis, apps) == 1
+
+    changed = {**APPSTREAM, "summary": "A changed app"}
+    apps[0] = ("org.example.App", changed, LOCALIZATION, CONTENT_RATING_DETAILS)
+    assert appstream_documents.store_documents(redis, apps) == 2
+
+    document = asyncio.run(
+        appstream_documents.get_document(redis, "org.example.App", "pt-BR")
+    )
+    assert document == appstream_documents.translate(
+        changed, LOCALIZATION, CONTENT_RATING_DETAILS, "pt-BR"
+    )
+    assert (
+        asyncio.run(appstream_documents.get_document(redis, "org.example.Empty", "en"))
+        is None
+    )
+
+    appstream_documents.delete_documents(redis, ["org.example.App"])
+    assert (
+        asyncio.run(appstream_documents.get_document(redis, "org.example.App", "en"))
+        is None
+    )
@@ -0,0 +1,93 @@
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from lxml import etree
+
+from app import (
+    models,  # noqa: F401
+    utils,
+)
+
+APPSTREAM_REPO = os.path.join(ROOT_DIR, "tests", "appstream")
+APPSTREAM_XML = os.path.join(
+    APPSTREAM_REPO, "repo", "appstream", "x86_64", "appstream.xml"
+)
+
+
+class FakeAppStream:
+    @staticmethod
+    def license_is_free_license(licence):
+        return "GPL" in licence
+
+
+def _content_rating_details(rating, lang):
+    return {"lang": lang}
+
+
+_components2dicts = utils._components2dicts
+
+
+def _stubbed_components2dicts(components):
+    # Pool workers import app.utils afresh, so the test's monkeypatches do not
+    # reach them; this runs in the worker and installs the same stubs there
+    utils.AppStream = FakeAppStream
+    utils.get_content_rating_details = _content_rating_details
+    return _components2dicts(components)
+
+
+def test_components_are_streamed_in_order_with_small_chunks():
+    xml = (
+        b"<components>"
+        b"<component><id>one</id><provides><component>nested</component>"
+        b"</provides></component>"
+        b"<component><id>two</id></component>"
+        b"</components>"
+    )
+    chunks = [xml[i : i + 7] for i in range(0, len(xml), 7)]
+
+    components = [
+        etree.fromstring(component)
+        for component in utils._iter_appstream_components(chunks)
+    ]
+
+    assert [component.findtext("id") for component in components] == ["one", "two"]
+
+
+def test_streamed_appstream_matches_whole_tree_parse(monkeypatch):
+    monkeypatch.setattr(utils, "AppStream", FakeAppStream)
+    monkeypatch.setattr(utils, "get_content_rating_details", _content_rating_details)
+    monkeypatch.setattr(utils.config.settings, "appstream_repos", APPSTREAM_REPO)
+    monkeypatch.setattr(utils, "APPSTREAM_CHUNK_SIZE", 512)
+    monkeypatch.setattr(utils, "APPSTREAM_WORKERS", 1)
+    monkeypatch.setattr(utils, "APPSTREAM_BATCH_SIZE", 2)
+
+    with open(APPSTREAM_XML, "rb") as f:
+        root = etree.fromstring(f.read())
+    expected = dict(utils._component2dict(component) for component in root)
+
+    apps = utils.appstream2dict()
+
+    assert list(apps) == list(expected)
+    assert apps == expected
+
+
+def test_appstream_parsed_in_a_pool_matches_whole_tree_parse(monkeypatch):
+    monkeypatch.setattr(utils, "AppStream", FakeAppStream)
+    monkeypatch.setattr(utils, "get_content_rating_details", _content_rating_details)
+    monkeypatch.setattr(utils, "_components2dicts", _stubbed_components2dicts)
+    monkeypatch.setattr(utils.config.settings, "appstream_repos", APPSTREAM_REPO)
+    monkeypatch.setattr(utils, "APPSTREAM_WORKERS", 2)
+    monkeypatch.setattr(utils, "APPSTREAM_BATCH_SIZE", 1)
+
+    with open(APPSTREAM_XML, "rb") as f:
+        root = etree.fromstring(f.read())
+    expected = dict(utils._component2dict(component) for component in root)
+
+    apps = utils.appstream2dict()
+
+    assert len(expected) > 2
+    assert list(apps) == list(expected)
+    assert apps == expected
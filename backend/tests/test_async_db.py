@@ -0,0 +1,90 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from app import models
+
+
+class FakeAsyncSession:
+    def __init__(self, apps):
+        self.apps = apps
+        self.statements = []
+
+    async def scalar(self, statement):
+        await asyncio.sleep(0)
+        self.statements.append(statement)
+        app_id = statement.whereclause.right.value
+        app = self.apps.get(app_id)
+        if app is None or statement.column_descriptions[0]["name"] == "App":
+            return app
+        return getattr(app, statement.column_descriptions[0]["name"])
+
+
+def _app(app_id, **kwargs):
+    return SimpleNamespace(
+        app_id=app_id,
+        type=kwargs.get("type", "desktop-application"),
+        is_eol=kwargs.get("is_eol", False),
+        eol_branches=kwargs.get("eol_branches"),
+        is_fullscreen_app=kwargs.get("is_fullscreen_app", False),
+    )
+
+
+APPS = {
+    "org.example.Active": _app("org.example.Active", is_fullscreen_app=True),
+    "org.example.Old": _app("org.example.Old", is_eol=True),
+    "org.example.Partial": _app(
+        "org.example.Partial", is_eol=True, eol_branches=["beta"]
+    ),
+    "org.example.Platform": _app(
+        "org.example.Platform", type="runtime", is_eol=True, eol_branches=["23"]
+    ),
+}
+
+
+@pytest.fixture
+def sync_db(monkeypatch):
+    monkeypatch.setattr(
+        models.App, "by_appid", classmethod(lambda cls, _db, app_id: APPS.get(app_id))
+    )
+    return SimpleNamespace()
+
+
+@pytest.mark.parametrize("app_id", [*APPS, "org.example.Missing"])
+@pytest.mark.parametrize("branch", [None, "beta", "23", "stable"])
+def test_async_eol_checks_match_sync(sync_db, app_id, branch):
+    async_db = SimpleNamespace(session=FakeAsyncSession(APPS))
+
+    async def check():
+        return (
+            await models.App.async_get_eol_data(async_db, app_id, branch),
+            await models.App.async_is_fully_eol(async_db, app_id),
+        )
+
+    assert asyncio.run(check()) == (
+        models.App.get_eol_data(sync_db, app_id, branch),
+        models.App.is_fully_eol(sync_db, app_id),
+    )
+
+
+def test_async_fullscreen_app_selects_single_column():
+    session = FakeAsyncSession(APPS)
+    db = SimpleNamespace(session=session)
+
+    async def check():
+        return [
+            await models.App.async_get_fullscreen_app(db, app_id)
+            for app_id in ("org.example.Active", "org.example.Old", "org.example.None")
+        ]
+
+    assert asyncio.run(check()) == [True, False, False]
+    assert [
+        [column["name"] for column in statement.column_descriptions]
+        for statement in session.statements
+    ] == [["is_fullscreen_app"]] * 3
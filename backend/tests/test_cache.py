@@ -0,0 +1,529 @@
+import asyncio
+import gzip
+import hashlib
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import orjson
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app import cache
+
+
+def test_local_cache_evicts_least_recently_used():
+    local = cache.LocalCache(max_entries=2)
+    now = time.time()
+    local.set("a", 1, 60, now)
+    local.set("b", 2, 60, now)
+
+    assert local.get("a") == (True, 1)
+
+    local.set("c", 3, 60, now)
+
+    assert local.get("b") == (False, None)
+    assert local.get("a") == (True, 1)
+    assert local.get("c") == (True, 3)
+    assert len(local) == 2
+
+
+def test_local_cache_expires_at_stale_threshold():
+    local = cache.LocalCache(max_entries=10)
+    ttl = 100
+    local.set("fresh", "value", ttl, time.time() - ttl * cache.STALE_THRESHOLD + 5)
+    local.set("stale", "value", ttl, time.time() - ttl * cache.STALE_THRESHOLD - 5)
+
+    assert local.get("fresh") == (True, "value")
+    assert local.get("stale") == (False, None)
+    assert len(local) == 1
+
+
+def test_local_cache_invalidates_by_redis_glob_pattern():
+    local = cache.LocalCache(max_entries=10)
+    now = time.time()
+    local.set("cache:endpoint:get_appstream:abc", 1, 60, now)
+    local.set("cache:endpoint:get_appstream:def", 2, 60, now)
+    local.set("cache:endpoint:get_summary:abc", 3, 60, now)
+
+    assert local.invalidate("cache:endpoint:get_appstream:*") == 2
+    assert local.get("cache:endpoint:get_summary:abc") == (True, 3)
+    assert local.invalidate("cache:endpoint:*") == 1
+    assert len(local) == 0
+
+
+def test_local_cache_discards_exact_keys():
+    local = cache.LocalCache(max_entries=10)
+    now = time.time()
+    local.set("cache:endpoint:get_appstream:abc", 1, 60, now)
+    local.set("cache:endpoint:get_appstream:[a]*", 2, 60, now)
+
+    assert local.discard(["cache:endpoint:get_appstream:[a]*", "missing"]) == 1
+    assert local.get("cache:endpoint:get_appstream:abc") == (True, 1)
+
+
+def test_local_cache_disabled_when_size_is_zero():
+    local = cache.LocalCache(max_entries=0)
+    local.set("a", 1, 60, time.time())
+
+    assert local.get("a") == (False, None)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+
+        return queue
+
+    async def execute(self, raise_on_error=True):
+        results = []
+        for command, args, kwargs in self.commands:
+            try:
+                results.append(await command(*args, **kwargs))
+            except TypeError as error:
+                if raise_on_error:
+                    raise
+                results.append(error)
+        return results
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: dict[str, str] = {}
+        self.sets: dict[str, set[str]] = {}
+        self.hashes: dict[str, dict[str, str | bytes]] = {}
+        self.published: list[tuple[str, str]] = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def expire(self, key, ttl):
+        return True
+
+    async def zincrby(self, key, amount, member):
+        scores = self.sets.setdefault(key, {})
+        scores[member] = scores.get(member, 0) + amount
+        return scores[member]
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def exists(self, *keys):
+        return sum(key in self.data or key in self.hashes for key in keys)
+
+    async def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    async def hmget(self, key, fields):
+        if key in self.data:
+            raise TypeError("WRONGTYPE")
+        entry = self.hashes.get(key, {})
+        # The real client decodes replies, which fails for the gzip copy
+        return [
+            value.decode() if isinstance(value, bytes) else value
+            for value in (entry.get(field) for field in fields)
+        ]
+
+    async def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return False
+        self.data[key] = value.decode() if isinstance(value, bytes) else value
+        return True
+
+    async def setex(self, key, ttl, value):
+        return await self.set(key, value)
+
+    async def delete(self, *keys):
+        deleted = [
+            self.data.pop(key, None)
+            or self.sets.pop(key, None)
+            or self.hashes.pop(key, None)
+            for key in keys
+        ]
+        return sum(value is not None for value in deleted)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeRedis()
+
+    async def get_redis():
+        return redis
+
+    monkeypatch.setattr(cache.database, "get_redis", get_redis)
+    monkeypatch.setattr(cache, "local_cache", cache.LocalCache(max_entries=0))
+    monkeypatch.setattr(cache, "hit_counter", cache.HitCounter())
+    return redis
+
+
+class Payload(BaseModel):
+    name: str
+    summary: str | None = None
+
+
+def test_entry_round_trips_through_hash_fields():
+    body = cache._serialize_body(Payload(name="Maze"), exclude_none=True)
+    entry = cache._make_entry(body, generation=3)
+    fields = cache._dump_entry(entry)
+
+    assert fields["body"] == b'{"name":"Maze"}'
+    assert fields["etag"] == hashlib.md5(body).hexdigest()
+    assert fields["is_stale"] == "0"
+    assert cache.GZIP_FIELD not in fields
+
+    decoded = [
+        value.decode() if isinstance(value, bytes) else value
+        for value in (fields[field] for field in cache.ENTRY_FIELDS)
+    ]
+    assert cache._load_entry(decoded) == entry
+
+
+def test_large_bodies_are_stored_gzipped_for_the_edge():
+    body = orjson.dumps({"summary": "x" * cache.GZIP_MIN_SIZE})
+    fields = cache._dump_entry(cache._make_entry(body))
+
+    assert gzip.decompress(fields[cache.GZIP_FIELD]) == body
+    assert fields["body"] == body
+
+
+def test_model_entries_store_the_body_the_edge_sends(fake_redis):
+    @cache.cached(ttl=60)
+    async def endpoint(app_id: str) -> Payload:
+        return Payload(name=app_id)
+
+    asyncio.run(endpoint("org.example.App"))
+
+    cache_key = cache._make_cache_key(endpoint.__wrapped__, ("org.example.App",), {})
+    assert orjson.loads(fake_redis.hashes[cache_key]["body"]) == {
+        "name": "org.example.App",
+        "summary": None,
+    }
+    assert asyncio.run(endpoint("org.example.App")) == Payload(name="org.example.App")
+
+
+def test_entries_in_previous_layout_are_replaced(fake_redis):
+    calls = []
+
+    @cache.cached(ttl=60)
+    async def endpoint() -> dict:
+        calls.append(len(calls))
+        return {"layout": "hash"}
+
+    cache_key = cache._make_cache_key(endpoint.__wrapped__, (), {})
+    fake_redis.data[cache_key] = orjson.dumps(
+        {"created_at": time.time(), "is_stale": False, "value": {"layout": "json"}}
+    ).decode()
+
+    assert asyncio.run(endpoint()) == {"layout": "hash"}
+    assert asyncio.run(endpoint()) == {"layout": "hash"}
+    assert calls == [0]
+    assert cache_key not in fake_redis.data
+
+
+def test_raw_mode_serves_stored_body_without_calling_function(fake_redis):
+    calls = []
+
+    @cache.cached(ttl=60, raw=True, exclude_none=True)
+    async def endpoint(app_id: str):
+        calls.append(app_id)
+        return Payload(name=app_id)
+
+    first = asyncio.run(endpoint("org.example.App"))
+    second = asyncio.run(endpoint("org.example.App"))
+
+    assert calls == ["org.example.App"]
+    assert isinstance(second, Response)
+    assert second.body == first.body == b'{"name":"org.example.App"}'
+
+
+def test_generation_bump_marks_entries_stale(fake_redis):
+    calls = []
+
+    @cache.cached(ttl=60)
+    async def endpoint() -> dict:
+        calls.append(len(calls))
+        return {"call": len(calls)}
+
+    assert asyncio.run(endpoint()) == {"call": 1}
+    assert asyncio.run(endpoint()) == {"call": 1}
+
+    asyncio.run(cache.bump_generation())
+
+    assert asyncio.run(endpoint()) == {"call": 2}
+    assert asyncio.run(endpoint()) == {"call": 2}
+    assert calls == [0, 1]
+
+
+def test_invalidate_tags_only_drops_tagged_entries(fake_redis):
+    calls = []
+
+    @cache.cached(ttl=60, tags=("app:{app_id}", "stats"))
+    async def endpoint(app_id: str) -> dict:
+        calls.append(app_id)
+        return {"app_id": app_id}
+
+    for app_id in ("org.example.One", "org.example.Two", "org.example.One"):
+        asyncio.run(endpoint(app_id))
+
+    assert calls == ["org.example.One", "org.example.Two"]
+    assert len(fake_redis.sets["cache:tag:stats"]) == 2
+
+    assert asyncio.run(cache.invalidate_tags("app:org.example.One")) == 1
+    assert "cache:tag:app:org.example.One" not in fake_redis.sets
+    channel, message = fake_redis.published[-1]
+    assert channel == cache.LOCAL_KEY_INVALIDATION_CHANNEL
+    assert message.split("\n") == [
+        cache._make_cache_key(endpoint.__wrapped__, ("org.example.One",), {})
+    ]
+
+    asyncio.run(endpoint("org.example.One"))
+    asyncio.run(endpoint("org.example.Two"))
+
+    assert calls == ["org.example.One", "org.example.Two", "org.example.One"]
+
+
+def test_callable_tags_are_resolved_from_arguments(fake_redis):
+    def owner_tag(app_id: str, **_) -> str:
+        return f"owner:{app_id.rsplit('.', 1)[0]}"
+
+    @cache.cached(ttl=60, tags=(owner_tag,))
+    async def endpoint(app_id: str, locale: str = "en") -> dict:
+        return {"app_id": app_id}
+
+    asyncio.run(endpoint("org.example.One"))
+    asyncio.run(endpoint("org.example.Two", locale="de"))
+
+    assert len(fake_redis.sets["cache:tag:owner:org.example"]) == 2
+    assert asyncio.run(cache.invalidate_tags("owner:org.example")) == 2
+
+
+def test_hit_counts_are_flushed_in_batches(fake_redis, monkeypatch):
+    @cache.cached(ttl=60, tags=("app:{app_id}",))
+    async def endpoint(app_id: str) -> dict:
+        return {"app_id": app_id}
+
+    async def read_three_times():
+        for _ in range(3):
+            await endpoint("org.example.App")
+
+    asyncio.run(read_three_times())
+    assert cache.HITS_KEY not in fake_redis.sets
+
+    asyncio.run(cache.hit_counter.flush())
+    assert fake_redis.sets[cache.HITS_KEY] == {"app:org.example.App": 3}
+
+    monkeypatch.setattr(cache, "HIT_FLUSH_INTERVAL", 0)
+
+    async def read_and_settle():
+        await endpoint("org.example.App")
+        await asyncio.sleep(0)
+
+    asyncio.run(read_and_settle())
+    assert fake_redis.sets[cache.HITS_KEY] == {"app:org.example.App": 4}
+
+
+def test_reads_inside_hits_not_counted_are_not_recorded(fake_redis):
+    @cache.cached(ttl=60, tags=("app:{app_id}",))
+    async def endpoint(app_id: str) -> dict:
+        return {"app_id": app_id}
+
+    async def read():
+        await endpoint("org.example.App")
+        with cache.hits_not_counted():
+            await asyncio.gather(endpoint("org.example.App"), endpoint("org.other"))
+        await endpoint("org.example.App")
+        await cache.hit_counter.flush()
+
+    asyncio.run(read())
+    assert fake_redis.sets[cache.HITS_KEY] == {"app:org.example.App": 2}
+
+
+def test_cache_state_reports_entry_without_computing(fake_redis):
+    calls = []
+
+    @cache.cached(ttl=60, tags=("app:{app_id}",))
+    async def endpoint(app_id: str) -> dict:
+        calls.append(app_id)
+        return {"app_id": app_id}
+
+    state = asyncio.run(endpoint.cache_state("org.example.App"))
+    assert state == cache.EntryState.MISSING
+
+    asyncio.run(endpoint("org.example.App"))
+    assert asyncio.run(endpoint.cache_state("org.example.App")) == "fresh"
+
+    asyncio.run(cache.bump_generation())
+    assert asyncio.run(endpoint.cache_state("org.example.App")) == "stale"
+    assert calls == ["org.example.App"]
+
+
+def test_concurrent_misses_call_function_once(fake_redis):
+    calls = []
+
+    @cache.cached(ttl=60)
+    async def endpoint(app_id: str) -> dict:
+        calls.append(app_id)
+        await asyncio.sleep(0.01)
+        return {"app_id": app_id}
+
+    async def burst():
+        return await asyncio.gather(*(endpoint("org.example.App") for _ in range(10)))
+
+    results = asyncio.run(burst())
+
+    assert calls == ["org.example.App"]
+    assert results == [{"app_id": "org.example.App"}] * 10
+    assert not any(key.endswith(":refreshing") for key in fake_redis.data)
+
+
+def test_concurrent_misses_share_exception(fake_redis):
+    calls = []
+
+    @cache.cached(ttl=60)
+    async def endpoint() -> dict:
+        calls.append(len(calls))
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def burst():
+        return await asyncio.gather(
+            *(endpoint() for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(burst())
+
+    assert calls == [0]
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_miss_waits_for_entry_stored_by_lock_holder(fake_redis, monkeypatch):
+    monkeypatch.setattr(cache, "MISS_POLL_INTERVAL", 0.001)
+    calls = []
+
+    @cache.cached(ttl=60)
+    async def endpoint() -> dict:
+        calls.append(len(calls))
+        return {"worker": "local"}
+
+    cache_key = cache._make_cache_key(endpoint.__wrapped__, (), {})
+    fake_redis.data[cache._make_refresh_lock_key(cache_key)] = "1"
+
+    async def other_worker():
+        await asyncio.sleep(0.01)
+        entry = cache._make_entry(cache._serialize_value({"worker": "other"}))
+        await fake_redis.hset(cache_key, mapping=cache._dump_entry(entry))
+        await fake_redis.delete(cache._make_refresh_lock_key(cache_key))
+
+    async def run():
+        _, result = await asyncio.gather(other_worker(), endpoint())
+        return result
+
+    assert asyncio.run(run()) == {"worker": "other"}
+    assert calls == []
+
+
+@pytest.fixture
+def conditional_client(fake_redis):
+    calls = []
+    app = FastAPI()
+
+    @app.get("/model/{app_id}")
+    @cache.cached(ttl=60)
+    async def model_endpoint(app_id: str) -> Payload:
+        calls.append(app_id)
+        return Payload(name=app_id)
+
+    @app.get("/raw/{app_id}")
+    @cache.cached(ttl=60, raw=True)
+    async def raw_endpoint(app_id: str) -> Payload:
+        calls.append(app_id)
+        return Payload(name=app_id)
+
+    @cache.cached(ttl=60)
+    async def helper() -> dict:
+        calls.append("helper")
+        return {"ok": True}
+
+    @app.get("/wrapped")
+    async def wrapped_endpoint():
+        return await helper()
+
+    with TestClient(cache.CacheControlMiddleware(app)) as client:
+        yield client, calls
+
+
+@pytest.mark.parametrize("path", ["/model/org.example.App", "/raw/org.example.App"])
+def test_cached_endpoint_answers_not_modified(conditional_client, path):
+    client, calls = conditional_client
+
+    first = client.get(path)
+    etag = first.headers["etag"]
+
+    assert first.status_code == 200
+    assert first.json() == {"name": "org.example.App", "summary": None}
+    assert "last-modified" in first.headers
+
+    not_modified = client.get(path, headers={"If-None-Match": etag})
+    changed = client.get(path, headers={"If-None-Match": '"other"'})
+    since = client.get(
+        path, headers={"If-Modified-Since": first.headers["last-modified"]}
+    )
+
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert changed.status_code == 200
+    assert changed.headers["etag"] == etag
+    assert since.status_code == 304
+    assert calls == ["org.example.App"]
+
+
+def test_cached_helper_inside_route_is_not_conditional(conditional_client):
+    client, calls = conditional_client
+
+    first = client.get("/wrapped")
+    second = client.get("/wrapped", headers={"If-None-Match": "*"})
+
+    assert "etag" not in first.headers
+    assert second.status_code == 200
+    assert second.json() == {"ok": True}
+    assert calls == ["helper"]
+
+
+def test_etag_matching_handles_lists_and_weak_validators():
+    assert cache._etag_matches('"a", W/"b"', "b")
+    assert cache._etag_matches("*", "b")
+    assert not cache._etag_matches('"a"', "b")
@@ -0,0 +1,267 @@
+import hashlib
+import os
+import re
+import sys
+from enum import Enum
+from typing import Annotated
+from urllib.parse import parse_qsl, quote, unquote, urlsplit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, Path, Query
+from fastapi.testclient import TestClient
+
+from app import cache, cache_manifest
+
+
+class Sort(str, Enum):
+    NAME = "name"
+    DOWNLOADS = "downloads"
+
+
+def _user() -> str:
+    return "user"
+
+
+def _make_app() -> FastAPI:
+    app = FastAPI(root_path="/api/v2")
+    router = APIRouter(prefix="/apps")
+
+    @router.get("/special")
+    async def special() -> dict:
+        return {}
+
+    @router.get("/{app_id}")
+    @cache.cached(ttl=600, raw=True)
+    async def get_app(
+        app_id: Annotated[str, Path()],
+        locale: str = "en",
+        limit: int = 10,
+        verified: bool = False,
+        sort: Sort = Sort.NAME,
+        arches: Annotated[list[str] | None, Query(alias="arch")] = None,
+    ) -> dict:
+        return {}
+
+    @router.get("/{app_id}/ids")
+    @cache.cached(ttl=60, raw=True)
+    async def get_ids(
+        app_id: str, ids: Annotated[list[int], Query(default_factory=list)]
+    ) -> list:
+        return []
+
+    @router.get("/{app_id}/favorite")
+    @cache.cached(ttl=60, raw=True)
+    async def get_favorite(app_id: str, user: str = Depends(_user)) -> bool:
+        return False
+
+    @router.get("/{app_id}/score")
+    @cache.cached(ttl=60, raw=True)
+    async def get_score(app_id: str, weight: float = 1.0) -> float:
+        return 0.0
+
+    @router.get("/{app_id}/summary")
+    @cache.cached(ttl=60)
+    async def get_summary(app_id: str) -> dict:
+        return {}
+
+    app.include_router(router)
+
+    @app.get("/uncached")
+    async def uncached() -> dict:
+        return {}
+
+    return app
+
+
+ESCAPES = {'"': '\\"', "\\": "\\\\", "\b": "\\b", "\f": "\\f"}
+ESCAPES.update({"\n": "\\n", "\r": "\\r", "\t": "\\t"})
+BOOLEANS = {
+    **dict.fromkeys(["true", "1", "yes", "on", "t", "y"], True),
+    **dict.fromkeys(["false", "0", "no", "off", "f", "n"], False),
+}
+
+
+def _encode_string(value: str) -> str:
+    escaped = re.sub(
+        r'[\x00-\x1f"\\]',
+        lambda match: ESCAPES.get(match[0], f"\\u{ord(match[0]):04x}"),
+        value,
+    )
+    return f'"{escaped}"'
+
+
+def _encode_scalar(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    return _encode_string(value)
+
+
+def _coerce(value: str, kind: str):
+    if kind == "integer":
+        return int(value) if re.fullmatch(r"\s*[+-]?\d+\s*", value) else None
+    if kind == "boolean":
+        return BOOLEANS.get(value.lower())
+    return value
+
+
+def _edge_key(manifest: dict, url: str) -> str | None:
+    """Build the cache key the way ``nginx/lua/redis_cache.lua`` does."""
+    parts = urlsplit(url)
+    args: dict[str, list[str]] = {}
+    for name, value in parse_qsl(parts.query, keep_blank_values=True):
+        args.setdefault(name, []).append(value)
+
+    path = unquote(parts.path).removeprefix(manifest["root_path"])
+    for route in manifest["routes"]:
+        captures = re.match(route["regex"], path)
+        if captures:
+            break
+    else:
+        return None
+    if "func" not in route:
+        return None
+
+    kwargs = []
+    for param in sorted(route["params"], key=lambda param: param["name"]):
+        if param["in"] == "path":
+            values = [captures[param["alias"]]]
+        else:
+            values = args.get(param["alias"])
+
+        if values is None:
+            if param["required"]:
+                return None
+            value = param.get("default")
+        elif param["type"] == "array":
+            value = [_coerce(item, param["items"]) for item in values]
+            if None in value:
+                return None
+        else:
+            value = _coerce(values[-1], param["type"])
+            if value is None:
+                return None
+
+        if param["type"] == "array" and value is not None:
+            encoded = "[" + ",".join(_encode_scalar(item) for item in value) + "]"
+        else:
+            encoded = _encode_scalar(value)
+        kwargs.append(f"{_encode_string(param['name'])}:{encoded}")
+
+    key_data = '{"func":' + _encode_string(route["func"])
+    key_data += ',"kwargs":{' + ",".join(kwargs) + "}}"
+    digest = hashlib.md5(key_data.encode()).hexdigest()
+    return f"{manifest['key_prefix']}{route['func']}:{digest}"
+
+
+class KeyBuilt(Exception):
+    pass
+
+
+@pytest.fixture
+def backend_key(monkeypatch):
+    """Return the key the backend builds when serving ``url``."""
+    make_cache_key = cache._make_cache_key
+
+    def record(func, args, kwargs):
+        raise KeyBuilt(make_cache_key(func, args, kwargs))
+
+    monkeypatch.setattr(cache, "_make_cache_key", record)
+    client = TestClient(_make_app(), root_path="")
+
+    def build(url: str) -> str:
+        with pytest.raises(KeyBuilt) as built:
+            client.get(url)
+        return str(built.value)
+
+    return build
+
+
+def _route(manifest: dict, path: str) -> dict:
+    return next(route for route in manifest["routes"] if route["path"] == path)
+
+
+def test_manifest_describes_cached_routes():
+    manifest = cache_manifest.build_manifest(_make_app())
+
+    assert manifest["version"] == cache_manifest.MANIFEST_VERSION
+    assert manifest["root_path"] == "/api/v2"
+    assert manifest["entry_fields"][-1] == "body"
+    assert [route["path"] for route in manifest["routes"]] == [
+        "/apps/special",
+        "/apps/{app_id}",
+        "/apps/{app_id}/ids",
+        "/apps/{app_id}/favorite",
+        "/apps/{app_id}/score",
+        "/apps/{app_id}/summary",
+        "/uncached",
+    ]
+
+    get_app = _route(manifest, "/apps/{app_id}")
+    assert get_app["func"] == "get_app"
+    assert get_app["ttl"] == 600
+    assert get_app["params"] == [
+        {"name": "app_id", "alias": "app_id", "in": "path", "required": True}
+        | {"type": "string"},
+        {"name": "locale", "alias": "locale", "in": "query", "required": False}
+        | {"type": "string", "default": "en"},
+        {"name": "limit", "alias": "limit", "in": "query", "required": False}
+        | {"type": "integer", "default": 10},
+        {"name": "verified", "alias": "verified", "in": "query", "required": False}
+        | {"type": "boolean", "default": False},
+        {"name": "sort", "alias": "sort", "in": "query", "required": False}
+        | {"type": "string", "default": "name"},
+        {"name": "arches", "alias": "arch", "in": "query", "required": False}
+        | {"type": "array", "items": "string", "default": None},
+    ]
+
+
+def test_routes_the_edge_cannot_key_have_no_schema():
+    manifest = cache_manifest.build_manifest(_make_app())
+
+    for path in ("/apps/special", "/apps/{app_id}/favorite", "/apps/{app_id}/score"):
+        assert "func" not in _route(manifest, path)
+    assert "func" not in _route(manifest, "/uncached")
+
+
+def test_only_raw_entries_are_served_by_the_edge():
+    # Other entries hold the model dump, not the body FastAPI sends
+    manifest = cache_manifest.build_manifest(_make_app())
+
+    assert "func" not in _route(manifest, "/apps/{app_id}/summary")
+    assert _edge_key(manifest, "/api/v2/apps/org.gimp.GIMP/summary") is None
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/apps/org.gimp.GIMP",
+        "/apps/org.gimp.GIMP?locale=de&limit=5&verified=yes&sort=downloads",
+        "/apps/org.gimp.GIMP?limit=5&limit=+7",
+        "/apps/org.gimp.GIMP?arch=x86_64&arch=aarch64",
+        "/apps/org.gimp.GIMP?arch=",
+        "/apps/" + quote('org.example."Ünïcode"\\'),
+        "/apps/org.gimp.GIMP?locale=" + quote("line\nbreak\x01\x7f"),
+        "/apps/org.gimp.GIMP/ids?ids=3&ids=-1",
+    ],
+)
+def test_edge_builds_the_backend_cache_key(backend_key, url):
+    manifest = cache_manifest.build_manifest(_make_app())
+
+    assert _edge_key(manifest, "/api/v2" + url) == backend_key(url)
+
+
+def test_edge_passes_through_routes_it_cannot_key():
+    manifest = cache_manifest.build_manifest(_make_app())
+
+    assert _edge_key(manifest, "/api/v2/apps/special") is None
+    assert _edge_key(manifest, "/api/v2/apps/org.gimp.GIMP/favorite") is None
+    assert _edge_key(manifest, "/api/v2/apps/org.gimp.GIMP?limit=many") is None
+    assert _edge_key(manifest, "/api/v2/apps/org.gimp.GIMP/ids?ids=x") is None
+    assert _edge_key(manifest, "/other/apps/org.gimp.GIMP") is None
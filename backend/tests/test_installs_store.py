@@ -0,0 +1,164 @@
+import datetime
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+# app.search imports meilisearch at module load and connects at import time.
+# Stub it before importing any app module that transitively pulls it in.
+sys.modules.setdefault("app.search", SimpleNamespace())
+
+from app import (
+    installs_store,
+    models,  # noqa: F401
+)
+from app.installs_store import FIRST_STATS_DATE, DailyInstalls
+
+
+def _date(offset: int) -> str:
+    return (FIRST_STATS_DATE + datetime.timedelta(days=offset)).isoformat()
+
+
+class FakeBytesPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.commands.append((getattr(self.redis, name), args))
+
+        return queue
+
+    def execute(self):
+        return [command(*args) for command, args in self.commands]
+
+
+class FakeBytesRedis:
+    def __init__(self):
+        self.strings: dict[str, bytes] = {}
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+
+    def pipeline(self):
+        return FakeBytesPipeline(self)
+
+    def exists(self, key):
+        return int(key in self.strings or key in self.hashes)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field.encode()] = str(value).encode()
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hkeys(self, key):
+        return list(self.hashes.get(key, {}))
+
+    def setrange(self, key, offset, value):
+        current = self.strings.get(key, b"").ljust(offset, b"\0")
+        self.strings[key] = current[:offset] + value + current[offset + len(value) :]
+
+    def mget(self, keys):
+        return [self.strings.get(key) for key in keys]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.strings.pop(key, None)
+            self.hashes.pop(key, None)
+
+
+def test_window_sums_clip_to_each_app_run():
+    installs = DailyInstalls.from_per_day(
+        {
+            "org.example.Old": {_date(0): 1, _date(1): 2, _date(2): 3},
+            "org.example.New": {_date(2): 10, _date(4): 20},
+        }
+    )
+    edate = FIRST_STATS_DATE + datetime.timedelta(days=4)
+
+    assert installs.window_sums(edate, 2).tolist() == [0, 20]
+    assert installs.window_sums(edate, 3).tolist() == [3, 30]
+    assert installs.window_sums(edate, 100).tolist() == [6, 30]
+
+
+def test_window_zero_fills_days_outside_run():
+    installs = DailyInstalls.from_per_day(
+        {"org.example.App": {_date(1): 5, _date(3): -2}}
+    )
+
+    window = installs.window(FIRST_STATS_DATE + datetime.timedelta(days=4), 5)
+
+    assert window.tolist() == [[0, 5, 0, -2, 0]]
+
+
+def test_per_day_covers_run_from_first_day():
+    installs = DailyInstalls.from_per_day(
+        {"org.example.App": {_date(1): 5, _date(3): 7}}
+    )
+
+    assert installs.per_day("org.example.App") == {
+        _date(1): 5,
+        _date(2): 0,
+        _date(3): 7,
+    }
+
+
+def test_writer_appends_days_and_loader_reads_runs():
+    conn = FakeBytesRedis()
+    writer = installs_store.DailyInstallsWriter(conn)
+
+    for offset, day in enumerate(
+        [{"org.example.One": 4}, {}, {"org.example.One": 6, "org.example.Two": -1}]
+    ):
+        writer.record(FIRST_STATS_DATE + datetime.timedelta(days=offset), day)
+    # Re-recording a day after a restart must not change anything
+    installs_store.DailyInstallsWriter(conn).record(
+        FIRST_STATS_DATE + datetime.timedelta(days=2),
+        {"org.example.One": 6, "org.example.Two": -1},
+    )
+
+    assert installs_store.has_daily_installs(conn)
+    installs = installs_store.load_daily_installs(conn)
+
+    assert installs.app_ids == ["org.example.One", "org.example.Two"]
+    assert installs.starts.tolist() == [0, 2]
+    np.testing.assert_array_equal(
+        installs.window(FIRST_STATS_DATE + datetime.timedelta(days=2), 3),
+        [[4, 0, 6], [0, 0, -1]],
+    )
+    assert installs_store.load_first_seen(conn) == {
+        "org.example.One": FIRST_STATS_DATE,
+        "org.example.Two": FIRST_STATS_DATE + datetime.timedelta(days=2),
+    }
+
+    installs_store.delete_daily_installs(conn)
+    assert not conn.strings
+    assert not installs_store.has_daily_installs(conn)
+
+
+def test_window_installs_combine_aggregates_with_partial_days():
+    from app import stats
+
+    edate = FIRST_STATS_DATE + datetime.timedelta(days=40)
+    installs = DailyInstalls.from_per_day(
+        {
+            "org.example.Old": {_date(0): 100},
+            "org.example.Steady": {_date(10): 1, _date(35): 2, _date(38): 3},
+            "org.example.Quiet": {_date(20): 0},
+        }
+    )
+    partial = {"org.example.Steady": 4, "org.example.New": 5}
+
+    assert stats._get_window_installs(installs, partial, edate, 7) == {
+        "org.example.Steady": 9,
+        "org.example.New": 5,
+    }
+    assert stats._get_window_installs(installs, partial, edate, 30) == {
+        "org.example.Steady": 9,
+        "org.example.Quiet": 0,
+        "org.example.New": 5,
+    }
@@ -0,0 +1,241 @@
+import base64
+import os
+import sys
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+# app.search imports meilisearch at module load and connects at import time.
+# Stub it before importing any app module that transitively pulls it in.
+sys.modules.setdefault("app.search", SimpleNamespace())
+
+from app import config, models, ownership
+from app.login_info import LoginInformation, LoginState, login_state
+from app.routes import purchases
+
+REFS_PER_CLIENT = 250
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def sadd(self, key, *members):
+        self.commands.append(lambda: self.redis.sadd(key, *members))
+
+    def expire(self, key, ttl):
+        self.commands.append(lambda: self.redis.expire(key, ttl))
+
+    def execute(self):
+        return [command() for command in self.commands]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.sets: dict[str, set[str]] = {}
+        self.ttls: dict[str, int] = {}
+
+    def smismember(self, key, members):
+        return [int(member in self.sets.get(key, ())) for member in members]
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def expire(self, key, ttl):
+        self.ttls[key] = ttl
+
+    def delete(self, *keys):
+        for key in keys:
+            self.sets.pop(key, None)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakeOwnershipTable:
+    """Answers ``UserOwnedApp.owned_app_ids`` queries and counts them."""
+
+    def __init__(self, owned: dict[int, set[str]]):
+        self.owned = owned
+        self.queries: list[tuple[int, list[str]]] = []
+
+    def scalars(self, statement):
+        params = statement.compile().params
+        user_id, app_ids = params["account_1"], params["app_ids"]
+        self.queries.append((user_id, app_ids))
+        return [app_id for app_id in app_ids if app_id in self.owned.get(user_id, ())]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(ownership, "_redis", lambda: redis)
+    return redis
+
+
+@pytest.fixture
+def table(monkeypatch):
+    table = FakeOwnershipTable({})
+
+    @contextmanager
+    def get_db(db_type="replica"):
+        yield SimpleNamespace(session=table)
+
+    monkeypatch.setattr(purchases, "get_db", get_db)
+    return table
+
+
+@pytest.fixture
+def client(table, fake_redis):
+    app = FastAPI()
+    purchases.register_to_app(app)
+    user = SimpleNamespace(id=1)
+    app.dependency_overrides[login_state] = lambda: LoginInformation(
+        state=LoginState.LOGGED_IN, user=user, method=None
+    )
+
+    with TestClient(app) as client_:
+        client_.user = user
+        yield client_
+
+
+def _refs(user_id: int) -> list[str]:
+    refs = []
+    for i in range(REFS_PER_CLIENT // 3 + 1):
+        app_id = f"org.example.User{user_id}.App{i}"
+        refs += [
+            f"app/{app_id}/x86_64/stable",
+            f"runtime/{app_id}.Locale/x86_64/stable",
+            f"runtime/{app_id}.Debug/x86_64/stable",
+        ]
+    return refs[:REFS_PER_CLIENT]
+
+
+def _update_token(user_id: int) -> str:
+    return jwt.encode(
+        {
+            "token-id": "token",
+            "user-id": user_id,
+            "exp": datetime.now(UTC) + timedelta(days=1),
+        },
+        base64.b64decode(config.settings.update_token_secret),
+        algorithm="HS256",
+    )
+
+
+def test_owned_app_ids_is_one_query_over_all_ids():
+    table = FakeOwnershipTable({1: {"org.example.A", "org.example.C"}})
+    db = SimpleNamespace(session=table)
+
+    owned = models.UserOwnedApp.owned_app_ids(
+        db, 1, ["org.example.A", "org.example.B", "org.example.C"]
+    )
+
+    assert owned == {"org.example.A", "org.example.C"}
+    assert table.queries == [(1, ["org.example.A", "org.example.B", "org.example.C"])]
+
+
+def test_clients_with_many_refs_are_checked_with_one_query_each(client, table):
+    users = range(1, 21)
+    for user_id in users:
+        table.owned[user_id] = {
+            ref.split("/")[1].removesuffix(".Locale").removesuffix(".Debug")
+            for ref in _refs(user_id)
+        }
+
+    for _ in range(3):
+        for user_id in users:
+            client.user.id = user_id
+            response = client.post("/purchases/check-purchases", json=_refs(user_id))
+            assert response.status_code == 200
+
+            response = client.post(
+                "/purchases/generate-download-token",
+                json={"appids": _refs(user_id), "update_token": _update_token(user_id)},
+            )
+            assert response.status_code == 200
+
+    # Only the first check of each client reaches the database
+    assert [user_id for user_id, _ in table.queries] == list(users)
+    assert all(len(app_ids) == 84 for _, app_ids in table.queries)
+
+
+def test_unowned_apps_are_looked_up_again(client, table, fake_redis):
+    table.owned[1] = {"org.example.A"}
+    refs = ["app/org.example.A/x86_64/stable", "app/org.example.B/x86_64/stable"]
+
+    for _ in range(2):
+        response = client.post("/purchases/check-purchases", json=refs)
+        assert response.status_code == 403
+        assert response.headers["missing-appids"] == "org.example.B"
+
+    assert [sorted(app_ids) for _, app_ids in table.queries] == [
+        ["org.example.A", "org.example.B"],
+        ["org.example.B"],
+    ]
+    assert fake_redis.sets[ownership._key(1)] == {"org.example.A"}
+
+    table.owned[1].add("org.example.B")
+    response = client.post("/purchases/check-purchases", json=refs)
+    assert response.status_code == 200
+
+
+def test_check_falls_back_to_the_database_without_redis(client, table, monkeypatch):
+    class BrokenRedis(FakeRedis):
+        def smismember(self, key, members):
+            raise ownership.redis.ConnectionError("down")
+
+        def pipeline(self):
+            raise ownership.redis.ConnectionError("down")
+
+    monkeypatch.setattr(ownership, "_redis", BrokenRedis)
+    table.owned[1] = {"org.example.A"}
+
+    response = client.post(
+        "/purchases/check-purchases", json=["app/org.example.A/x86_64/stable"]
+    )
+
+    assert response.status_code == 200
+    assert table.queries == [(1, ["org.example.A"])]
+
+
+def test_ownership_changes_are_cached_after_commit(fake_redis):
+    session = Session()
+    ownership.add_on_commit(session, 1, "org.example.A")
+    assert ownership._key(1) not in fake_redis.sets
+
+    session.commit()
+
+    assert fake_redis.sets[ownership._key(1)] == {"org.example.A"}
+    assert fake_redis.ttls[ownership._key(1)] == ownership.OWNED_APPS_TTL
+
+    ownership.forget_on_commit(session, 1)
+    session.commit()
+
+    assert ownership._key(1) not in fake_redis.sets
+
+
+def test_rolled_back_ownership_changes_are_not_cached(fake_redis):
+    session = Session()
+    session.begin()
+    ownership.add_on_commit(session, 1, "org.example.A")
+    session.rollback()
+    session.commit()
+
+    assert ownership._key(1) not in fake_redis.sets
@@ -0,0 +1,88 @@
+import asyncio
+import importlib
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+# app.search imports meilisearch at module load and connects at import time.
+# Stub it before importing any app module that transitively pulls it in.
+sys.modules.setdefault("app.search", SimpleNamespace())
+
+from app import models  # noqa: F401
+
+# app.worker re-exports the actor under the name of its module
+refresh_cache = importlib.import_module("app.worker.refresh_cache")
+
+
+def test_each_run_closes_its_loop_bound_connections(monkeypatch):
+    events = []
+
+    async def bump_generation():
+        events.append("bump")
+
+    async def prepopulate_cache():
+        events.append("prewarm")
+        if events.count("prewarm") == 1:
+            raise RuntimeError("prewarm failed")
+
+    async def close_async_db():
+        events.append("close_db")
+
+    async def close_redis():
+        events.append("close_redis")
+
+    monkeypatch.setattr(refresh_cache.cache, "bump_generation", bump_generation)
+    monkeypatch.setattr(refresh_cache, "_prepopulate_cache", prepopulate_cache)
+    monkeypatch.setattr(refresh_cache.database, "close_async_db", close_async_db)
+    monkeypatch.setattr(refresh_cache.database, "close_redis", close_redis)
+
+    with pytest.raises(RuntimeError):
+        refresh_cache.refresh_cache.fn()
+    refresh_cache.refresh_cache.fn()
+
+    assert events == [
+        "bump",
+        "prewarm",
+        "close_db",
+        "close_redis",
+        "bump",
+        "prewarm",
+        "close_db",
+        "close_redis",
+    ]
+
+
+def test_prewarm_reads_are_not_counted_as_hits(monkeypatch):
+    class Endpoint:
+        __name__ = "endpoint"
+
+        async def cache_state(self, **kwargs):
+            return refresh_cache.cache.EntryState.STALE
+
+        async def __call__(self, **kwargs):
+            refresh_cache.cache.hit_counter.record([f"app:{kwargs['app_id']}"])
+
+    async def get_prewarm_app_ids(limit):
+        return ["org.example.App"]
+
+    async def decay_hit_counts():
+        pass
+
+    counter = refresh_cache.cache.HitCounter()
+    monkeypatch.setattr(refresh_cache.cache, "hit_counter", counter)
+    monkeypatch.setattr(refresh_cache, "_get_prewarm_app_ids", get_prewarm_app_ids)
+    monkeypatch.setattr(
+        refresh_cache,
+        "_app_endpoints",
+        lambda app_id: [(Endpoint(), {"app_id": app_id})],
+    )
+    monkeypatch.setattr(refresh_cache.cache, "decay_hit_counts", decay_hit_counts)
+
+    asyncio.run(refresh_cache._prepopulate_cache())
+
+    assert not counter._counts
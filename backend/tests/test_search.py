@@ -1,3 +1,4 @@
+import asyncio
 import importlib
 import os
 import sys
@@ -74,6 +75,7 @@ class FakeClient:
     def __init__(self):
         self.indices = {}
         self.created = []
+        self.created_at = "2026-01-01T00:00:00Z"
 
     def create_index(self, uid, options):
         self.created.append((uid, options))
@@ -83,6 +85,85 @@ class FakeClient:
     def index(self, uid):
         return self.indices.setdefault(uid, FakeIndex(uid))
 
+    def get_index(self, uid):
+        return SimpleNamespace(uid=uid, created_at=self.created_at)
+
+
+class FakeAsyncClient:
+    def __init__(self, client):
+        self.client = client
+        self.timeouts = []
+
+    async def search(self, index_uid, query, options=None, timeout=None):
+        self.timeouts.append(timeout)
+        return self.client.index(index_uid).search(query, options)
+
+    async def multi_search(self, queries, timeout=None):
+        self.timeouts.append(timeout)
+        return [
+            self.client.index(query.index_uid).search(query.query, query.options)
+            for query in queries
+        ]
+
+
+class FakeRedisPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+
+        return queue
+
+    def execute(self):
+        return [command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.strings = {}
+        self.hashes = {}
+
+    def pipeline(self):
+        return FakeRedisPipeline(self)
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def set(self, key, value):
+        self.strings[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.strings.pop(key, None)
+            self.hashes.pop(key, None)
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(field) for field in fields]
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(
+            {
+                field: value.decode() if isinstance(value, bytes) else value
+                for field, value in mapping.items()
+            }
+        )
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+
 
 class FakeMonitor:
     def __init__(self):
@@ -109,10 +190,14 @@ def search_module(monkeypatch):
     module = importlib.import_module("app.search")
     monitor = FakeMonitor()
     monkeypatch.setattr(module, "monitor_hybrid_index_task", monitor)
+    monkeypatch.setattr(module, "monitor_lexical_index_task", FakeMonitor())
     monkeypatch.setattr(module.search_health, "has_hybrid_task_failures", lambda: False)
     monkeypatch.setattr(module.search_health, "mark_hybrid_task_failed", lambda _: None)
     monkeypatch.setattr(module.search_health, "hybrid_mutation_lock", nullcontext)
     monkeypatch.setattr(module.search_health, "record_lexical_mutation", lambda _: None)
+    fake_redis = FakeRedis()
+    monkeypatch.setattr(module.search_fingerprints, "_redis", lambda: fake_redis)
+    monkeypatch.setattr(module, "async_client", FakeAsyncClient(fake_client))
     yield module, fake_client
     sys.modules.pop("app.search", None)
     sys.modules.pop("app.database", None)
@@ -205,12 +290,80 @@ def test_lexical_mutations_advance_reconciliation_generation(
     assert recorded == [[1], [1]]
 
 
+def test_unchanged_documents_are_not_sent_again(search_module):
+    search, client = search_module
+    lexical = client.indices[search.LEXICAL_APPS_INDEX]
+    hybrid = client.indices[search.HYBRID_APPS_INDEX]
+    document = {"id": "org.example.App", "name": "App", "trending": 1.0}
+
+    search.create_or_update_apps([document])
+    search.create_or_update_apps([dict(document)])
+    assert lexical.update_calls == [[document]]
+    assert hybrid.update_calls == [[document]]
+
+    changed = {**document, "name": "New name"}
+    other = {"id": "org.example.Other", "name": "Other", "trending": 2.0}
+    search.create_or_update_apps([changed, other])
+    assert lexical.update_calls[-1] == [changed, other]
+
+
+def test_overlapping_partial_updates_invalidate_fingerprints(search_module):
+    search, client = search_module
+    lexical = client.indices[search.LEXICAL_APPS_INDEX]
+    full = {"id": "org.example.App", "name": "App", "trending": 1.0}
+    trending = {"id": "org.example.App", "trending": 5.0}
+    installs = {"id": "org.example.App", "installs_last_month": 3}
+
+    for document in [full, trending, installs, installs, full, trending]:
+        search.create_or_update_apps([document])
+
+    # The full document put back the old trending value, so trending is
+    # sent again; installs shares no fields with either and stays skipped.
+    assert lexical.update_calls == [[full], [trending], [installs], [full], [trending]]
+
+
+def test_lexical_document_task_is_monitored(search_module, monkeypatch):
+    search, client = search_module
+    lexical = client.indices[search.LEXICAL_APPS_INDEX]
+    document = {"id": "org.example.App", "trending": 1.0}
+
+    search.create_or_update_apps([document])
+    assert search.monitor_lexical_index_task.sent == [(1, ["org.example.App"])]
+
+    def unavailable(*args):
+        raise RuntimeError("broker unavailable")
+
+    monkeypatch.setattr(search.monitor_lexical_index_task, "send", unavailable)
+    changed = {**document, "trending": 2.0}
+    search.create_or_update_apps([changed])
+    search.create_or_update_apps([changed])
+
+    # The second task could not be monitored, so its documents are resent
+    assert lexical.update_calls == [[document], [changed], [changed]]
+
+
+def test_deleted_and_reindexed_documents_are_sent_again(search_module):
+    search, client = search_module
+    lexical = client.indices[search.LEXICAL_APPS_INDEX]
+    document = {"id": "org.example.App", "trending": 1.0}
+
+    search.create_or_update_apps([document])
+    search.delete_apps([document["id"]])
+    search.create_or_update_apps([document])
+    client.created_at = "2026-02-01T00:00:00Z"
+    search.create_or_update_apps([document])
+
+    assert lexical.update_calls == [[document]] * 3
+
+
 def test_failed_hybrid_tasks_force_lexical_fallback(search_module, monkeypatch):
     search, client = search_module
     search.config.settings.search_hybrid_enabled = True
     monkeypatch.setattr(search.search_health, "has_hybrid_task_failures", lambda: True)
 
-    search.search_apps_post(search.SearchQuery(query="record my screen"), "en")
+    asyncio.run(
+        search.search_apps_post(search.SearchQuery(query="record my screen"), "en")
+    )
 
     assert client.indices[search.LEXICAL_APPS_INDEX].search_calls
     assert not client.indices[search.HYBRID_APPS_INDEX].search_calls
@@ -250,7 +403,9 @@ def test_non_hybrid_searches_use_lexical_index(
     search.config.settings.search_hybrid_enabled = enabled
     if filters == "runtime":
         filters = [search.Filter(filterType="type", value="runtime")]
-    search.search_apps_post(search.SearchQuery(query=query, filters=filters), "en")
+    asyncio.run(
+        search.search_apps_post(search.SearchQuery(query=query, filters=filters), "en")
+    )
 
     assert client.indices[expected_index].search_calls
     assert not client.indices[search.HYBRID_APPS_INDEX].search_calls
@@ -268,7 +423,7 @@ def test_desktop_intent_search_uses_exact_hybrid_payload(search_module):
         hits_per_page=10,
         page=2,
     )
-    search.search_apps_post(query, "en")
+    asyncio.run(search.search_apps_post(query, "en"))
 
     lexical = client.indices[search.LEXICAL_APPS_INDEX]
     hybrid = client.indices[search.HYBRID_APPS_INDEX]
@@ -303,7 +458,7 @@ def test_hybrid_error_retries_lexically_with_same_options(search_module):
     hybrid = client.indices[search.HYBRID_APPS_INDEX]
     hybrid.search_error = meilisearch.errors.MeilisearchCommunicationError("down")
 
-    search.search_apps_post(search.SearchQuery(query="compress pdf"), "en")
+    asyncio.run(search.search_apps_post(search.SearchQuery(query="compress pdf"), "en"))
 
     lexical = client.indices[search.LEXICAL_APPS_INDEX]
     assert len(lexical.search_calls) == 1
@@ -313,10 +468,16 @@ def test_hybrid_error_retries_lexically_with_same_options(search_module):
     assert lexical_options == {
         key: value for key, value in hybrid_options.items() if key != "hybrid"
     }
+    assert search.async_client.timeouts == [
+        search.config.settings.search_hybrid_timeout,
+        None,
+    ]
 
     lexical.search_error = meilisearch.errors.MeilisearchTimeoutError("down")
     with pytest.raises(meilisearch.errors.MeilisearchTimeoutError):
-        search.search_apps_post(search.SearchQuery(query="compress pdf"), "en")
+        asyncio.run(
+            search.search_apps_post(search.SearchQuery(query="compress pdf"), "en")
+        )
 
 
 @pytest.mark.parametrize(
@@ -338,11 +499,30 @@ def test_hybrid_error_retries_lexically_with_same_options(search_module):
         lambda search: search.get_runtime_list(),
         lambda search: search.get_developers(1, 1),
         lambda search: search.get_number_of_verified_apps(),
+        lambda search: search.get_search_totals(),
     ],
 )
 def test_non_text_queries_use_only_lexical_index(search_module, call):
     search, client = search_module
-    call(search)
+    asyncio.run(call(search))
 
     assert client.indices[search.LEXICAL_APPS_INDEX].search_calls
     assert not client.indices[search.HYBRID_APPS_INDEX].search_calls
+
+
+def test_search_totals_are_read_in_one_multi_search(search_module):
+    search, client = search_module
+    lexical = client.indices[search.LEXICAL_APPS_INDEX]
+    lexical.search_response["facetDistribution"] = {
+        "main_categories": {"game": 3},
+        "verification_verified": {"true": 2},
+    }
+
+    totals = asyncio.run(search.get_search_totals())
+
+    assert totals == ({"game": 3}, 2)
+    assert [options["filter"] for _, options in lexical.search_calls] == [
+        "type IN [desktop-application, console-application] AND NOT icon IS NULL",
+        search.VERIFIED_APPS_OPTIONS["filter"],
+    ]
+    assert search.async_client.timeouts == [None]
@@ -0,0 +1,184 @@
+import asyncio
+import os
+import sys
+
+import httpx
+import meilisearch.errors
+import orjson
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from app.search_client import AsyncSearchClient, MultiSearchQuery
+
+
+def _result(query):
+    return {"hits": [], "query": query["q"], "processingTimeMs": 1}
+
+
+class FakeMeilisearch:
+    def __init__(self, delay=0.0):
+        self.requests = []
+        self.delay = delay
+        self.invalid_queries = set()
+
+    def _error(self):
+        return httpx.Response(
+            400, json={"message": "Invalid filter", "code": "invalid_search_filter"}
+        )
+
+    async def handler(self, request):
+        body = orjson.loads(request.content)
+        self.requests.append((request.url.path, body, request.headers))
+        await asyncio.sleep(self.delay)
+
+        if request.url.path == "/multi-search":
+            if any(query["q"] in self.invalid_queries for query in body["queries"]):
+                return self._error()
+            return httpx.Response(
+                200,
+                json={
+                    "results": [
+                        {"indexUid": query["indexUid"], **_result(query)}
+                        for query in body["queries"]
+                    ]
+                },
+            )
+        if body["q"] in self.invalid_queries:
+            return self._error()
+        return httpx.Response(200, json=_result(body))
+
+
+def _client(server, **kwargs):
+    return AsyncSearchClient(
+        "http://meilisearch:7700",
+        "secret",
+        transport=httpx.MockTransport(server.handler),
+        **kwargs,
+    )
+
+
+def test_single_search_uses_the_index_endpoint():
+    server = FakeMeilisearch()
+    client = _client(server)
+
+    result = asyncio.run(client.search("apps", "gimp", {"limit": 1}))
+
+    assert result["query"] == "gimp"
+    path, body, headers = server.requests[0]
+    assert path == "/indexes/apps/search"
+    assert body == {"q": "gimp", "limit": 1}
+    assert headers["Authorization"] == "Bearer secret"
+
+
+def test_concurrent_searches_are_sent_separately_with_their_timeouts():
+    server = FakeMeilisearch(delay=0.2)
+    client = _client(server)
+
+    async def run():
+        return await asyncio.gather(
+            client.search("apps-hybrid", "slow", timeout=0.05),
+            client.search("apps", "lexical", timeout=1.0),
+            return_exceptions=True,
+        )
+
+    hybrid, lexical = asyncio.run(run())
+
+    assert isinstance(hybrid, meilisearch.errors.MeilisearchTimeoutError)
+    assert lexical["query"] == "lexical"
+    assert sorted(path for path, _, _ in server.requests) == [
+        "/indexes/apps-hybrid/search",
+        "/indexes/apps/search",
+    ]
+
+
+def test_multi_search_sends_its_queries_together():
+    server = FakeMeilisearch()
+    client = _client(server)
+
+    results = asyncio.run(
+        client.multi_search(
+            [
+                MultiSearchQuery("apps", "a", {"sort": ["trending:desc"]}),
+                MultiSearchQuery("apps", "b"),
+            ]
+        )
+    )
+
+    assert [result["query"] for result in results] == ["a", "b"]
+    assert all("indexUid" not in result for result in results)
+    assert len(server.requests) == 1
+    path, body, _ = server.requests[0]
+    assert path == "/multi-search"
+    assert body["queries"] == [
+        {"indexUid": "apps", "q": "a", "sort": ["trending:desc"]},
+        {"indexUid": "apps", "q": "b"},
+    ]
+
+
+def test_api_errors():
+    server = FakeMeilisearch()
+    server.invalid_queries.add("bad")
+    client = _client(server)
+
+    with pytest.raises(meilisearch.errors.MeilisearchApiError) as error:
+        asyncio.run(client.search("apps", "bad"))
+
+    assert error.value.status_code == 400
+    assert error.value.code == "invalid_search_filter"
+    assert error.value.message == "Invalid filter"
+
+    with pytest.raises(meilisearch.errors.MeilisearchApiError) as error:
+        asyncio.run(client.multi_search([MultiSearchQuery("apps", "bad")]))
+
+    assert error.value.code == "invalid_search_filter"
+
+
+def test_api_errors_without_a_json_body():
+    client = AsyncSearchClient(
+        "http://meilisearch:7700",
+        transport=httpx.MockTransport(lambda request: httpx.Response(502)),
+    )
+
+    with pytest.raises(meilisearch.errors.MeilisearchApiError) as error:
+        asyncio.run(client.search("apps", "gimp"))
+
+    assert (error.value.status_code, error.value.code) == (502, None)
+
+
+def test_search_timeout():
+    server = FakeMeilisearch(delay=1.0)
+    client = _client(server)
+
+    with pytest.raises(meilisearch.errors.MeilisearchTimeoutError):
+        asyncio.run(client.search("apps", "slow", timeout=0.05))
+
+
+def test_connection_errors():
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    client = AsyncSearchClient(
+        "http://meilisearch:7700", transport=httpx.MockTransport(handler)
+    )
+
+    with pytest.raises(meilisearch.errors.MeilisearchCommunicationError):
+        asyncio.run(client.search("apps", "gimp"))
+
+
+def test_client_survives_a_new_event_loop():
+    server = FakeMeilisearch()
+    client = _client(server)
+
+    asyncio.run(client.search("apps", "first"))
+    result = asyncio.run(client.search("apps", "second"))
+
+    assert result["query"] == "second"
+
+    async def close():
+        await client.search("apps", "third")
+        await client.aclose()
+
+    asyncio.run(close())
+    assert client._client is None
@@ -260,3 +260,20 @@ def test_reconciliation_bails_when_another_rebuild_is_running(monkeypatch):
     search_tasks.reconcile_hybrid_index.fn(0)
 
     assert lock.released is False
+
+
+@pytest.mark.parametrize(
+    ("status", "forgotten"), [("succeeded", []), ("failed", [["a", "b"]])]
+)
+def test_failed_lexical_task_forgets_its_fingerprints(monkeypatch, status, forgotten):
+    client = FakeClient(status)
+    monkeypatch.setattr(app, "search", SimpleNamespace(client=client), raising=False)
+    forgets = []
+    monkeypatch.setattr(search_tasks.search_fingerprints, "forget", forgets.append)
+
+    search_tasks.monitor_lexical_index_task.fn(12, ["a", "b"])
+
+    assert client.wait_calls == [
+        (12, search_tasks.TASK_TIMEOUT_MS, search_tasks.TASK_INTERVAL_MS)
+    ]
+    assert forgets == forgotten
@@ -0,0 +1,216 @@
+import asyncio
+import datetime
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import httpx
+import orjson
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+# app.search imports meilisearch at module load and connects at import time.
+# Stub it before importing any app module that transitively pulls it in.
+sys.modules.setdefault("app.search", SimpleNamespace())
+
+from app import (
+    models,  # noqa: F401
+    stats_fetcher,
+    stats_store,
+)
+from app.stats_store import StatsStore
+
+NOW = datetime.datetime(2026, 3, 1, 12)
+OLD_DAY = datetime.date(2026, 2, 1)
+RECENT_DAY = datetime.date(2026, 2, 27)
+DAY = {"downloads": 3, "refs": {"org.example.App": {"x86_64": [3, 1]}}}
+BODY = orjson.dumps(DAY)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.redis, name), args, kwargs))
+
+        return queue
+
+    def execute(self):
+        return [command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+        self.expiry = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def hgetall(self, key):
+        return self.values.get(key, {})
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.decode() if isinstance(value, bytes) else value
+        self.expiry[key] = ex
+
+    def hset(self, key, mapping):
+        self.values.setdefault(key, {}).update(
+            {field: str(value) for field, value in mapping.items()}
+        )
+
+    def expire(self, key, ex):
+        self.expiry[key] = ex
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+
+@pytest.fixture
+def env(monkeypatch, tmp_path):
+    requests = []
+    responses = {}
+    now = [NOW]
+
+    def handler(request):
+        requests.append(request)
+        status, headers = responses.get(request.url.path, (404, {}))
+        return httpx.Response(
+            status, headers=headers, content=BODY if status == 200 else b""
+        )
+
+    redis = FakeRedis()
+    store = StatsStore(str(tmp_path))
+    monkeypatch.setattr(stats_fetcher.config.settings, "stats_baseurl", "https://s")
+    monkeypatch.setattr(stats_fetcher.utils, "utcnow", lambda: now[0])
+    monkeypatch.setattr(stats_fetcher, "redis_conn", redis)
+    monkeypatch.setattr(stats_store, "stats_store", store)
+
+    def fetch(*dates, raise_errors=False):
+        fetcher = stats_fetcher.StatsFetcher(transport=httpx.MockTransport(handler))
+        results = asyncio.run(fetcher.fetch(list(dates), raise_errors=raise_errors))
+        return results, fetcher.report
+
+    return SimpleNamespace(
+        fetch=fetch,
+        handler=handler,
+        requests=requests,
+        responses=responses,
+        redis=redis,
+        store=store,
+        now=now,
+    )
+
+
+def test_recent_days_are_revalidated_with_their_etag(env):
+    env.responses["/2026/02/27.json"] = (200, {"ETag": '"v1"'})
+
+    results, report = env.fetch(RECENT_DAY)
+    assert results == [DAY]
+    assert (report.downloaded, report.bytes_downloaded) == (1, len(BODY))
+    assert env.redis.expiry["stats:date:2026-02-27"] == stats_fetcher.CACHE_EXPIRY
+
+    results, report = env.fetch(RECENT_DAY)
+    assert results == [DAY]
+    assert report.requests == 0
+
+    env.now[0] = NOW + datetime.timedelta(hours=5)
+    env.responses["/2026/02/27.json"] = (304, {})
+    results, report = env.fetch(RECENT_DAY)
+    assert results == [DAY]
+    assert (report.not_modified, report.bytes_saved) == (1, len(BODY))
+    assert env.requests[-1].headers["If-None-Match"] == '"v1"'
+    assert env.redis.values["stats:date:2026-02-27:validators"]["etag"] == '"v1"'
+    assert sum(report.latencies) == 1
+    assert env.store.get(RECENT_DAY) is None
+
+
+def test_old_days_are_read_from_the_store(env):
+    env.responses["/2026/01/31.json"] = (200, {})
+    env.redis.values["stats:date:2026-02-01"] = BODY.decode()
+
+    results, report = env.fetch(OLD_DAY, OLD_DAY - datetime.timedelta(days=1))
+    assert results == [DAY, DAY]
+    assert report.downloaded == 1
+    assert env.redis.values == {}
+
+    results, report = env.fetch(OLD_DAY, OLD_DAY - datetime.timedelta(days=1))
+    assert results == [DAY, DAY]
+    assert report.requests == 0
+
+
+def test_days_becoming_immutable_are_revalidated_before_stored(env):
+    env.responses["/2026/02/23.json"] = (200, {"Last-Modified": "Mon, 23 Feb 2026"})
+    day = datetime.date(2026, 2, 23)
+
+    env.fetch(day)
+    env.now[0] = NOW + datetime.timedelta(days=1)
+    env.responses["/2026/02/23.json"] = (304, {})
+    results, report = env.fetch(day)
+
+    assert results == [DAY]
+    assert report.not_modified == 1
+    assert env.requests[-1].headers["If-Modified-Since"] == "Mon, 23 Feb 2026"
+    assert env.store.get(day) == DAY
+    assert env.redis.values == {}
+
+
+def test_failed_requests(env):
+    env.responses["/2026/02/28.json"] = (500, {})
+
+    results, report = env.fetch(RECENT_DAY, datetime.date(2026, 2, 28))
+    assert results == [None, None]
+    assert report.missing == 1
+
+    with pytest.raises(httpx.HTTPStatusError):
+        env.fetch(datetime.date(2026, 2, 28), raise_errors=True)
+
+
+def test_iter_days_shares_one_client_across_chunks(env, monkeypatch):
+    dates = [RECENT_DAY - datetime.timedelta(days=offset) for offset in range(5)]
+    for date in dates:
+        env.responses[date.strftime("/%Y/%m/%d.json")] = (200, {})
+    clients = []
+
+    class Fetcher(stats_fetcher.StatsFetcher):
+        def __init__(self):
+            super().__init__(transport=httpx.MockTransport(env.handler))
+
+        def _new_client(self):
+            clients.append(super()._new_client())
+            return clients[-1]
+
+    monkeypatch.setattr(stats_fetcher, "StatsFetcher", Fetcher)
+    monkeypatch.setattr(stats_fetcher, "FETCH_CHUNK_DAYS", 2)
+
+    assert list(stats_fetcher.iter_days(dates)) == [(date, DAY) for date in dates]
+    assert len(env.requests) == 5
+    assert len(clients) == 1
+    assert clients[0].is_closed
+
+
+def test_days_are_saved_off_the_event_loop(env, monkeypatch):
+    env.responses["/2026/02/01.json"] = (200, {})
+    threads = []
+    put = env.store.put
+
+    def record_thread(date, stats):
+        threads.append(threading.current_thread())
+        return put(date, stats)
+
+    monkeypatch.setattr(env.store, "put", record_thread)
+
+    results, _ = env.fetch(OLD_DAY)
+
+    assert results == [DAY]
+    assert threads and threads[0] is not threading.main_thread()
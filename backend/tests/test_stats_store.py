@@ -0,0 +1,53 @@
+import datetime
+import glob
+import json
+import os
+
+import orjson
+import pytest
+
+from app import stats_store
+from app.stats_store import StatsStore
+
+STATS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stats")
+OLD_DAY = datetime.date(2026, 2, 1)
+
+
+def _fixtures():
+    return [json.load(open(path)) for path in sorted(glob.glob(f"{STATS_DIR}/0*.json"))]
+
+
+@pytest.mark.parametrize("day", _fixtures())
+def test_encoding_round_trips_days(day):
+    decoded = stats_store.decode(stats_store.encode(day))
+
+    assert decoded == day
+    assert orjson.dumps(decoded) == orjson.dumps(day)
+
+
+def test_encoding_keeps_irregular_tables_in_the_header():
+    day = {
+        "downloads": 3,
+        "refs": {"org.example.App": {"x86_64": [3, 1], "aarch64": [2]}},
+        "ref_by_country": {"org.example.App": {"DE": [3, 1]}, "org.example.B": {}},
+        "ref_by_os_version": None,
+        "countries": {"DE": 3},
+    }
+
+    assert stats_store.decode(stats_store.encode(day)) == day
+
+
+def test_store_deduplicates_and_verifies_objects(tmp_path):
+    store = StatsStore(str(tmp_path))
+    day = _fixtures()[0]
+
+    digest = store.put(OLD_DAY, day)
+    assert store.put(OLD_DAY + datetime.timedelta(days=1), day) == digest
+    assert len(glob.glob(f"{tmp_path}/objects/*/*.zst")) == 1
+    assert store.get(OLD_DAY) == day
+    assert store.get(OLD_DAY - datetime.timedelta(days=1)) is None
+
+    object_path = store._object_path(digest)
+    with open(object_path, "wb") as object_file:
+        object_file.write(b"")
+    assert store.get(OLD_DAY) is None
@@ -0,0 +1,96 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from app.trending import calculate_trending_score, calculate_trending_scores
+
+HISTORIES = [
+    [0] * 21,
+    [10] * 21,
+    [10] * 14 + [20] * 7,
+    [20] * 14 + [10] * 7,
+    [10] * 14 + [0] * 6 + [140],
+    [1] * 14 + [2] * 7,
+    [100] * 14 + [200] * 7,
+    [0] * 14 + [5] * 7,
+    [-5] * 14 + [5] * 7,
+    [5] * 14 + [-5] * 7,
+    [3] + [0] * 9 + [-2] + [0] * 9 + [9],
+    [0] * 20 + [1],
+    [2**40] * 14 + [2**41] * 7,
+    [2**31 - 1] * 14 + [-(2**31)] * 7,
+]
+
+
+def _scalar_scores(histories, ratios, icons, eol):
+    return np.array(
+        [
+            calculate_trending_score(
+                installs_over_days=history,
+                quality_passed_ratio=ratio,
+                icon_quality_bonus=icon,
+                is_eol=is_eol,
+            )
+            for history, ratio, icon, is_eol in zip(
+                histories, ratios, icons, eol, strict=True
+            )
+        ]
+    )
+
+
+def _assert_parity(histories, ratios, icons, eol):
+    expected = _scalar_scores(histories.tolist(), ratios.tolist(), icons.tolist(), eol)
+    scores = calculate_trending_scores(histories, ratios, icons, eol)
+
+    np.testing.assert_allclose(scores, expected, rtol=1e-9, atol=1e-9)
+    # Ties and the sign decide the ranking, so they must match exactly
+    np.testing.assert_array_equal(np.sign(scores), np.sign(expected))
+
+
+@pytest.mark.parametrize("is_eol", [False, True])
+@pytest.mark.parametrize("quality, icon_quality", [(0.0, 0), (0.5, 2), (1.0, 5)])
+def test_batch_matches_scalar_on_edge_cases(quality, icon_quality, is_eol):
+    histories = np.array(HISTORIES, dtype=np.int64)
+    count = len(histories)
+
+    _assert_parity(
+        histories,
+        np.full(count, quality),
+        np.full(count, icon_quality),
+        np.full(count, is_eol),
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_scalar_on_random_histories(seed):
+    rng = np.random.default_rng(seed)
+    count = 2000
+    scale = rng.choice([1, 10, 1000, 100_000], size=(count, 1))
+    histories = rng.integers(-2, 10, size=(count, 21)) * scale
+    # Some apps only start showing up partway through the window
+    histories[rng.random(count) < 0.2, : rng.integers(1, 21)] = 0
+
+    _assert_parity(
+        histories,
+        rng.random(count),
+        rng.integers(0, 8, size=count),
+        rng.random(count) < 0.1,
+    )
+
+
+def test_batch_handles_no_apps():
+    scores = calculate_trending_scores(
+        np.zeros((0, 21), dtype=np.int64), np.zeros(0), np.zeros(0), np.zeros(0)
+    )
+
+    assert scores.shape == (0,)
+
+
+def test_batch_requires_21_days():
+    with pytest.raises(ValueError, match="exactly 21"):
+        calculate_trending_scores(np.zeros((2, 20)), np.zeros(2), np.zeros(2), [0, 0])
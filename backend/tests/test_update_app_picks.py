@@ -0,0 +1,125 @@
+import datetime
+import importlib
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+# app.search imports meilisearch at module load and connects at import time.
+# Stub it before importing any app module that transitively pulls it in.
+sys.modules.setdefault("app.search", SimpleNamespace())
+
+from app import models
+
+# app.worker re-exports the actor under the name of its module
+update_app_picks = importlib.import_module("app.worker.update_app_picks")
+
+DAY = datetime.date(2026, 10, 18)
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def scalars(self, statement):
+        self.statements.append(statement)
+        return iter(self.rows)
+
+
+def _sql(statement) -> str:
+    return str(
+        statement.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+@pytest.fixture
+def picks(monkeypatch):
+    picked = []
+    monkeypatch.setattr(models.AppOfTheDay, "by_date", lambda db, day: None)
+    monkeypatch.setattr(
+        models.AppOfTheDay,
+        "set_app_of_the_day",
+        lambda db, app_id, day: picked.append((app_id, day)),
+    )
+    monkeypatch.setattr(update_app_picks, "invalidate_tags", lambda *tags: None)
+    return picked
+
+
+def test_candidates_are_selected_in_one_query():
+    session = FakeSession(["org.example.A", "org.example.B"])
+
+    candidates = models.AppOfTheDay.oldest_candidates(
+        SimpleNamespace(session=session), DAY
+    )
+
+    assert candidates == ["org.example.A", "org.example.B"]
+    assert len(session.statements) == 1
+    sql = _sql(session.statements[0])
+    assert "rank() OVER (ORDER BY anon_2.last_pick ASC NULLS FIRST)" in sql
+    assert "apps.excluded_from_app_picks = false" in sql
+    assert (
+        "apps.app_id NOT IN (SELECT appsoftheweek.app_id" in sql
+        and 'appsoftheweek."weekNumber" = 42 AND appsoftheweek.year = 2026' in sql
+    )
+    assert (
+        "HAVING count(guideline.id) = sum(CAST(qualitymoderation.passed AS INTEGER))"
+        in sql
+    )
+
+
+def test_frontend_condition_matches_console_apps_with_icon_and_screenshots():
+    sql = _sql(models.App.for_frontend())
+
+    assert "apps.type = 'desktop-application'" in sql
+    assert "apps.type = 'console-application'" in sql
+    assert "(apps.appstream ->> 'icon') NOT IN ('', '[]', '{}', 'false', '0')" in sql
+    assert "(apps.appstream ->> 'screenshots') NOT IN" in sql
+
+
+def test_app_of_the_day_is_picked_among_oldest_candidates(picks, monkeypatch):
+    candidates = ["org.example.A", "org.example.B", "org.example.C"]
+    lookups = []
+
+    def oldest_candidates(db, day):
+        lookups.append(day)
+        return candidates
+
+    monkeypatch.setattr(models.AppOfTheDay, "oldest_candidates", oldest_candidates)
+
+    update_app_picks.pick_app_of_the_day_automatically(None, DAY)
+
+    assert lookups == [DAY]
+    assert len(picks) == 1
+    assert picks[0][0] in candidates
+    assert picks[0][1] == DAY
+
+
+def test_nothing_is_picked_without_candidates(picks, monkeypatch):
+    monkeypatch.setattr(models.AppOfTheDay, "oldest_candidates", lambda db, day: [])
+
+    update_app_picks.pick_app_of_the_day_automatically(None, DAY)
+
+    assert picks == []
+
+
+def test_existing_app_of_the_day_is_kept(picks, monkeypatch):
+    monkeypatch.setattr(
+        models.AppOfTheDay, "by_date", lambda db, day: SimpleNamespace(app_id="a")
+    )
+
+    def oldest_candidates(db, day):
+        raise AssertionError("candidates must not be looked up")
+
+    monkeypatch.setattr(models.AppOfTheDay, "oldest_candidates", oldest_candidates)
+
+    update_app_picks.pick_app_of_the_day_automatically(None, DAY)
+
+    assert picks == []
@@ -0,0 +1,130 @@
+import importlib
+import os
+import sys
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import orjson
+from sqlalchemy.dialects import postgresql
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+# app.search imports meilisearch at module load and connects at import time.
+# Stub it before importing any app module that transitively pulls it in.
+sys.modules.setdefault("app.search", SimpleNamespace())
+
+from app import models
+
+update_module = importlib.import_module("app.worker.update")
+
+RELEASED = datetime(2020, 1, 2, 3, 4, 5)
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, _criterion):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def query(self, *_columns):
+        return FakeQuery(self.rows)
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+    def commit(self):
+        pass
+
+
+def test_backfill_uses_one_query_and_one_update(monkeypatch):
+    session = FakeSession(
+        [
+            ("org.example.Released", RELEASED, 1),
+            ("org.example.Summary", None, 1600000000),
+            ("org.example.Legacy", None, None),
+            ("org.example.Unknown", None, None),
+        ]
+    )
+    sessions = []
+
+    @contextmanager
+    def fake_get_db(db_type="replica"):
+        sessions.append(db_type)
+        yield SimpleNamespace(session=session)
+
+    legacy = {
+        "summary:org.example.Legacy:stable": orjson.dumps({"timestamp": 1500000000})
+    }
+    monkeypatch.setattr(update_module, "get_db", fake_get_db)
+    monkeypatch.setattr(
+        update_module,
+        "redis_conn",
+        SimpleNamespace(mget=lambda keys: [legacy.get(key) for key in keys]),
+    )
+
+    before = datetime.now(UTC).timestamp()
+    created_at = update_module._backfill_initial_release_at(
+        ["org.example.Released", "org.example.Summary", "org.example.Legacy"]
+    )
+
+    assert sessions == ["writer"]
+    assert created_at["org.example.Released"] == RELEASED.timestamp()
+    assert created_at["org.example.Summary"] == 1600000000
+    assert created_at["org.example.Legacy"] == 1500000000
+    assert created_at["org.example.Unknown"] >= int(before)
+
+    [statement] = session.statements
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE apps SET initial_release_at=backfill.")
+    assert "FROM (VALUES" in sql
+    assert "apps.initial_release_at IS NULL" in sql
+    params = statement.compile(dialect=postgresql.dialect()).params
+    assert sorted(v for v in params.values() if isinstance(v, str)) == [
+        "org.example.Legacy",
+        "org.example.Summary",
+        "org.example.Unknown",
+    ]
+
+
+def test_backfill_skips_update_when_nothing_is_missing():
+    session = FakeSession([])
+
+    models.App.bulk_set_initial_release_at(SimpleNamespace(session=session), {})
+
+    assert session.statements == []
+
+
+def test_update_invalidates_changed_apps(monkeypatch):
+    @contextmanager
+    def get_db(db_type="replica"):
+        yield SimpleNamespace(session=None)
+
+    invalidated = []
+    monkeypatch.setattr(update_module, "get_db", get_db)
+    monkeypatch.setattr(
+        update_module.apps, "load_appstream", lambda db: {"org.example.A"}
+    )
+    monkeypatch.setattr(
+        update_module.summary, "update", lambda db: {"org.example.B", "org.example.A"}
+    )
+    monkeypatch.setattr(update_module.exceptions, "update", lambda: None)
+    monkeypatch.setattr(update_module.apps, "get_appids", lambda include_eol: [])
+    monkeypatch.setattr(
+        update_module, "invalidate_tags", lambda *tags: invalidated.append(tags)
+    )
+
+    update_module.update.fn()
+
+    assert invalidated == [("app:org.example.A", "app:org.example.B")]
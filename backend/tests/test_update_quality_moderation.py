@@ -0,0 +1,250 @@
+import importlib
+import logging
+import os
+import random
+import sys
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+# app.search imports meilisearch at module load and connects at import time.
+# Stub it before importing any app module that transitively pulls it in.
+sys.modules.setdefault("app.search", SimpleNamespace())
+
+from app import models
+
+# app.worker re-exports the actor under the name of its module
+quality = importlib.import_module("app.worker.update_quality_moderation")
+
+APP_COUNT = 3000
+RUNTIMES = [
+    ("org.gnome.Platform", "45"),
+    ("org.gnome.Platform", "48"),
+    ("org.kde.Platform", "5.15"),
+    ("org.freedesktop.Platform", "24.08"),
+]
+EOL_RUNTIMES = {("org.gnome.Platform", "45"), ("org.kde.Platform", "5.15")}
+
+
+def _legacy_verdicts(appstream, summary, eol_runtimes) -> dict[str, bool]:
+    """The per-app checks the worker ran before it evaluated in bulk."""
+    value = appstream
+    verdicts = {
+        "app-name-not-too-long": "name" in value and len(value["name"]) <= 20,
+        "app-summary-not-too-long": "summary" in value and len(value["summary"]) <= 35,
+        "screenshots-at-least-one-screenshot": "screenshots" in value
+        and len(value["screenshots"]) >= 1,
+    }
+
+    def primary(scheme=None, no_scheme=False):
+        return any(
+            branding
+            for branding in value["branding"]
+            if "type" in branding
+            and "value" in branding
+            and branding["type"] == "primary"
+            and (not no_scheme or "scheme_preference" not in branding)
+            and (
+                scheme is None
+                or (
+                    "scheme_preference" in branding
+                    and branding["scheme_preference"] in scheme
+                )
+            )
+        )
+
+    verdicts["branding-has-primary-brand-colors"] = "branding" in value and (
+        (primary({"light"}) and primary({"dark"}))
+        or (primary({"light", "dark"}) and primary(no_scheme=True))
+        or primary()
+    )
+
+    if summary:
+        runtime_is_not_eol = True
+        if summary.get("metadata") and summary["metadata"].get("runtime"):
+            parts = summary["metadata"]["runtime"].split("/")
+            if len(parts) >= 2:
+                branch = parts[2] if len(parts) > 2 else "stable"
+                runtime_is_not_eol = (parts[0], branch) not in eol_runtimes
+        verdicts["general-runtime-not-eol"] = runtime_is_not_eol
+    return verdicts
+
+
+def _synthetic_app(rng: random.Random, i: int) -> SimpleNamespace:
+    appstream = {"name": "A" * rng.randint(3, 30)}
+    if rng.random() < 0.9:
+        appstream["summary"] = "s" * rng.randint(5, 50)
+    if rng.random() < 0.8:
+        appstream["screenshots"] = [{}] * rng.randint(0, 3)
+    if rng.random() < 0.7:
+        appstream["branding"] = [
+            {
+                key: value
+                for key, value in {
+                    "type": rng.choice(["primary", "secondary"]),
+                    "value": "#ffffff",
+                    "scheme_preference": rng.choice(["light", "dark", None]),
+                }.items()
+                if value is not None and rng.random() < 0.9
+            }
+            for _ in range(rng.randint(0, 3))
+        ]
+
+    summary = None
+    if rng.random() < 0.85:
+        runtime_id, branch = rng.choice(RUNTIMES)
+        runtime = rng.choice(
+            [
+                f"{runtime_id}/x86_64/{branch}",
+                f"{runtime_id}/x86_64",
+                runtime_id,
+                None,
+            ]
+        )
+        summary = {
+            "branch": rng.choice(["stable", "stable", "stable", "beta"]),
+            "metadata": {"runtime": runtime} if runtime else {},
+        }
+    return SimpleNamespace(
+        app_id=f"org.example.App{i}", appstream=appstream, summary=summary
+    )
+
+
+@pytest.fixture
+def apps():
+    rng = random.Random(1234)
+    return [_synthetic_app(rng, i) for i in range(APP_COUNT)]
+
+
+class FakeStore:
+    def __init__(self, apps):
+        self.apps = apps
+        self.stored: dict[tuple[str, str], bool] = {}
+        self.upserts: list[list[tuple[str, str, bool]]] = []
+        self.eol_lookups: list[set[tuple[str, str]]] = []
+
+    def install(self, monkeypatch):
+        @contextmanager
+        def get_db(db_type="replica"):
+            yield SimpleNamespace(session=None)
+
+        def eol_refs(db, refs):
+            self.eol_lookups.append(refs)
+            return refs & EOL_RUNTIMES
+
+        def bulk_upsert(db, verdicts, updated_by):
+            self.upserts.append(verdicts)
+            for app_id, guideline_id, passed in verdicts:
+                self.stored[(app_id, guideline_id)] = passed
+            return len(verdicts)
+
+        monkeypatch.setattr(quality, "get_db", get_db)
+        monkeypatch.setattr(
+            models.App, "appstream_and_summaries", lambda db, types: self.apps
+        )
+        monkeypatch.setattr(models.App, "eol_refs", eol_refs)
+        monkeypatch.setattr(
+            models.QualityModeration,
+            "passed_by_guidelines",
+            lambda db, guideline_ids: dict(self.stored),
+        )
+        monkeypatch.setattr(models.QualityModeration, "bulk_upsert", bulk_upsert)
+
+
+def test_bulk_evaluation_matches_per_app_checks(apps):
+    verdicts = quality.evaluate_apps(apps, EOL_RUNTIMES)
+
+    expected = [
+        (app.app_id, guideline_id, passed)
+        for app in apps
+        for guideline_id, passed in _legacy_verdicts(
+            app.appstream,
+            app.summary if (app.summary or {}).get("branch") == "stable" else None,
+            EOL_RUNTIMES,
+        ).items()
+    ]
+    assert verdicts == expected
+    assert {guideline_id for _, guideline_id, _ in verdicts} == set(
+        quality.AUTOMATIC_GUIDELINES
+    )
+
+
+def test_only_changed_verdicts_are_written(apps, monkeypatch, caplog):
+    store = FakeStore(apps)
+    store.install(monkeypatch)
+
+    with caplog.at_level(logging.INFO, logger=quality.__name__):
+        quality.update_quality_moderation.fn()
+
+    first_run = store.upserts[0]
+    assert len(first_run) == len(quality.evaluate_apps(apps, EOL_RUNTIMES))
+    # All runtimes are looked up together, not once per app
+    assert len(store.eol_lookups) == 1
+    assert store.eol_lookups[0] <= set(RUNTIMES) | {
+        (runtime_id, "stable") for runtime_id, _ in RUNTIMES
+    }
+    assert f"of {APP_COUNT} apps" in caplog.text
+
+    quality.update_quality_moderation.fn()
+    assert store.upserts[1] == []
+
+    apps[0].appstream["name"] = "Short name"
+    apps[1].appstream["name"] = "A much too long application name"
+    quality.update_quality_moderation.fn()
+
+    changed = {
+        (app_id, passed)
+        for app_id, guideline_id, passed in store.upserts[2]
+        if guideline_id == "app-name-not-too-long"
+    }
+    assert store.upserts[2] and len(store.upserts[2]) == len(changed)
+    assert changed <= {("org.example.App0", True), ("org.example.App1", False)}
+    assert store.stored[("org.example.App0", "app-name-not-too-long")] is True
+    assert store.stored[("org.example.App1", "app-name-not-too-long")] is False
+
+
+def test_bulk_upsert_sends_one_statement_per_batch(monkeypatch):
+    statements = []
+    session = SimpleNamespace(execute=statements.append, commit=lambda: None)
+    monkeypatch.setattr(models, "BULK_UPSERT_BATCH_SIZE", 2)
+
+    verdicts = [
+        (f"org.example.App{i}", "app-name-not-too-long", True) for i in range(5)
+    ]
+    written = models.QualityModeration.bulk_upsert(
+        SimpleNamespace(session=session), verdicts, None
+    )
+
+    assert written == 5
+    assert len(statements) == 3
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (app_id, guideline_id) DO UPDATE" in sql
+    assert "qualitymoderation.passed IS DISTINCT FROM excluded.passed" in sql
+
+
+def test_eol_refs_looks_up_all_runtimes_at_once():
+    rows = [
+        SimpleNamespace(app_id="org.gnome.Platform", is_eol=True, eol_branches=["45"]),
+        SimpleNamespace(app_id="org.kde.Platform", is_eol=True, eol_branches=None),
+        SimpleNamespace(
+            app_id="org.freedesktop.Platform", is_eol=False, eol_branches=None
+        ),
+    ]
+    statements = []
+
+    def execute(statement):
+        statements.append(statement)
+        return rows
+
+    refs = set(RUNTIMES) | {("org.example.Missing", "stable")}
+    eol = models.App.eol_refs(
+        SimpleNamespace(session=SimpleNamespace(execute=execute)), refs
+    )
+
+    assert eol == EOL_RUNTIMES
+    assert len(statements) == 1
@@ -177,10 +177,14 @@ def test_dns_verification_status_reports_domain(monkeypatch):
         verified=True,
         verified_timestamp=datetime.fromtimestamp(123, UTC),
     )
+
+    async def fake_get_existing_verification(_app_id):
+        return persisted
+
     monkeypatch.setattr(
         verification_module,
-        "_get_existing_verification",
-        lambda _app_id: persisted,
+        "_async_get_existing_verification",
+        fake_get_existing_verification,
     )
 
     result = asyncio.run(
@@ -246,16 +250,16 @@ def test_confirm_dns_verification_persists_expected_effects(monkeypatch, new_app
         lambda app_id: events.append(("republish", app_id)),
     )
 
-    async def mark_stale(pattern):
-        events.append(("cache", pattern))
+    async def invalidate_tags(*tags, stale=False):
+        events.append(("cache", tags, stale))
 
     async def check(_app_id, _token):
         return verification_module.DnsVerificationResult(verified=True)
 
     monkeypatch.setattr(
         verification_module.cache,
-        "mark_stale_by_pattern",
-        mark_stale,
+        "invalidate_tags",
+        invalidate_tags,
     )
 
     result = asyncio.run(
@@ -282,7 +286,7 @@ def test_confirm_dns_verification_persists_expected_effects(monkeypatch, new_app
         assert events == [
             *common_events,
             ("republish", "org.example.App"),
-            ("cache", "cache:endpoint:get_verification_status:*"),
+            ("cache", ("verification:org.example.App",), True),
         ]
 
 
@@ -307,3 +311,21 @@ def test_direct_upload_creation_requires_direct_upload_permission(monkeypatch):
     assert exc_info.value.status_code == 403
     assert exc_info.value.detail == verification_module.ErrorDetail.NOT_UPLOADER
     assert db_types == ["replica"]
+
+
+def test_runtimes_share_the_verification_tag_of_their_sdk(monkeypatch):
+    verification_module = _load_verification_module(monkeypatch)
+
+    assert (
+        verification_module.verification_tag("org.gnome.Platform")
+        == verification_module.verification_tag("org.gnome.Sdk")
+        == "verification:org.gnome.Sdk"
+    )
+    assert (
+        verification_module.verification_tag("org.gnome.Sdk.Extension.foo")
+        == "verification:org.gnome.Sdk.Extension.foo"
+    )
+    assert (
+        verification_module.verification_tag("org.example.App")
+        == "verification:org.example.App"
+    )
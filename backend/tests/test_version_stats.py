@@ -39,7 +39,9 @@ def test_recent_version_stats_adds_unknown_os_from_ostree_total(monkeypatch):
         "utcnow",
         lambda: datetime.datetime(2026, 8, 14, tzinfo=datetime.UTC),
     )
-    monkeypatch.setattr(stats, "_get_stats_for_date", payloads.get)
+    monkeypatch.setattr(
+        stats, "_get_stats_for_dates", lambda dates: [payloads.get(d) for d in dates]
+    )
 
     os_versions, flatpak_versions, _ = stats._compute_recent_version_stats(days=3)
 
@@ -0,0 +1,149 @@
+import asyncio
+import datetime
+import os
+import sys
+from types import SimpleNamespace
+from typing import ClassVar
+
+import httpx
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+# app.search imports meilisearch at module load and connects at import time.
+# Stub it before importing any app module that transitively pulls it in.
+sys.modules.setdefault("app.search", SimpleNamespace())
+
+from app import (
+    models,  # noqa: F401
+    year_totals,
+)
+from app.year_totals import YearTotals
+
+NOW = datetime.datetime(2026, 3, 1, 12)
+
+
+def _day(date: datetime.date) -> dict:
+    return {
+        "updates": 10,
+        "refs": {
+            "org.example.App/x86_64": {"x86_64": [5, 1]},
+            "org.example.App/aarch64": {"aarch64": [2, 0]},
+            "org.example.Updates/x86_64": {"x86_64": [1, 3]},
+        },
+        "ref_by_country": {
+            "org.example.App/x86_64": {"DE": [3, 1], "FR": [1, 1]},
+            "org.example.Updates/x86_64": {"DE": [0, 2]},
+        },
+    }
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values: dict[str, bytes] = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+
+class FakeFetcher:
+    requested: ClassVar[list[list[datetime.date]]] = []
+    failing: ClassVar[set[datetime.date]] = set()
+
+    async def fetch(self, dates, raise_errors=False):
+        type(self).requested.append(dates)
+        if raise_errors and self.failing & set(dates):
+            raise httpx.ConnectError("refused")
+        return [_day(date) for date in dates]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(year_totals, "redis_conn", redis)
+    monkeypatch.setattr(year_totals.utils, "utcnow", lambda: NOW)
+    monkeypatch.setattr(year_totals.stats_fetcher, "StatsFetcher", FakeFetcher)
+    FakeFetcher.requested = []
+    FakeFetcher.failing = set()
+    return redis
+
+
+def test_day_is_reduced_to_new_installs():
+    totals = YearTotals()
+    totals.add_day(datetime.date(2026, 1, 1), _day(datetime.date(2026, 1, 1)))
+    totals.add_day(datetime.date(2026, 1, 2), None)
+
+    assert totals.through == datetime.date(2026, 1, 2)
+    assert totals.updates == 10
+    assert totals.app_downloads == {"org.example.App": 6}
+    assert totals.arch_downloads == {"x86_64": 4, "aarch64": 2}
+    assert totals.country_downloads == {"DE": 2}
+    assert totals.total_downloads == 6
+    assert totals.category_downloads({"org.example.App": "Game"}) == {"game": 6}
+
+
+def test_totals_round_trip():
+    totals = YearTotals()
+    totals.add_day(datetime.date(2026, 1, 1), _day(datetime.date(2026, 1, 1)))
+
+    assert YearTotals.loads(totals.dumps()) == totals
+
+
+def test_only_days_after_the_checkpoint_are_fetched(fake_redis):
+    first = asyncio.run(year_totals.load_year_totals(2026))
+
+    # 2026-01-01 to 2026-03-01; the last MUTABLE_DAYS are not folded in
+    days = (NOW.date() - datetime.date(2026, 1, 1)).days + 1
+    assert first.through == NOW.date()
+    assert first.updates == 10 * days
+    checkpoint = YearTotals.loads(fake_redis.values["stats:year_in_review:totals:2026"])
+    assert checkpoint.through == NOW.date() - datetime.timedelta(
+        days=year_totals.stats_store.MUTABLE_DAYS
+    )
+
+    second = asyncio.run(year_totals.load_year_totals(2026))
+
+    assert second == first
+    assert FakeFetcher.requested[1] == [
+        checkpoint.through + datetime.timedelta(days=i + 1)
+        for i in range(year_totals.stats_store.MUTABLE_DAYS)
+    ]
+
+
+def test_past_years_are_not_fetched_again(fake_redis):
+    first = asyncio.run(year_totals.load_year_totals(2025))
+    second = asyncio.run(year_totals.load_year_totals(2025))
+
+    assert second == first
+    assert first.through == datetime.date(2025, 12, 31)
+    assert len(FakeFetcher.requested) == 1
+
+
+def test_failed_days_are_not_folded_in(fake_redis):
+    FakeFetcher.failing = {datetime.date(2026, 2, 1)}
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(year_totals.load_year_totals(2026))
+
+    assert fake_redis.values == {}
+
+
+def test_years_without_stats_have_no_totals(fake_redis):
+    assert asyncio.run(year_totals.load_year_totals(2027)) is None
+    assert asyncio.run(year_totals.load_year_totals(2017)) is None
+
+
+def test_delete_year_totals(fake_redis):
+    asyncio.run(year_totals.load_year_totals(2025))
+
+    year_totals.delete_year_totals()
+
+    assert fake_redis.values == {}
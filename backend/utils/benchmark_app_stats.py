@@ -0,0 +1,112 @@
+"""Compare writing per-app stats row by row and with the bulk upsert.
+
+Generates a synthetic stats dictionary shaped like the one ``stats.update``
+builds and writes it to the ``app_stats`` table of a scratch database:
+
+- legacy: ``AppStats.set_stats`` per app, one SELECT and commit each
+- bulk (cold): ``AppStats.bulk_set_stats`` into an empty table
+- bulk (unchanged): the same data again, all rows skipped by hash
+- bulk (changed): the same data with ``--changed`` of the apps modified
+
+The table is created if needed and truncated between runs, so never point
+this at a database whose stats you want to keep.
+
+Usage: python -m utils.benchmark_app_stats --database-url URL [--apps N]
+"""
+
+import argparse
+import copy
+import datetime
+import random
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app import models
+
+COUNTRIES = [f"C{i:02d}" for i in range(40)]
+
+
+def _synthetic_stats(apps: int, days: int, seed: int) -> dict[str, dict]:
+    rng = random.Random(seed)
+    end = datetime.date(2026, 1, 1)
+    dates = [(end - datetime.timedelta(days=i)).isoformat() for i in range(days)]
+
+    stats = {}
+    for i in range(apps):
+        active_days = dates[: rng.randint(1, days)]
+        per_day = {day: rng.randint(0, 500) for day in reversed(active_days)}
+        stats[f"org.example.App{i}"] = {
+            "installs_total": sum(per_day.values()),
+            "installs_last_month": sum(list(per_day.values())[-30:]),
+            "installs_last_7_days": sum(list(per_day.values())[-7:]),
+            "installs_per_day": per_day,
+            "installs_per_country": {
+                country: rng.randint(0, 1000)
+                for country in rng.sample(COUNTRIES, rng.randint(1, len(COUNTRIES)))
+            },
+        }
+    return stats
+
+
+def _truncate(session: Session) -> None:
+    session.execute(text("TRUNCATE app_stats"))
+    session.commit()
+
+
+def _timed(label: str, func) -> None:
+    start = time.perf_counter()
+    written = func()
+    elapsed = time.perf_counter() - start
+    suffix = f", {written} rows written" if written is not None else ""
+    print(f"{label:18} {elapsed:8.2f}s{suffix}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--apps", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--changed", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--skip-legacy", action="store_true", help="Only run the bulk upserts"
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    models.AppStats.__table__.create(engine, checkfirst=True)
+
+    print(f"Generating {args.apps} apps with up to {args.days} days of stats")
+    stats = _synthetic_stats(args.apps, args.days, args.seed)
+
+    with Session(engine) as session:
+
+        def legacy() -> None:
+            for app_id, data in stats.items():
+                models.AppStats.set_stats(session, app_id, data)
+
+        if not args.skip_legacy:
+            _truncate(session)
+            _timed("legacy", legacy)
+
+        _truncate(session)
+        _timed("bulk (cold)", lambda: models.AppStats.bulk_set_stats(session, stats))
+        _timed(
+            "bulk (unchanged)", lambda: models.AppStats.bulk_set_stats(session, stats)
+        )
+
+        changed = copy.deepcopy(stats)
+        rng = random.Random(args.seed + 1)
+        for app_id in rng.sample(sorted(changed), int(len(changed) * args.changed)):
+            changed[app_id]["installs_total"] += 1
+        _timed(
+            "bulk (changed)", lambda: models.AppStats.bulk_set_stats(session, changed)
+        )
+
+        _truncate(session)
+
+
+if __name__ == "__main__":
+    main()
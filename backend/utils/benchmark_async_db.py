@@ -0,0 +1,118 @@
+"""Compare route throughput with the sync and async database sessions.
+
+Each simulated request does the lookups of an uncached ``get_summary`` hit:
+fetch the app, check whether it is fully EOL and read its fullscreen flag. The
+sync mode runs them through ``get_db`` inside a coroutine, which is what the
+``async def`` routes used to do and blocks the event loop on every round trip.
+The async mode uses ``get_async_db``. A ticker measures how late the event
+loop wakes up while the load runs.
+
+Run it against a populated replica, once per worker process you want to model.
+``--latency-ms`` adds a ``pg_sleep`` to every request to simulate the network
+round trip to a remote database.
+
+Usage: python -m utils.benchmark_async_db [--concurrency N] [--duration S]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select, text
+
+from app import models
+from app.database import close_async_db, get_async_db, get_db
+
+TICK_INTERVAL = 0.005
+
+
+async def _sync_request(app_id: str, latency: float) -> None:
+    with get_db("replica") as sqldb:
+        if latency:
+            sqldb.session.execute(text("SELECT pg_sleep(:s)"), {"s": latency})
+        app = models.App.by_appid(sqldb, app_id)
+        models.App.is_fully_eol(sqldb, app_id, app=app)
+        models.App.get_fullscreen_app(sqldb, app_id)
+
+
+async def _async_request(app_id: str, latency: float) -> None:
+    async with get_async_db("replica") as sqldb:
+        if latency:
+            await sqldb.session.execute(text("SELECT pg_sleep(:s)"), {"s": latency})
+        app = await models.App.async_by_appid(sqldb, app_id)
+        await models.App.async_is_fully_eol(sqldb, app_id, app=app)
+        await models.App.async_get_fullscreen_app(sqldb, app_id)
+
+
+async def _ticker(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_INTERVAL)
+        lags.append((time.perf_counter() - start - TICK_INTERVAL) * 1000)
+
+
+async def _run(request, app_ids: list[str], args) -> tuple[float, list[float]]:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    completed = 0
+    deadline = time.perf_counter() + args.duration
+
+    async def client(offset: int) -> None:
+        nonlocal completed
+        i = offset
+        while time.perf_counter() < deadline:
+            await request(app_ids[i % len(app_ids)], args.latency_ms / 1000)
+            completed += 1
+            i += args.concurrency
+
+    ticker = asyncio.create_task(_ticker(stop, lags))
+    start = time.perf_counter()
+    async with asyncio.TaskGroup() as tg:
+        for offset in range(args.concurrency):
+            tg.create_task(client(offset))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return completed / elapsed, lags
+
+
+def _lag_summary(lags: list[float]) -> str:
+    lags = sorted(lags) or [0.0]
+    p99 = lags[max(int(len(lags) * 0.99) - 1, 0)]
+    return f"loop lag median {statistics.median(lags):7.2f}ms  p99 {p99:7.2f}ms"
+
+
+async def _main(args) -> None:
+    async with get_async_db("replica") as sqldb:
+        app_ids = list(
+            await sqldb.session.scalars(
+                select(models.App.app_id).order_by(models.App.app_id).limit(args.apps)
+            )
+        )
+    if not app_ids:
+        raise SystemExit("No apps found in the replica database")
+
+    for name, request in (("sync", _sync_request), ("async", _async_request)):
+        throughput, lags = await _run(request, app_ids, args)
+        print(f"{name:5}: {throughput:8.1f} req/s  {_lag_summary(lags)}")
+
+    await close_async_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--apps", type=int, default=500)
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="Add a server-side sleep to each request to model network latency",
+    )
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
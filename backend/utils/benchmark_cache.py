@@ -0,0 +1,118 @@
+"""Compare cache hit cost of the model and raw modes of ``cache.cached``.
+
+Both modes start from the hash fields ``HMGET`` returns for an entry. The model
+mode replays what a hit on ``get_appstream`` costs: parse the stored body,
+deserialize the value and let FastAPI validate and serialize it against the
+route's ``response_model``. The raw mode wraps the stored body in a
+``Response``.
+
+Usage: python -m utils.benchmark_cache [--iterations N] [--releases N]
+"""
+
+import argparse
+import copy
+import glob
+import os
+import statistics
+import time
+from collections.abc import Callable
+
+import orjson
+from pydantic import TypeAdapter
+
+from app import api_models, cache
+
+SNAPSHOT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "snapshots"
+)
+APPSTREAM_ADAPTER = TypeAdapter(api_models.Appstream)
+
+
+def _load_payloads(releases: int) -> dict[str, dict]:
+    payloads = {}
+    for path in sorted(glob.glob(os.path.join(SNAPSHOT_DIR, "main__appstream_*.json"))):
+        with open(path, "rb") as f:
+            payload = orjson.loads(f.read())
+        if not isinstance(payload, dict) or "type" not in payload:
+            continue
+
+        if releases and payload.get("releases"):
+            template = payload["releases"][0]
+            payload["releases"] = [copy.deepcopy(template) for _ in range(releases)]
+
+        name = os.path.basename(path).removeprefix("main__").split("__")[0]
+        payloads[name] = payload
+    return payloads
+
+
+def _stored_fields(body: bytes) -> list:
+    """Return the fields of an entry for ``body`` as Redis replies with them."""
+    fields = cache._dump_entry(cache._make_entry(body))
+    return [
+        value.decode() if isinstance(value, bytes) else value
+        for value in (fields[field] for field in cache.ENTRY_FIELDS)
+    ]
+
+
+def _model_hit(stored: list) -> bytes:
+    entry = cache._load_entry(stored)
+    assert entry is not None
+    value = cache._deserialize_value(orjson.loads(entry.body), None)
+    model = APPSTREAM_ADAPTER.validate_python(value)
+    return APPSTREAM_ADAPTER.dump_json(model, by_alias=True, exclude_none=True)
+
+
+def _raw_hit(stored: list) -> bytes:
+    entry = cache._load_entry(stored)
+    assert entry is not None
+    return cache._raw_response(entry).body
+
+
+def _measure(func: Callable[[list], bytes], stored: list, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(stored)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return timings
+
+
+def _summary(timings: list[float]) -> str:
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    return f"median {statistics.median(timings):8.1f}us  p99 {p99:8.1f}us"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument(
+        "--releases",
+        type=int,
+        default=0,
+        help="Replace each payload's releases with N copies to simulate larger apps",
+    )
+    args = parser.parse_args()
+
+    payloads = _load_payloads(args.releases)
+    if not payloads:
+        raise SystemExit(f"No appstream snapshots found in {SNAPSHOT_DIR}")
+
+    for name, payload in payloads.items():
+        model = APPSTREAM_ADAPTER.validate_python(payload)
+        model_stored = _stored_fields(cache._serialize_value(model))
+        raw_body = cache._serialize_body(model, exclude_none=True)
+        raw_stored = _stored_fields(raw_body)
+        assert _model_hit(model_stored) == _raw_hit(raw_stored)
+
+        model_timings = _measure(_model_hit, model_stored, args.iterations)
+        raw_timings = _measure(_raw_hit, raw_stored, args.iterations)
+        speedup = statistics.median(model_timings) / statistics.median(raw_timings)
+
+        print(f"{name} ({len(raw_body)} bytes)")
+        print(f"  model: {_summary(model_timings)}")
+        print(f"  raw:   {_summary(raw_timings)}  ({speedup:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compare the cost of checking purchases for clients with many refs.
+
+Each simulated client checks the apps of one user who owns ``--refs`` of
+them, like a Flatpak update run calling ``check-purchases`` and
+``generate-download-token``. The per-app mode replays the old check with one
+``user_owns_app`` query per app. The batched mode runs the single
+``owned_app_ids`` query, and the cached mode goes through
+``ownership.owned_apps``, which only reaches the database on the first check
+of each user.
+
+Run it against a populated replica and Redis. Users with at least ``--refs``
+owned apps are taken from the database.
+
+Usage: python -m utils.benchmark_purchases [--users N] [--refs N] [--rounds N]
+"""
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable
+
+from sqlalchemy import func, select
+
+from app import models, ownership
+from app.database import get_db
+
+
+def _per_app(db, user_id: int, app_ids: list[str]) -> set[str]:
+    return {
+        app_id
+        for app_id in app_ids
+        if models.UserOwnedApp.user_owns_app(db, user_id, app_id)
+    }
+
+
+def _batched(db, user_id: int, app_ids: list[str]) -> set[str]:
+    return models.UserOwnedApp.owned_app_ids(db, user_id, app_ids)
+
+
+def _cached(db, user_id: int, app_ids: list[str]) -> set[str]:
+    return ownership.owned_apps(
+        user_id,
+        app_ids,
+        lambda missing: models.UserOwnedApp.owned_app_ids(db, user_id, missing),
+    )
+
+
+def _run(
+    check: Callable[..., set[str]], clients: dict[int, list[str]], rounds: int
+) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        for user_id, app_ids in clients.items():
+            start = time.perf_counter()
+            with get_db("replica") as db:
+                owned = check(db, user_id, app_ids)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert len(owned) == len(app_ids)
+    return timings
+
+
+def _summary(timings: list[float]) -> str:
+    timings = sorted(timings)
+    p99 = timings[max(int(len(timings) * 0.99) - 1, 0)]
+    return f"median {statistics.median(timings):8.2f}ms  p99 {p99:8.2f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--refs", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with get_db("replica") as db:
+        user_ids = db.session.scalars(
+            select(models.UserOwnedApp.account)
+            .group_by(models.UserOwnedApp.account)
+            .having(func.count() >= args.refs)
+            .limit(args.users)
+        ).all()
+        clients = {
+            user_id: list(
+                db.session.scalars(
+                    select(models.UserOwnedApp.app_id)
+                    .filter_by(account=user_id)
+                    .limit(args.refs)
+                )
+            )
+            for user_id in user_ids
+        }
+    if not clients:
+        raise SystemExit(f"No users own {args.refs} apps in the replica database")
+
+    ownership._forget(set(clients))
+    for name, check in (
+        ("per-app", _per_app),
+        ("batched", _batched),
+        ("cached", _cached),
+    ):
+        print(f"{name:8}: {_summary(_run(check, clients, args.rounds))}")
+
+
+if __name__ == "__main__":
+    main()
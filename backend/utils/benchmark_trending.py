@@ -0,0 +1,82 @@
+"""Compare per-app Decimal trending scores with the vectorized batch.
+
+Builds a synthetic 21-day installs matrix shaped like the one
+``DailyInstalls.window`` returns during ``stats.update`` and scores it once
+per app with ``calculate_trending_score``, then in one call to
+``calculate_trending_scores``. The per-app loop includes the list
+conversion of each row, as the update used to do.
+
+Usage: python -m utils.benchmark_trending [--apps N] [--repeat N]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.trending import calculate_trending_score, calculate_trending_scores
+
+
+def _synthetic_inputs(apps: int, seed: int):
+    rng = np.random.default_rng(seed)
+    scale = rng.choice([1, 10, 100, 10_000], size=(apps, 1))
+    histories = rng.integers(0, 20, size=(apps, 21)) * scale
+    return (
+        histories,
+        rng.random(apps),
+        rng.integers(0, 6, size=apps),
+        rng.random(apps) < 0.05,
+    )
+
+
+def _per_app(histories, ratios, icons, eol) -> np.ndarray:
+    return np.array(
+        [
+            calculate_trending_score(
+                installs_over_days=history,
+                quality_passed_ratio=ratio,
+                icon_quality_bonus=icon,
+                is_eol=is_eol,
+            )
+            for history, ratio, icon, is_eol in zip(
+                histories.tolist(),
+                ratios.tolist(),
+                icons.tolist(),
+                eol.tolist(),
+                strict=True,
+            )
+        ]
+    )
+
+
+def _best_of(repeat: int, func, *args) -> tuple[float, np.ndarray]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--apps", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    inputs = _synthetic_inputs(args.apps, args.seed)
+    per_app_time, expected = _best_of(args.repeat, _per_app, *inputs)
+    batch_time, scores = _best_of(args.repeat, calculate_trending_scores, *inputs)
+
+    print(f"{args.apps} apps, best of {args.repeat}")
+    print(f"  per app (Decimal): {per_app_time * 1000:10.1f} ms")
+    print(
+        f"  batch (float64):   {batch_time * 1000:10.1f} ms"
+        f"  ({per_app_time / batch_time:.0f}x faster)"
+    )
+    print(f"  max abs difference: {np.max(np.abs(scores - expected), initial=0.0):.3g}")
+
+
+if __name__ == "__main__":
+    main()
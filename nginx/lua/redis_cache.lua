@@ -2,10 +2,15 @@ local redis = require "resty.redis"
 local http = require "resty.http"
 local cjson = require "cjson.safe"
 
-cjson.encode_empty_table_as_object(false)
-
 local _M = {}
 
+-- Written by the backend on startup, see backend/app/cache_manifest.py
+local MANIFEST_KEY = "cache:manifest"
+local MANIFEST_VERSION = 1
+local MANIFEST_REFRESH_INTERVAL = 60
+
+local manifest_cache = {manifest = nil, loaded_at = 0}
+
 local function get_redis_host()
     return os.getenv("REDIS_HOST") or "redis"
 end
@@ -14,39 +19,6 @@ local function get_redis_port()
     return tonumber(os.getenv("REDIS_PORT")) or 6379
 end
 
-local function encode_sorted_json(tbl)
-    if type(tbl) ~= "table" then
-        return cjson.encode(tbl)
-    end
-
-    local keys = {}
-    for k in pairs(tbl) do
-        table.insert(keys, k)
-    end
-    table.sort(keys)
-
-    local sorted_parts = {}
-    table.insert(sorted_parts, "{")
-
-    for i, key in ipairs(keys) do
-        if i > 1 then
-            table.insert(sorted_parts, ",")
-        end
-
-        table.insert(sorted_parts, '"' .. key .. '":')
-
-        local value = tbl[key]
-        if type(value) == "table" then
-            table.insert(sorted_parts, encode_sorted_json(value))
-        else
-            table.insert(sorted_parts, cjson.encode(value))
-        end
-    end
-
-    table.insert(sorted_parts, "}")
-    return table.concat(sorted_parts)
-end
-
 local function connect_redis()
     local red = redis:new()
     red:set_timeout(1000)
@@ -67,209 +39,274 @@ local function set_keepalive(red)
     end
 end
 
-local function add_pagination(params, args)
-    if args.page and args.per_page then
-        params.page = tonumber(args.page)
-        params.per_page = tonumber(args.per_page)
-    else
-        params.page = cjson.null
-        params.per_page = cjson.null
+local function load_manifest(red)
+    local now = ngx.now()
+    if now - manifest_cache.loaded_at < MANIFEST_REFRESH_INTERVAL then
+        return manifest_cache.manifest
+    end
+    manifest_cache.loaded_at = now
+
+    local raw, err = red:get(MANIFEST_KEY)
+    if not raw or raw == ngx.null then
+        if err then
+            ngx.log(ngx.ERR, "Failed to read the cache manifest: ", err)
+        end
+        return manifest_cache.manifest
     end
+
+    local manifest = cjson.decode(raw)
+    if type(manifest) ~= "table" or manifest.version ~= MANIFEST_VERSION then
+        ngx.log(ngx.ERR, "Ignoring cache manifest of unknown version")
+        return manifest_cache.manifest
+    end
+
+    manifest_cache.manifest = manifest
+    return manifest
 end
 
-local function add_locale(params, args)
-    params.locale = args.locale or "en"
+-- Strings are escaped the way orjson escapes them, so keys hash the same
+local escapes = {
+    ['"'] = '\\"', ["\\"] = "\\\\", ["\b"] = "\\b", ["\f"] = "\\f",
+    ["\n"] = "\\n", ["\r"] = "\\r", ["\t"] = "\\t",
+}
+
+local function encode_string(value)
+    local escaped = value:gsub('[%z\1-\31"\\]', function(char)
+        return escapes[char] or string.format("\\u%04x", string.byte(char))
+    end)
+    return '"' .. escaped .. '"'
 end
 
-local function add_optional(params, args, key)
-    if args[key] then
-        params[key] = args[key]
-    else
-        params[key] = cjson.null
+local function encode_scalar(value)
+    if value == nil or value == cjson.null then
+        return "null"
+    elseif type(value) == "boolean" then
+        return value and "true" or "false"
+    elseif type(value) == "number" then
+        return string.format("%d", value)
     end
+    return encode_string(value)
 end
 
-local routes = {
-    {"^/api/v2/eol/rebase$", "get_eol_rebase", function(match, args)
-        return {}
-    end},
-    {"^/api/v2/eol/rebase/([^/]+)$", "get_eol_rebase_appid", function(match, args)
-        return {app_id = match[1], branch = args.branch or "stable"}
-    end},
-    {"^/api/v2/eol/message$", "get_eol_message", function(match, args)
-        return {}
-    end},
-    {"^/api/v2/eol/message/([^/]+)$", "get_eol_message_appid", function(match, args)
-        return {app_id = match[1], branch = args.branch or "stable"}
-    end},
-    {"^/api/v2/appstream$", "list_appstream", function(match, args)
-        return {filter = args.filter or "apps", sort = args.sort or "alphabetical"}
-    end},
-    {"^/api/v2/appstream/([^/]+)$", "get_appstream", function(match, args)
-        return {app_id = match[1], locale = args.locale or "en"}
-    end},
-    {"^/api/v2/summary/([^/]+)$", "get_summary", function(match, args)
-        return {
-            app_id = match[1],
-            branch = args.branch or cjson.null
-        }
-    end},
-    {"^/api/v2/verification/([^/]+)/status$", "get_verification_status", function(match, args)
-        return {app_id = match[1]}
-    end},
-    {"^/api/v2/is%-fullscreen%-app/([^/]+)$", "get_isFullscreenApp", function(match, args)
-        return {app_id = match[1]}
-    end},
-    {"^/api/v2/addon/([^/]+)$", "get_addons", function(match, args)
-        return {app_id = match[1]}
-    end},
-    {"^/api/v2/stats$", "get_stats", function(match, args)
-        return {}
-    end},
-    {"^/api/v2/stats/([^/]+)$", "get_stats_for_app", function(match, args)
-        local params = {app_id = match[1]}
-
-        if args.all then
-            if args.all == "true" or args.all == "True" then
-                params.all = true
-            else
-                params.all = false
+local function encode_value(value, param)
+    if param.type ~= "array" or value == nil or value == cjson.null then
+        return encode_scalar(value)
+    end
+
+    local items = {}
+    for i, item in ipairs(value) do
+        items[i] = encode_scalar(item)
+    end
+    return "[" .. table.concat(items, ",") .. "]"
+end
+
+local booleans = {
+    ["true"] = true, ["1"] = true, yes = true, on = true, t = true, y = true,
+    ["false"] = false, ["0"] = false, no = false, off = false, f = false, n = false,
+}
+
+-- Mirrors FastAPI's validation; nil means the backend would reject the value
+-- or coerce it differently, so the request is passed through
+local function coerce(value, kind)
+    if kind == "integer" then
+        if not value:match("^%s*[+-]?%d+%s*$") then
+            return nil
+        end
+        return tonumber(value)
+    elseif kind == "boolean" then
+        return booleans[value:lower()]
+    end
+    return value
+end
+
+local function param_value(param, captures, args)
+    local value
+    if param["in"] == "path" then
+        value = captures[param.alias]
+    else
+        value = args[param.alias]
+        if value == true then
+            value = ""
+        end
+    end
+
+    if value == nil then
+        if param.required then
+            return nil
+        end
+        return param.default
+    end
+
+    if param.type == "array" then
+        if type(value) ~= "table" then
+            value = {value}
+        end
+        local items = {}
+        for i, item in ipairs(value) do
+            if item == true then
+                item = ""
+            end
+            items[i] = coerce(item, param.items)
+            if items[i] == nil then
+                return nil
             end
-        else
-            params.all = false
         end
+        return items
+    end
 
-        if args.days then
-            params.days = tonumber(args.days) or 180
-        else
-            params.days = 180
+    -- Repeated scalar parameters take the last value, as in FastAPI
+    if type(value) == "table" then
+        value = value[#value]
+    end
+    return coerce(value, param.type)
+end
+
+-- Builds the key of backend/app/cache.py's _make_cache_key: the MD5 of the
+-- sorted JSON of the function name and all of its arguments
+local function build_cache_key(manifest, route, captures, args)
+    local params = {}
+    for _, param in ipairs(route.params) do
+        local value = param_value(param, captures, args)
+        if value == nil then
+            return nil
         end
+        table.insert(params, {param = param, value = value})
+    end
+    table.sort(params, function(a, b)
+        return a.param.name < b.param.name
+    end)
 
-        return params
-    end},
-    {"^/api/v2/app%-picks/app%-of%-the%-day/([^/]+)$", "get_app_of_the_day", function(match, args)
-        return {date = match[1]}
-    end},
-    {"^/api/v2/app%-picks/apps%-of%-the%-week/([^/]+)$", "get_app_of_the_week", function(match, args)
-        return {date = match[1]}
-    end},
-    {"^/api/v2/collection/category$", "get_categories", function(match, args)
-        return {}
-    end},
-    {"^/api/v2/collection/category/([^/]+)$", "get_category", function(match, args)
-        local params = {category = match[1]}
-        add_locale(params, args)
-        add_pagination(params, args)
-        add_optional(params, args, "exclude_subcategories")
-        add_optional(params, args, "sort_by")
-        return params
-    end},
-    {"^/api/v2/collection/category/([^/]+)/subcategories$", "get_subcategory", function(match, args)
-        local params = {category = match[1]}
-        add_locale(params, args)
-        add_pagination(params, args)
-        add_optional(params, args, "subcategory")
-        add_optional(params, args, "exclude_subcategories")
-        add_optional(params, args, "sort_by")
-        return params
-    end},
-    {"^/api/v2/collection/keyword$", "get_keyword", function(match, args)
-        local params = {keyword = args.keyword}
-        add_locale(params, args)
-        add_pagination(params, args)
-        return params
-    end},
-    {"^/api/v2/collection/developer$", "get_developers", function(match, args)
-        local params = {}
-        add_pagination(params, args)
-        return params
-    end},
-    {"^/api/v2/collection/developer/(.+)$", "get_developer", function(match, args)
-        local params = {developer = match[1]}
-        add_locale(params, args)
-        add_pagination(params, args)
-        return params
-    end},
-    {"^/api/v2/collection/recently%-updated$", "get_recently_updated", function(match, args)
-        local params = {}
-        add_locale(params, args)
-        add_pagination(params, args)
-        return params
-    end},
-    {"^/api/v2/collection/recently%-added$", "get_recently_added", function(match, args)
-        local params = {}
-        add_locale(params, args)
-        add_pagination(params, args)
-        return params
-    end},
-    {"^/api/v2/collection/verified$", "get_verified", function(match, args)
-        local params = {}
-        add_locale(params, args)
-        add_pagination(params, args)
-        return params
-    end},
-    {"^/api/v2/collection/mobile$", "get_mobile", function(match, args)
-        local params = {}
-        add_locale(params, args)
-        add_pagination(params, args)
-        return params
-    end},
-    {"^/api/v2/collection/popular$", "get_popular_last_month", function(match, args)
-        local params = {}
-        add_locale(params, args)
-        add_pagination(params, args)
-        return params
-    end},
-    {"^/api/v2/collection/trending$", "get_trending_last_two_weeks", function(match, args)
-        local params = {}
-        add_locale(params, args)
-        add_pagination(params, args)
-        return params
-    end},
-    {"^/api/v2/collection/favorites$", "get_most_favorited", function(match, args)
-        local params = {}
-        add_locale(params, args)
-        add_pagination(params, args)
-        return params
-    end},
-}
+    local kwargs = {}
+    for i, entry in ipairs(params) do
+        kwargs[i] = encode_string(entry.param.name) .. ":" .. encode_value(entry.value, entry.param)
+    end
+
+    local key_data = '{"func":' .. encode_string(route.func)
+        .. ',"kwargs":{' .. table.concat(kwargs, ",") .. "}}"
+    return manifest.key_prefix .. route.func .. ":" .. ngx.md5(key_data)
+end
+
+-- Routes are tried in the backend's order; the first match decides, even if
+-- it is not cached. Only routes whose entries hold the exact response body
+-- (raw=True in the backend) carry a func.
+local function match_route(manifest, uri)
+    local root_path = manifest.root_path or ""
+    if uri:sub(1, #root_path) ~= root_path then
+        return nil
+    end
+    local path = uri:sub(#root_path + 1)
 
-local function build_cache_key(uri, args)
-    for _, route in ipairs(routes) do
-        local pattern, func_name, param_builder = route[1], route[2], route[3]
-        local matches = {string.match(uri, pattern)}
-
-        if #matches > 0 or uri:match(pattern) then
-            local kwargs = param_builder(matches, args)
-            local key_data = {func = func_name, kwargs = kwargs}
-            local json_str = encode_sorted_json(key_data)
-            local key_hash = ngx.md5(json_str)
-            return "cache:endpoint:" .. func_name .. ":" .. key_hash
+    for _, route in ipairs(manifest.routes) do
+        local captures = ngx.re.match(path, route.regex, "jo")
+        if captures then
+            if route.func then
+                return route, captures
+            end
+            return nil
         end
     end
 
     return nil
 end
 
-local function get_from_cache(red, cache_key)
-    local cached_value, err = red:get(cache_key)
+local function accepts_gzip()
+    local accept_encoding = ngx.var.http_accept_encoding
+    return accept_encoding ~= nil and accept_encoding:find("gzip", 1, true) ~= nil
+end
 
-    if not cached_value or cached_value == ngx.null then
-        return nil
+local function get_from_cache(red, manifest, cache_key, gzip)
+    local fields = {}
+    for i, field in ipairs(manifest.entry_fields) do
+        fields[i] = field
+    end
+    -- The body is the last field; ask for the compressed copy instead
+    if gzip then
+        fields[#fields] = manifest.gzip_field
     end
 
-    if err then
+    red:init_pipeline()
+    red:hmget(cache_key, unpack(fields))
+    red:get(manifest.generation_key)
+    local res, err = red:commit_pipeline()
+    if not res then
         ngx.log(ngx.ERR, "Redis get error: ", err)
         return nil
     end
 
-    local cache_data, decode_err = cjson.decode(cached_value)
-    if decode_err then
-        ngx.log(ngx.ERR, "JSON decode error: ", decode_err)
+    -- Errors (e.g. WRONGTYPE for entries in an older layout) count as misses
+    local values, generation = res[1], res[2]
+    if type(values) ~= "table" or values[1] == false then
         return nil
     end
 
-    return cache_data
+    local entry = {}
+    for i, field in ipairs(manifest.entry_fields) do
+        local value = values[i]
+        if value ~= ngx.null then
+            entry[field] = value
+        end
+    end
+
+    if gzip then
+        if entry.body then
+            entry.content_encoding = "gzip"
+        else
+            -- Small bodies are stored uncompressed only
+            local body = red:hget(cache_key, "body")
+            if body and body ~= ngx.null then
+                entry.body = body
+            end
+        end
+    end
+
+    if not entry.body or not entry.etag then
+        return nil
+    end
+
+    entry.created_at = tonumber(entry.created_at)
+    entry.is_stale = entry.is_stale == "1"
+
+    -- Entries written before the last cache:generation bump are stale
+    generation = tonumber(generation)
+    if generation and (tonumber(entry.generation) or 0) < generation then
+        entry.is_stale = true
+    end
+
+    return entry
+end
+
+local function is_stale(manifest, route, entry)
+    if entry.is_stale then
+        return true
+    end
+    if entry.created_at then
+        return ngx.now() - entry.created_at > route.ttl * manifest.stale_threshold
+    end
+    return false
+end
+
+local function etag_matches(if_none_match, etag)
+    for candidate in string.gmatch(if_none_match, "[^,]+") do
+        candidate = candidate:match("^%s*(.-)%s*$")
+        if candidate == "*" then
+            return true
+        end
+        candidate = candidate:gsub("^W/", ""):gsub('"', "")
+        if candidate == etag then
+            return true
+        end
+    end
+    return false
+end
+
+local function send_validators(entry)
+    ngx.header["ETag"] = '"' .. entry.etag .. '"'
+    if entry.created_at then
+        ngx.header["Last-Modified"] = ngx.http_time(math.floor(entry.created_at))
+    end
+
+    local if_none_match = ngx.var.http_if_none_match
+    return if_none_match ~= nil and etag_matches(if_none_match, entry.etag)
 end
 
 local function async_refresh(uri, args)
@@ -297,32 +334,51 @@ function _M.try_cache()
         return
     end
 
-    local cache_key = build_cache_key(ngx.var.uri, ngx.req.get_uri_args())
+    local manifest = load_manifest(red)
+    if not manifest then
+        set_keepalive(red)
+        return
+    end
+
+    local args = ngx.req.get_uri_args()
+    local route, captures = match_route(manifest, ngx.var.uri)
+    local cache_key = route and build_cache_key(manifest, route, captures, args)
     if not cache_key then
         set_keepalive(red)
         return
     end
 
-    local cached_data = get_from_cache(red, cache_key)
+    local entry = get_from_cache(red, manifest, cache_key, accepts_gzip())
     set_keepalive(red)
 
-    if cached_data and cached_data.value ~= nil and cached_data.value ~= cjson.null then
-        ngx.header["Content-Type"] = "application/json"
+    if not entry then
+        return
+    end
 
-        if cached_data.is_stale then
-            ngx.header["X-Cache-Status"] = "STALE"
-            local uri = ngx.var.uri
-            local args = ngx.req.get_uri_args()
-            ngx.timer.at(0, function()
-                async_refresh(uri, args)
-            end)
-        else
-            ngx.header["X-Cache-Status"] = "HIT"
-        end
+    ngx.header["Content-Type"] = "application/json"
+    ngx.header["Vary"] = "Accept-Encoding"
+
+    if is_stale(manifest, route, entry) then
+        ngx.header["X-Cache-Status"] = "STALE"
+        local uri = ngx.var.uri
+        ngx.timer.at(0, function()
+            async_refresh(uri, args)
+        end)
+    else
+        ngx.header["X-Cache-Status"] = "HIT"
+    end
+
+    if send_validators(entry) then
+        ngx.exit(ngx.HTTP_NOT_MODIFIED)
+    end
 
-        ngx.say(cjson.encode(cached_data.value))
-        ngx.exit(ngx.HTTP_OK)
+    -- The body is sent exactly as the backend stored it
+    if entry.content_encoding then
+        ngx.header["Content-Encoding"] = entry.content_encoding
     end
+    ngx.header["Content-Length"] = #entry.body
+    ngx.print(entry.body)
+    ngx.exit(ngx.HTTP_OK)
 end
 
 return _M